@@ -33,6 +33,8 @@ class Schedule(TypedDict):
     is_skip_requested: bool
     current_item_id: str
     item_number: int
+    # where an interrupted run stopped, recovered from the schedule journal
+    resume: NotRequired[dict[str, Any]]
 
 
 class AbstractDevice(ABC):
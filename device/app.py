@@ -250,17 +250,17 @@ class DeviceMain:
                 4700,
                 dev["device_num"],
             )
-            # Don't start the imaging or log collector if this is a simulator
+            # The simulator serves imaging on 4800 too, but has no log collector
             simulator = dev.get("simulator", False)
+            telescope.start_seestar_imaging(
+                logger,
+                dev["name"],
+                dev["ip_address"],
+                4800,
+                dev["device_num"],
+                controller,
+            )
             if not simulator:
-                telescope.start_seestar_imaging(
-                    logger,
-                    dev["name"],
-                    dev["ip_address"],
-                    4800,
-                    dev["device_num"],
-                    controller,
-                )
                 telescope.start_seestar_logcollector(
                     logger,
                     dev["name"],
@@ -307,6 +307,7 @@ class DeviceMain:
             f"/management/v{API_VERSION}/configureddevices",
             management.configureddevices(),
         )
+        falc_app.add_route("/metrics", management.metrics())
         falc_app.add_route("/setup", setup.svrsetup())
         falc_app.add_route(
             f"/setup/v{API_VERSION}/rotator/{{devnum}}/setup", setup.devsetup()
@@ -110,6 +110,8 @@ class _Config:
         self.ip_address: str = self.get_toml("network", "ip_address", "127.0.0.1")
         self.port: int = self.get_toml("network", "port", 5555)
         self.imgport: int = self.get_toml("network", "imgport", 7556)
+        # Video, live status and eventstatus streams each hold an imaging thread
+        self.imager_threads: int = self.get_toml("network", "imager_threads", 32)
         self.stport: int = self.get_toml("network", "stport", 8090)
         self.sthost: str = self.get_toml("network", "sthost", "localhost")
         self.timeout: int = self.get_toml("network", "timeout", 5)
@@ -150,6 +152,17 @@ class _Config:
         self.verbose_driver_exceptions: bool = self.get_toml(
             "server", "verbose_driver_exceptions", True
         )
+        self.watchdog_enabled: bool = self.get_toml("server", "watchdog_enabled", True)
+        self.watchdog_interval_s: float = self.get_toml(
+            "server", "watchdog_interval_s", 5.0
+        )
+        self.watchdog_stall_factor: float = self.get_toml(
+            "server", "watchdog_stall_factor", 3.0
+        )
+        self.watchdog_reconnect: bool = self.get_toml(
+            "server", "watchdog_reconnect", False
+        )
+        self.watchdog_systemd: bool = self.get_toml("server", "watchdog_systemd", False)
 
         # --------------
         # Device Section
@@ -158,6 +171,36 @@ class _Config:
         self.step_size: float = self.get_toml("device", "step_size", 1.0)
         self.steps_per_sec: int = self.get_toml("device", "steps_per_sec", 6)
         self.verify_injection: bool = self.get_toml("device", "verify_injection", True)
+        # Seconds a federation (device 0) action waits for every scope to reply
+        self.federation_timeout: float = self.get_toml(
+            "device", "federation_timeout", 12.0
+        )
+        self.jnow_equinox_interval_s: float = self.get_toml(
+            "device", "jnow_equinox_interval_s", 3600.0
+        )
+        # Local horizon (CSV profile, Stellarium PNG or landscape.ini); "" for none
+        self.horizon_mask_file: str = self.get_toml("device", "horizon_mask_file", "")
+        self.horizon_mask_rotation: float = self.get_toml(
+            "device", "horizon_mask_rotation", 0.0
+        )
+        self.horizon_mask_margin: float = self.get_toml(
+            "device", "horizon_mask_margin", 2.0
+        )
+        self.horizon_mask_max_wait_min: int = self.get_toml(
+            "device", "horizon_mask_max_wait_min", 60
+        )
+        # Where learned operation durations are kept between runs; "" keeps them in memory
+        self.operation_stats_dir: str = self.get_toml(
+            "device", "operation_stats_dir", ""
+        )
+        # Where each device journals its schedule to survive restarts; "" turns it off
+        self.schedule_journal_dir: str = self.get_toml(
+            "device", "schedule_journal_dir", ""
+        )
+        # Memory each device may use for its telemetry history
+        self.telemetry_budget_kb: int = self.get_toml(
+            "device", "telemetry_budget_kb", 512
+        )
         if "seestars" in self._dict:
             self.seestars = self._dict["seestars"]
         else:
@@ -193,6 +236,11 @@ class _Config:
         self.log_events_in_info: bool = self.get_toml(
             "logging", "log_events_in_info", False
         )
+        self.log_queue_size: int = self.get_toml("logging", "log_queue_size", 10000)
+        self.log_rate_limited_events: list = self.get_toml(
+            "logging", "log_rate_limited_events", ["ScopeTrack", "PiStatus"]
+        )
+        self.log_rate_limit_s: float = self.get_toml("logging", "log_rate_limit_s", 10)
 
         # ---------------
         # seestar_initialization Section
@@ -284,6 +332,7 @@ class _Config:
         self.set_toml("network", "ip_address", req.media["ip_address"])
         self.set_toml("network", "port", int(req.media["port"]))
         self.set_toml("network", "imgport", int(req.media["imgport"]))
+        self.set_toml("network", "imager_threads", int(req.media["imager_threads"]))
         self.set_toml("network", "stport", int(req.media["stport"]))
         self.set_toml("network", "sthost", req.media["sthost"])
         self.set_toml("network", "timeout", int(req.media["timeout"]))
@@ -310,11 +359,37 @@ class _Config:
             "verbose_driver_exceptions",
             "verbose_driver_exceptions" in req.media,
         )
+        self.set_toml("server", "watchdog_enabled", "watchdog_enabled" in req.media)
+        self.set_toml("server", "watchdog_reconnect", "watchdog_reconnect" in req.media)
 
         # device
         self.set_toml("device", "can_reverse", "can_reverse" in req.media)
         self.set_toml("device", "step_size", float(req.media["step_size"]))
         self.set_toml("device", "steps_per_sec", int(req.media["steps_per_sec"]))
+        self.set_toml(
+            "device", "federation_timeout", float(req.media["federation_timeout"])
+        )
+        self.set_toml("device", "horizon_mask_file", req.media["horizon_mask_file"])
+        self.set_toml(
+            "device",
+            "horizon_mask_rotation",
+            float(req.media["horizon_mask_rotation"]),
+        )
+        self.set_toml(
+            "device", "horizon_mask_margin", float(req.media["horizon_mask_margin"])
+        )
+        self.set_toml(
+            "device",
+            "horizon_mask_max_wait_min",
+            int(req.media["horizon_mask_max_wait_min"]),
+        )
+        self.set_toml(
+            "device", "schedule_journal_dir", req.media["schedule_journal_dir"]
+        )
+        self.set_toml("device", "operation_stats_dir", req.media["operation_stats_dir"])
+        self.set_toml(
+            "device", "telemetry_budget_kb", int(req.media["telemetry_budget_kb"])
+        )
 
         # logging
         self.set_toml("logging", "log_level", req.media["log_level"])
@@ -325,6 +400,9 @@ class _Config:
         self.set_toml(
             "logging", "log_events_in_info", "log_events_in_info" in req.media
         )
+        self.set_toml(
+            "logging", "log_rate_limit_s", float(req.media["log_rate_limit_s"])
+        )
 
         # seestar_initialization
         self.set_toml(
@@ -620,6 +698,13 @@ class _Config:
                     "Imaging API port (this should not need to be changed except in extreme cases) default 7556",
                     required=True,
                 )
+                + self.render_text(
+                    "imager_threads",
+                    "IMG threads:",
+                    self.imager_threads,
+                    "Requests the imaging API serves at once. Every open video, live status or event status view holds one. Takes effect after a restart, default 32",
+                    required=True,
+                )
                 + self.render_text(
                     "sthost",
                     "Stellarium host:",
@@ -735,6 +820,18 @@ class _Config:
                     "Verbose driver exceptions:",
                     self.verbose_driver_exceptions,
                     "Give more information upon driver errors",
+                )
+                + self.render_checkbox(
+                    "watchdog_enabled",
+                    "Thread watchdog:",
+                    self.watchdog_enabled,
+                    "Watch the device connection threads and log the stack of any that stall",
+                )
+                + self.render_checkbox(
+                    "watchdog_reconnect",
+                    "Reconnect stalled devices:",
+                    self.watchdog_reconnect,
+                    "Drop and reopen a device connection whose thread the watchdog finds stalled",
                 ),
             )
             + self.render_config_section(
@@ -753,6 +850,54 @@ class _Config:
                     "Steps per second:",
                     self.steps_per_sec,
                     "Not used at this time",
+                )
+                + self.render_text(
+                    "federation_timeout",
+                    "Federation timeout:",
+                    self.federation_timeout,
+                    "Seconds a federation (device 0) action waits for every scope to reply, default 12",
+                )
+                + self.render_text(
+                    "horizon_mask_file",
+                    "Horizon mask file:",
+                    self.horizon_mask_file,
+                    "Local horizon as a CSV azimuth/altitude profile, a Stellarium PNG or landscape.ini (leave blank for none)",
+                )
+                + self.render_text(
+                    "horizon_mask_rotation",
+                    "Horizon mask rotation:",
+                    self.horizon_mask_rotation,
+                    "Azimuth in degrees of the left edge of a landscape PNG, default 0",
+                )
+                + self.render_text(
+                    "horizon_mask_margin",
+                    "Horizon mask margin:",
+                    self.horizon_mask_margin,
+                    "Degrees a target must clear the horizon mask by, default 2",
+                )
+                + self.render_text(
+                    "horizon_mask_max_wait_min",
+                    "Horizon mask max wait:",
+                    self.horizon_mask_max_wait_min,
+                    "Minutes the scheduler waits for a target to clear the horizon mask before skipping it, default 60",
+                )
+                + self.render_text(
+                    "schedule_journal_dir",
+                    "Schedule journal directory:",
+                    self.schedule_journal_dir,
+                    "Where each device journals its schedule so it resumes after a restart (leave blank to turn off)",
+                )
+                + self.render_text(
+                    "operation_stats_dir",
+                    "Operation stats directory:",
+                    self.operation_stats_dir,
+                    "Where learned goto, focus and plate solve durations are kept between runs (leave blank to keep them in memory)",
+                )
+                + self.render_text(
+                    "telemetry_budget_kb",
+                    "Telemetry memory (KB):",
+                    self.telemetry_budget_kb,
+                    "Memory each device may use for its battery, temperature and stacking history, default 512",
                 ),
             )
             + self.render_config_section(
@@ -793,6 +938,12 @@ class _Config:
                     "Log events in INFO:",
                     self.log_events_in_info,
                     "Log INFO events",
+                )
+                + self.render_text(
+                    "log_rate_limit_s",
+                    "Log rate limit seconds:",
+                    self.log_rate_limit_s,
+                    "Frequent events such as ScopeTrack and PiStatus are logged at most once in this many seconds",
                 ),
             )
             + self.render_config_section(
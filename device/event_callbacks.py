@@ -3,6 +3,9 @@ import subprocess
 from abc import ABC, abstractmethod
 
 from device.config import Config
+from device.operation_stats import OPERATION_EVENTS
+from device.scheduler_wakeup import WAKE_EVENTS
+from device.telemetry_store import TELEMETRY_FIELDS
 
 
 class EventCallback(ABC):
@@ -83,6 +86,58 @@ class BatteryWatch(EventCallback):
         #    self.logger.info(f"BatteryWatch Ignoring event {event_data}")
 
 
+class OperationTimer(EventCallback):
+    """
+    A callback class that records how long gotos, auto focus, plate solves,
+    dark libraries and polar alignments take, from the lapse_ms of their
+    final event, for the schedule timeline
+    """
+
+    def __init__(self, device, initial_state):
+        self.logger = device.logger
+        self.logger.info("OperationTimer - init")
+
+    def fireOnEvents(self):
+        return list(OPERATION_EVENTS)
+
+    def eventFired(self, device, event_data):
+        device.operation_stats.record_event(event_data)
+
+
+class TelemetryRecorder(EventCallback):
+    """
+    A callback class that keeps the battery, temperature, stack and focuser
+    readings of events in the device's telemetry history
+    """
+
+    def __init__(self, device, initial_state):
+        self.logger = device.logger
+        self.logger.info("TelemetryRecorder - init")
+
+    def fireOnEvents(self):
+        return list(TELEMETRY_FIELDS)
+
+    def eventFired(self, device, event_data):
+        device.telemetry.record_event(event_data)
+
+
+class SchedulerWaker(EventCallback):
+    """
+    A callback class that wakes the scheduler threads when a goto, focus
+    run, stack or other operation they may be waiting on reports progress
+    """
+
+    def __init__(self, device, initial_state):
+        self.logger = device.logger
+        self.logger.info("SchedulerWaker - init")
+
+    def fireOnEvents(self):
+        return list(WAKE_EVENTS)
+
+    def eventFired(self, device, event_data):
+        device.scheduler_wakeup.notify()
+
+
 class SensorTempWatch(EventCallback):
     """
     A callback class to watch the sensor temp, and take action if if changes more than a set value
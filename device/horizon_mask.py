@@ -0,0 +1,224 @@
+#
+# horizon_mask - the local horizon as an altitude per 0.1 degree of azimuth
+#
+# Trees, roofs and hills hide part of the sky. The mask is built once from a
+# Stellarium landscape (the PNG panorama or its landscape.ini) or from a CSV
+# profile of azimuth/altitude pairs, and stored as 3600 altitudes, so "is
+# this alt/az visible" is one array index and a target's track for the next
+# hours is checked in a single vectorized pass.
+#
+import configparser
+import csv
+import math
+import os
+import re
+import threading
+
+import numpy as np
+
+from device.altaz_kernel import altaz_track, julian_date
+from device.config import Config
+
+STEPS_PER_DEGREE = 10
+NUM_STEPS = 360 * STEPS_PER_DEGREE
+
+
+class HorizonMask:
+    """Altitude of the local horizon for every 0.1 degree of azimuth.
+
+    Azimuth runs from north through east. A point is visible when it is
+    higher than the mask at its azimuth plus ``margin`` degrees.
+    """
+
+    def __init__(self, altitudes, margin: float = 0.0):
+        altitudes = np.asarray(altitudes, dtype=float)
+        if altitudes.shape != (NUM_STEPS,):
+            raise ValueError(
+                f"expected {NUM_STEPS} altitudes, got {altitudes.shape[0]}"
+            )
+        self.altitudes = altitudes
+        self.margin = margin
+
+    @classmethod
+    def from_profile(cls, azimuths, altitudes, margin: float = 0.0):
+        """Interpolate (azimuth, altitude) points linearly around the circle."""
+        azimuths = np.asarray(azimuths, dtype=float) % 360.0
+        altitudes = np.asarray(altitudes, dtype=float)
+        keep = np.isfinite(azimuths) & np.isfinite(altitudes)
+        if not keep.any():
+            raise ValueError("horizon profile has no points")
+        grid = np.arange(NUM_STEPS) / STEPS_PER_DEGREE
+        return cls(
+            np.interp(grid, azimuths[keep], altitudes[keep], period=360.0), margin
+        )
+
+    @classmethod
+    def from_csv(cls, path: str, margin: float = 0.0):
+        """Read azimuth,altitude rows (commas or whitespace; other lines are
+        skipped), which also covers Stellarium's polygonal horizon.txt."""
+        azimuths, altitudes = [], []
+        with open(path, newline="") as f:
+            for row in csv.reader(f):
+                fields = re.split(r"[\s,;]+", ",".join(row).strip())
+                try:
+                    azimuth, altitude = float(fields[0]), float(fields[1])
+                except (IndexError, ValueError):
+                    continue
+                azimuths.append(azimuth)
+                altitudes.append(altitude)
+        return cls.from_profile(azimuths, altitudes, margin)
+
+    @classmethod
+    def from_landscape(
+        cls,
+        path: str,
+        rotation: float = 0.0,
+        transparent: bool = False,
+        margin: float = 0.0,
+    ):
+        """Trace the skyline of a Stellarium panorama.
+
+        The image spans 360 degrees of azimuth left to right with the
+        horizon across its middle row; the sky is transparent. rotation is
+        the azimuth of the left edge. With transparent set the first
+        transparent pixel from the top is traced instead of the first
+        opaque one.
+        """
+        from PIL import Image
+
+        with Image.open(path) as image:
+            alpha = np.asarray(image.convert("RGBA"))[:, :, 3]
+        # the first column of some panoramas is garbage
+        alpha = alpha.copy()
+        alpha[:, 0] = alpha[:, 1]
+        height, width = alpha.shape
+        edge = (alpha == 0) if transparent else (alpha > 0)
+        found = edge.any(axis=0)
+        rows = np.argmax(edge, axis=0)
+        altitudes = np.where(found, (height / 2 - rows) * 90.0 / (height / 2), -90.0)
+        azimuths = np.arange(width) * 360.0 / width + rotation
+        return cls.from_profile(azimuths, altitudes, margin)
+
+    @classmethod
+    def load(cls, path: str, rotation: float = 0.0, margin: float = 0.0):
+        """A mask from a CSV/TXT profile, a PNG panorama or a landscape.ini."""
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".ini":
+            parser = configparser.ConfigParser()
+            parser.read(path)
+            landscape = parser["landscape"]
+            folder = os.path.dirname(path)
+            if "polygonal_horizon_list" in landscape:
+                return cls.from_csv(
+                    os.path.join(folder, landscape["polygonal_horizon_list"]), margin
+                )
+            return cls.from_landscape(
+                os.path.join(folder, landscape["maptex"]), rotation, margin=margin
+            )
+        if extension in (".png", ".jpg", ".jpeg", ".tif", ".tiff"):
+            return cls.from_landscape(path, rotation, margin=margin)
+        return cls.from_csv(path, margin)
+
+    def altitude_at(self, azimuth):
+        """Mask altitude at azimuth (degrees, scalar or array)."""
+        index = np.rint(np.asarray(azimuth, dtype=float) * STEPS_PER_DEGREE)
+        return self.altitudes[index.astype(int) % NUM_STEPS]
+
+    def is_visible(self, altitude, azimuth):
+        """Whether alt/az (scalars or arrays) clear the mask."""
+        return np.asarray(altitude) > self.altitude_at(azimuth) + self.margin
+
+    def track(
+        self,
+        ra_hours,
+        dec_degrees,
+        latitude: float,
+        longitude: float,
+        when=None,
+        minutes: int = 720,
+        step_minutes: float = 1.0,
+        j2000: bool = False,
+    ):
+        """Visibility of targets every step_minutes from when, (t,) or (n, t)."""
+        jd = (
+            julian_date(when)
+            + np.arange(0.0, minutes + step_minutes, step_minutes) / 1440.0
+        )
+        altitude, azimuth = altaz_track(
+            ra_hours, dec_degrees, latitude, longitude, jd, j2000, refraction=True
+        )
+        return self.is_visible(altitude, azimuth)
+
+    def visibility(
+        self,
+        ra_hours,
+        dec_degrees,
+        latitude: float,
+        longitude: float,
+        when=None,
+        minutes: int = 720,
+        step_minutes: float = 1.0,
+        j2000: bool = False,
+    ):
+        """(minutes until the target clears the mask, minutes until it sets
+        behind it), from one track.
+
+        The first is 0 if the target is visible now, the second 0 if it is
+        hidden now; either is inf if it does not happen within the window.
+        """
+        visible = self.track(
+            ra_hours,
+            dec_degrees,
+            latitude,
+            longitude,
+            when,
+            minutes,
+            step_minutes,
+            j2000,
+        )
+        return _first_minute(visible, step_minutes), _first_minute(
+            ~visible, step_minutes
+        )
+
+    def minutes_until_visible(self, *args, **kwargs):
+        """Minutes until the target clears the mask (see visibility)."""
+        return self.visibility(*args, **kwargs)[0]
+
+    def minutes_until_blocked(self, *args, **kwargs):
+        """Minutes until the target sets behind the mask (see visibility)."""
+        return self.visibility(*args, **kwargs)[1]
+
+
+def _first_minute(hits, step_minutes: float):
+    found = hits.any(axis=-1)
+    minutes = np.where(found, np.argmax(hits, axis=-1) * step_minutes, math.inf)
+    return float(minutes) if minutes.ndim == 0 else minutes
+
+
+_mask_lock = threading.Lock()
+_mask_cache: dict = {}
+
+
+def get_horizon_mask(logger=None):
+    """The mask configured in Config.horizon_mask_file, or None.
+
+    Loaded once per (file, rotation, margin); a file that cannot be read is
+    logged and treated as no mask.
+    """
+    path = Config.horizon_mask_file
+    if not path:
+        return None
+    key = (path, Config.horizon_mask_rotation, Config.horizon_mask_margin)
+    with _mask_lock:
+        if key not in _mask_cache:
+            try:
+                _mask_cache[key] = HorizonMask.load(
+                    path,
+                    rotation=Config.horizon_mask_rotation,
+                    margin=Config.horizon_mask_margin,
+                )
+            except Exception as e:
+                if logger is not None:
+                    logger.warning(f"Could not load horizon mask {path}: {e}")
+                _mask_cache[key] = None
+        return _mask_cache[key]
@@ -36,14 +36,108 @@
 # 15-Jan-2023   rbd 0.1 Documentation. No logic changes.
 # 08-Nov-2023   rbd 0.4 Log name is now 'alpyca'
 
+import atexit
 import logging
 import logging.handlers
+import queue
+import threading
 import time
 from device.config import Config
 
 global logger
 # logger: logging.Logger = None  # Master copy (root) of the logger
 logger = None  # Safe on Python 3.7 but no intellisense in VSCode etc.
+queue_handler = None  # Feeds the log writer thread
+log_writer = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the log writer thread without waiting on file I/O.
+
+    The queue is bounded. When the writer falls behind, new records are
+    dropped and counted rather than stalling the thread that logged them,
+    and a warning with the count is queued once there is room again.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def enqueue(self, record):
+        # Called from handle(), which holds the handler lock
+        try:
+            if self._unreported:
+                notice = logging.LogRecord(
+                    record.name,
+                    logging.WARNING,
+                    __file__,
+                    0,
+                    "Log writer fell behind, dropped %d records",
+                    (self._unreported,),
+                    None,
+                )
+                self.queue.put_nowait(self.prepare(notice))
+                self._unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+
+class EventRateLimitFilter(logging.Filter):
+    """Lets a noisy scope event through at most once per interval.
+
+    Records opt in by passing ``extra={"event": name, "device": device}``;
+    anything else passes untouched. Limits are kept per logger, device and
+    event, and the next record let through says how many were suppressed.
+    """
+
+    def __init__(self, events, interval):
+        super().__init__()
+        self.events = frozenset(events)
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        event = getattr(record, "event", None)
+        if event not in self.events or self.interval <= 0:
+            return True
+        key = (record.name, getattr(record, "device", None), event)
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and record.created - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last[key] = record.created
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar suppressed)"
+            record.args = None
+        return True
+
+
+class LogWriter(logging.handlers.QueueListener):
+    """The thread that formats queued records and writes them out."""
+
+    def start(self):
+        super().start()
+        self._thread.name = "LogWriter"
+
+
+def dropped_records() -> int:
+    """Records dropped because the log writer fell behind."""
+    return queue_handler.dropped if queue_handler is not None else 0
+
+
+def stop_logging():
+    """Write out whatever is still queued and stop the writer thread."""
+    global log_writer
+    if log_writer is not None:
+        log_writer.stop()
+        log_writer = None
 
 
 def init_logging():
@@ -62,12 +156,16 @@ def init_logging():
         of logs to keep, as well as the max size (at which point the log will be rotated).
         A new log is started each time the app is started.
 
+        Handlers don't run on the logging thread: records go onto a bounded queue
+        and the LogWriter thread formats and writes them. Noisy scope events can be
+        rate limited, see :py:class:`EventRateLimitFilter`.
+
     Returns:
         Customized Python logger.
 
     """
 
-    global logger
+    global logger, queue_handler, log_writer
 
     # Reinitializing the causes issues, so don't do it...
     if logger is None:
@@ -78,10 +176,9 @@ def init_logging():
             "%Y-%m-%dT%H:%M:%S",
         )
         formatter.converter = time.gmtime  # UTC time
-        logger.handlers[0].setFormatter(
-            formatter
-        )  # This is the stdout handler, level set above
-        # Add a logfile handler, same formatter and level
+        stdout_handler = logger.handlers[0]  # Created by logging.basicConfig()
+        stdout_handler.setFormatter(formatter)
+        # Add a logfile handler, same formatter
         handler = logging.handlers.RotatingFileHandler(
             Config.log_prefix + "alpyca.log",
             mode="w",
@@ -89,19 +186,31 @@ def init_logging():
             maxBytes=Config.max_size_mb * 1000000,
             backupCount=Config.num_keep_logs,
         )
-        handler.setLevel(Config.log_level)
         handler.setFormatter(formatter)
         handler.doRollover()  # Always start with fresh log
-        logger.addHandler(handler)
+        """
+            The stdout and file handlers are driven by the log writer
+            thread, so socket and web threads never wait on a write.
+            Levels are checked once, on the queue handler, which is
+            what reload and reinit_logging() adjust.
+        """
+        logger.removeHandler(stdout_handler)
+        output_handlers = [handler]
+        if Config.log_to_stdout:
+            output_handlers.insert(0, stdout_handler)
+        queue_handler = DroppingQueueHandler(queue.Queue(Config.log_queue_size))
+        queue_handler.setLevel(Config.log_level)
+        queue_handler.addFilter(
+            EventRateLimitFilter(
+                Config.log_rate_limited_events, Config.log_rate_limit_s
+            )
+        )
+        logger.addHandler(queue_handler)
+        log_writer = LogWriter(queue_handler.queue, *output_handlers)
+        log_writer.start()
+        atexit.register(stop_logging)
         if not Config.log_to_stdout:
-            """
-                This allows control of logging to stdout by simply
-                removing the stdout handler from the logger's
-                handler list. It's always handler[0] as created
-                by logging.basicConfig()
-            """
             logger.debug("Logging to stdout disabled in settings")
-            logger.removeHandler(logger.handlers[0])  # This is the stdout handler
     return logger
 
 
@@ -110,6 +219,10 @@ def reinit_logging():
     logger.setLevel(Config.log_level)
     for handler in logger.handlers:
         handler.setLevel(Config.log_level)
+        for log_filter in getattr(handler, "filters", []):
+            if isinstance(log_filter, EventRateLimitFilter):
+                log_filter.events = frozenset(Config.log_rate_limited_events)
+                log_filter.interval = Config.log_rate_limit_s
     return logger
 
 
@@ -47,6 +47,7 @@ import uuid
 from falcon import Request, Response
 from device.shr import PropertyResponse, DeviceMetadata
 from device.config import Config
+from device.metrics import CONTENT_TYPE, REGISTRY
 from logging import Logger
 
 # For each *type* of device served
@@ -99,3 +100,12 @@ class configureddevices:
             for dev in Config.seestars
         ]
         resp.text = PropertyResponse(confarray, req).json
+
+
+# -------
+# Metrics
+# -------
+class metrics:
+    def on_get(self, req: Request, resp: Response):
+        resp.content_type = CONTENT_TYPE
+        resp.text = REGISTRY.render()
@@ -0,0 +1,446 @@
+#
+# metrics - counters, gauges and histograms served on /metrics
+#
+# Instrumentation points on the device's hot paths (RPCs, scope events,
+# imaging frames, Alpaca actions, schedule items) update the metrics defined
+# at the bottom of this module. Updating one is a dict lookup and an addition
+# under a lock, so it costs about a microsecond even on a Pi. The registry
+# renders the Prometheus text format, which any Prometheus-compatible
+# scraper can collect.
+#
+import bisect
+import math
+import threading
+from abc import ABC, abstractmethod
+
+from device import log
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; RPCs, frame decodes and encodes, Alpaca actions
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# seconds; schedule items run from seconds to hours
+DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 14400)
+
+
+def _format_value(value) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = (
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class CounterValue:
+    __slots__ = ("value", "_function", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._function = None
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set_function(self, function) -> None:
+        """Read the value from function() whenever metrics are collected."""
+        self._function = function
+
+    def get(self) -> float:
+        if self._function is not None:
+            return self._function()
+        return self.value
+
+
+class GaugeValue(CounterValue):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # one more for the values above the last bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Metric(ABC):
+    """A named metric with one value per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_value(self):
+        pass
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} takes labels {self.labelnames}, got {values}"
+                )
+            with self._lock:
+                child = self._children.setdefault(values, self._new_value())
+        return child
+
+    def remove(self, *values) -> None:
+        with self._lock:
+            self._children.pop(values, None)
+
+    def _samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            yield self.name, values, (), child.get()
+
+    def render(self, lines: list) -> None:
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for name, values, extra, value in self._samples():
+            labels = _format_labels(
+                self.labelnames + tuple(n for n, _ in extra),
+                values + tuple(v for _, v in extra),
+            )
+            lines.append(f"{name}{labels} {_format_value(value)}")
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_value(self):
+        return CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def set_function(self, function) -> None:
+        self.labels().set_function(function)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_value(self):
+        return GaugeValue()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_value(self):
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            with child._lock:
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield (
+                    f"{self.name}_bucket",
+                    values,
+                    (("le", _format_value(bound)),),
+                    cumulative,
+                )
+            yield f"{self.name}_sum", values, (), total
+            yield f"{self.name}_count", values, (), count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, help, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif type(metric) is not cls:
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Gauge:
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(
+        self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                metric.render(lines)
+            except Exception as e:
+                # a gauge function that fails must not take /metrics down
+                lines.append(f"# {metric.name} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --------
+# Seestar
+# --------
+RPC_SECONDS = REGISTRY.histogram(
+    "alp_rpc_seconds",
+    "Time from sending a command to the scope to its reply arriving.",
+    ("device", "method"),
+)
+# the scope methods this server and its front end call. Others, e.g. typed
+# into a method_sync action, are counted as "unknown" so a client cannot grow
+# the metric without bound.
+RPC_METHODS = frozenset(
+    {
+        "begin_streaming",
+        "get_albums",
+        "get_app_setting",
+        "get_camera_exp_and_bin",
+        "get_camera_state",
+        "get_controls",
+        "get_device_state",
+        "get_disk_volume",
+        "get_focuser_position",
+        "get_image_save_path",
+        "get_img_name_field",
+        "get_last_solve_result",
+        "get_sensor_calibration",
+        "get_server_log",
+        "get_setting",
+        "get_solve_result",
+        "get_stack_info",
+        "get_stack_setting",
+        "get_stacked_img",
+        "get_test_setting",
+        "get_user_location",
+        "get_view_state",
+        "get_wheel_position",
+        "get_wheel_setting",
+        "get_wheel_state",
+        "iscope_get_app_state",
+        "iscope_start_stack",
+        "iscope_start_view",
+        "iscope_stop_view",
+        "move_focuser",
+        "pi_get_ap",
+        "pi_is_verified",
+        "pi_output_set2",
+        "pi_reboot",
+        "pi_set_time",
+        "pi_shutdown",
+        "pi_station_state",
+        "play_sound",
+        "scan_iscope",
+        "scope_get_equ_coord",
+        "scope_get_horiz_coord",
+        "scope_get_ra_dec",
+        "scope_goto",
+        "scope_move_to_horizon",
+        "scope_park",
+        "scope_speed_move",
+        "scope_sync",
+        "set_control_value",
+        "set_sensor_calibration",
+        "set_sequence_setting",
+        "set_setting",
+        "set_stack_setting",
+        "set_stack_type",
+        "set_user_location",
+        "set_wheel_position",
+        "start_auto_focuse",
+        "start_create_calib_frame",
+        "start_create_dark",
+        "start_create_hpc",
+        "start_polar_align",
+        "start_record_avi",
+        "start_scan_planet",
+        "start_solve",
+        "stop_auto_focuse",
+        "stop_polar_align",
+        "stop_record_avi",
+        "stop_streaming",
+    }
+)
+RPC_RESPONSE_MISSES = REGISTRY.counter(
+    "alp_rpc_response_misses_total",
+    "Commands whose reply never showed up in the response buffer.",
+    ("device",),
+)
+RECONNECTS = REGISTRY.counter(
+    "alp_reconnects_total",
+    "Control connections opened to the scope.",
+    ("device",),
+)
+EVENTS = REGISTRY.counter(
+    "alp_events_total",
+    "Events received from the scope, by event name.",
+    ("device", "event"),
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "alp_queue_depth",
+    "Entries waiting in the device's internal queues and buffers.",
+    ("device", "queue"),
+)
+
+# -------
+# Imaging
+# -------
+IMAGING_FRAMES = REGISTRY.counter(
+    "alp_imaging_frames_total",
+    "Preview frames and stacked images received from the scope.",
+    ("device", "type"),
+)
+IMAGING_BYTES = REGISTRY.counter(
+    "alp_imaging_bytes_total",
+    "Image bytes received from the scope.",
+    ("device", "type"),
+)
+IMAGING_DECODE_SECONDS = REGISTRY.histogram(
+    "alp_imaging_decode_seconds",
+    "Time to turn received image data into an image.",
+    ("device", "type"),
+)
+MJPEG_ENCODE_SECONDS = REGISTRY.histogram(
+    "alp_mjpeg_encode_seconds",
+    "Time to annotate and JPEG encode a frame for the video stream.",
+    ("device",),
+)
+MJPEG_VIEWERS = REGISTRY.gauge(
+    "alp_mjpeg_viewers",
+    "Clients watching the video stream.",
+    ("device",),
+)
+MJPEG_FRAMES_SENT = REGISTRY.counter(
+    "alp_mjpeg_frames_sent_total",
+    "Frames sent on the video stream.",
+    ("device",),
+)
+MJPEG_SENT_FPS = REGISTRY.gauge(
+    "alp_mjpeg_sent_fps",
+    "Frames per second sent on the video stream, over the last second.",
+    ("device",),
+)
+
+# ------
+# Alpaca
+# ------
+ALPACA_ACTION_SECONDS = REGISTRY.histogram(
+    "alp_alpaca_action_seconds",
+    "Time to handle an Alpaca action request.",
+    ("device", "action"),
+)
+
+# ---------
+# Scheduler
+# ---------
+SCHEDULE_ITEM_SECONDS = REGISTRY.histogram(
+    "alp_schedule_item_seconds",
+    "How long schedule items took to run.",
+    ("device", "action"),
+    buckets=DURATION_BUCKETS,
+)
+
+# -------
+# Logging
+# -------
+LOG_QUEUE_DEPTH = REGISTRY.gauge(
+    "alp_log_queue_depth",
+    "Log records waiting for the log writer thread.",
+)
+LOG_DROPPED_RECORDS = REGISTRY.counter(
+    "alp_log_dropped_records_total",
+    "Log records dropped because the log writer fell behind.",
+)
+LOG_QUEUE_DEPTH.set_function(
+    lambda: log.queue_handler.queue.qsize() if log.queue_handler is not None else 0
+)
+LOG_DROPPED_RECORDS.set_function(log.dropped_records)
+
+# -------
+# Threads
+# -------
+THREAD_LAG_SECONDS = REGISTRY.gauge(
+    "alp_thread_lag_seconds",
+    "How far a worker loop is behind its expected period, per thread.",
+    ("thread",),
+)
+THREAD_STALLS = REGISTRY.counter(
+    "alp_thread_stalls_total",
+    "Times a worker loop was found stalled by the thread watchdog.",
+    ("thread",),
+)
@@ -0,0 +1,174 @@
+#
+# mosaic_panel_queue - shared panel queue for federated mosaics
+#
+# In the "dynamic" federation mode every scope works on the same mosaic and
+# pulls the next unclaimed panel from one queue when it finishes its current
+# one, instead of being handed a fixed slice of panels up front. A scope that
+# loses time to clouds or a failed plate solve simply claims fewer panels.
+#
+import collections
+import threading
+import uuid
+from typing import Optional
+
+# panel queues of the running federated mosaics, keyed by queue_id. Schedule
+# items only carry the queue_id so they stay JSON serializable.
+_panel_queues: dict[str, "MosaicPanelQueue"] = {}
+_panel_queues_lock = threading.Lock()
+
+
+class MosaicPanelQueue:
+    """Thread-safe queue of mosaic panels shared by the scopes of a federation.
+
+    Panels are identified by the same "<ra><dec>" strings used by
+    ``selected_panels``. A scope ``claim``s a panel, images it and then calls
+    ``complete`` or ``fail``. A failed panel goes back to the end of the queue
+    until it has been attempted ``max_attempts`` times. A panel claimed by a
+    scope that stopped before finishing it is put back with ``release``
+    without counting as an attempt, and one that cannot be imaged yet, e.g.
+    behind the horizon mask, goes to the end of the queue with ``defer``.
+    Every change of a panel's state calls the notify functions added with
+    ``add_waiter``, so scopes with nothing left to claim can wait for a
+    panel to come back.
+    """
+
+    def __init__(self, panels: list[str], max_attempts: int = 2, logger=None):
+        self.queue_id = str(uuid.uuid4())
+        self.logger = logger
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        self._pending = collections.deque(panels)
+        self._waiters = []
+        self._panels = {
+            panel: {"state": "pending", "device_num": None, "attempts": 0}
+            for panel in panels
+        }
+
+    def claim(self, device_num: int) -> Optional[str]:
+        """Return the next pending panel for device_num, or None when none is left."""
+        with self._lock:
+            if not self._pending:
+                return None
+            panel = self._pending.popleft()
+            info = self._panels[panel]
+            info["state"] = "working"
+            info["device_num"] = device_num
+            info["attempts"] += 1
+            return panel
+
+    def complete(self, panel: str, device_num: int) -> None:
+        with self._lock:
+            info = self._panels[panel]
+            info["state"] = "complete"
+            info["device_num"] = device_num
+        self._log(f"panel {panel} completed by device {device_num}")
+        self._notify_waiters()
+
+    def fail(self, panel: str, device_num: int) -> bool:
+        """Record a failed attempt. Returns True if the panel was requeued."""
+        with self._lock:
+            info = self._panels[panel]
+            info["device_num"] = device_num
+            if info["attempts"] >= self.max_attempts:
+                info["state"] = "failed"
+                requeued = False
+            else:
+                info["state"] = "pending"
+                self._pending.append(panel)
+                requeued = True
+        if requeued:
+            self._log(
+                f"panel {panel} failed on device {device_num}, requeued (attempt {info['attempts']} of {self.max_attempts})"
+            )
+        else:
+            self._log(
+                f"panel {panel} failed on device {device_num}, giving up after {info['attempts']} attempts"
+            )
+        self._notify_waiters()
+        return requeued
+
+    def release(self, panel: str) -> None:
+        """Put back a claimed panel that was never imaged."""
+        self._put_back(panel, self._pending.appendleft)
+
+    def defer(self, panel: str) -> None:
+        """Put a claimed panel that cannot be imaged yet at the end of the queue."""
+        self._put_back(panel, self._pending.append)
+
+    def _put_back(self, panel: str, add) -> None:
+        with self._lock:
+            info = self._panels[panel]
+            if info["state"] != "working":
+                return
+            info["state"] = "pending"
+            info["device_num"] = None
+            info["attempts"] -= 1
+            add(panel)
+        self._notify_waiters()
+
+    def add_waiter(self, notify) -> None:
+        """Call notify() whenever a panel is completed, failed or put back."""
+        with self._lock:
+            self._waiters.append(notify)
+
+    def remove_waiter(self, notify) -> None:
+        with self._lock:
+            if notify in self._waiters:
+                self._waiters.remove(notify)
+
+    def _notify_waiters(self) -> None:
+        with self._lock:
+            waiters = list(self._waiters)
+        for notify in waiters:
+            notify()
+
+    def num_pending(self) -> int:
+        """Number of panels waiting to be claimed."""
+        with self._lock:
+            return len(self._pending)
+
+    def num_remaining(self) -> int:
+        """Number of panels that are pending or being imaged."""
+        with self._lock:
+            return sum(
+                1
+                for info in self._panels.values()
+                if info["state"] in ("pending", "working")
+            )
+
+    def is_done(self) -> bool:
+        return self.num_remaining() == 0
+
+    def get_status(self) -> dict:
+        with self._lock:
+            panels = {panel: dict(info) for panel, info in self._panels.items()}
+        counts = collections.Counter(info["state"] for info in panels.values())
+        return {
+            "queue_id": self.queue_id,
+            "num_panels": len(panels),
+            "num_pending": counts["pending"],
+            "num_working": counts["working"],
+            "num_complete": counts["complete"],
+            "num_failed": counts["failed"],
+            "panels": panels,
+        }
+
+    def _log(self, msg: str) -> None:
+        if self.logger:
+            self.logger.info(msg)
+
+
+def register_panel_queue(panel_queue: MosaicPanelQueue) -> str:
+    with _panel_queues_lock:
+        _panel_queues[panel_queue.queue_id] = panel_queue
+    return panel_queue.queue_id
+
+
+def get_panel_queue(queue_id: str) -> Optional[MosaicPanelQueue]:
+    with _panel_queues_lock:
+        return _panel_queues.get(queue_id)
+
+
+def remove_panel_queue(queue_id: str) -> None:
+    with _panel_queues_lock:
+        _panel_queues.pop(queue_id, None)
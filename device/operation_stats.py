@@ -0,0 +1,150 @@
+#
+# operation_stats - how long scope operations actually take, per device
+#
+# The scope reports the elapsed time of its long operations in the lapse_ms
+# field of their final event. Keeping the last few dozen durations of each
+# operation in a small ring buffer lets the schedule timeline predict how
+# long an item will take on this particular scope instead of guessing.
+#
+import json
+import os
+import threading
+
+import numpy as np
+
+# event name -> operation
+OPERATION_EVENTS = {
+    "AutoGoto": "goto",
+    "ScopeGoto": "goto",
+    "AutoFocus": "auto_focus",
+    "PlateSolve": "plate_solve",
+    "DarkLibrary": "dark_library",
+    "EqModePA": "polar_align",
+}
+
+# seconds, used until an operation has been seen on this scope
+DEFAULT_DURATIONS = {
+    "goto": 60.0,
+    "auto_focus": 90.0,
+    "plate_solve": 15.0,
+    "dark_library": 240.0,
+    "polar_align": 150.0,
+    "command": 5.0,
+}
+
+
+class OperationStats:
+    """Recent durations of scope operations, in seconds.
+
+    Each operation keeps its last max_samples durations in a float32 ring
+    buffer; estimate() is their median. With a path the samples are loaded
+    from and saved to a small JSON file so they survive restarts.
+    """
+
+    def __init__(self, path: str = "", max_samples: int = 32, logger=None):
+        self.path = path
+        self.max_samples = max_samples
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._samples: dict[str, np.ndarray] = {}
+        self._counts: dict[str, int] = {}
+        # bumped on every change, so cached estimates know when to refresh
+        self.version = 0
+        if path and os.path.isfile(path):
+            self.load()
+
+    def record(self, operation: str, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        with self._lock:
+            samples = self._samples.get(operation)
+            if samples is None:
+                samples = np.zeros(self.max_samples, dtype=np.float32)
+                self._samples[operation] = samples
+            count = self._counts.get(operation, 0)
+            samples[count % self.max_samples] = seconds
+            self._counts[operation] = count + 1
+            self.version += 1
+        if self.path:
+            self.save()
+
+    def record_event(self, event: dict) -> bool:
+        """Record the lapse_ms of a completed operation event.
+
+        Returns whether the event was one of OPERATION_EVENTS.
+        """
+        operation = OPERATION_EVENTS.get(event.get("Event"))
+        if operation is None or event.get("state") != "complete":
+            return False
+        lapse_ms = event.get("lapse_ms") or 0
+        self.record(operation, lapse_ms / 1000.0)
+        return True
+
+    def _recent(self, operation: str) -> np.ndarray:
+        count = self._counts.get(operation, 0)
+        if count == 0:
+            return np.empty(0, dtype=np.float32)
+        return self._samples[operation][: min(count, self.max_samples)]
+
+    def count(self, operation: str) -> int:
+        return self._counts.get(operation, 0)
+
+    def estimate(self, operation: str, default: float | None = None) -> float:
+        """Median of the recent durations, or a default if none were seen."""
+        with self._lock:
+            recent = self._recent(operation)
+            if len(recent):
+                return float(np.median(recent))
+        if default is not None:
+            return default
+        return DEFAULT_DURATIONS.get(operation, DEFAULT_DURATIONS["command"])
+
+    def summary(self) -> dict:
+        with self._lock:
+            result = {}
+            for operation in sorted(self._counts):
+                recent = self._recent(operation)
+                result[operation] = {
+                    "count": self._counts[operation],
+                    "median_s": round(float(np.median(recent)), 1),
+                    "p90_s": round(float(np.percentile(recent, 90)), 1),
+                }
+            return result
+
+    def save(self) -> None:
+        with self._lock:
+            data = {
+                operation: {
+                    "count": self._counts[operation],
+                    "samples": [round(float(v), 2) for v in self._recent(operation)],
+                }
+                for operation in self._counts
+            }
+            tmp_name = self.path + ".tmp"
+            try:
+                with open(tmp_name, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp_name, self.path)
+            except OSError as e:
+                if self.logger is not None:
+                    self.logger.warning(
+                        f"Could not save operation stats {self.path}: {e}"
+                    )
+
+    def load(self) -> None:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            if self.logger is not None:
+                self.logger.warning(f"Could not load operation stats {self.path}: {e}")
+            return
+        with self._lock:
+            for operation, entry in data.items():
+                samples = np.zeros(self.max_samples, dtype=np.float32)
+                values = entry.get("samples", [])[-self.max_samples :]
+                samples[: len(values)] = values
+                self._samples[operation] = samples
+                # the ring restarts after the loaded samples
+                self._counts[operation] = len(values)
+            self.version += 1
@@ -50,7 +50,7 @@ class SeestarBinaryProtocol(SocketBase):
             soc = self._s if self.is_connected() else None
 
         if soc is not None:
-            self.logger.debug(f"sending message: {data}")  # temp made info
+            self.logger.debug("sending message: %s", data)  # temp made info
             try:
                 soc.sendall(
                     data.encode()
@@ -100,10 +100,10 @@ class SeestarBinaryProtocol(SocketBase):
                 return None
 
             # self.logger.debug(f'{self.device_name} received : {len(data)}')
-            self.logger.debug(f"received : {len(data)}")  # todo : make debug!
+            self.logger.debug("received : %d", len(data))  # todo : make debug!
             dl = len(data)
             if dl < 100 and dl != 80:
-                self.logger.debug(f"Message: {data}")
+                self.logger.debug("Message: %s", data)
             # self.trace.save_message(data, 'recv')
             return data
         else:
@@ -3,12 +3,13 @@ import zipfile
 from datetime import datetime
 from enum import Enum
 from io import BytesIO
-from time import sleep
+from time import perf_counter, sleep
 from typing import Optional, Tuple, List
 
 import cv2
 import numpy as np
 
+from device import metrics, thread_watchdog
 from device.config import Config
 from device.processors.graxpert_stretch import GraxpertStretch
 from device.processors.image_processor import ImageProcessor
@@ -79,6 +80,8 @@ class SeestarImagerProtocol(SeestarBinaryProtocol):
             )
             self.receiving_thread.name = f"ImagingReceiveStarThread.{self.device_name}"
             self.receiving_thread.start()
+            # the replies to the 3s test_connection heartbeat keep it going round
+            thread_watchdog.register(self.receiving_thread, 10, self.disconnect)
         if self.streaming_thread is None or not self.streaming_thread.is_alive():
             self.logger.info("Starting ImagingReceiverStreamingThread")
             self.streaming_thread = threading.Thread(
@@ -88,6 +91,7 @@ class SeestarImagerProtocol(SeestarBinaryProtocol):
                 f"ImagingReceiveStreamingThread.{self.device_name}"
             )
             self.streaming_thread.start()
+            thread_watchdog.register(self.streaming_thread, Config.timeout + 5)
 
     def stop(self):
         super().stop()
@@ -185,7 +189,7 @@ class SeestarImagerProtocol(SeestarBinaryProtocol):
 
                 self._received_frame += 1
                 if self.raw_img is not None:
-                    self.logger.debug(f"read image size={len(self.raw_img)}")
+                    self.logger.debug("read image size=%d", len(self.raw_img))
                 # todo : run on message listeners here!
         else:
             # If we aren't connected, just wait...
@@ -203,6 +207,7 @@ class SeestarImagerProtocol(SeestarBinaryProtocol):
                 # self.received_frame += 1
 
                 while self.is_streaming():
+                    threading.current_thread().last_run = datetime.now()
                     image = client.read(raw=True)
                     with self.lock:
                         if image is not None and not np.array_equal(
@@ -253,15 +258,18 @@ class SeestarImagerProtocol(SeestarBinaryProtocol):
     #     return 0, None, None, None
 
     def handle_preview_frame(self, width, height, data):
+        started = perf_counter()
         self.raw_img = data
         self.raw_img_size = [width, height]
         self.latest_image = self.convert_star_image(self.raw_img, width, height)
+        self._record_frame("preview", len(data), started)
         if Config.save_frames:
             # save the raw frames
             pass
 
     def handle_stack(self, width, height, data):
         # for stacking, we have to extract zipfile
+        started = perf_counter()
         try:
             zip_file = BytesIO(data)
             with zipfile.ZipFile(zip_file) as zip:
@@ -272,6 +280,7 @@ class SeestarImagerProtocol(SeestarBinaryProtocol):
                 if self.latest_image is None:
                     self.raw_img = None
                     self.raw_img_size = [None, None]
+            self._record_frame("stack", len(data), started)
 
             # xxx Temp hack: just disconnect for now...
             # xxx Ideally we listen for an event that stack count has increased, or we track the stack
@@ -284,6 +293,13 @@ class SeestarImagerProtocol(SeestarBinaryProtocol):
             self.raw_img = None
             self.raw_img_size = [None, None]
 
+    def _record_frame(self, frame_type, size, started):
+        metrics.IMAGING_DECODE_SECONDS.labels(self.device_num, frame_type).observe(
+            perf_counter() - started
+        )
+        metrics.IMAGING_FRAMES.labels(self.device_num, frame_type).inc()
+        metrics.IMAGING_BYTES.labels(self.device_num, frame_type).inc(size)
+
     def convert_star_image(
         self, raw_image: np.array, width: int, height: int
     ) -> np.array:
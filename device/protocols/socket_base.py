@@ -8,6 +8,7 @@ from abc import ABC, abstractmethod
 import time
 from typing import List, Optional
 
+from device import thread_watchdog
 from device.config import Config
 
 
@@ -64,6 +65,7 @@ class SocketBase:
                 )
                 self.heartbeat_thread.name = f"SocketHeartbeatMessageThread.{self.device_name}"  # todo : tweak the name
                 self.heartbeat_thread.start()
+                thread_watchdog.register(self.heartbeat_thread, Config.timeout + 3)
 
             self.connect()
 
@@ -105,6 +107,11 @@ class SocketBase:
             self.logger.info("disconnect")
             self._is_connected = False
             if self._s:
+                try:
+                    # wakes up a thread blocked reading the socket
+                    self._s.shutdown(socket.SHUT_RDWR)
+                except Exception:
+                    pass
                 try:
                     self._s.close()
                     self._s = None
@@ -0,0 +1,243 @@
+#
+# schedule_journal - crash-safe record of a device's schedule and progress
+#
+# Every schedule edit and every step of the scheduler (item started, panel
+# started, stacked seconds, panel done, state change) is appended to a JSON
+# lines file. record() only applies the change to an in-memory copy and
+# queues the line; a background thread writes and fsyncs the queued lines
+# in batches, so the scheduler never waits on the disk. Once the file has
+# grown past compact_after records it is rewritten as a single snapshot.
+#
+# After a restart, recover() replays the file into the last known schedule
+# and, if the scheduler was running, the item and panel it was on.
+#
+import copy
+import json
+import os
+import threading
+import time
+from typing import Any, Optional
+
+# seconds between fsyncs of the queued records
+FLUSH_INTERVAL_S = 1.0
+# records after which the file is rewritten as one snapshot
+COMPACT_AFTER = 500
+
+
+def _empty_state() -> dict[str, Any]:
+    return {
+        "schedule_id": "",
+        "list": [],
+        "state": "stopped",
+        "item_id": "",
+        "item_number": 0,
+        "panel": "",
+        "stacked_s": 0.0,
+        "completed_panels": [],
+    }
+
+
+def _index_of(items: list[dict], item_id: str) -> int:
+    for index, item in enumerate(items):
+        if item.get("schedule_item_id") == item_id:
+            return index
+    return -1
+
+
+def apply_record(state: dict[str, Any], record: dict[str, Any]) -> None:
+    """Apply one journal record to a replayed state, in place."""
+    op = record.get("op")
+    items = state["list"]
+    if op == "snapshot":
+        state.clear()
+        state.update(_empty_state())
+        state.update(copy.deepcopy(record["state"]))
+    elif op == "create":
+        state.update(_empty_state())
+        state["schedule_id"] = record["schedule_id"]
+    elif op == "add":
+        items.append(record["item"])
+    elif op == "insert":
+        index = _index_of(items, record["before_id"])
+        items.insert(index if index >= 0 else len(items), record["item"])
+    elif op == "replace":
+        index = _index_of(items, record["item_id"])
+        if index >= 0:
+            items[index] = record["item"]
+    elif op == "remove":
+        index = _index_of(items, record["item_id"])
+        if index >= 0:
+            del items[index]
+    elif op == "state":
+        state["state"] = record["state"]
+    elif op == "item":
+        state["item_id"] = record["item_id"]
+        state["item_number"] = record["item_number"]
+        state["panel"] = ""
+        state["stacked_s"] = 0.0
+        state["completed_panels"] = []
+    elif op == "panel":
+        state["panel"] = record["panel"]
+        state["stacked_s"] = record.get("stacked_s", 0.0)
+        if record.get("done") and record["panel"] not in state["completed_panels"]:
+            state["completed_panels"].append(record["panel"])
+
+
+class ScheduleJournal:
+    """Append-only journal of one device's schedule, flushed in batches."""
+
+    def __init__(
+        self,
+        path: str,
+        logger=None,
+        flush_interval: float = FLUSH_INTERVAL_S,
+        compact_after: int = COMPACT_AFTER,
+    ):
+        self.path = path
+        self.logger = logger
+        self.flush_interval = flush_interval
+        self.compact_after = compact_after
+        self._condition = threading.Condition()
+        # keeps batches in order when close() flushes after the thread
+        self._write_lock = threading.Lock()
+        self._pending: list[str] = []
+        self._state = _empty_state()
+        self._records = 0
+        self._compact_due = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def recover(self) -> dict[str, Any]:
+        """Replay the journal file and start appending to it.
+
+        Returns the recovered state: schedule_id, list, state and the
+        item_id, item_number, panel, stacked_s and completed_panels the
+        scheduler had reached. A torn last line from a crash is ignored.
+        """
+        state = _empty_state()
+        records = 0
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        apply_record(state, json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    records += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self._warn(f"Could not read schedule journal {self.path}: {e}")
+        with self._condition:
+            self._state = state
+            self._records = records
+        self._start()
+        return copy.deepcopy(state)
+
+    def record(self, op: str, **fields) -> None:
+        """Queue one change; it reaches the disk within flush_interval."""
+        line = json.dumps(
+            {"op": op, "ts": round(time.time(), 1), **fields}, default=str
+        )
+        with self._condition:
+            if self._closed:
+                return
+            # apply what was written, not the caller's objects, which the
+            # scheduler may go on changing
+            apply_record(self._state, json.loads(line))
+            self._pending.append(line)
+            if op == "snapshot":
+                self._compact_due = True
+            self._condition.notify()
+        if self._thread is None:
+            self._start()
+
+    def snapshot(self, schedule: dict) -> None:
+        """Replace everything journaled so far with the given schedule."""
+        self.record(
+            "snapshot",
+            state={
+                **_empty_state(),
+                "schedule_id": schedule.get("schedule_id", ""),
+                "list": list(schedule.get("list", [])),
+                "state": schedule.get("state", "stopped"),
+            },
+        )
+
+    def state(self) -> dict[str, Any]:
+        with self._condition:
+            return copy.deepcopy(self._state)
+
+    def flush(self) -> None:
+        """Write and fsync the queued records now."""
+        with self._write_lock:
+            with self._condition:
+                lines = self._pending
+                self._pending = []
+                compact = self._compact_due or (
+                    self._records + len(lines) > self.compact_after
+                )
+                if compact:
+                    snapshot = {
+                        "op": "snapshot",
+                        "ts": round(time.time(), 1),
+                        "state": self._state,
+                    }
+                    lines = [json.dumps(snapshot, default=str)]
+                    self._records = 1
+                    self._compact_due = False
+                else:
+                    self._records += len(lines)
+            if lines:
+                self._write(lines, compact)
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _start(self) -> None:
+        with self._condition:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(
+                target=self._flush_thread_fn, name="ScheduleJournal", daemon=True
+            )
+        self._thread.start()
+
+    def _flush_thread_fn(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                # let more records pile up, then write them with one fsync
+                self._condition.wait_for(lambda: self._closed, self.flush_interval)
+            self.flush()
+
+    def _write(self, lines: list[str], compact: bool) -> None:
+        data = "".join(line + "\n" for line in lines)
+        try:
+            if compact:
+                tmp_name = self.path + ".tmp"
+                with open(tmp_name, "w") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_name, self.path)
+            else:
+                with open(self.path, "a") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            self._warn(f"Could not write schedule journal {self.path}: {e}")
+
+    def _warn(self, msg: str) -> None:
+        if self.logger is not None:
+            self.logger.warning(msg)
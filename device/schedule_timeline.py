@@ -0,0 +1,271 @@
+#
+# schedule_timeline - predicted start and end of every schedule item
+#
+# Item durations come from the scope's learned operation durations (see
+# operation_stats). Durations and horizon checks are cached per item, so
+# inserting, removing or skipping an item only re-estimates the items that
+# changed; the start times themselves are a running sum that is cheap to
+# redo on every call.
+#
+import json
+import math
+import threading
+import time
+from datetime import datetime
+
+import ephem
+import numpy as np
+
+from device.altaz_kernel import UNIX_EPOCH_JD, altaz_track
+from device.horizon_mask import get_horizon_mask
+from device.operation_stats import OperationStats
+from device.scheduler_wakeup import seconds_until_local_time
+from device.seestar_util import Util
+
+# the spectra item exposes 8 segments plus a 60 s reference star
+SPECTRA_SEGMENTS = 8
+SPECTRA_STAR_S = 60.0
+# items that point at a target, checked against twilight and the horizon
+TARGET_ACTIONS = ("start_mosaic", "start_spectra")
+# how often a target's altitude is sampled over the span of its item
+HORIZON_STEP_MINUTES = 5.0
+MAX_CACHED = 1024
+# ephem dates count days from 1899-12-31 12:00 UTC
+_UNIX_EPOCH_DJD = 25567.5
+
+
+def _item_key(item: dict) -> tuple:
+    params = json.dumps(item.get("params", {}), sort_keys=True, default=str)
+    return item.get("schedule_item_id", ""), item.get("action", ""), params
+
+
+def _panel_count(params: dict) -> int:
+    selected_panels = params.get("selected_panels") or ""
+    if selected_panels:
+        return len([p for p in selected_panels.split(";") if p])
+    return max(1, int(params.get("ra_num", 1))) * max(1, int(params.get("dec_num", 1)))
+
+
+class ScheduleTimeline:
+    """Predicts when each schedule item starts and ends.
+
+    Items are flagged "past_twilight" when they run into astronomical dawn
+    and "below_horizon" when their target is under the horizon (or the
+    horizon mask) at some point while they run.
+    """
+
+    def __init__(self, stats: OperationStats, logger=None):
+        self.stats = stats
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._durations: dict[tuple, float] = {}
+        self._horizon: dict[tuple, bool] = {}
+        self._dawn: dict[tuple, float] = {}
+        self._current: tuple[str, float] | None = None
+        self._stats_version = -1
+        self.estimates = 0
+
+    def item_started(self, item_id: str, started: float | None = None) -> None:
+        """Anchor the timeline at the item the scheduler is running now."""
+        with self._lock:
+            self._current = (item_id, time.time() if started is None else started)
+
+    def panel_overhead(self, is_use_autofocus: bool) -> float:
+        operation = "panel_overhead_af" if is_use_autofocus else "panel_overhead"
+        if self.stats.count(operation):
+            return self.stats.estimate(operation)
+        overhead = self.stats.estimate("goto") + self.stats.estimate("plate_solve")
+        if is_use_autofocus:
+            overhead += self.stats.estimate("auto_focus")
+        return overhead
+
+    def estimate_duration(self, item: dict) -> float:
+        """Seconds the item takes, except wait_until (see update)."""
+        action = item.get("action", "")
+        params = item.get("params") or {}
+        if not isinstance(params, dict):
+            params = {}
+        command = self.stats.estimate("command")
+        match action:
+            case "start_mosaic":
+                per_panel = float(
+                    params.get("panel_time_sec", params.get("session_time_sec", 0))
+                )
+                return _panel_count(params) * (
+                    per_panel
+                    + self.panel_overhead(bool(params.get("is_use_autofocus", False)))
+                )
+            case "start_spectra":
+                return (
+                    SPECTRA_STAR_S
+                    + SPECTRA_SEGMENTS * float(params.get("panel_time_sec", 0))
+                    + self.stats.estimate("goto")
+                )
+            case "auto_focus":
+                return self.stats.estimate("auto_focus")
+            case "wait_for":
+                return float(params.get("timer_sec", 0))
+            case "start_up_sequence":
+                duration = command
+                if params.get("3ppa") or params.get("polar_align"):
+                    duration += self.stats.estimate("polar_align")
+                if params.get("auto_focus"):
+                    duration += self.stats.estimate("auto_focus")
+                if params.get("dark_frames"):
+                    duration += self.stats.estimate("dark_library")
+                return duration
+            case "scope_park":
+                return self.stats.estimate("goto")
+            case _:
+                return command
+
+    def _duration(self, item: dict) -> float:
+        key = _item_key(item)
+        duration = self._durations.get(key)
+        if duration is None:
+            duration = self.estimate_duration(item)
+            self._durations[key] = duration
+            self.estimates += 1
+        return duration
+
+    def _dawn_after(self, ts: float, latitude: float, longitude: float) -> float:
+        """Unix time of the first astronomical dawn after ts (cached per hour)."""
+        key = (round(latitude, 2), round(longitude, 2), int(ts // 3600))
+        dawn = self._dawn.get(key)
+        if dawn is None:
+            observer = ephem.Observer()
+            observer.lat, observer.lon = str(latitude), str(longitude)
+            observer.horizon = "-18"
+            observer.pressure = 0
+            observer.date = ephem.Date(key[2] * 3600 / 86400.0 + _UNIX_EPOCH_DJD)
+            try:
+                rising = observer.next_rising(ephem.Sun(), use_center=True)
+                dawn = (float(rising) - _UNIX_EPOCH_DJD) * 86400.0
+            except (ephem.AlwaysUpError, ephem.NeverUpError):
+                dawn = math.inf
+            self._dawn[key] = dawn
+        return dawn
+
+    def _is_hidden(
+        self, item: dict, start: float, end: float, latitude: float, longitude: float
+    ) -> bool:
+        params = item["params"]
+        ra, dec = params.get("ra"), params.get("dec")
+        if ra is None or dec is None:
+            return False
+        if not isinstance(ra, str) and ra == -1 and dec == -1:
+            return False
+        key = (_item_key(item), int(start // 60), int(end // 60), latitude, longitude)
+        hidden = self._horizon.get(key)
+        if hidden is None:
+            try:
+                ra, dec = Util.to_jnow(params.get("is_j2000", False), ra, dec)
+            except ValueError:
+                return False
+            minutes = max(0.0, (end - start) / 60.0)
+            jd = (
+                start / 86400.0
+                + UNIX_EPOCH_JD
+                + np.arange(0.0, minutes + HORIZON_STEP_MINUTES, HORIZON_STEP_MINUTES)
+                / 1440.0
+            )
+            altitude, azimuth = altaz_track(
+                ra, dec, latitude, longitude, jd, refraction=True
+            )
+            mask = get_horizon_mask(self.logger)
+            if mask is None:
+                hidden = bool((altitude <= 0).any())
+            else:
+                hidden = not bool(mask.is_visible(altitude, azimuth).all())
+            self._horizon[key] = hidden
+        return hidden
+
+    def update(
+        self,
+        schedule: dict,
+        latitude: float,
+        longitude: float,
+        now: float | None = None,
+    ) -> dict:
+        """Timeline of the items that have not run yet.
+
+        While the scheduler is working it starts at the current item, at
+        the time that item started.
+        """
+        now = time.time() if now is None else now
+        items = list(schedule.get("list", []))
+        first = 0
+        start = now
+        with self._lock:
+            if schedule.get("state") == "working":
+                first = max(0, int(schedule.get("item_number", 1)) - 1)
+                if self._current is not None and first < len(items):
+                    item_id, started = self._current
+                    if items[first].get("schedule_item_id") == item_id:
+                        start = started
+
+            # new measurements change every estimate
+            if self.stats.version != self._stats_version:
+                self._durations.clear()
+                self._stats_version = self.stats.version
+
+            # forget cached items that left the schedule
+            keys = {_item_key(item) for item in items}
+            for key in [k for k in self._durations if k not in keys]:
+                del self._durations[key]
+            for key in [k for k in self._horizon if k[0] not in keys]:
+                del self._horizon[key]
+            # horizon checks and dawns of start times that have passed
+            if len(self._horizon) > MAX_CACHED:
+                self._horizon.clear()
+            if len(self._dawn) > MAX_CACHED:
+                self._dawn.clear()
+
+            entries = []
+            for index in range(first, len(items)):
+                item = items[index]
+                action = item.get("action", "")
+                params = item.get("params")
+                if not isinstance(params, dict):
+                    params = {}
+                if action == "wait_until":
+                    duration = seconds_until_local_time(
+                        params.get("local_time"), datetime.fromtimestamp(start)
+                    )
+                else:
+                    duration = self._duration(item)
+                end = start + duration
+                # the running item cannot end before now
+                if index == first and start < now:
+                    end = max(end, now)
+                flags = []
+                if action in TARGET_ACTIONS:
+                    if end > self._dawn_after(start, latitude, longitude):
+                        flags.append("past_twilight")
+                    if self._is_hidden(item, start, end, latitude, longitude):
+                        flags.append("below_horizon")
+                entries.append(
+                    {
+                        "schedule_item_id": item.get("schedule_item_id", ""),
+                        "action": action,
+                        "target_name": params.get("target_name", ""),
+                        "start_ts": round(start, 1),
+                        "end_ts": round(end, 1),
+                        "start": _local_minutes(start),
+                        "end": _local_minutes(end),
+                        "duration_s": round(end - start),
+                        "flags": flags,
+                    }
+                )
+                start = end
+
+        return {
+            "schedule_id": schedule.get("schedule_id", ""),
+            "items": entries,
+            "end": entries[-1]["end"] if entries else "",
+            "fits_night": not any("past_twilight" in e["flags"] for e in entries),
+        }
+
+
+def _local_minutes(ts: float) -> str:
+    return datetime.fromtimestamp(ts).isoformat(sep=" ", timespec="minutes")
@@ -0,0 +1,96 @@
+#
+# scheduler_wakeup - what the scheduler threads sleep on
+#
+# The scheduler used to poll its state every 2 to 5 seconds. Its threads now
+# wait on one condition variable with a monotonic deadline instead. Scope
+# events and pause, skip and stop requests notify it, so a finished goto or
+# a stop request is acted on within milliseconds rather than at the next poll.
+#
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+# waiters still wake this often to refresh their watchdog time and progress
+HEARTBEAT_S = 5.0
+
+# scope events that can end something the scheduler waits for, including
+# every op name Seestar.wait_end_op is called with
+WAKE_EVENTS = (
+    "AutoGoto",
+    "ScopeGoto",
+    "ScopeHome",
+    "AutoFocus",
+    "PlateSolve",
+    "DarkLibrary",
+    "EqModePA",
+    "Stack",
+    "View",
+)
+
+
+class SchedulerWakeup:
+    """Condition variable shared by the scheduler, mosaic and start-up threads.
+
+    wait() blocks until its predicate holds or its timeout runs out, checking
+    the predicate again whenever notify() is called.
+    """
+
+    def __init__(self, heartbeat: float = HEARTBEAT_S):
+        self.heartbeat = heartbeat
+        self._condition = threading.Condition()
+
+    def notify(self) -> None:
+        with self._condition:
+            self._condition.notify_all()
+
+    def wait(
+        self,
+        predicate: Optional[Callable[[], bool]] = None,
+        timeout: Optional[float] = None,
+        on_tick: Optional[Callable[[Optional[float]], None]] = None,
+    ) -> bool:
+        """Wait until predicate() is true or timeout seconds have passed.
+
+        on_tick(remaining) is called at least every heartbeat while waiting,
+        with the seconds left (None without a timeout). Returns True if the
+        predicate became true, False if the timeout ran out first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        is_tick_due = on_tick is not None
+        while True:
+            with self._condition:
+                if predicate is not None and predicate():
+                    return True
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                if not is_tick_due:
+                    if remaining is None:
+                        self._condition.wait(self.heartbeat)
+                    else:
+                        self._condition.wait(min(remaining, self.heartbeat))
+                    is_tick_due = on_tick is not None
+                    continue
+            # ticks write to the journal and the event bus; outside the lock
+            # they cannot hold up notify() on a device's receive thread
+            on_tick(remaining)
+            is_tick_due = False
+
+
+def seconds_until_local_time(local_time, now: datetime) -> float:
+    """Seconds from now until the next local HH:MM.
+
+    Zero while now is still within that minute, so a wait_until reached a
+    few seconds late runs at once instead of a day later.
+    """
+    try:
+        hour, minute = (int(v) for v in str(local_time).split(":")[:2])
+    except ValueError:
+        return 0.0
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target + timedelta(minutes=1) <= now:
+        target += timedelta(days=1)
+    return max(0.0, (target - now).total_seconds())
@@ -28,11 +28,20 @@ from device.abstract_device import MessageParams, StartStackParams, Schedule
 from device.config import Config
 from device.version import Version  # type: ignore
 from device.seestar_util import Util
+from device.altaz_kernel import equatorial_to_altaz, is_above_horizon
+from device.horizon_mask import get_horizon_mask
+from device.operation_stats import OperationStats
+from device.schedule_journal import ScheduleJournal
+from device.schedule_timeline import ScheduleTimeline
+from device.telemetry_store import TelemetryStore
+from device.scheduler_wakeup import SchedulerWakeup, seconds_until_local_time
 from device.event_callbacks import *
+from device.mosaic_panel_queue import MosaicPanelQueue, get_panel_queue
+from device import metrics, thread_watchdog
 
 from collections import OrderedDict
 
-from astropy.coordinates import EarthLocation, AltAz
+from astropy.coordinates import EarthLocation
 import astropy.units as u
 
 
@@ -110,7 +119,9 @@ class Seestar:
         self.get_msg_thread: Optional[threading.Thread] = None
         self.heartbeat_msg_thread: Optional[threading.Thread] = None
         self.is_debug: bool = is_debug
-        self.response_dict: OrderedDict[int, dict] = FixedSizeOrderedDict(max=100)
+        self.response_dict: OrderedDict[int, dict] = FixedSizeOrderedDict(maxsize=100)
+        # perf_counter() when each reply in response_dict arrived
+        self.response_times: OrderedDict[int, float] = FixedSizeOrderedDict(maxsize=100)
         self.logger = logger
         self.is_connected: bool = False
         # PEM key bytes (lazy loaded)
@@ -130,6 +141,17 @@ class Seestar:
         self.firmware_ver_int: int = 0
 
         self.event_callbacks: list[EventCallback] = []
+        # learned durations of gotos, focus runs, plate solves, ... for the
+        # schedule timeline
+        stats_path = ""
+        if Config.operation_stats_dir:
+            stats_path = os.path.join(
+                Config.operation_stats_dir, f"operation_stats_{device_num}.json"
+            )
+        self.operation_stats = OperationStats(stats_path, logger=logger)
+        self.schedule_timeline = ScheduleTimeline(self.operation_stats, logger)
+        # battery, temperature, stack, focuser and SNR history for charts
+        self.telemetry = TelemetryStore(Config.telemetry_budget_kb)
 
         self.mosaic_thread: Optional[threading.Thread] = None
         self.scheduler_thread: Optional[threading.Thread] = None
@@ -145,9 +167,25 @@ class Seestar:
             "current_item_id": "",
             "item_number": 9999,
         }
+        # schedule edits and progress, replayed after a restart
+        self.schedule_journal: Optional[ScheduleJournal] = None
+        # completed panels of the item a resumed run starts at
+        self.resume_panels: dict[str, set[str]] = {}
+        if Config.schedule_journal_dir:
+            self.schedule_journal = ScheduleJournal(
+                os.path.join(
+                    Config.schedule_journal_dir, f"schedule_journal_{device_num}.jsonl"
+                ),
+                logger,
+            )
+            self.restore_schedule(self.schedule_journal.recover())
         self.lock = threading.RLock()
         self.is_cur_scheduler_item_working: bool = False
+        # the scheduler threads sleep on this; scope events and pause, skip
+        # and stop requests wake them
+        self.scheduler_wakeup = SchedulerWakeup()
 
+        self.eventbus = signal(f"{self.device_name}.eventbus")
         self.event_state: dict[str, Any] = {}
         self.update_scheduler_state_obj({}, result=0)
 
@@ -160,7 +198,12 @@ class Seestar:
 
         # self.event_queue = queue.Queue()
         self.event_queue = collections.deque(maxlen=20)
-        self.eventbus = signal(f"{self.device_name}.eventbus")
+        metrics.QUEUE_DEPTH.labels(self.device_num, "events").set_function(
+            lambda: len(self.event_queue)
+        )
+        metrics.QUEUE_DEPTH.labels(self.device_num, "responses").set_function(
+            lambda: len(self.response_dict)
+        )
         self.is_EQ_mode: bool = False  # updated from device state on startup
         # self.trace = MessageTrace(self.device_num, self.port)
 
@@ -440,6 +483,8 @@ class Seestar:
             "result": result,
         }
         self.logger.info(f"scheduler event state: {self.event_state['scheduler']}")
+        # let event bus listeners (e.g. the eventstatus push) know it changed
+        self.eventbus.send(self.event_state["scheduler"])
 
     def heartbeat(
         self,
@@ -454,7 +499,7 @@ class Seestar:
                 time.sleep(3)
                 return False
             # todo : don't send if not connected or socket is null?
-            self.logger.debug(f"sending: {data}")
+            self.logger.debug("sending: %s", data)
             self.s.sendall(
                 data.encode()
             )  # TODO: would utf-8 or unicode_escaped help here
@@ -543,6 +588,7 @@ class Seestar:
             self.s.connect((self.host, self.port))
             # self.s.settimeout(None)
             self.is_connected = True
+            metrics.RECONNECTS.labels(self.device_num).inc()
             # If an interop PEM key is configured, attempt firmware 7.18+ auth
             # inline so a fresh connection is authenticated before
             # start_watch_thread() issues get_device_state etc.  Failure is
@@ -671,13 +717,14 @@ class Seestar:
                     if "jsonrpc" in parsed_data:
                         # {"jsonrpc":"2.0","Timestamp":"9507.244805160","method":"scope_get_equ_coord","result":{"ra":17.093056,"dec":34.349722},"code":0,"id":83}
                         if parsed_data["method"] == "scope_get_equ_coord":
-                            self.logger.debug(f"{parsed_data}")
+                            self.logger.debug("%s", parsed_data)
                             self.update_equ_coord(parsed_data)
                         else:
-                            self.logger.debug(f"{parsed_data}")
+                            self.logger.debug("%s", parsed_data)
                         if parsed_data["method"] == "get_view_state":
                             self.update_view_state(parsed_data)
                         # keep a running queue of last 100 responses for sync call results
+                        self.response_times[parsed_data["id"]] = time.perf_counter()
                         self.response_dict[parsed_data["id"]] = parsed_data
 
                     elif "Event" in parsed_data:
@@ -685,12 +732,19 @@ class Seestar:
                         self.event_queue.append(parsed_data)
                         self.eventbus.send(parsed_data)
 
+                        event_name = parsed_data["Event"]
+                        metrics.EVENTS.labels(self.device_num, event_name).inc()
                         # xxx: make this a common method....
+                        # The event name lets noisy events be rate limited
+                        log_extra = {"event": event_name, "device": self.device_name}
                         if Config.log_events_in_info:
-                            self.logger.info(f"received : {parsed_data}")
+                            self.logger.info(
+                                "received : %s", parsed_data, extra=log_extra
+                            )
                         else:
-                            self.logger.debug(f"received : {parsed_data}")
-                        event_name = parsed_data["Event"]
+                            self.logger.debug(
+                                "received : %s", parsed_data, extra=log_extra
+                            )
                         self.event_state[event_name] = parsed_data
 
                         # {'Event': 'EqModePA', 'Timestamp': '740.411562378', 'state': 'working', 'lapse_ms': 0, 'route': []}
@@ -823,6 +877,7 @@ class Seestar:
                 "result": "Sent command async for these types of commands.",
             }
         else:
+            started = time.perf_counter()
             cur_cmdid = self.send_message_param(data)
 
         start = time.time()
@@ -837,6 +892,7 @@ class Seestar:
                         f"Failed to wait for message response.  {elapsed} seconds. {cur_cmdid=} {data=}"
                     )
                     data["result"] = "Error: Exceeded allotted wait time for result"
+                    metrics.RPC_RESPONSE_MISSES.labels(self.device_num).inc()
                     return data
                 else:
                     self.logger.warning(
@@ -844,7 +900,13 @@ class Seestar:
                     )
                     # todo : dump out stats.  last run time on threads, connection status, etc.
             time.sleep(0.5)
-        self.logger.debug(f"response is {self.response_dict[cur_cmdid]}")
+        # timed to the reply's arrival, not to the end of the poll above
+        arrived = self.response_times.get(cur_cmdid, time.perf_counter())
+        method = data["method"]
+        if method not in metrics.RPC_METHODS:
+            method = "unknown"
+        metrics.RPC_SECONDS.labels(self.device_num, method).observe(arrived - started)
+        self.logger.debug("response is %s", self.response_dict[cur_cmdid])
         return self.response_dict[cur_cmdid]
 
     def get_event_state(self, params=None):
@@ -892,13 +954,24 @@ class Seestar:
         if self.site_altaz_frame is None:
             self.logger.warning("SCC has a rouge thread trying to call BPA error!")
             return [9999.9, 9999.9]
-        radec = Util.parse_coordinate(is_j2000=False, in_ra=in_ra, in_dec=in_dec)
-        # Convert RA/Dec to Alt/Az
-        altaz = radec.transform_to(
-            AltAz(obstime=obs_time, location=self.site_altaz_frame)
+        if isinstance(in_ra, str):
+            in_ra, in_dec = Util.to_jnow(False, in_ra, in_dec)
+        alt, az = equatorial_to_altaz(
+            in_ra, in_dec, self.site_latitude, self.site_longitude, when=obs_time
+        )
+        self.logger.info(f"coord in az-alt: {az}, {alt}")
+        return [alt, az]
+
+    def is_target_above_horizon(self, in_ra, in_dec, min_altitude=0.0, obs_time=None):
+        # in_ra/in_dec are JNow hours/degrees, as sent to the mount
+        return is_above_horizon(
+            in_ra,
+            in_dec,
+            self.site_latitude,
+            self.site_longitude,
+            min_altitude,
+            when=obs_time,
         )
-        self.logger.info(f"coord in az-alt: {altaz.az.deg}, {altaz.alt.deg}")
-        return [altaz.alt.deg, altaz.az.deg]
 
     def get_pa_error(self, param):
         if self.cur_pa_error_x is None or self.cur_pa_error_y is None:
@@ -1087,9 +1160,7 @@ class Seestar:
         is_j2000 = params["is_j2000"]
         in_ra = params["ra"]
         in_dec = params["dec"]
-        parsed_coord = Util.parse_coordinate(is_j2000, in_ra, in_dec)
-        in_ra = parsed_coord.ra.hour
-        in_dec = parsed_coord.dec.deg
+        in_ra, in_dec = Util.to_jnow(is_j2000, in_ra, in_dec)
         target_name = params.get("target_name", "unknown")
         self.logger.info(
             "%s: going to target... %s %s %s",
@@ -1098,6 +1169,10 @@ class Seestar:
             in_ra,
             in_dec,
         )
+        if not self.is_target_above_horizon(in_ra, in_dec):
+            self.logger.warning(
+                "%s: target %s is below the horizon", self.device_name, target_name
+            )
 
         data: MessageParams = {
             "method": "iscope_start_view",
@@ -1476,6 +1551,8 @@ class Seestar:
                 lon=Config.init_long * u.deg,
                 height=10 * u.m,
             )
+            self.site_latitude = Config.init_lat
+            self.site_longitude = Config.init_long
 
             loc_param["lat"] = Config.init_lat
             loc_param["lon"] = Config.init_long
@@ -1678,6 +1755,7 @@ class Seestar:
             and not self.schedule["is_stacking_paused"]
         ):
             self.schedule["is_stacking_paused"] = True
+            self.scheduler_wakeup.notify()
             self.logger.info(
                 "confirmed scheduler is stacking, so stop for further instrctions."
             )
@@ -1694,6 +1772,7 @@ class Seestar:
             and self.schedule["is_stacking_paused"]
         ):
             self.schedule["is_stacking_paused"] = False
+            self.scheduler_wakeup.notify()
             self.logger.info(
                 "confirmed scheduler was paused stacking, so continue stacking now.."
             )
@@ -1723,6 +1802,7 @@ class Seestar:
             self.schedule["is_skip_requested"] = True
             self.schedule["is_stacking_paused"] = False
             self.schedule["is_stacking"] = False
+            self.scheduler_wakeup.notify()
             return self.json_result(
                 "skip_scheduler_cur_item", 0, "Requested to skip current item."
             )
@@ -1809,9 +1889,7 @@ class Seestar:
             is_LP = [False, False, True, False, False, False, True, False]
             num_segments = len(spacing)
 
-            parsed_coord = Util.parse_coordinate(is_j2000, center_RA, center_Dec)
-            center_RA = parsed_coord.ra.hour
-            center_Dec = parsed_coord.dec.deg
+            center_RA, center_Dec = Util.to_jnow(is_j2000, center_RA, center_Dec)
 
             # 60s for the star
             time_remaining = exposure_time_per_segment * num_segments - 60.0
@@ -1843,7 +1921,7 @@ class Seestar:
             self.event_state["scheduler"]["cur_scheduler_item"]["action"] = (
                 "stack for reference star for 60 seconds"
             )
-            time.sleep(60)
+            self.scheduler_wakeup.wait(lambda: self.schedule["state"] != "working", 60)
             self.stop_stack()
             time_remaining -= 60
             self.event_state["scheduler"]["cur_scheduler_item"][
@@ -1870,22 +1948,26 @@ class Seestar:
                 self.event_state["scheduler"]["cur_scheduler_item"]["action"] = (
                     f"stack for spectra at spacing index {index}"
                 )
-                count_down = exposure_time_per_segment
-                while count_down > 0:
-                    if self.schedule["state"] != "working":
-                        self.stop_stack()
-                        self.schedule["state"] = "stopped"
-                        return
-                    elif self.schedule["is_skip_requested"]:
-                        self.logger.info("requested to skip. Stopping spectra_thread.")
-                        return
-                    time_remaining -= count_down
-                    time.sleep(10)
-                    count_down -= 10
-                    time_remaining -= 10
+                time_remaining -= exposure_time_per_segment
+
+                def show_remaining(remaining):
+                    threading.current_thread().last_run = datetime.now()
                     self.event_state["scheduler"]["cur_scheduler_item"][
                         "item_remaining_time_s"
-                    ] = time_remaining
+                    ] = round(time_remaining + remaining)
+
+                self.scheduler_wakeup.wait(
+                    self.is_scheduler_interrupted,
+                    exposure_time_per_segment,
+                    show_remaining,
+                )
+                if self.schedule["state"] != "working":
+                    self.stop_stack()
+                    self.schedule["state"] = "stopped"
+                    return
+                elif self.schedule["is_skip_requested"]:
+                    self.logger.info("requested to skip. Stopping spectra_thread.")
+                    return
                 self.stop_stack()
 
             self.logger.info("Finished spectra mosaic.")
@@ -1895,6 +1977,7 @@ class Seestar:
             self.event_state["scheduler"]["cur_scheduler_item"]["action"] = "complete"
         finally:
             self.is_cur_scheduler_item_working = False
+            self.scheduler_wakeup.notify()
 
     # {"target_name":"kai_Vega", "ra":-1.0, "dec":-1.0, "is_use_lp_filter_too":true, "panel_time_sec":600, "grating_lines":300}
     def start_spectra_item(self, params):
@@ -1952,6 +2035,357 @@ class Seestar:
             result = True
         return result
 
+    def mosaic_panel_centers(
+        self, center_RA, center_Dec, nRA, nDec, overlap_percent
+    ) -> dict[str, tuple[int, int, float, float]]:
+        """Map each panel string ("<ra><dec>") to (index_ra, index_dec, ra, dec), in imaging order."""
+        spacing_result = Util.mosaic_next_center_spacing(
+            center_RA, center_Dec, overlap_percent
+        )
+        delta_RA = spacing_result[0]
+        delta_Dec = spacing_result[1]
+
+        # adjust mosaic center if num panels is even
+        if nRA % 2 == 0:
+            center_RA += delta_RA / 2
+        if nDec % 2 == 0:
+            center_Dec += delta_Dec / 2
+
+        panel_centers = {}
+        cur_dec = center_Dec - int(nDec / 2) * delta_Dec
+        for index_dec in range(nDec):
+            spacing_result = Util.mosaic_next_center_spacing(
+                center_RA, cur_dec, overlap_percent
+            )
+            delta_RA = spacing_result[0]
+            cur_ra = center_RA - int(nRA / 2) * delta_RA
+            for index_ra in range(nRA):
+                panel_string = str(index_ra + 1) + str(index_dec + 1)
+                panel_centers[panel_string] = (index_ra, index_dec, cur_ra, cur_dec)
+                cur_ra += delta_RA
+            cur_dec += delta_Dec
+        return panel_centers
+
+    def is_scheduler_interrupted(self) -> bool:
+        """Whether the scheduler was asked to stop or to skip its item."""
+        return self.schedule["state"] != "working" or bool(
+            self.schedule["is_skip_requested"]
+        )
+
+    def is_mosaic_stop_requested(self) -> bool:
+        if self.schedule["state"] != "working":
+            self.logger.info("Mosaic mode was requested to stop. Stopping")
+            self.schedule["state"] = "stopped"
+            return True
+        if self.schedule["is_skip_requested"]:
+            self.logger.info(
+                "current mosaic was requested to skip. Stopping at current mosaic."
+            )
+            return True
+        return False
+
+    def mosaic_image_panel(
+        self,
+        save_target_name,
+        panel_center,
+        is_use_LP_filter,
+        sleep_time_per_panel,
+        gain,
+        is_use_autofocus,
+        num_tries,
+        retry_wait_s,
+        stack_type,
+    ) -> str:
+        """Slew to, optionally focus on, and stack one mosaic panel.
+
+        Returns "complete", "failed", "stopped" or "skipped".
+        """
+        index_ra, index_dec, cur_ra, cur_dec = panel_center
+        panel_string = f"{index_ra + 1}{index_dec + 1}"
+        cur_item = self.event_state["scheduler"]["cur_scheduler_item"]
+        panel_start = time.time()
+        self.journal("panel", panel=panel_string, stacked_s=0)
+        cur_item["cur_ra_panel_num"] = index_ra + 1
+        cur_item["cur_dec_panel_num"] = index_dec + 1
+
+        self.logger.info("Stacking operation started for " + save_target_name)
+        self.logger.info(
+            "mosaic goto for panel %s, to location %s",
+            f"{index_ra + 1}{index_dec + 1}",
+            (cur_ra, cur_dec),
+        )
+
+        # set_settings(x_stack_l, x_continuous, d_pix, d_interval, d_enable, l_enhance, heater_enable):
+        # TODO: Need to set correct parameters
+        self.send_message_param_sync(
+            {"method": "set_setting", "params": {"stack_lenhance": False}}
+        )
+
+        for try_index in range(num_tries):
+            try_count = try_index + 1
+            cur_item["action"] = (
+                f"attempt #{try_count} slewing to target panel centered at {cur_ra:.2f}, {cur_dec:.2f}"
+            )
+            self.logger.info(f"Trying to readch target, attempt #{try_count}")
+            result = self.mosaic_goto_inner_worker(
+                cur_ra,
+                cur_dec,
+                save_target_name,
+                is_use_autofocus,
+                is_use_LP_filter,
+            )
+            if result:
+                break
+            else:
+                if try_count < num_tries:
+                    # wait as requested before the next try
+                    def show_retry_wait(remaining):
+                        threading.current_thread().last_run = datetime.now()
+                        waited_time = round(retry_wait_s - remaining)
+                        msg = f"waited {waited_time}s of requested {retry_wait_s}s before retry GOTO target."
+                        self.logger.info(msg)
+                        cur_item["action"] = msg
+
+                    self.scheduler_wakeup.wait(
+                        lambda: self.schedule["state"] != "working",
+                        retry_wait_s,
+                        show_retry_wait,
+                    )
+                    if self.schedule["state"] != "working":
+                        self.logger.info(
+                            "Scheduler was requested to stop. Stopping at current mosaic."
+                        )
+                        cur_item["action"] = (
+                            "Scheduler was requested to stop. Stopping at current mosaic."
+                        )
+                        self.schedule["state"] = "stopped"
+                        return "stopped"
+
+        # if we failed goto
+        if not result:
+            msg = f"Failed to goto target after {num_tries} tries."
+            self.logger.warning(msg)
+            cur_item["action"] = msg
+            return "failed"
+
+        msg = f"stacking the panel for {sleep_time_per_panel} seconds"
+        self.logger.info(msg)
+        cur_item["action"] = msg
+
+        # be sure we are using the right target name before we stack
+        self.set_target_name(save_target_name)
+
+        if not self.start_stack(
+            {"gain": gain, "restart": True, "stack_type": stack_type}
+        ):
+            msg = "Failed to start stacking."
+            self.logger.warning(msg)
+            cur_item["action"] = msg
+            return "failed"
+
+        item_remaining_time_s = cur_item.get("item_remaining_time_s", 0)
+
+        def show_panel_progress(remaining):
+            threading.current_thread().last_run = datetime.now()
+            cur_item["panel_remaining_time_s"] = round(remaining)
+            self.journal(
+                "panel",
+                panel=panel_string,
+                stacked_s=round(sleep_time_per_panel - remaining),
+            )
+            cur_item["item_remaining_time_s"] = max(
+                0, round(item_remaining_time_s - sleep_time_per_panel + remaining)
+            )
+
+        self.scheduler_wakeup.wait(
+            self.is_scheduler_interrupted, sleep_time_per_panel, show_panel_progress
+        )
+        if self.schedule["state"] != "working":
+            self.logger.info(
+                "Scheduler was requested to stop. Stopping at current mosaic."
+            )
+            cur_item["action"] = (
+                "Scheduler was requested to stop. Stopping at current mosaic."
+            )
+            self.stop_stack()
+            self.schedule["state"] = "stopped"
+            cur_item["panel_remaining_time_s"] = 0
+            cur_item["item_remaining_time_s"] = 0
+            return "stopped"
+        elif self.schedule["is_skip_requested"]:
+            self.logger.info(
+                "current mosaic stacking was requested to skip. Stopping at current mosaic."
+            )
+            return "skipped"
+        cur_item["panel_remaining_time_s"] = 0
+        cur_item["item_remaining_time_s"] = max(
+            0, item_remaining_time_s - sleep_time_per_panel
+        )
+        self.stop_stack()
+        msg = "Stacking operation finished " + save_target_name
+        self.logger.info(msg)
+        cur_item["action"] = msg
+        self.journal(
+            "panel", panel=panel_string, stacked_s=sleep_time_per_panel, done=True
+        )
+        # everything but the stacking itself: goto, focus, plate solve, ...
+        self.operation_stats.record(
+            "panel_overhead_af" if is_use_autofocus else "panel_overhead",
+            time.time() - panel_start - sleep_time_per_panel,
+        )
+        return "complete"
+
+    def order_panels_for_horizon(self, panel_list, panel_centers) -> list[str]:
+        """Reorder mosaic panels around the horizon mask.
+
+        Visible panels come first, those that set behind the mask soonest
+        leading; hidden panels follow in the order they clear it. Without a
+        mask the list is returned unchanged.
+        """
+        mask = get_horizon_mask(self.logger)
+        if mask is None or len(panel_list) < 2:
+            return list(panel_list)
+        ra = [panel_centers[panel][2] for panel in panel_list]
+        dec = [panel_centers[panel][3] for panel in panel_list]
+        until_visible, until_blocked = mask.visibility(
+            ra, dec, self.site_latitude, self.site_longitude
+        )
+        order = sorted(
+            range(len(panel_list)),
+            key=lambda k: (
+                (0, until_blocked[k])
+                if until_visible[k] == 0
+                else (1, until_visible[k])
+            ),
+        )
+        return [panel_list[k] for k in order]
+
+    def is_panel_hidden(self, panel_center) -> bool:
+        """Whether a (index_ra, index_dec, ra, dec) panel is behind the horizon mask now."""
+        mask = get_horizon_mask(self.logger)
+        if mask is None:
+            return False
+        _, _, ra, dec = panel_center
+        return (
+            mask.minutes_until_visible(
+                ra, dec, self.site_latitude, self.site_longitude, minutes=0
+            )
+            > 0
+        )
+
+    def wait_for_hidden_panels(self, panels, panel_centers) -> bool:
+        """Wait for the first of panels, all behind the horizon mask, to clear it.
+
+        Waits up to Config.horizon_mask_max_wait_min. Returns False without
+        waiting if none of them clears within that time.
+        """
+        mask = get_horizon_mask(self.logger)
+        if mask is None:
+            return True
+        max_wait_min = Config.horizon_mask_max_wait_min
+        until_visible, _ = mask.visibility(
+            [panel_centers[panel][2] for panel in panels],
+            [panel_centers[panel][3] for panel in panels],
+            self.site_latitude,
+            self.site_longitude,
+            minutes=max_wait_min,
+        )
+        soonest = float(np.min(until_visible))
+        if math.isinf(soonest):
+            self.logger.warning(
+                f"panels {', '.join(sorted(panels))} stay behind the horizon mask for the next {max_wait_min} minutes. Leaving them."
+            )
+            return False
+        # the mask is tracked a minute at a time
+        wait_s = max(60, round(soonest * 60))
+        msg = f"remaining panels are behind the horizon mask. Waiting {wait_s / 60:.0f} minutes for one to clear."
+        self.logger.info(msg)
+        self.event_state["scheduler"]["cur_scheduler_item"]["action"] = msg
+
+        def keep_alive(_remaining):
+            threading.current_thread().last_run = datetime.now()
+
+        self.scheduler_wakeup.wait(self.is_scheduler_interrupted, wait_s, keep_alive)
+        return True
+
+    def wait_for_queued_panel(self, panel_queue: MosaicPanelQueue) -> None:
+        """Wait for a panel to claim, for the queue to finish, or for a stop or skip."""
+        msg = "waiting for the other devices to finish their panels"
+        self.logger.info(msg)
+        self.event_state["scheduler"]["cur_scheduler_item"]["action"] = msg
+
+        def keep_alive(_remaining):
+            threading.current_thread().last_run = datetime.now()
+
+        self.scheduler_wakeup.wait(
+            lambda: panel_queue.num_pending() > 0
+            or panel_queue.is_done()
+            or self.is_scheduler_interrupted(),
+            on_tick=keep_alive,
+        )
+
+    def wait_for_horizon_mask(self, params: dict[str, Any], update_time) -> bool:
+        """Defer a schedule item whose target is behind the horizon mask.
+
+        Waits up to Config.horizon_mask_max_wait_min for the target to clear
+        the mask. Returns False if the item should be skipped instead: the
+        target stays hidden longer than that, or the scheduler was stopped
+        or asked to skip while waiting.
+        """
+        mask = get_horizon_mask(self.logger)
+        ra, dec = params.get("ra"), params.get("dec")
+        if mask is None or ra is None or dec is None:
+            return True
+        if not isinstance(ra, str) and ra == -1 and dec == -1:
+            return True
+        try:
+            ra, dec = Util.to_jnow(params.get("is_j2000", False), ra, dec)
+        except ValueError:
+            return True
+        target_name = params.get("target_name", "target")
+        max_wait_min = Config.horizon_mask_max_wait_min
+        until_visible, until_blocked = mask.visibility(
+            ra, dec, self.site_latitude, self.site_longitude, minutes=max_wait_min
+        )
+        if math.isinf(until_visible):
+            self.logger.warning(
+                f"{target_name} stays behind the horizon mask for the next {max_wait_min} minutes. Skipping it."
+            )
+            return False
+        if until_visible == 0:
+            if not math.isinf(until_blocked):
+                self.logger.info(
+                    f"{target_name} sets behind the horizon mask in {until_blocked:.0f} minutes"
+                )
+            return True
+
+        self.logger.info(
+            f"{target_name} is behind the horizon mask. Waiting {until_visible:.0f} minutes for it to clear."
+        )
+        remaining_s = round(until_visible * 60)
+        item_state: SchedulerItemState = {
+            "type": "wait_for_horizon",
+            "schedule_item_id": self.schedule["current_item_id"],
+            "action": f"wait for {target_name} to clear the horizon mask",
+            "remaining s": remaining_s,
+        }
+        self.update_scheduler_state_obj(item_state)
+
+        def show_remaining(remaining):
+            update_time()
+            self.event_state["scheduler"]["cur_scheduler_item"]["remaining s"] = round(
+                remaining
+            )
+
+        if self.scheduler_wakeup.wait(
+            self.is_scheduler_interrupted, remaining_s, show_remaining
+        ):
+            if self.schedule["is_skip_requested"]:
+                self.logger.info("requested to skip. Stopping horizon mask wait.")
+            return False
+        self.event_state["scheduler"]["cur_scheduler_item"]["remaining s"] = 0
+        return True
+
     def mosaic_thread_fn(
         self,
         target_name,
@@ -1968,27 +2402,34 @@ class Seestar:
         num_tries,
         retry_wait_s,
         stack_type="DeepSky",
+        panel_queue: Optional[MosaicPanelQueue] = None,
     ):
+        # with a panel_queue (federation_mode "dynamic") the panels are claimed
+        # one at a time from the queue shared with the rest of the federation
+        # and selected_panels is ignored.
         try:
-            spacing_result = Util.mosaic_next_center_spacing(
-                center_RA, center_Dec, overlap_percent
+            panel_centers = self.mosaic_panel_centers(
+                center_RA, center_Dec, nRA, nDec, overlap_percent
             )
-            delta_RA = spacing_result[0]
-            delta_Dec = spacing_result[1]
 
-            num_panels = nRA * nDec
-            is_use_selected_panels = not selected_panels == ""
-            if is_use_selected_panels:
+            if panel_queue is not None:
+                panel_list = []
+                num_panels = panel_queue.num_remaining()
+            elif selected_panels != "":
                 panel_set = selected_panels.split(";")
+                panel_list = [p for p in panel_centers if p in panel_set]
                 num_panels = len(panel_set)
             else:
-                panel_set = []
-
-            # adjust mosaic center if num panels is even
-            if nRA % 2 == 0:
-                center_RA += delta_RA / 2
-            if nDec % 2 == 0:
-                center_Dec += delta_Dec / 2
+                panel_list = list(panel_centers)
+                num_panels = len(panel_list)
+            # a resumed run skips the panels it finished before the restart
+            completed_panels = self.resume_panels.pop(
+                self.schedule["current_item_id"], set()
+            )
+            if completed_panels and panel_queue is None:
+                panel_list = [p for p in panel_list if p not in completed_panels]
+                num_panels = len(panel_list)
+            panel_list = self.order_panels_for_horizon(panel_list, panel_centers)
 
             sleep_time_per_panel = round(panel_time_sec)
 
@@ -2003,172 +2444,102 @@ class Seestar:
             }
             self.update_scheduler_state_obj(item_state)
 
-            cur_dec = center_Dec - int(nDec / 2) * delta_Dec
-            for index_dec in range(nDec):
-                spacing_result = Util.mosaic_next_center_spacing(
-                    center_RA, cur_dec, overlap_percent
-                )
-                delta_RA = spacing_result[0]
-                cur_ra = center_RA - int(nRA / 2) * spacing_result[0]
-                for index_ra in range(nRA):
-                    if self.schedule["state"] != "working":
-                        self.logger.info("Mosaic mode was requested to stop. Stopping")
-                        self.schedule["state"] = "stopped"
-                        return
-                    if self.schedule["is_skip_requested"]:
-                        self.logger.info(
-                            "current mosaic was requested to skip. Stopping at current mosaic."
-                        )
-                        return
-
-                    # check if we are doing a subset of the panels
-                    panel_string = str(index_ra + 1) + str(index_dec + 1)
-                    if is_use_selected_panels and panel_string not in panel_set:
-                        cur_ra += delta_RA
-                        continue
-
-                    self.event_state["scheduler"]["cur_scheduler_item"][
-                        "cur_ra_panel_num"
-                    ] = index_ra + 1
-                    self.event_state["scheduler"]["cur_scheduler_item"][
-                        "cur_dec_panel_num"
-                    ] = index_dec + 1
-
-                    if nRA == 1 and nDec == 1:
-                        save_target_name = target_name
-                    else:
-                        save_target_name = target_name + "_" + panel_string
-
-                    self.logger.info(
-                        "Stacking operation started for " + save_target_name
-                    )
-                    self.logger.info(
-                        "mosaic goto for panel %s, to location %s",
-                        panel_string,
-                        (cur_ra, cur_dec),
-                    )
+            panel_args = (
+                is_use_LP_filter,
+                sleep_time_per_panel,
+                gain,
+                is_use_autofocus,
+                num_tries,
+                retry_wait_s,
+                stack_type,
+            )
 
-                    # set_settings(x_stack_l, x_continuous, d_pix, d_interval, d_enable, l_enhance, heater_enable):
-                    # TODO: Need to set correct parameters
-                    self.send_message_param_sync(
-                        {"method": "set_setting", "params": {"stack_lenhance": False}}
-                    )
+            def save_name(panel_string):
+                if nRA == 1 and nDec == 1:
+                    return target_name
+                return target_name + "_" + panel_string
 
-                    for try_index in range(num_tries):
-                        try_count = try_index + 1
-                        self.event_state["scheduler"]["cur_scheduler_item"][
-                            "action"
-                        ] = f"attempt #{try_count} slewing to target panel centered at {cur_ra:.2f}, {cur_dec:.2f}"
-                        self.logger.info(
-                            f"Trying to readch target, attempt #{try_count}"
-                        )
-                        result = self.mosaic_goto_inner_worker(
-                            cur_ra,
-                            cur_dec,
-                            save_target_name,
-                            is_use_autofocus,
-                            is_use_LP_filter,
-                        )
-                        if result:
-                            break
+            if panel_queue is None:
+                deferred = set()
+                while panel_list:
+                    panel_string = panel_list.pop(0)
+                    if self.is_mosaic_stop_requested():
+                        return
+                    if self.is_panel_hidden(panel_centers[panel_string]):
+                        if panel_string in deferred or not panel_list:
+                            self.logger.warning(
+                                f"panel {panel_string} is behind the horizon mask. Skipping it."
+                            )
                         else:
-                            if try_count < num_tries:
-                                # wait as requested before the next try
-                                for i in range(round(retry_wait_s / 5)):
-                                    if self.schedule["state"] != "working":
-                                        self.logger.info(
-                                            "Scheduler was requested to stop. Stopping at current mosaic."
-                                        )
-                                        self.event_state["scheduler"][
-                                            "cur_scheduler_item"
-                                        ][
-                                            "action"
-                                        ] = "Scheduler was requested to stop. Stopping at current mosaic."
-                                        self.schedule["state"] = "stopped"
-                                        return
-                                    else:
-                                        waited_time = i * 5
-                                        msg = f"waited {waited_time}s of requested {retry_wait_s}s before retry GOTO target."
-                                        self.logger.info(msg)
-                                        self.event_state["scheduler"][
-                                            "cur_scheduler_item"
-                                        ]["action"] = msg
-                                    time.sleep(5)
-
-                    # if we failed goto
-                    if not result:
-                        msg = f"Failed to goto target after {num_tries} tries."
-                        self.logger.warning(msg)
-                        self.event_state["scheduler"]["cur_scheduler_item"][
-                            "action"
-                        ] = msg
-
-                        cur_ra += delta_RA
-                        continue
-
-                    msg = f"stacking the panel for {sleep_time_per_panel} seconds"
-                    self.logger.info(msg)
-                    self.event_state["scheduler"]["cur_scheduler_item"]["action"] = msg
-
-                    # be sure we are using the right target name before we stack
-                    self.set_target_name(save_target_name)
-
-                    if not self.start_stack(
-                        {"gain": gain, "restart": True, "stack_type": stack_type}
-                    ):
-                        msg = "Failed to start stacking."
-                        self.logger.warning(msg)
-                        self.event_state["scheduler"]["cur_scheduler_item"][
-                            "action"
-                        ] = msg
-
-                        cur_ra += delta_RA
+                            self.logger.info(
+                                f"panel {panel_string} is behind the horizon mask. Imaging it last."
+                            )
+                            deferred.add(panel_string)
+                            panel_list.append(panel_string)
                         continue
-
-                    panel_remaining_time_s = sleep_time_per_panel
-                    for i in range(round(sleep_time_per_panel / 5)):
-                        self.event_state["scheduler"]["cur_scheduler_item"][
-                            "panel_remaining_time_s"
-                        ] = panel_remaining_time_s
+                    result = self.mosaic_image_panel(
+                        save_name(panel_string),
+                        panel_centers[panel_string],
+                        *panel_args,
+                    )
+                    if result in ("stopped", "skipped"):
+                        return
+            else:
+                # panels found behind the horizon mask since the last one was
+                # imaged. Claiming one of them again means every panel left
+                # in the queue is hidden.
+                hidden = set()
+                panel_queue.add_waiter(self.scheduler_wakeup.notify)
+                try:
+                    while not self.is_mosaic_stop_requested():
+                        panel_string = panel_queue.claim(self.device_num)
+                        if panel_string is None:
+                            if panel_queue.is_done():
+                                break
+                            # the other scopes are still imaging; one of
+                            # their panels may fail or be put back
+                            self.wait_for_queued_panel(panel_queue)
+                            continue
+                        # the estimate covers what is left for the whole federation
                         self.event_state["scheduler"]["cur_scheduler_item"][
                             "item_remaining_time_s"
-                        ] = item_remaining_time_s
-                        threading.current_thread().last_run = datetime.now()
-
-                        if self.schedule["state"] != "working":
-                            self.logger.info(
-                                "Scheduler was requested to stop. Stopping at current mosaic."
-                            )
-                            self.event_state["scheduler"]["cur_scheduler_item"][
-                                "action"
-                            ] = "Scheduler was requested to stop. Stopping at current mosaic."
-                            self.stop_stack()
-                            self.schedule["state"] = "stopped"
-                            self.event_state["scheduler"]["cur_scheduler_item"][
-                                "panel_remaining_time_s"
-                            ] = 0
-                            self.event_state["scheduler"]["cur_scheduler_item"][
-                                "item_remaining_time_s"
-                            ] = 0
-                            return
-                        elif self.schedule["is_skip_requested"]:
-                            self.logger.info(
-                                "current mosaic stacking was requested to skip. Stopping at current mosaic."
+                        ] = sleep_time_per_panel * panel_queue.num_remaining()
+                        if panel_string not in panel_centers:
+                            self.logger.warning(
+                                f"panel {panel_string} is not part of the {nRA}x{nDec} mosaic"
                             )
+                            panel_queue.fail(panel_string, self.device_num)
+                            continue
+                        if self.is_panel_hidden(panel_centers[panel_string]):
+                            # a hidden panel is not an attempt: it goes to the
+                            # back of the queue and another panel is tried
+                            panel_queue.defer(panel_string)
+                            if panel_string not in hidden:
+                                self.logger.info(
+                                    f"panel {panel_string} is behind the horizon mask. Trying another panel."
+                                )
+                                hidden.add(panel_string)
+                            elif not self.wait_for_hidden_panels(hidden, panel_centers):
+                                break
+                            else:
+                                hidden.clear()
+                            continue
+                        hidden.clear()
+                        result = self.mosaic_image_panel(
+                            save_name(panel_string),
+                            panel_centers[panel_string],
+                            *panel_args,
+                        )
+                        if result == "complete":
+                            panel_queue.complete(panel_string, self.device_num)
+                        elif result == "failed":
+                            panel_queue.fail(panel_string, self.device_num)
+                        else:
+                            # let another scope pick the panel up
+                            panel_queue.release(panel_string)
                             return
-
-                        time.sleep(5)
-                        panel_remaining_time_s -= 5
-                        item_remaining_time_s -= 5
-                    self.event_state["scheduler"]["cur_scheduler_item"][
-                        "panel_remaining_time_s"
-                    ] = 0
-                    self.stop_stack()
-                    msg = "Stacking operation finished " + save_target_name
-                    self.logger.info(msg)
-                    self.event_state["scheduler"]["cur_scheduler_item"]["action"] = msg
-                    cur_ra += delta_RA
-                cur_dec += delta_Dec
+                finally:
+                    panel_queue.remove_waiter(self.scheduler_wakeup.notify)
             self.logger.info("Finished mosaic.")
             self.event_state["scheduler"]["cur_scheduler_item"][
                 "item_remaining_time_s"
@@ -2176,6 +2547,7 @@ class Seestar:
             self.event_state["scheduler"]["cur_scheduler_item"]["action"] = "complete"
         finally:
             self.is_cur_scheduler_item_working = False
+            self.scheduler_wakeup.notify()
 
     def start_mosaic_item(self, params: dict[str, Any]) -> None:
         self.is_cur_scheduler_item_working = False
@@ -2206,6 +2578,15 @@ class Seestar:
         num_tries = params.get("num_tries", 1)
         retry_wait_s = params.get("retry_wait_s", 300)
         stack_type = params.get("stack_type", "DeepSky")
+        panel_queue_id = params.get("panel_queue_id")
+        panel_queue = None
+        if panel_queue_id:
+            panel_queue = get_panel_queue(panel_queue_id)
+            if panel_queue is None:
+                self.logger.warning(
+                    f"Panel queue {panel_queue_id} for this mosaic no longer exists. Moving to next schedule item if any."
+                )
+                return
 
         # verify mosaic pattern
         if nRA < 1 or nDec < 0:
@@ -2219,9 +2600,7 @@ class Seestar:
             center_Dec = self.dec
             is_j2000 = False
 
-        parsed_coord = Util.parse_coordinate(is_j2000, center_RA, center_Dec)
-        center_RA = parsed_coord.ra.hour
-        center_Dec = parsed_coord.dec.deg
+        center_RA, center_Dec = Util.to_jnow(is_j2000, center_RA, center_Dec)
 
         response = self.send_message_param_sync({"method": "get_setting"})
         result = response["result"]
@@ -2255,6 +2634,8 @@ class Seestar:
         self.logger.info("  select panels : %s", selected_panels)
         self.logger.info("  # goto tries  : %s", num_tries)
         self.logger.info("  retry wait sec: %s", retry_wait_s)
+        if panel_queue is not None:
+            self.logger.info("  panel queue   : %s", panel_queue_id)
 
         self.is_cur_scheduler_item_working = True
         self.mosaic_thread = threading.Thread(
@@ -2273,6 +2654,7 @@ class Seestar:
                 num_tries,
                 retry_wait_s,
                 stack_type,
+                panel_queue=panel_queue,
             )
         )
         self.mosaic_thread.name = f"MosaicThread:{self.device_name}"
@@ -2286,6 +2668,55 @@ class Seestar:
 
         return self.schedule
 
+    def journal(self, op: str, **fields) -> None:
+        """Record a schedule change or progress step, if journaling is on."""
+        if self.schedule_journal is not None:
+            self.schedule_journal.record(op, **fields)
+
+    def restore_schedule(self, recovered: dict[str, Any]) -> None:
+        """Rebuild the schedule from the journal after a restart.
+
+        If the scheduler was running when the process died, the item and
+        panel it had reached are kept in schedule["resume"] for
+        resume_scheduler.
+        """
+        if not recovered["schedule_id"]:
+            return
+        self.schedule["schedule_id"] = recovered["schedule_id"]
+        self.schedule["list"] = collections.deque(recovered["list"])
+        if recovered["state"] == "working" and recovered["item_id"]:
+            self.schedule["resume"] = {
+                key: recovered[key]
+                for key in (
+                    "item_id",
+                    "item_number",
+                    "panel",
+                    "stacked_s",
+                    "completed_panels",
+                )
+            }
+            self.logger.info(
+                f"Recovered an interrupted schedule at item {recovered['item_number']}, panel {recovered['panel'] or '-'}"
+            )
+
+    def get_schedule_timeline(self, params=None):
+        """Predicted start/end of the remaining schedule items (see ScheduleTimeline)."""
+        timeline = self.schedule_timeline.update(
+            self.schedule, self.site_latitude, self.site_longitude
+        )
+        timeline["operation_stats"] = self.operation_stats.summary()
+        return timeline
+
+    def get_telemetry(self, params=None):
+        """Telemetry history for a time window (see TelemetryStore.query)."""
+        params = params or {}
+        return self.telemetry.query(
+            params.get("metrics"),
+            params.get("start"),
+            params.get("end"),
+            params.get("resolution", "auto"),
+        )
+
     def create_schedule(self, params):
         if self.schedule["state"] == "working":
             return "scheduler is still active"
@@ -2300,6 +2731,8 @@ class Seestar:
         self.schedule["schedule_id"] = schedule_id
         self.schedule["state"] = "stopped"
         self.schedule["list"].clear()
+        self.schedule.pop("resume", None)
+        self.journal("create", schedule_id=schedule_id)
         return self.schedule
 
     def construct_schedule_item(self, params):
@@ -2323,6 +2756,7 @@ class Seestar:
     def add_schedule_item(self, params) -> Schedule:
         new_item = self.construct_schedule_item(params)
         self.schedule["list"].append(new_item)
+        self.journal("add", item=new_item)
         return self.schedule
 
     def replace_schedule_item(self, params):
@@ -2349,6 +2783,7 @@ class Seestar:
             if item_id == targeted_item_id:
                 new_item = self.construct_schedule_item(params)
                 self.schedule["list"][index] = new_item
+                self.journal("replace", item_id=targeted_item_id, item=new_item)
                 break
             index += 1
         return self.schedule
@@ -2379,6 +2814,7 @@ class Seestar:
             if item_id == targeted_item_id:
                 new_item = self.construct_schedule_item(params)
                 self.schedule["list"].insert(index, new_item)
+                self.journal("insert", before_id=targeted_item_id, item=new_item)
                 break
             index += 1
         return self.schedule
@@ -2406,6 +2842,7 @@ class Seestar:
             item_id = item.get("schedule_item_id", "UNKNOWN")
             if item_id == targeted_item_id:
                 self.schedule["list"].remove(item)
+                self.journal("remove", item_id=targeted_item_id)
                 break
             index += 1
         return self.schedule
@@ -2439,11 +2876,15 @@ class Seestar:
         self.schedule["current_item_id"] = ""
         self.schedule["item_number"] = 9999
 
+        self.schedule.pop("resume", None)
+
         if not is_retain_state:
             self.schedule["schedule_id"] = str(uuid.uuid4())
             for item in self.schedule["list"]:
                 item["schedule_item_id"] = str(uuid.uuid4())
             self.schedule["state"] = "stopped"
+        if self.schedule_journal is not None:
+            self.schedule_journal.snapshot(self.schedule)
         return self.schedule
 
     # shortcut to start a new scheduler with only a mosaic request
@@ -2549,6 +2990,7 @@ class Seestar:
             self.schedule["item_number"] = params["start_item"]
         else:
             self.schedule["item_number"] = 1
+        self.schedule.pop("resume", None)
 
         self.scheduler_thread = threading.Thread(
             target=lambda: self.scheduler_thread_fn(), daemon=True
@@ -2565,10 +3007,34 @@ class Seestar:
     #                               "item_elapsed_time_s":123, "item_remaining_time":-1}
     #       }
 
+    def resume_scheduler(self, params):
+        """Restart an interrupted run at the item and panel it had reached."""
+        resume = self.schedule.get("resume")
+        if not resume:
+            return self.json_result(
+                "resume_scheduler", -1, "There is no interrupted schedule to resume."
+            )
+        self.resume_panels = {resume["item_id"]: set(resume["completed_panels"])}
+        result = self.start_scheduler({"start_item": resume["item_number"]})
+        if "resume" in self.schedule:
+            # start_scheduler refused, so keep the offer open
+            self.resume_panels = {}
+        else:
+            self.logger.info(
+                f"Resuming schedule at item {resume['item_number']}, skipping panels {sorted(resume['completed_panels'])}"
+            )
+        return result
+
     def scheduler_thread_fn(self):
         def update_time():
             threading.current_thread().last_run = datetime.now()
 
+        def tick(_remaining):
+            update_time()
+
+        def item_finished():
+            return not self.is_cur_scheduler_item_working
+
         self.logger.info(
             f"start run scheduler with seestar_alp version {Version.app_version}"
         )
@@ -2576,6 +3042,7 @@ class Seestar:
         self.schedule["state"] = "working"
         self.schedule["is_stacking"] = False
         self.schedule["is_stacking_paused"] = False
+        self.journal("state", state="working")
         issue_shutdown = False
         self.play_sound(80)
         self.logger.info(
@@ -2591,17 +3058,22 @@ class Seestar:
                 "schedule_item_id", "UNKNOWN"
             )
             self.schedule["item_number"] = index + 1
+            self.schedule_timeline.item_started(self.schedule["current_item_id"])
+            self.journal(
+                "item",
+                item_id=self.schedule["current_item_id"],
+                item_number=index + 1,
+            )
             action = cur_schedule_item["action"]
+            item_started = time.monotonic()
             if action == "start_mosaic":
-                self.start_mosaic_item(cur_schedule_item["params"])
-                while self.is_cur_scheduler_item_working:
-                    update_time()
-                    time.sleep(2)
+                if self.wait_for_horizon_mask(cur_schedule_item["params"], update_time):
+                    self.start_mosaic_item(cur_schedule_item["params"])
+                self.scheduler_wakeup.wait(item_finished, on_tick=tick)
             elif action == "start_spectra":
-                self.start_spectra_item(cur_schedule_item["params"])
-                while self.is_cur_scheduler_item_working:
-                    update_time()
-                    time.sleep(2)
+                if self.wait_for_horizon_mask(cur_schedule_item["params"], update_time):
+                    self.start_spectra_item(cur_schedule_item["params"])
+                self.scheduler_wakeup.wait(item_finished, on_tick=tick)
             elif action == "auto_focus":
                 item_state: SchedulerItemState = {
                     "type": "auto_focus",
@@ -2643,44 +3115,56 @@ class Seestar:
                     "remaining s": sleep_time,
                 }
                 self.update_scheduler_state_obj(item_state)
-                sleep_count = 0
-                while sleep_count < sleep_time and self.schedule["state"] == "working":
-                    if self.schedule["is_skip_requested"]:
-                        self.logger.info("requested to skip. Stopping wait_for.")
-                        break
+
+                def show_remaining(remaining):
                     update_time()
-                    time.sleep(5)
-                    sleep_count += 5
                     self.event_state["scheduler"]["cur_scheduler_item"][
                         "remaining s"
-                    ] = sleep_time - sleep_count
+                    ] = round(remaining)
 
+                if self.scheduler_wakeup.wait(
+                    self.is_scheduler_interrupted, sleep_time, show_remaining
+                ):
+                    if self.schedule["is_skip_requested"]:
+                        self.logger.info("requested to skip. Stopping wait_for.")
+                else:
+                    self.event_state["scheduler"]["cur_scheduler_item"][
+                        "remaining s"
+                    ] = 0
             elif action == "wait_until":
-                wait_until_time = cur_schedule_item["params"]["local_time"].split(":")
-                wait_until_hour = int(wait_until_time[0])
-                wait_until_minute = int(wait_until_time[1])
-                local_time = local_time = datetime.now()
+                local_time = cur_schedule_item["params"]["local_time"]
+                # a wall clock target, so a clock step or a late wake-up
+                # cannot skip past the minute
+                wake_time = time.time() + seconds_until_local_time(
+                    local_time, datetime.now()
+                )
                 item_state: SchedulerItemState = {
                     "type": "wait_until",
                     "schedule_item_id": self.schedule["current_item_id"],
-                    "action": f"wait until local time of {cur_schedule_item['params']['local_time']}",
+                    "action": f"wait until local time of {local_time}",
                 }
                 self.update_scheduler_state_obj(item_state)
-                while self.schedule["state"] == "working":
+
+                def show_current_time(_remaining):
                     update_time()
-                    local_time = datetime.now()
-                    if (
-                        local_time.hour == wait_until_hour
-                        and local_time.minute == wait_until_minute
-                    ):
-                        break
-                    elif self.schedule["is_skip_requested"]:
-                        self.logger.info("requested to skip. Stopping wait_until.")
-                        break
-                    time.sleep(5)
+                    now = datetime.now()
                     self.event_state["scheduler"]["cur_scheduler_item"][
                         "current time"
-                    ] = f"{local_time.hour:02d}:{local_time.minute:02d}"
+                    ] = f"{now.hour:02d}:{now.minute:02d}"
+
+                # the monotonic deadline is re-read from the wall clock every
+                # heartbeat in case the clock was stepped while waiting
+                while not self.is_scheduler_interrupted():
+                    remaining = wake_time - time.time()
+                    if remaining <= 0:
+                        break
+                    self.scheduler_wakeup.wait(
+                        self.is_scheduler_interrupted,
+                        min(remaining, self.scheduler_wakeup.heartbeat),
+                        show_current_time,
+                    )
+                if self.schedule["is_skip_requested"]:
+                    self.logger.info("requested to skip. Stopping wait_until.")
             elif action == "start_up_sequence":
                 item_state: SchedulerItemState = {
                     "type": "start up",
@@ -2696,15 +3180,15 @@ class Seestar:
                     ),
                 )
                 startup_thread.start()
-                time.sleep(2)
-                while startup_thread.is_alive():
-                    update_time()
-                    if self.schedule["state"] != "working":
-                        self.logger.info(
-                            "Scheduler stopped while start_up_sequence was running; exiting startup wait."
-                        )
-                        break
-                    time.sleep(2)
+                self.scheduler_wakeup.wait(
+                    lambda: not startup_thread.is_alive()
+                    or self.schedule["state"] != "working",
+                    on_tick=tick,
+                )
+                if startup_thread.is_alive():
+                    self.logger.info(
+                        "Scheduler stopped while start_up_sequence was running; exiting startup wait."
+                    )
             elif action == "action_set_dew_heater":
                 self.logger.info(
                     f"Trying to set dew heater to {cur_schedule_item['params']}"
@@ -2730,11 +3214,16 @@ class Seestar:
                 else:
                     request: MessageParams = {"method": action}
                 self.send_message_param_sync(request)
+            metrics.SCHEDULE_ITEM_SECONDS.labels(self.device_num, action).observe(
+                time.monotonic() - item_started
+            )
             index += 1
             self.schedule["is_skip_requested"] = False
 
         if self.schedule["state"] != "stopped":
             self.schedule["state"] = "complete"
+        self.journal("state", state=self.schedule["state"])
+        self.resume_panels = {}
         self.schedule["current_item_id"] = ""
         self.schedule["item_number"] = 0
         self.logger.info("Scheduler finished.")
@@ -2756,6 +3245,7 @@ class Seestar:
 
         if self.schedule["state"] == "working":
             self.schedule["state"] = "stopping"
+            self.scheduler_wakeup.notify()
             self.stop_slew()
             self.stop_stack()
             self.play_sound(83)
@@ -2787,18 +3277,17 @@ class Seestar:
         self.logger.info(f"Waiting for {in_op_name} to finish.")
         if in_op_name == "goto_target":
             self.mark_goto_status_as_start()
-            while self.is_goto():
-                time.sleep(1)
+            self.scheduler_wakeup.wait(lambda: not self.is_goto())
             result = self.is_goto_completed_ok()
         else:
             # self.event_state[in_op_name] = {"state":"stopped"}
             # "cancel" is treated as a terminal failure state — firmware can send this when
             # an operation is pre-empted or the device is not in the right mode (e.g. 7.06+).
             terminal_states = {"complete", "fail", "cancel"}
-            while in_op_name not in self.event_state or (
-                self.event_state[in_op_name]["state"] not in terminal_states
-            ):
-                time.sleep(1)
+            self.scheduler_wakeup.wait(
+                lambda: in_op_name in self.event_state
+                and self.event_state[in_op_name]["state"] in terminal_states
+            )
             result = self.event_state[in_op_name]["state"] == "complete"
 
         self.logger.info(f"Finished waiting for {in_op_name}. Result: {result}")
@@ -2856,6 +3345,9 @@ class Seestar:
         self.logger.info(f"event_callback_init({self}, {initial_state})")
         self.event_callbacks: list[EventCallback] = [
             BatteryWatch(self, initial_state),
+            OperationTimer(self, initial_state),
+            TelemetryRecorder(self, initial_state),
+            SchedulerWaker(self, initial_state),
             # SensorTempWatch(self, initial_state)
         ]
 
@@ -2903,6 +3395,10 @@ class Seestar:
                 )
                 self.get_msg_thread.name = f"IncomingMsgThread:{self.device_name}"
                 self.get_msg_thread.start()
+                # a pass is one socket read, or a failed reconnect
+                thread_watchdog.register(
+                    self.get_msg_thread, Config.timeout + 3, self.disconnect
+                )
 
                 self.heartbeat_msg_thread = threading.Thread(
                     target=self.heartbeat_message_thread_fn, daemon=True
@@ -2927,6 +3423,10 @@ class Seestar:
                         pass
                 # move start of heartbeat thread to here to avoid error with simulator
                 self.heartbeat_msg_thread.start()
+                # a pass sleeps 3s, and 5s more after a failed reconnect
+                thread_watchdog.register(
+                    self.heartbeat_msg_thread, Config.timeout + 10, self.disconnect
+                )
 
                 self.guest_mode_init()
                 self.event_callbacks_init(initial_state["result"])
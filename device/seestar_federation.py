@@ -1,7 +1,16 @@
 import threading
+import time
 import uuid
-from typing import Any
-
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+from device.config import Config
+from device.mosaic_panel_queue import (
+    MosaicPanelQueue,
+    get_panel_queue,
+    register_panel_queue,
+    remove_panel_queue,
+)
 from device.seestar_device import Schedule
 from seestar_util import Util
 import json
@@ -17,6 +26,64 @@ class DequeEncoder(JSONEncoder):
         return JSONEncoder.default(self, obj)
 
 
+class FederationExecutor:
+    """Run one call per connected device concurrently and collect the replies.
+
+    ``run`` returns as soon as every device has answered or the deadline has
+    passed, whichever comes first, so one hung scope no longer stalls the
+    whole fleet. A device that misses the deadline is reported as
+    ``{"timed_out": True, "error": ...}``; its call keeps running on the
+    pool and the late reply is dropped. A device whose call raises is
+    reported as ``{"error": ...}`` and does not affect the others.
+    """
+
+    def __init__(self, logger, max_workers: int = 32):
+        self.logger = logger
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="FederationWorker"
+        )
+
+    def run(
+        self,
+        devices: dict,
+        call: Callable[[Any], Any],
+        deadline_s: float | None = None,
+    ) -> dict:
+        if deadline_s is None:
+            deadline_s = Config.federation_timeout
+        futures = {}
+        for key, dev in list(devices.items()):
+            if dev.is_connected:
+                futures[key] = self._pool.submit(call, dev)
+        if not futures:
+            return {}
+
+        start = time.monotonic()
+        wait(futures.values(), timeout=deadline_s)
+        elapsed = time.monotonic() - start
+
+        result = {}
+        for key, future in futures.items():
+            if not future.done():
+                self.logger.warning(
+                    f"federation: device {key} did not reply within {deadline_s}s"
+                )
+                result[key] = {
+                    "timed_out": True,
+                    "error": f"No reply from device {key} within {deadline_s} seconds",
+                }
+                continue
+            try:
+                result[key] = future.result()
+            except Exception as ex:
+                self.logger.warning(f"federation: device {key} failed: {ex}")
+                result[key] = {"error": str(ex)}
+        self.logger.debug(
+            f"federation: {len(futures)} devices answered in {elapsed:.3f}s"
+        )
+        return result
+
+
 class Seestar_Federation:
     def __new__(cls, *args, **kwargs):
         # print("Create a new instance of Seestar.")
@@ -28,6 +95,7 @@ class Seestar_Federation:
         self.is_connected = True
         self.logger = logger
         self.seestar_devices = seestar_devices
+        self.executor = FederationExecutor(logger)
         self.schedule: Schedule = {
             "version": 1.0,
             "list": collections.deque(),
@@ -41,80 +109,41 @@ class Seestar_Federation:
     def reconnect(self) -> bool:
         return True
 
+    def _fan_out(self, call, deadline_s: float | None = None) -> dict:
+        return self.executor.run(self.seestar_devices, call, deadline_s)
+
     def get_event_state(self, params: dict | None = None):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].get_event_state(params)
-        return result
+        return self._fan_out(lambda dev: dev.get_event_state(params))
 
     def send_message_param_sync(self, data):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].send_message_param_sync(data)
-        return result
+        # each device gets its own copy: on a timeout send_message_param_sync
+        # writes the error into the dict it was handed
+        return self._fan_out(lambda dev: dev.send_message_param_sync(dict(data)))
 
     def goto_target(self, params):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].goto_target(params)
-        return result
+        return self._fan_out(lambda dev: dev.goto_target(params))
 
     def stop_goto_target(self):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].stop_goto_target()
-        return result
+        return self._fan_out(lambda dev: dev.stop_goto_target())
 
     def force_stop_goto(self):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].force_stop_goto()
-        return result
+        return self._fan_out(lambda dev: dev.force_stop_goto())
 
     def is_goto(self):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].is_goto()
-        return result
+        return self._fan_out(lambda dev: dev.is_goto())
 
     def is_goto_completed_ok(self):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].is_goto_completed_ok()
-        return result
+        return self._fan_out(lambda dev: dev.is_goto_completed_ok())
 
     def set_below_horizon_dec_offset(self, offset):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].set_below_horizon_dec_offset(
-                    offset
-                )
-        return result
+        return self._fan_out(lambda dev: dev.set_below_horizon_dec_offset(offset))
 
     def stop_slew(self):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].stop_slew()
-        return result
+        return self._fan_out(lambda dev: dev.stop_slew())
 
     # {"method":"scope_speed_move","params":{"speed":4000,"angle":270,"dur_sec":10}}
     def move_scope(self, in_angle, in_speed, in_dur=3):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].move_scope(
-                    in_angle, in_speed, in_dur
-                )
-        return result
+        return self._fan_out(lambda dev: dev.move_scope(in_angle, in_speed, in_dur))
 
     def try_auto_focus(self, try_count):
         result = {}
@@ -128,46 +157,22 @@ class Seestar_Federation:
         return result
 
     def stop_stack(self):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].stop_stack()
-        return result
+        return self._fan_out(lambda dev: dev.stop_stack())
 
     def play_sound(self, in_sound_id: int):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].play_sound(in_sound_id)
-        return result
+        return self._fan_out(lambda dev: dev.play_sound(in_sound_id))
 
     def start_stack(self, params={"gain": 80, "restart": True}):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].start_stack(params)
-        return result
+        return self._fan_out(lambda dev: dev.start_stack(params))
 
     def action_set_dew_heater(self, params):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].action_set_dew_heater(params)
-        return result
+        return self._fan_out(lambda dev: dev.action_set_dew_heater(params))
 
     def action_set_exposure(self, params):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].action_set_exposure(params)
-        return result
+        return self._fan_out(lambda dev: dev.action_set_exposure(params))
 
     def action_start_up_sequence(self, params):
-        result = {}
-        for key in self.seestar_devices:
-            if self.seestar_devices[key].is_connected:
-                result[key] = self.seestar_devices[key].action_start_up_sequence(params)
-        return result
+        return self._fan_out(lambda dev: dev.action_start_up_sequence(params))
 
     def get_schedule(self, params):
         if "schedule_id" in params:
@@ -193,9 +198,22 @@ class Seestar_Federation:
                     availiable_device_list.append(key)
                 result["device"][key] = device_schedule
         result["available_device_list"] = availiable_device_list
+        mosaic_panels = {}
+        for queue_id in result.get("panel_queue_ids", []):
+            panel_queue = get_panel_queue(queue_id)
+            if panel_queue is not None:
+                mosaic_panels[queue_id] = panel_queue.get_status()
+        if mosaic_panels:
+            result["mosaic_panels"] = mosaic_panels
         result["comment"] = "Test comment"
         return result
 
+    def get_schedule_timeline(self, params=None):
+        return self._fan_out(lambda dev: dev.get_schedule_timeline(params))
+
+    def get_telemetry(self, params=None):
+        return self._fan_out(lambda dev: dev.get_telemetry(params))
+
     def create_schedule(self, params):
         self.schedule = {
             "list": collections.deque(),
@@ -316,22 +334,23 @@ class Seestar_Federation:
 
     # cur_params['selected_panels'] cur_params['ra_num'], cur_params['dec_num']
     # split selected panels into multiple sections. Given num_devices > 1 and num ra and dec is > 1
+    def get_panel_array_for_mosaic(self, params):
+        if "selected_panels" in params and params["selected_panels"] != "":
+            return params["selected_panels"].split(";")
+
+        panel_array = []
+        for n_dec in range(params["dec_num"]):
+            for n_ra in range(params["ra_num"]):
+                panel_array.append(f"{n_ra + 1}{n_dec + 1}")
+        return panel_array
+
     def get_section_array_for_mosaic(self, device_id_list, params):
         num_devices = len(device_id_list)
         if num_devices == 0:
             raise Exception("there is no active device connected!")
 
-        if "selected_panels" in params and params["selected_panels"] != "":
-            panel_array = params["selected_panels"].split(";")
-            num_panels = len(panel_array)
-        else:
-            num_panels = params["dec_num"] * params["ra_num"]
-            panel_array = [""] * num_panels
-            index = 0
-            for n_dec in range(params["dec_num"]):
-                for n_ra in range(params["ra_num"]):
-                    panel_array[index] = f"{n_ra + 1}{n_dec + 1}"
-                    index += 1
+        panel_array = self.get_panel_array_for_mosaic(params)
+        num_panels = len(panel_array)
         start_index = 0
 
         num_panels_per_device = int(num_panels / num_devices)
@@ -393,6 +412,10 @@ class Seestar_Federation:
             cur_device = self.seestar_devices[key]
             cur_device.create_schedule(params)
 
+        for queue_id in self.schedule.get("panel_queue_ids", []):
+            remove_panel_queue(queue_id)
+        self.schedule["panel_queue_ids"] = []
+
         for schedule_item in self.schedule["list"]:
             if "params" not in schedule_item:
                 cur_params = {}
@@ -400,7 +423,7 @@ class Seestar_Federation:
                 cur_params = schedule_item["params"].copy()
 
             if schedule_item["action"] == "start_mosaic":
-                # federation_mode : duplicate, by_panels or by_time
+                # federation_mode : duplicate, by_panels, by_time or dynamic
                 if "federation_mode" not in cur_params or num_devices == 1:
                     cur_params["federation_mode"] = "duplicate"
                 elif cur_params["federation_mode"] == "by_time":
@@ -413,6 +436,18 @@ class Seestar_Federation:
                         available_devices, cur_params
                     )
                     self.logger.info(f"federation mode split ->  {section_dict}")
+                elif cur_params["federation_mode"] == "dynamic":
+                    # every device claims panels from one shared queue as it goes
+                    panel_queue = MosaicPanelQueue(
+                        self.get_panel_array_for_mosaic(cur_params),
+                        max_attempts=cur_params.get("panel_max_attempts", 2),
+                        logger=self.logger,
+                    )
+                    cur_params["panel_queue_id"] = register_panel_queue(panel_queue)
+                    self.schedule["panel_queue_ids"].append(panel_queue.queue_id)
+                    self.logger.info(
+                        f"federation mode dynamic -> queue {panel_queue.queue_id}: {panel_queue.get_status()['num_panels']} panels"
+                    )
 
                 for key in available_devices:
                     cur_device = self.seestar_devices[key]
@@ -444,9 +479,7 @@ class Seestar_Federation:
         return self.get_schedule(params)
 
     def stop_scheduler(self, params: dict):
-        result = {}
-        for key in self.seestar_devices:
-            cur_device = self.seestar_devices[key]
-            if cur_device.is_connected:
-                result[key] = cur_device.stop_scheduler(params)
-        return result
+        return self._fan_out(lambda dev: dev.stop_scheduler(params))
+
+    def resume_scheduler(self, params: dict):
+        return self._fan_out(lambda dev: dev.resume_scheduler(params))
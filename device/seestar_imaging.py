@@ -10,7 +10,7 @@
 import datetime
 import os
 import threading
-from time import sleep, time
+from time import perf_counter, sleep, time
 from typing import Optional
 
 from flask import Flask, Response
@@ -20,7 +20,7 @@ from blinker import signal
 
 import sys
 
-from device import log
+from device import log, metrics
 from device.analysis.snr_analysis import SNRAnalysis
 from device.protocols.imager import SeestarImagerProtocol, ExposureModes
 from device.config import Config
@@ -117,7 +117,7 @@ class SeestarImaging:
     def event_handler(self, event):
         try:
             match event["Event"]:
-                case "Stack":
+                case "Stack" | "Simu_Stack":  # the simulator sends Simu_Stack
                     stacked_frame = event["stacked_frame"] + event["dropped_frame"]
                     # xxx change to just stacked frame _or_ initial request?
                     if (
@@ -256,6 +256,7 @@ class SeestarImaging:
         return exposure_mode
 
     def build_frame_bytes(self, image: np.ndarray, width: int, height: int):
+        started = perf_counter()
         font = cv2.FONT_HERSHEY_COMPLEX
 
         dt = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-5]
@@ -276,10 +277,21 @@ class SeestarImaging:
         imgencode = cv2.imencode(".jpeg", image)[1]
         stringData = imgencode.tobytes()
         frame = b"Content-Type: image/jpeg\r\n\r\n" + stringData + self.BOUNDARY
+        metrics.MJPEG_ENCODE_SECONDS.labels(self.device_num).observe(
+            perf_counter() - started
+        )
 
         return frame
 
     def get_frame(self):
+        viewers = metrics.MJPEG_VIEWERS.labels(self.device_num)
+        viewers.inc()
+        try:
+            yield from self._get_frame()
+        finally:
+            viewers.dec()
+
+    def _get_frame(self):
         # xxx : We want to be able to manually switch between preview and stack modes.
         #       If stage is RTSP, we force switch to stream exposure mode.
         # .      If stage is Stack, and exposure mode preview, leave it alone.
@@ -332,6 +344,7 @@ class SeestarImaging:
 
                         # Update stats!
                         self.sent_frame += 1
+                        metrics.MJPEG_FRAMES_SENT.labels(self.device_num).inc()
 
                         now = int(time())
                         if self.last_stat_time != now:
@@ -342,6 +355,9 @@ class SeestarImaging:
                             ):
                                 elapsed = now - self.last_stat_time
                                 frames = self.sent_frame - self.last_stat_frames
+                                metrics.MJPEG_SENT_FPS.labels(self.device_num).set(
+                                    frames / elapsed
+                                )
                                 self.logger.debug(
                                     f"Sent frames: {frames} in {elapsed} seconds.  FPS: {frames / elapsed}.  Received frame total: {self.received_frame}"
                                 )
@@ -351,6 +367,8 @@ class SeestarImaging:
 
                         self.last_frame = received_frame
                         self.snr = snr
+                        if snr is not None and snr >= 0 and self.device is not None:
+                            self.device.telemetry.record("snr", snr)
 
                         first_image = True
                         # ts = time()
@@ -1,4 +1,6 @@
+import functools
 import geocoder
+import re
 from datetime import datetime, timezone
 from astropy.coordinates import FK5, SkyCoord, AltAz
 from astropy.time import Time
@@ -6,6 +8,61 @@ import astropy.units as u
 import math
 import numpy as np
 
+from device.altaz_kernel import UNIX_EPOCH_JD, julian_date, precession_matrix
+from device.config import Config
+
+# "12h30m05.2s", "-05d23m28s", "12 30 05.2", "12:30", "12h", "187.5", ...
+_SEXAGESIMAL = re.compile(
+    r"""^\s*(?P<sign>[+-])?\s*
+    (?P<whole>\d+(?:\.\d*)?|\.\d+)
+    (?:\s*(?:[hd:]\s*|\s+)
+        (?P<minutes>\d+(?:\.\d*)?)
+        (?:\s*(?:[m:]\s*|\s+)(?P<seconds>\d+(?:\.\d*)?)\s*s?|\s*m?)
+    )?\s*[hd]?\s*$""",
+    re.VERBOSE | re.IGNORECASE,
+)
+
+
+def _parse_one(value) -> float:
+    if not isinstance(value, str):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    match = _SEXAGESIMAL.match(value)
+    if match is None:
+        return math.nan
+    whole, minutes, seconds = match.group("whole", "minutes", "seconds")
+    result = float(whole) + float(minutes or 0) / 60.0 + float(seconds or 0) / 3600.0
+    return -result if match.group("sign") == "-" else result
+
+
+def parse_sexagesimal(values) -> np.ndarray:
+    """Parse RA hours or Dec degrees, as strings or numbers, into a float array.
+
+    Values that cannot be parsed become NaN.
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in "fiu":
+        return values.astype(float)
+    if isinstance(values, (str, int, float)):
+        values = [values]
+    return np.fromiter((_parse_one(v) for v in values), dtype=float)
+
+
+@functools.lru_cache(maxsize=4)
+def _jnow_rotation(epoch: int, interval_s: float) -> np.ndarray:
+    jd = (epoch + 0.5) * interval_s / 86400.0 + UNIX_EPOCH_JD
+    return np.array(precession_matrix(jd))
+
+
+def jnow_rotation(when=None) -> np.ndarray:
+    """J2000 to the mean equator and equinox of date, reused for
+    Config.jnow_equinox_interval_s."""
+    interval_s = max(float(Config.jnow_equinox_interval_s), 1.0)
+    unix_time = (julian_date(when) - UNIX_EPOCH_JD) * 86400.0
+    return _jnow_rotation(int(unix_time // interval_s), interval_s)
+
 
 class Util:
     @staticmethod
@@ -49,6 +106,44 @@ class Util:
             result = result.transform_to(_fk5)
         return result
 
+    @staticmethod
+    def parse_coordinates(is_j2000, in_ra, in_dec, when=None):
+        """Batched parse_coordinate: JNow RA (hours) and Dec (degrees) arrays.
+
+        in_ra/in_dec are sequences of strings or numbers (or a single value).
+        Raises ValueError if any of them cannot be parsed.
+        """
+        ra = parse_sexagesimal(in_ra)
+        dec = parse_sexagesimal(in_dec)
+        if ra.shape != dec.shape:
+            raise ValueError(f"{len(ra)} RA values but {len(dec)} Dec values")
+        bad = np.isnan(ra) | np.isnan(dec)
+        if bad.any():
+            k = int(np.argmax(bad))
+            raise ValueError(
+                f"Invalid coordinate: {np.atleast_1d(in_ra)[k]} {np.atleast_1d(in_dec)[k]}"
+            )
+        if not is_j2000:
+            return ra, dec
+        ra_rad, dec_rad = np.radians(ra * 15.0), np.radians(dec)
+        cos_dec = np.cos(dec_rad)
+        vectors = (
+            np.stack(
+                [cos_dec * np.cos(ra_rad), cos_dec * np.sin(ra_rad), np.sin(dec_rad)],
+                axis=-1,
+            )
+            @ jnow_rotation(when).T
+        )
+        ra = np.degrees(np.arctan2(vectors[:, 1], vectors[:, 0])) / 15.0 % 24.0
+        dec = np.degrees(np.arcsin(np.clip(vectors[:, 2], -1.0, 1.0)))
+        return ra, dec
+
+    @staticmethod
+    def to_jnow(is_j2000, in_ra, in_dec, when=None):
+        """One coordinate as JNow (ra_hours, dec_degrees) floats."""
+        ra, dec = Util.parse_coordinates(is_j2000, [in_ra], [in_dec], when)
+        return float(ra[0]), float(dec[0])
+
     # take into account ra spacing factor changes depends on dec position as 1/cos(dec)
     @staticmethod
     def mosaic_next_center_spacing(in_ra, in_dec, overlap_percent):
@@ -0,0 +1,215 @@
+#
+# telemetry_store - recent history of a scope's battery, temperature, stack,
+# focuser and SNR readings
+#
+# event_state only keeps the latest event of each kind. The store keeps every
+# reading of the fields in TELEMETRY_FIELDS in preallocated NumPy ring
+# buffers, one set per device, in two tiers: raw samples for the last hour
+# and one-minute means for the last day. The buffer sizes are worked out from
+# a memory budget up front, so a scope streaming events all night never grows
+# the process.
+#
+import math
+import threading
+import time
+
+import numpy as np
+
+# event name -> {event field: metric}
+TELEMETRY_FIELDS = {
+    "PiStatus": {
+        "battery_capacity": "battery",
+        "temp": "temperature",
+        "battery_temp": "battery_temperature",
+    },
+    "Stack": {"stacked_frame": "stacked_frames", "dropped_frame": "dropped_frames"},
+    # the simulator reports its stack progress under its own event name
+    "Simu_Stack": {
+        "stacked_frame": "stacked_frames",
+        "dropped_frame": "dropped_frames",
+    },
+    "FocuserMove": {"position": "focuser_position"},
+}
+# recorded by the imaging side rather than from an event
+IMAGING_METRICS = ("snr",)
+METRICS = tuple(
+    dict.fromkeys(
+        [metric for fields in TELEMETRY_FIELDS.values() for metric in fields.values()]
+        + list(IMAGING_METRICS)
+    )
+)
+
+RAW_WINDOW_S = 3600
+MINUTE_WINDOW_S = 24 * 3600
+# a timestamp and a value
+SAMPLE_BYTES = np.dtype(np.float64).itemsize + np.dtype(np.float32).itemsize
+MINUTE_SLOTS = MINUTE_WINDOW_S // 60
+# more than one raw sample a second makes a longer chart, not a better one
+MAX_RAW_SLOTS = RAW_WINDOW_S
+
+
+class _Ring:
+    """Timestamps and values in fixed arrays, overwriting the oldest sample."""
+
+    __slots__ = ("times", "values", "count")
+
+    def __init__(self, slots: int):
+        self.times = np.zeros(slots, dtype=np.float64)
+        self.values = np.zeros(slots, dtype=np.float32)
+        self.count = 0
+
+    def append(self, t: float, value: float) -> None:
+        index = self.count % len(self.times)
+        self.times[index] = t
+        self.values[index] = value
+        self.count += 1
+
+    def last_time(self) -> float:
+        if self.count == 0:
+            return -math.inf
+        return float(self.times[(self.count - 1) % len(self.times)])
+
+    def window(self, start: float, end: float) -> tuple[np.ndarray, np.ndarray]:
+        """The samples from start to end, oldest first."""
+        slots = len(self.times)
+        if self.count <= slots:
+            times, values = self.times[: self.count], self.values[: self.count]
+        else:
+            oldest = self.count % slots
+            times = np.roll(self.times, -oldest)
+            values = np.roll(self.values, -oldest)
+        keep = (times >= start) & (times <= end)
+        return times[keep], values[keep]
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.values.nbytes
+
+
+class _Series:
+    __slots__ = ("raw", "minutes", "raw_interval", "minute", "sum", "n")
+
+    def __init__(self, raw_slots: int):
+        self.raw = _Ring(raw_slots)
+        self.minutes = _Ring(MINUTE_SLOTS)
+        self.raw_interval = RAW_WINDOW_S / raw_slots
+        self.minute = None
+        self.sum = 0.0
+        self.n = 0
+
+    def add(self, t: float, value: float) -> None:
+        minute = int(t // 60)
+        if minute != self.minute:
+            self.close_minute()
+            self.minute = minute
+        # every reading counts towards the minute's mean, but the raw tier
+        # keeps at most one per raw_interval so it always spans the hour
+        self.sum += value
+        self.n += 1
+        if t - self.raw.last_time() >= self.raw_interval:
+            self.raw.append(t, value)
+
+    def close_minute(self) -> None:
+        if self.n:
+            self.minutes.append(self.minute * 60.0, self.sum / self.n)
+        self.sum = 0.0
+        self.n = 0
+
+    def minute_window(self, start: float, end: float):
+        times, values = self.minutes.window(start, end)
+        # the minute in progress, so a chart does not lag a minute behind
+        if self.n and start <= self.minute * 60.0 <= end:
+            times = np.append(times, self.minute * 60.0)
+            values = np.append(values, np.float32(self.sum / self.n))
+        return times, values
+
+
+class TelemetryStore:
+    """Time series of one device's telemetry, within a fixed memory budget.
+
+    Each metric gets MINUTE_SLOTS one-minute means and as many raw slots as
+    the rest of budget_kb allows, up to one a second. query() reads the raw
+    tier for windows within the last hour and the minute tier for longer
+    ones. A budget too small for the minute tier and 60 raw slots per metric
+    gets those anyway.
+    """
+
+    def __init__(self, budget_kb: int = 512):
+        per_metric = budget_kb * 1024 // len(METRICS) // SAMPLE_BYTES
+        self.raw_slots = max(60, min(MAX_RAW_SLOTS, per_metric - MINUTE_SLOTS))
+        self._lock = threading.Lock()
+        self._series = {metric: _Series(self.raw_slots) for metric in METRICS}
+
+    def record(self, metric: str, value, t: float | None = None) -> None:
+        series = self._series.get(metric)
+        if series is None or value is None:
+            return
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return
+        if math.isnan(value):
+            return
+        with self._lock:
+            series.add(time.time() if t is None else t, value)
+
+    def record_event(self, event: dict) -> bool:
+        """Record the telemetry fields of a scope event.
+
+        Returns whether the event was one of TELEMETRY_FIELDS.
+        """
+        fields = TELEMETRY_FIELDS.get(event.get("Event"))
+        if fields is None:
+            return False
+        now = time.time()
+        for field, metric in fields.items():
+            if field in event:
+                self.record(metric, event[field], now)
+        return True
+
+    def query(
+        self,
+        metrics=None,
+        start: float | None = None,
+        end: float | None = None,
+        resolution: str = "auto",
+    ) -> dict:
+        """Samples of metrics (all by default) between start and end.
+
+        Times are Unix seconds; the window defaults to the last hour.
+        resolution is "raw", "1m" or "auto", which picks raw when the window
+        starts within the last hour.
+        """
+        now = time.time()
+        end = now if end is None else float(end)
+        start = end - RAW_WINDOW_S if start is None else float(start)
+        if resolution == "auto":
+            resolution = "raw" if start >= now - RAW_WINDOW_S else "1m"
+        if resolution not in ("raw", "1m"):
+            raise ValueError(f"unknown resolution {resolution}")
+        names = METRICS if metrics is None else metrics
+
+        result = {}
+        with self._lock:
+            for metric in names:
+                series = self._series.get(metric)
+                if series is None:
+                    raise ValueError(f"unknown telemetry metric {metric}")
+                if resolution == "raw":
+                    times, values = series.raw.window(start, end)
+                else:
+                    times, values = series.minute_window(start, end)
+                result[metric] = {
+                    "t": np.round(times, 3).tolist(),
+                    "v": np.round(values.astype(np.float64), 3).tolist(),
+                }
+        return {
+            "start": start,
+            "end": end,
+            "resolution": resolution,
+            "metrics": result,
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return sum(s.raw.nbytes + s.minutes.nbytes for s in self._series.values())
@@ -27,7 +27,10 @@ from device.seestar_device import Seestar
 from device.seestar_federation import Seestar_Federation
 from alpaca.telescope import *
 import json
+import time
+from device import metrics
 from device.seestar_util import Util  # RWR
+from device.altaz_kernel import equatorial_to_altaz
 
 # logger: Logger = None
 
@@ -169,6 +172,8 @@ class action:
         else:
             cur_dev = seestar_dev[devnum]
 
+        started = time.perf_counter()
+        action_label = action_name
         try:
             result = ""
 
@@ -179,17 +184,26 @@ class action:
                 "get_view_state",
             ]:
                 cur_dev.logger.debug(
-                    f"request: {action_name} for device {devnum} with param {parameters}"
+                    "request: %s for device %s with param %s",
+                    action_name,
+                    devnum,
+                    parameters,
                 )
                 log_debug = True
-            elif action_name in ["get_event_state", "get_view_state"]:
+            elif action_name in ["get_event_state", "get_view_state", "get_telemetry"]:
                 cur_dev.logger.debug(
-                    f"request: {action_name} for device {devnum} with param {parameters}"
+                    "request: %s for device %s with param %s",
+                    action_name,
+                    devnum,
+                    parameters,
                 )
                 log_debug = True
             else:
                 cur_dev.logger.info(
-                    f"request: {action_name} for device {devnum} with param {parameters}"
+                    "request: %s for device %s with param %s",
+                    action_name,
+                    devnum,
+                    parameters,
                 )
 
             # print(f'Received request: Action {action_name} with params {params}')
@@ -242,6 +256,12 @@ class action:
             elif action_name == "get_schedule":
                 result = cur_dev.get_schedule(params)
                 resp.text = MethodResponse(req, value=result).json
+            elif action_name == "get_schedule_timeline":
+                result = cur_dev.get_schedule_timeline(params)
+                resp.text = MethodResponse(req, value=result).json
+            elif action_name == "get_telemetry":
+                result = cur_dev.get_telemetry(params)
+                resp.text = MethodResponse(req, value=result).json
             elif action_name == "create_schedule":
                 result = cur_dev.create_schedule(params)
                 resp.text = MethodResponse(req, value=result).json
@@ -263,6 +283,9 @@ class action:
             elif action_name == "stop_scheduler":
                 result = cur_dev.stop_scheduler(params)
                 resp.text = MethodResponse(req, value=result).json
+            elif action_name == "resume_scheduler":
+                result = cur_dev.resume_scheduler(params)
+                resp.text = MethodResponse(req, value=result).json
             elif action_name == "export_schedule":
                 result = cur_dev.export_schedule(params)
                 resp.text = MethodResponse(req, value=result).json
@@ -303,10 +326,13 @@ class action:
             elif action_name == "skip_scheduler_cur_item":
                 result = cur_dev.skip_scheduler_cur_item(params)
                 resp.text = MethodResponse(req, value=result).json
+            else:
+                # keep made-up action names out of the metric labels
+                action_label = "unknown"
             if log_debug:
-                cur_dev.logger.debug(f"response: {result}")
+                cur_dev.logger.debug("response: %s", result)
             else:
-                cur_dev.logger.info(f"response: {result}")
+                cur_dev.logger.info("response: %s", result)
 
             if hasattr(cur_dev, "event_callbacks"):
                 event_name = f"action_{action_name}"
@@ -321,6 +347,9 @@ class action:
                 req, DevDriverException(0x500, "\n".join(ex.args), ex)
             ).json
             cur_dev.logger.warn(f"Error making request: {ex}")
+        metrics.ALPACA_ACTION_SECONDS.labels(devnum, action_label).observe(
+            time.perf_counter() - started
+        )
 
 
 @before(PreProcessRequest(maxdev))
@@ -419,6 +448,12 @@ class alignmentmode:
             ).json
 
 
+def current_altaz(dev):
+    # the mount's JNow RA/Dec snapshot at the Alpaca site; no refraction,
+    # matching DoesRefraction
+    return equatorial_to_altaz(dev.ra, dev.dec, dev.site_latitude, dev.site_longitude)
+
+
 @before(PreProcessRequest(maxdev))
 class altitude:
     def on_get(self, req: Request, resp: Response, devnum: int):
@@ -429,7 +464,7 @@ class altitude:
             return
         try:
             # ----------------------
-            val = 0
+            val = current_altaz(seestar_dev[devnum])[0]
             # ----------------------
             resp.text = PropertyResponse(val, req).json
         except Exception as ex:
@@ -528,7 +563,7 @@ class azimuth:
             return
         try:
             # ----------------------
-            val = 0
+            val = current_altaz(seestar_dev[devnum])[1]
             # ----------------------
             resp.text = PropertyResponse(val, req).json
         except Exception as ex:
@@ -0,0 +1,199 @@
+#
+# thread_watchdog - notices worker loops that stopped going round
+#
+# Every worker loop stamps threading.current_thread().last_run on each pass.
+# The connection loops register here with how often they are expected to get
+# back to that stamp. The watchdog thread samples the stamps, exports how far
+# each loop is behind on /metrics and, once a loop has missed a few periods,
+# logs the Python stack of its thread. A recv that never returns or a
+# deadlock then shows up in the log instead of only as a frozen UI.
+#
+# Optionally the watchdog drops the connection of a stalled loop so it is
+# reopened, and pings systemd's watchdog while every loop is healthy, so a
+# unit with WatchdogSec gets restarted when a loop stays stuck.
+#
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Callable, Optional
+
+from device import metrics
+from device.config import Config
+
+
+class _Loop:
+    __slots__ = ("thread", "period", "on_stall", "last_run", "changed", "stalled")
+
+    def __init__(self, thread: threading.Thread, period: float, on_stall):
+        self.thread = thread
+        self.period = period
+        self.on_stall = on_stall
+        self.last_run = getattr(thread, "last_run", None)
+        self.changed = time.monotonic()
+        self.stalled = False
+
+
+class ThreadWatchdog:
+    """Samples the last_run stamps of registered worker loops.
+
+    A loop's age is the time since its stamp was last seen to change, measured
+    on the monotonic clock, so setting the wall clock (NTP on a Pi without an
+    RTC) does not look like a stall. Its lag is how much longer than its period
+    that is. A loop older than stall_factor periods is stalled: its stack is
+    logged and its on_stall callback run once, until it moves again.
+    """
+
+    def __init__(
+        self,
+        logger=None,
+        stall_factor: float = 3.0,
+        reconnect: bool = False,
+        notify: Optional[Callable[[str], None]] = None,
+    ):
+        self.logger = logger
+        self.stall_factor = stall_factor
+        self.reconnect = reconnect
+        self.notify = notify
+        self._loops: dict[threading.Thread, _Loop] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(
+        self,
+        thread: threading.Thread,
+        period: float,
+        on_stall: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Watch thread, whose loop stamps last_run at least every period seconds.
+
+        on_stall is run on its own thread when the loop stalls and reconnect
+        is enabled; it should drop the connection the loop is waiting on.
+        """
+        with self._lock:
+            self._loops[thread] = _Loop(thread, period, on_stall)
+
+    def unregister(self, thread: threading.Thread) -> None:
+        with self._lock:
+            self._loops.pop(thread, None)
+            name_in_use = any(t.name == thread.name for t in self._loops)
+        if not name_in_use:
+            metrics.THREAD_LAG_SECONDS.remove(thread.name)
+
+    def check(self) -> list[str]:
+        """Samples every loop once and returns the names of the stalled ones."""
+        now = time.monotonic()
+        with self._lock:
+            loops = list(self._loops.values())
+        stalled = []
+        for loop in loops:
+            thread = loop.thread
+            if thread.ident is not None and not thread.is_alive():
+                self.unregister(thread)
+                continue
+
+            last_run = getattr(thread, "last_run", None)
+            if last_run != loop.last_run:
+                loop.last_run = last_run
+                loop.changed = now
+            age = now - loop.changed
+            metrics.THREAD_LAG_SECONDS.labels(thread.name).set(
+                max(0.0, age - loop.period)
+            )
+
+            if age <= loop.period * self.stall_factor:
+                if loop.stalled:
+                    loop.stalled = False
+                    self._log("info", "Thread %s is running again", thread.name)
+                continue
+
+            stalled.append(thread.name)
+            if loop.stalled:
+                continue
+            loop.stalled = True
+            metrics.THREAD_STALLS.labels(thread.name).inc()
+            self._log(
+                "warning",
+                "Thread %s stalled: no pass for %.0fs, expected every %.0fs\n%s",
+                thread.name,
+                age,
+                loop.period,
+                self.format_stack(thread),
+            )
+            if self.reconnect and loop.on_stall is not None:
+                # on_stall may need a lock the stalled thread is holding
+                threading.Thread(
+                    target=self._run_on_stall,
+                    args=(loop,),
+                    name=f"WatchdogReconnect.{thread.name}",
+                    daemon=True,
+                ).start()
+
+        if self.notify is not None and not stalled:
+            self.notify("WATCHDOG=1")
+        return stalled
+
+    @staticmethod
+    def format_stack(thread: threading.Thread) -> str:
+        frame = sys._current_frames().get(thread.ident)
+        if frame is None:
+            return "  (no stack, thread is not running)\n"
+        return "".join(traceback.format_stack(frame))
+
+    def start(self, interval: float) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="ThreadWatchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            threading.current_thread().last_run = datetime.now()
+            try:
+                self.check()
+            except Exception as e:
+                self._log("error", "Thread watchdog check failed: %s", e)
+
+    def _run_on_stall(self, loop: _Loop) -> None:
+        self._log("warning", "Dropping the connection of %s", loop.thread.name)
+        try:
+            loop.on_stall()
+        except Exception as e:
+            self._log("error", "Reconnecting %s failed: %s", loop.thread.name, e)
+
+    def _log(self, level: str, msg: str, *args) -> None:
+        if self.logger is not None:
+            getattr(self.logger, level)(msg, *args)
+
+
+watchdog = ThreadWatchdog()
+
+
+def register(
+    thread: threading.Thread,
+    period: float,
+    on_stall: Optional[Callable[[], None]] = None,
+) -> None:
+    watchdog.register(thread, period, on_stall)
+
+
+def start_watchdog(logger, notify: Optional[Callable[[str], None]] = None) -> None:
+    """Starts the watchdog thread as configured; notify is sdnotify's notify."""
+    if not Config.watchdog_enabled:
+        return
+    watchdog.logger = logger
+    watchdog.stall_factor = Config.watchdog_stall_factor
+    watchdog.reconnect = Config.watchdog_reconnect
+    watchdog.notify = notify if Config.watchdog_systemd else None
+    watchdog.start(Config.watchdog_interval_s)
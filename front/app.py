@@ -10,14 +10,16 @@ from falcon import (
     HTTPNotFound,
 )
 from astroquery.simbad import Simbad
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
 from wsgiref.simple_server import WSGIRequestHandler, make_server
 from pathlib import Path
 import urllib.parse
 import requests
 import humanize
 import json
+import collections
 import csv
+import hashlib
 import re
 import os
 import io
@@ -33,21 +35,29 @@ import shutil
 import signal
 import math
 import numpy as np
-import sqlite3
 
 from skyfield.api import Loader
-from skyfield.data import mpc
-from skyfield.constants import GM_SUN_Pitjeva_2005_km3_s2 as GM_SUN
+from skyfield.units import Angle
 
 from device.config import Config  # type: ignore
+from device.seestar_util import parse_sexagesimal  # type: ignore
 from device.log import init_logging, get_logger  # type: ignore
 from device.version import Version  # type: ignore
 from device import telescope
+from front.comet_index import CometIndex
+from front.minor_planet_index import MinorPlanetIndex
+from front.night_planner import NightPlanner
+from front.object_search import ObjectSearch
+from front.static_assets import StaticAssetResource, ensure_static_assets
 import threading
 import pydash
 
 logger = init_logging()
 load = Loader("data/")
+comet_index = CometIndex(load, logger=logger)
+minor_planet_index = MinorPlanetIndex(load, logger=logger)
+object_search = ObjectSearch(logger=logger)
+night_planner = NightPlanner(logger=logger)
 _last_context_get_time = {}
 _context_cached = {}
 _last_api_state_get_time = {}
@@ -458,18 +468,19 @@ def get_planning_cards():
             os.path.dirname(__file__), "planning.json"
         )
 
+    if getattr(
+        sys, "frozen", False
+    ):  # frozen means that we are running from a bundled app
+        card_state_example_file_location = os.path.abspath(
+            os.path.join(sys._MEIPASS, "planning.json.example")
+        )
+    else:
+        card_state_example_file_location = os.path.join(
+            os.path.dirname(__file__), "planning.json.example"
+        )
+
     # Check to see if there is cached planning.json, if not create it.
     if not os.path.isfile(card_state_file_location):
-        if getattr(
-            sys, "frozen", False
-        ):  # frozen means that we are running from a bundled app
-            card_state_example_file_location = os.path.abspath(
-                os.path.join(sys._MEIPASS, "planning.json.example")
-            )
-        else:
-            card_state_example_file_location = os.path.join(
-                os.path.dirname(__file__), "planning.json.example"
-            )
         shutil.copyfile(card_state_example_file_location, card_state_file_location)
     file_mtime = os.path.getmtime(card_state_file_location)
     with _planning_cards_cache_lock:
@@ -480,6 +491,22 @@ def get_planning_cards():
             return json.loads(json.dumps(_planning_cards_cache))
         with open(card_state_file_location, "r") as card_state_file:
             state_data = json.load(card_state_file)
+
+        # Cards added in newer versions show up for existing installs too.
+        new_cards = []
+        if os.path.isfile(card_state_example_file_location):
+            with open(card_state_example_file_location, "r") as example_file:
+                known = {card["card_name"] for card in state_data}
+                new_cards = [
+                    card
+                    for card in json.load(example_file)
+                    if card["card_name"] not in known
+                ]
+        if new_cards:
+            state_data.extend(new_cards)
+            with open(card_state_file_location, "w") as card_state_file:
+                json.dump(state_data, card_state_file, indent=4)
+            file_mtime = os.path.getmtime(card_state_file_location)
         _planning_cards_cache = state_data
         _planning_cards_cache_mtime = file_mtime
         return json.loads(json.dumps(state_data))
@@ -1189,23 +1216,11 @@ def process_queue(resp, telescope_id):
 
 
 def check_ra_value(raString):
-    valid = [
-        r"^\d+h\s*\d+m\s*([0-9.]+s)?$",
-        r"^\d+(\.\d+)?$",
-        r"^\d+\s+\d+\s+[0-9.]+$",
-        r"^[+-]?([0-9]*[.])?[0-9]+$",
-    ]
-    return any(re.search(pattern, raString) for pattern in valid)
+    return bool(np.isfinite(parse_sexagesimal(raString)[0]))
 
 
 def check_dec_value(decString):
-    valid = [
-        r"^[+-]?\d+d\s*\d+m\s*([0-9.]+s)?$",
-        r"^[+-]?\d+(\.\d+)?$",
-        r"^[+-]?\d+\s+\d+\s+[0-9.]+$",
-        r"^[+-]?([0-9]*[.])?[0-9]+$",
-    ]
-    return any(re.search(pattern, decString) for pattern in valid)
+    return bool(np.isfinite(parse_sexagesimal(decString)[0]))
 
 
 def hms_to_sec(timeString):
@@ -1790,8 +1805,106 @@ def redirect(location):
     # raise HTTPTemporaryRedirect(location)
 
 
+class TimedTemplate(Template):
+    """Template that records how long each top-level render takes."""
+
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            template_render_stats.record(self.name, time.perf_counter() - start)
+
+
+class TemplateRenderStats:
+    """Render count and time per template name, plus fragment cache hits."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, elapsed_s):
+        with self._lock:
+            stat = self._stats.setdefault(
+                name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            elapsed_ms = elapsed_s * 1000
+            stat["count"] += 1
+            stat["total_ms"] += elapsed_ms
+            stat["max_ms"] = max(stat["max_ms"], elapsed_ms)
+
+    def snapshot(self):
+        with self._lock:
+            out = {}
+            for name, stat in self._stats.items():
+                out[name] = dict(stat)
+                out[name]["avg_ms"] = stat["total_ms"] / stat["count"]
+            return out
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+
+class FragmentCache:
+    """Small LRU of rendered HTML for partials that rarely change.
+
+    Entries are keyed by the fragment name plus a hash of every input the
+    fragment is rendered from, so a changed input simply misses the cache.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(name, inputs):
+        digest = hashlib.sha1(
+            json.dumps(inputs, sort_keys=True, default=repr).encode("utf-8")
+        ).hexdigest()
+        return (name, digest)
+
+    def get_or_render(self, name, inputs, render_fn):
+        key = self.make_key(name, inputs)
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+        html = render_fn()
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+template_render_stats = TemplateRenderStats()
+fragment_cache = FragmentCache()
+
 template_dir = os.path.join(os.path.dirname(__file__), "templates")
-env = Environment(loader=FileSystemLoader(template_dir))
+# Compiled templates are kept in memory (cache_size=-1: never evicted) and
+# their bytecode on disk, so a restart does not recompile every template.
+# Frozen builds can't change their templates, so skip the mtime checks.
+env = Environment(
+    loader=FileSystemLoader(template_dir),
+    bytecode_cache=FileSystemBytecodeCache(),
+    cache_size=-1,
+    auto_reload=not getattr(sys, "frozen", False),
+)
+env.template_class = TimedTemplate
 
 
 def seconds_to_hms(seconds):
@@ -1802,31 +1915,63 @@ def seconds_to_hms(seconds):
 
 env.globals["seconds_to_hms"] = seconds_to_hms
 
+static_assets = StaticAssetResource()
+env.globals["asset_url"] = static_assets.asset_url
+
+
+def warm_template_cache():
+    """Compile every template up front so the first page load doesn't pay for it."""
+    start = time.perf_counter()
+    count = 0
+    for name in env.list_templates(extensions=["html"]):
+        try:
+            env.get_template(name)
+            count += 1
+        except Exception as e:
+            logger.warning(f"Could not precompile template {name}: {e}")
+    logger.info(
+        f"Precompiled {count} templates in {(time.perf_counter() - start) * 1000:.0f} ms"
+    )
+    return count
+
 
 def fetch_template(template_name):
     try:
-        if getattr(sys, "frozen", False):
-            template_path = os.path.join(os.path.dirname(__file__), "templates")
-            env.loader = FileSystemLoader(template_path)
         return env.get_template(template_name)
     except Exception as e:
         print(f"Error fetching template {template_name}: {e}")
         raise
 
 
+_app_version = None
+
+
+def get_app_version():
+    # version.txt / git describe don't change while we are running
+    global _app_version
+    if _app_version is None:
+        _app_version = Version.app_version()
+    return _app_version
+
+
+def get_render_defaults():
+    return {
+        "webui_theme": Config.uitheme,
+        "webui_text_color": Config.webui_text_color,
+        "webui_font_family": Config.webui_font_family,
+        "webui_font_url": Config.webui_font_url,
+        "webui_link_color": Config.webui_link_color,
+        "webui_accent_color": Config.webui_accent_color,
+        "version": get_app_version(),
+    }
+
+
 def render_template(req, resp, template_name, **context):
     template = fetch_template(template_name)
     resp.status = falcon.HTTP_200
     resp.content_type = "text/html"
-    version = Version.app_version()
-    merged_context = dict(context)
-    merged_context.setdefault("webui_theme", Config.uitheme)
-    merged_context.setdefault("webui_text_color", Config.webui_text_color)
-    merged_context.setdefault("webui_font_family", Config.webui_font_family)
-    merged_context.setdefault("webui_font_url", Config.webui_font_url)
-    merged_context.setdefault("webui_link_color", Config.webui_link_color)
-    merged_context.setdefault("webui_accent_color", Config.webui_accent_color)
-    merged_context.setdefault("version", version)
+    merged_context = get_render_defaults()
+    merged_context.update(context)
 
     resp.text = template.render(
         flashed_messages=get_flash_cookie(req, resp),
@@ -1839,18 +1984,31 @@ def render_fragment(req, resp, template_name, **context):
     template = fetch_template(template_name)
     resp.status = falcon.HTTP_200
     resp.content_type = "text/html"
-    version = Version.app_version()
-    merged_context = dict(context)
-    merged_context.setdefault("webui_theme", Config.uitheme)
-    merged_context.setdefault("webui_text_color", Config.webui_text_color)
-    merged_context.setdefault("webui_font_family", Config.webui_font_family)
-    merged_context.setdefault("webui_font_url", Config.webui_font_url)
-    merged_context.setdefault("webui_link_color", Config.webui_link_color)
-    merged_context.setdefault("webui_accent_color", Config.webui_accent_color)
-    merged_context.setdefault("version", version)
+    merged_context = get_render_defaults()
+    merged_context.update(context)
     resp.text = template.render(**merged_context)
 
 
+def get_config_form_html():
+    """Config.render_config_html(), cached until any config value changes."""
+    inputs = {
+        key: value for key, value in vars(Config).items() if not key.startswith("_")
+    }
+    return fragment_cache.get_or_render(
+        "config_form", inputs, Config.render_config_html
+    )
+
+
+def get_planning_card_html(card, inputs):
+    """Rendered body of one planning card, cached per card and inputs."""
+    template_name = card["template"]
+    return fragment_cache.get_or_render(
+        template_name,
+        inputs,
+        lambda: fetch_template(template_name).render(**inputs),
+    )
+
+
 def respond_204_if_unchanged(resp, cache, lock, cache_key):
     html = resp.text
     with lock:
@@ -1928,10 +2086,24 @@ def import_csv_schedule(input, telescope_id):
 
     cleaned_input = io.StringIO(input_content)
 
-    reader = csv.DictReader(cleaned_input)
+    rows = [
+        {key: (value or "").strip() for key, value in row.items() if key is not None}
+        for row in csv.DictReader(cleaned_input)
+    ]
 
-    for row in reader:
-        row = {key: value.strip() for key, value in row.items()}
+    # validate every mosaic target in one pass instead of row by row
+    mosaics = [row for row in rows if row.get("action") == "start_mosaic"]
+    valid = np.isfinite(parse_sexagesimal([row.get("ra", "") for row in mosaics]))
+    valid &= np.isfinite(parse_sexagesimal([row.get("dec", "") for row in mosaics]))
+    invalid = {id(row) for row, ok in zip(mosaics, valid) if not ok}
+
+    for row in rows:
+        if id(row) in invalid:
+            logger.warning(
+                f"Skipping start_mosaic for {row.get('target_name')}: "
+                f"invalid coordinates {row.get('ra')} {row.get('dec')}"
+            )
+            continue
         action = row.pop("action", None)
 
         if not action:
@@ -2875,6 +3047,9 @@ class ScheduleToggleResource(BaseResource):
             current_item_id = value.get("current_item_id")
             if current_item_id:
                 do_action_device("skip_scheduler_cur_item", telescope_id, {})
+        elif action == "resume":
+            if value.get("resume"):
+                do_action_device("resume_scheduler", telescope_id, {})
         else:
             pass
         self.display_state(req, resp, telescope_id)
@@ -2883,12 +3058,19 @@ class ScheduleToggleResource(BaseResource):
     def display_state(req, resp, telescope_id):
         context = get_context(telescope_id, req)
         current = do_action_device("get_schedule", telescope_id, {})
+        resume = None
         if current.get("Value"):
             state = current["Value"]["state"]
+            resume = current["Value"].get("resume")
         else:
             state = "stopped"
         render_template(
-            req, resp, "partials/schedule_state.html", state=state, **context
+            req,
+            resp,
+            "partials/schedule_state.html",
+            state=state,
+            resume=resume,
+            **context,
         )
 
 
@@ -3092,7 +3274,7 @@ class ScheduleReStartResource(BaseResource):
     def render_schedule_list_html(self, req, resp, schedule, context):
         template = fetch_template("partials/schedule_list.html")
         webui_theme = Config.uitheme
-        version = Version.app_version()
+        version = get_app_version()
 
         html = template.render(
             flashed_messages=get_flash_cookie(req, resp),
@@ -3108,7 +3290,7 @@ class ScheduleReStartResource(BaseResource):
     def render_schedule_state_html(self, req, resp, state, context):
         template = fetch_template("partials/schedule_state.html")
         webui_theme = Config.uitheme
-        version = Version.app_version()
+        version = get_app_version()
 
         html = template.render(
             flashed_messages=get_flash_cookie(req, resp),
@@ -3161,7 +3343,7 @@ class ScheduleRefreshResource(BaseResource):
     def render_schedule_list_html(self, req, resp, schedule, context):
         template = fetch_template("partials/schedule_list.html")
         webui_theme = Config.uitheme
-        version = Version.app_version()
+        version = get_app_version()
         open_accordion_id = req.get_param("open_accordion_id", default="")
 
         html = template.render(
@@ -3177,65 +3359,268 @@ class ScheduleRefreshResource(BaseResource):
         return html
 
 
+class ScheduleTimelineResource:
+    @staticmethod
+    def on_get(req, resp, telescope_id=0):
+        result = do_action_device("get_schedule_timeline", telescope_id, {})
+        value = result.get("Value") if result else None
+        if not isinstance(value, dict):
+            timelines = {}
+        elif "items" in value:
+            timelines = {telescope_id: value}
+        else:
+            # the federation answers with one timeline per scope
+            timelines = {
+                key: timeline
+                for key, timeline in value.items()
+                if isinstance(timeline, dict) and "items" in timeline
+            }
+        render_fragment(
+            req, resp, "partials/schedule_timeline.html", timelines=timelines
+        )
+
+
+# page actions with their own set of event cards; anything else is "default"
+EVENT_STATUS_ACTIONS = ("command", "goto", "image", "mosaic")
+
+
+def event_status_events(action):
+    """Event cards shown by the eventstatus fragment for a page action."""
+    if action == "command":
+        return [
+            "WheelMove",
+            "AutoFocus",
+            "DarkLibrary",
+            "3PPA",
+            "PlateSolve",
+            "Scheduler",
+        ]
+    elif action == "goto":
+        return ["WheelMove", "AutoGoto", "PlateSolve"]
+    elif action == "image" or action == "mosaic":
+        return [
+            "WheelMove",
+            "AutoGoto",
+            "PlateSolve",
+            "DarkLibrary",
+            "AutoFocus",
+            "Stack",
+        ]
+    else:
+        return ["WheelMove", "AutoFocus", "AutoGoto", "PlateSolve"]
+
+
+def event_status_results(event_state):
+    """Flatten a get_event_state action reply into the list of event dicts to render."""
+    results = []
+    if not event_state or "Value" not in event_state:
+        return results
+
+    events = event_state["Value"]
+    if "result" in events:
+        if isinstance(events, dict):
+            result_info = events["result"]
+            if isinstance(result_info, dict):
+                for event_key, event_value in list(result_info.items()):
+                    if isinstance(event_value, dict):
+                        results.append(event_value)
+    else:
+        if events:
+            for device_id, device_info in events.items():
+                # Ensure device_info contains "result" and it is a dictionary
+                if isinstance(device_info, dict) and "result" in device_info:
+                    result_info = device_info["result"]
+                    if isinstance(result_info, dict):
+                        for event_key, event_value in list(result_info.items()):
+                            if isinstance(event_value, dict):
+                                # Add the device ID to each event (on a copy,
+                                # the dict may be the device's live event_state)
+                                results.append(dict(event_value, DeviceID=device_id))
+    return results
+
+
+def render_event_status(telescope_id: int, events) -> str:
+    """The eventstatus fragment, from the in-process device state."""
+    if telescope_id == 0:
+        reply = telescope.seestar_federation.get_event_state({})
+    else:
+        reply = telescope.get_seestar_device(telescope_id).get_event_state({})
+    results = event_status_results({"Value": reply})
+    template = fetch_template("eventstatus.html")
+    return template.render(results=results, events=events)
+
+
+def event_status_frame(html: str, etag=None, retry_ms=None) -> bytes:
+    """An SSE EventStatus event carrying html."""
+    fields = "event: EventStatus\n"
+    if etag is not None:
+        fields += f"id: {etag}\n"
+    if retry_ms is not None:
+        fields += f"retry: {retry_ms}\n"
+    data = "".join(f"data: {line}\n" for line in html.splitlines())
+    return f"{fields}{data}\n".encode("utf-8")
+
+
+class EventStatusChannel:
+    """Server-sent eventstatus fragment for one (telescope, action).
+
+    The fragment is rendered from the in-process device state only after the
+    device event bus reports an event, or after RESYNC_S without one to pick
+    up state the device changes without sending an event. A render whose
+    hash matches the previous one is not sent. All browser tabs watching the
+    same telescope and action share one render, and a dashboard with no
+    events costs one render every RESYNC_S instead of one per tab per second.
+    A channel leaves the device event buses when its last stream closes.
+
+    Each stream holds an imaging server thread for as long as the tab is
+    open, so only half of Config.imager_threads may stream at once, leaving
+    the rest for video and live status. Past that, a request gets the
+    current fragment and a one second SSE retry, so the browser polls
+    instead.
+    """
+
+    RESYNC_S = 10.0
+    POLL_RETRY_MS = 1000
+
+    _channels = {}
+    _channels_lock = threading.RLock()
+    num_streams = 0
+
+    def __init__(self, telescope_id, action):
+        self.telescope_id = int(telescope_id)
+        self.action = self.page_action(action)
+        self.events = event_status_events(self.action)
+        self.subscribers = 0
+        self._cond = threading.Condition()
+        self._render_lock = threading.Lock()
+        self._dirty = True
+        self._rendered_at = 0.0
+        self.etag = None
+        self.html = ""
+        self.num_renders = 0
+        self._buses = [dev.eventbus for dev in self._devices()]
+        for bus in self._buses:
+            bus.connect(self.on_event, weak=False)
+
+    @staticmethod
+    def page_action(action):
+        # the query string is client input; only known actions get a channel
+        return action if action in EVENT_STATUS_ACTIONS else "default"
+
+    @classmethod
+    def get(cls, telescope_id, action):
+        key = (int(telescope_id), cls.page_action(action))
+        with cls._channels_lock:
+            channel = cls._channels.get(key)
+            if channel is None:
+                channel = cls(telescope_id, action)
+                cls._channels[key] = channel
+            return channel
+
+    @staticmethod
+    def max_streams():
+        return max(1, Config.imager_threads // 2)
+
+    @classmethod
+    def subscribe(cls, telescope_id, action):
+        """SSE stream of a shared channel, released when the client goes away."""
+        with cls._channels_lock:
+            is_full = cls.num_streams >= cls.max_streams()
+            if not is_full:
+                channel = cls.get(telescope_id, action)
+                channel.subscribers += 1
+                cls.num_streams += 1
+        if is_full:
+            html = render_event_status(
+                int(telescope_id), event_status_events(cls.page_action(action))
+            )
+            yield event_status_frame(html, retry_ms=cls.POLL_RETRY_MS)
+            return
+        try:
+            yield from channel.stream()
+        finally:
+            with cls._channels_lock:
+                cls.num_streams -= 1
+                channel.subscribers -= 1
+                if channel.subscribers == 0:
+                    cls._channels.pop((channel.telescope_id, channel.action), None)
+                    channel.close()
+
+    def close(self):
+        for bus in self._buses:
+            bus.disconnect(self.on_event)
+        self._buses = []
+
+    def _devices(self):
+        if self.telescope_id == 0:
+            return list(telescope.seestar_dev.values())
+        return [telescope.get_seestar_device(self.telescope_id)]
+
+    def on_event(self, _event):
+        # called on the device receive thread; keep it cheap
+        with self._cond:
+            self._dirty = True
+            self._cond.notify_all()
+
+    def render(self):
+        return render_event_status(self.telescope_id, self.events)
+
+    def refresh(self):
+        """Re-render if the device state may have changed; return (etag, html)."""
+        with self._render_lock:
+            with self._cond:
+                is_stale = (
+                    self._dirty or time.monotonic() - self._rendered_at >= self.RESYNC_S
+                )
+                if not is_stale:
+                    return self.etag, self.html
+                self._dirty = False
+            html = self.render()
+            etag = hashlib.sha1(html.encode("utf-8")).hexdigest()
+            with self._cond:
+                self.num_renders += 1
+                self._rendered_at = time.monotonic()
+                if etag != self.etag:
+                    self.etag = etag
+                    self.html = html
+                    self._cond.notify_all()
+                return self.etag, self.html
+
+    def wait(self, last_etag, timeout):
+        """Block until an event arrives or the fragment differs from last_etag."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._dirty or self.etag != last_etag, timeout
+            )
+
+    def stream(self):
+        last_etag = None
+        while True:
+            etag, html = self.refresh()
+            if etag != last_etag:
+                last_etag = etag
+                yield event_status_frame(html, etag)
+            if not self.wait(last_etag, self.RESYNC_S):
+                # nothing happened; lets the server notice a closed connection
+                yield b": keepalive\n\n"
+
+
+def get_event_status_stream(telescope_id: int, action):
+    return EventStatusChannel.subscribe(telescope_id, action)
+
+
 class EventStatus:
     _last_render_by_key = {}
     _lock = threading.Lock()
 
     @staticmethod
     def on_get(req, resp, telescope_id=1):
-        results = []
         action = req.get_param("action")
-        if action == "command":
-            eventlist = [
-                "WheelMove",
-                "AutoFocus",
-                "DarkLibrary",
-                "3PPA",
-                "PlateSolve",
-                "Scheduler",
-            ]
-        elif action == "goto":
-            eventlist = ["WheelMove", "AutoGoto", "PlateSolve"]
-        elif action == "image" or action == "mosaic":
-            eventlist = [
-                "WheelMove",
-                "AutoGoto",
-                "PlateSolve",
-                "DarkLibrary",
-                "AutoFocus",
-                "Stack",
-            ]
-        else:
-            eventlist = ["WheelMove", "AutoFocus", "AutoGoto", "PlateSolve"]
+        eventlist = event_status_events(action)
         context = get_context(telescope_id, req)
         now = datetime.now()
         event_state = do_action_device("get_event_state", telescope_id, {})
-
-        if event_state is None:
-            event_state = {}
-            events = {}
-
-        if "Value" in event_state:
-            events = event_state["Value"]
-            if "result" in events:
-                if isinstance(events, dict):
-                    result_info = events["result"]
-                    if isinstance(result_info, dict):
-                        for event_key, event_value in result_info.items():
-                            if isinstance(event_value, dict):
-                                results.append(event_value)
-            else:
-                if events:
-                    for device_id, device_info in events.items():
-                        # Ensure device_info contains "result" and it is a dictionary
-                        if isinstance(device_info, dict) and "result" in device_info:
-                            result_info = device_info["result"]
-                            if isinstance(result_info, dict):
-                                for event_key, event_value in result_info.items():
-                                    if isinstance(event_value, dict):
-                                        # Add the device ID to each event
-                                        event_value["DeviceID"] = device_id
-                                        results.append(event_value)
+        results = event_status_results(event_state)
 
         render_template(
             req,
@@ -4247,6 +4632,19 @@ class PlanningResource:
         config_long = round(
             Config.init_long, 2
         )  # Some of the 3rd party api's/embeds want rounded down.
+        card_inputs = {
+            "twilight_times": twilight_times,
+            "config_lat": config_lat,
+            "config_long": config_long,
+            "clear_sky_href": nearest_csc["href"],
+            "clear_sky_img_src": nearest_csc["full_img"],
+            "utc_offset": utc_offset,
+            "telescope": context.get("telescope"),
+            "webui_theme": Config.uitheme,
+        }
+        for card in planning_cards:
+            if card.get("planning_page_enable"):
+                card["html"] = get_planning_card_html(card, card_inputs)
         render_template(
             req,
             resp,
@@ -4877,7 +5275,15 @@ class ConfigResource:
     def on_get(req, resp, telescope_id=1):
         now = datetime.now()
         context = get_context(telescope_id, req)
-        render_template(req, resp, "config.html", now=now, config=Config, **context)
+        render_template(
+            req,
+            resp,
+            "config.html",
+            now=now,
+            config=Config,
+            config_html=get_config_form_html(),
+            **context,
+        )
 
     @staticmethod
     def on_post(req, resp, telescope_id=1):
@@ -4889,7 +5295,31 @@ class ConfigResource:
 
         logger.info(f"GOT POST config: {req.media}")
 
-        render_template(req, resp, "config.html", now=now, config=Config, **context)
+        render_template(
+            req,
+            resp,
+            "config.html",
+            now=now,
+            config=Config,
+            config_html=get_config_form_html(),
+            **context,
+        )
+
+
+class TemplateStatsResource:
+    """Per-template render counts and times, plus fragment cache hit rates."""
+
+    @staticmethod
+    def on_get(req, resp):
+        resp.media = {
+            "templates": template_render_stats.snapshot(),
+            "fragment_cache": {
+                "hits": fragment_cache.hits,
+                "misses": fragment_cache.misses,
+            },
+        }
+        resp.content_type = "application/json"
+        resp.status = falcon.HTTP_200
 
 
 class ConfigJsonResource:
@@ -5089,20 +5519,6 @@ class GetPlanetCoordinates:
         resp.text = f"{ra}, {dec}"
 
 
-def checkFileAge():
-    if not os.path.exists("data/CometEls.txt"):
-        redownload = True
-    else:
-        creation_date = datetime.fromtimestamp(os.path.getctime("data/CometEls.txt"))
-        today = datetime.today()
-        delta = today - creation_date
-        if delta.days > 7:
-            redownload = True
-        else:
-            redownload = False
-    return redownload
-
-
 def get_UTC_Time():
     local_time = datetime.now(tzlocal.get_localzone())
     utc_time = local_time - local_time.utcoffset()  # Manually adjust to UTC
@@ -5116,151 +5532,62 @@ def get_UTC_Time():
     )
 
 
-def searchComet(name):
-    with load.open(mpc.COMET_URL, reload=checkFileAge()) as f:
-        comets = mpc.load_comets_dataframe(f)
-
-    # Keep only the most recent orbit for each comet,
-    # and index by designation for fast lookup.
-    comets = (
-        comets.sort_values("reference")
-        .groupby("designation", as_index=False)
-        .last()
-        .set_index("designation", drop=False)
-    )
+def format_radec(ra_hours, dec_degrees) -> dict:
+    return {
+        "ra": str(Angle(hours=ra_hours)).replace(" ", ""),
+        "dec": str(Angle(degrees=dec_degrees, signed=True))
+        .replace("deg", "d")
+        .replace("'", "m")
+        .replace('"', "s")
+        .replace(" ", ""),
+    }
+
 
-    regex = re.compile(r"{}".format(re.escape(name)), re.IGNORECASE)
+def searchComet(name):
+    ts = comet_index.timescale()
+    Y, M, D, h, m, s = get_UTC_Time()
+    t = ts.utc(Y, M, D, h, m, s)
+    names, (ra, dec, distance) = comet_index.lookup(name, t)
 
-    row = comets[comets["designation"].str.contains(regex)]
-    match len(row):
+    data = [
+        {**format_radec(ra[i], dec[i]), "cometName": comet_name}
+        for i, comet_name in enumerate(names)
+    ]
+    match len(data):
         case 0:  # Nothing returned
             return ""
         case 1:  # Single record returned
-            ts = load.timescale()
-            eph = load("de440s.bsp")
-            sun, earth = eph["sun"], eph["earth"]
-            comet = sun + mpc.comet_orbit(row.iloc[0], ts, GM_SUN)
-            Y, M, D, h, m, s = get_UTC_Time()
-            t = ts.utc(Y, M, D, h, m, s)
-            ra, dec, distance = earth.at(t).observe(comet).radec()
-            data = {
-                "ra": str(ra).replace(" ", ""),
-                "dec": str(dec)
-                .replace("deg", "d")
-                .replace("'", "m")
-                .replace('"', "s")
-                .replace(" ", ""),
-                "cometName": str(comet.target),
-            }
-            return json.dumps(data, indent=4)
-
-        case r if r > 1:  # Multiple records returned
-            ts = load.timescale()
-            eph = load("de440s.bsp")
-            sun, earth = eph["sun"], eph["earth"]
-            Y, M, D, h, m, s = get_UTC_Time()
-            t = ts.utc(Y, M, D, h, m, s)
-
-            data = []
-            for index, r in row.iterrows():
-                comet = sun + mpc.comet_orbit(r, ts, GM_SUN)  # Use `r`, the current row
-                ra, dec, distance = earth.at(t).observe(comet).radec()
-
-                data.append(
-                    {
-                        "ra": str(ra).replace(" ", ""),
-                        "dec": str(dec)
-                        .replace("deg", "d")
-                        .replace("'", "m")
-                        .replace('"', "s")
-                        .replace(" ", ""),
-                        "cometName": str(comet.target),
-                    }
-                )
+            return json.dumps(data[0], indent=4)
+        case _:  # Multiple records returned
             return json.dumps(data, indent=4)
 
 
 def searchMinorPlanet(name):
-    if os.path.exists("data/mpn-01.txt"):
-        mpcFile = "mpn-01.txt"
-    else:
-        mpcFile = "http://dss.stellarium.org/MPC/mpn-01.txt"
-
-    with load.open(mpcFile) as f:
-        minor_planets = mpc.load_mpcorb_dataframe(f)
-
-    bad_orbits = minor_planets.semimajor_axis_au.isnull()
-    minor_planets = minor_planets[~bad_orbits]
-
-    regex = re.compile(r"\b{}\b".format(name), re.IGNORECASE)
-    # Example: Filter for a specific asteroid by designation
-    row = minor_planets[minor_planets["designation"].str.contains(regex)]
-
-    if row.empty:
+    ids = minor_planet_index.find(name, limit=1)
+    if not ids:
         return ""
 
-    ts = load.timescale()
-    eph = load("de440s.bsp")
-    sun, earth = eph["sun"], eph["earth"]
-
-    object = sun + mpc.mpcorb_orbit(row.iloc[0], ts, GM_SUN)
+    ts = comet_index.timescale()
+    eph = comet_index.ephemeris()
     Y, M, D, h, m, s = get_UTC_Time()
     t = ts.utc(Y, M, D, h, m, s)
-    ra, dec, distance = earth.at(t).observe(object).radec()
+    ra, dec, distance = minor_planet_index.observe(ids, t, eph["sun"], eph["earth"])
 
-    data = {
-        "ra": str(ra).replace(" ", ""),
-        "dec": str(dec)
-        .replace("deg", "d")
-        .replace("'", "m")
-        .replace('"', "s")
-        .replace(" ", ""),
-    }
+    data = format_radec(ra[0], dec[0])
     return json.dumps(data, indent=4)
 
 
 def searchLocal(object):
-    try:
-        con = sqlite3.connect("data/alp.dat")
-    except Exception:
-        return
-
-    cursor = con.cursor()
-    search = f"SELECT ra, dec, objectType, commonNames, identifiers FROM objects where identifiers like '%{object}%' or commonNames like '%{object}%' COLLATE NOCASE"
-    result = cursor.execute(search)
-    sqlReturn = result.fetchall()
-
-    if len(sqlReturn) > 0:
-        data = []
-        for row in sqlReturn:
-            objectType = row[2]
-            if (
-                objectType == "Planetary Nebula"
-                or objectType == "Nebula"
-                or objectType == "Star cluster + Nebula"
-                or objectType == "HII Ionized region"
-                or objectType == "Supernova remnant"
-            ):
-                lp = "true"
-            else:
-                lp = "false"
-
-            if row[3]:  # We searched for a name so lets send back the full name
-                name = row[3]
-            else:
-                name = row[4]
-
-            data.append({"ra": row[0], "dec": row[1], "lp": lp, "objectName": name})
-        con.close()
-        return json.dumps(data, indent=4)
+    rows = object_search.search(object)
+    if len(rows) > 0:
+        return json.dumps(rows, indent=4)
     return ""
 
 
 class GetCometCoordinates:
     @staticmethod
     def on_get(req, resp):
-        cometName = urllib.parse.quote_plus(req.get_param("cometname"))
-        rtn = searchComet(cometName)
+        rtn = searchComet(req.get_param("cometname") or "")
         if len(rtn) == 0:
             resp.status = falcon.HTTP_404
             resp.content_type = "application/text"
@@ -5275,8 +5602,7 @@ class GetCometCoordinates:
 class GetMinorPlanetCoordinates:
     @staticmethod
     def on_get(req, resp):
-        minorname = urllib.parse.quote_plus(req.get_param("minorname"))
-        rtn = searchMinorPlanet(minorname)
+        rtn = searchMinorPlanet(req.get_param("minorname") or "")
         if len(rtn) == 0:
             resp.status = falcon.HTTP_404
             resp.content_type = "application/text"
@@ -5291,8 +5617,7 @@ class GetMinorPlanetCoordinates:
 class GetLocalSearch:
     @staticmethod
     def on_get(req, resp):
-        searchText = urllib.parse.quote_plus(req.get_param("target"))
-        rtn = searchLocal(searchText)
+        rtn = searchLocal(req.get_param("target") or "")
         if len(rtn) == 0:
             resp.status = falcon.HTTP_404
             resp.content_type = "application/text"
@@ -5304,6 +5629,51 @@ class GetLocalSearch:
             resp.text = rtn
 
 
+class GetLocalSearchSuggest:
+    @staticmethod
+    def on_get(req, resp):
+        resp.status = falcon.HTTP_200
+        resp.content_type = "application/json"
+        resp.text = json.dumps(object_search.suggest(req.get_param("q") or ""))
+
+
+def get_night_plan_targets(req):
+    """Tonight's best targets at the configured site, from the request filters."""
+    plan = night_planner.plan(
+        Config.init_lat,
+        Config.init_long,
+        date=req.get_param_as_date("date"),
+        tz=tzlocal.get_localzone(),
+        min_altitude=req.get_param_as_float(
+            "min_alt", min_value=0, max_value=90, default=30.0
+        ),
+        min_moon_separation=req.get_param_as_float(
+            "moon_sep", min_value=0, max_value=180, default=30.0
+        ),
+    )
+    targets = plan.targets(
+        limit=req.get_param_as_int("limit", min_value=1, max_value=1000, default=50),
+        object_types=req.get_param_as_list("type"),
+    )
+    return plan.summary(), targets
+
+
+class PlanningTargetsResource:
+    @staticmethod
+    def on_get(req, resp):
+        plan, targets = get_night_plan_targets(req)
+        render_fragment(
+            req, resp, "partials/night_targets_table.html", plan=plan, targets=targets
+        )
+
+
+class PlanningTargetsJsonResource:
+    @staticmethod
+    def on_get(req, resp):
+        plan, targets = get_night_plan_targets(req)
+        resp.media = {**plan, "targets": targets}
+
+
 class GetAAVSOSearch:
     @staticmethod
     def on_get(req: falcon.Request, resp: falcon.Response) -> None:
@@ -5362,6 +5732,7 @@ class FrontMain:
         app.add_route("/schedule/import", ScheduleImportResource())
         app.add_route("/schedule/mosaic", ScheduleMosaicResource())
         app.add_route("/schedule/refresh", ScheduleRefreshResource())
+        app.add_route("/schedule/timeline", ScheduleTimelineResource())
         app.add_route("/schedule/startup", ScheduleStartupResource())
         app.add_route("/schedule/shutdown", ScheduleShutdownResource())
         app.add_route("/schedule/park", ScheduleParkResource())
@@ -5436,6 +5807,9 @@ class FrontMain:
             "/{telescope_id:int}/schedule/dew-heater", ScheduleDewHeaterResource()
         )
         app.add_route("/{telescope_id:int}/schedule/refresh", ScheduleRefreshResource())
+        app.add_route(
+            "/{telescope_id:int}/schedule/timeline", ScheduleTimelineResource()
+        )
         app.add_route(
             "/{telescope_id:int}/schedule/restart_schedule", ScheduleReStartResource()
         )
@@ -5465,24 +5839,32 @@ class FrontMain:
         app.add_route("/{telescope_id:int}/config", ConfigResource())
         app.add_route("/{telescope_id:int}/pa_refine", BlindPolarAlignResource())
         app.add_route("/{telescope_id:int}/platform-rpi", PlatformRpiResource())
-        app.add_static_route("/public", f"{os.path.dirname(__file__)}/public")
+        ensure_static_assets(logger=logger)
+        static_assets.reload()
+        app.add_route("/public/{name}", static_assets)
         app.add_route("/simbad", SimbadResource())
         app.add_route("/stellarium", StellariumResource())
         app.add_route("/toggleuitheme", ToggleUIThemeResource())
         app.add_route("/toggleplanningcard", TogglePlanningCardResource())
         app.add_route("/collapseplanningcard", CollapsePlanningCardResource())
         app.add_route("/updatetwilighttimes", UpdateTwilightTimesResource())
+        app.add_route("/planning/targets", PlanningTargetsResource())
+        app.add_route("/planning/targets.json", PlanningTargetsJsonResource())
         app.add_route("/getbalancesensor", GetBalanceSensorResource())
         app.add_route("/gensupportbundle", GenSupportBundleResource())
         app.add_route("/getplanetcoordinates", GetPlanetCoordinates())
         app.add_route("/getcometcoordinates", GetCometCoordinates())
         app.add_route("/localsearch", GetLocalSearch())
+        app.add_route("/localsearch/suggest", GetLocalSearchSuggest())
         app.add_route("/getminorplanetcoordinates", GetMinorPlanetCoordinates())
         app.add_route("/getaavsocoordinates", GetAAVSOSearch())
         app.add_route("/config", ConfigResource())
         app.add_route("/config.json", ConfigJsonResource())
+        app.add_route("/template-stats.json", TemplateStatsResource())
         app.add_route("/pa_refine", BlindPolarAlignResource())
 
+        warm_template_cache()
+
         try:
             self.httpd = make_server(
                 Config.ip_address,
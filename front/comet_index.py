@@ -0,0 +1,289 @@
+#
+# comet_index - resident, lazily refreshed index of the MPC comet elements
+#
+# The MPC comet file (CometEls.txt) is parsed once into one row per
+# designation (the most recent orbit wins) plus a normalized-name lookup
+# table, and the heliocentric state at perihelion of every comet is
+# precomputed. Searches are then a scan over a few thousand short strings and
+# the positions of all matches are propagated in one vectorized two-body
+# solve instead of one skyfield orbit object per row.
+#
+# The file is re-downloaded when it is older than max_age_days and reparsed
+# whenever it changes on disk; both checks run at most every
+# check_interval_s so a burst of keystrokes never touches the disk.
+#
+import os
+import re
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+from skyfield.constants import AU_KM, C_AUDAY, DAY_S, DEG2RAD
+from skyfield.constants import GM_SUN_Pitjeva_2005_km3_s2 as GM_SUN
+from skyfield.data import mpc
+from skyfield.data.spice import inertial_frames
+from skyfield.functions import length_of, mxv
+from skyfield.keplerlib import ele_to_vec, propagate
+
+COMET_FILENAME = "CometEls.txt"
+GM_SUN_AU3_D2 = GM_SUN * DAY_S * DAY_S / AU_KM / AU_KM / AU_KM
+ECLIPTIC_TO_ICRF = inertial_frames["ECLIPJ2000"].T
+# fixed-point passes for the light time; each gains about 1e-4 in precision
+LIGHT_TIME_ITERATIONS = 3
+
+_non_alnum = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lower-case name and drop everything but letters and digits.
+
+    "C/2023 A3 (Tsuchinshan-ATLAS)", "c2023a3" and "C/2023 a3" all
+    normalize to a prefix of the same key.
+    """
+    return _non_alnum.sub("", name.lower())
+
+
+def latest_orbits(comets):
+    """Keep only the most recent orbit of every comet in an MPC dataframe."""
+    return (
+        comets.sort_values("reference")
+        .groupby("designation", as_index=False)
+        .last()
+        .reset_index(drop=True)
+    )
+
+
+def perihelion_states(comets, ts):
+    """Heliocentric ecliptic state vectors (au, au/day) at perihelion.
+
+    Returns (position, velocity, perihelion_tt) with shapes (3, n), (3, n)
+    and (n,), the same elements skyfield's comet_orbit() starts from.
+    """
+    e = comets["eccentricity"].to_numpy(dtype=float)
+    q = comets["perihelion_distance_au"].to_numpy(dtype=float)
+    parabolic = e == 1.0
+    p = q * (1.0 - e * e) / (1.0 - e + parabolic)
+    p[parabolic] = 2.0 * q[parabolic]
+    position, velocity = ele_to_vec(
+        p,
+        e,
+        DEG2RAD * comets["inclination_degrees"].to_numpy(dtype=float),
+        DEG2RAD * comets["longitude_of_ascending_node_degrees"].to_numpy(dtype=float),
+        DEG2RAD * comets["argument_of_perihelion_degrees"].to_numpy(dtype=float),
+        0.0,
+        GM_SUN_AU3_D2,
+    )
+    t_perihelion = ts.tt(
+        comets["perihelion_year"].to_numpy(),
+        comets["perihelion_month"].to_numpy(),
+        comets["perihelion_day"].to_numpy(),
+    )
+    return position, velocity, np.atleast_1d(t_perihelion.tt)
+
+
+def _valid_orbits(comets):
+    return comets[
+        comets["perihelion_distance_au"].gt(0)
+        & comets["eccentricity"].ge(0)
+        & comets["inclination_degrees"].between(0, 180)
+        & comets[
+            [
+                "perihelion_year",
+                "perihelion_month",
+                "perihelion_day",
+                "argument_of_perihelion_degrees",
+                "longitude_of_ascending_node_degrees",
+            ]
+        ]
+        .notnull()
+        .all(axis=1)
+    ].reset_index(drop=True)
+
+
+def observe_orbits(position, velocity, epoch_tt, t, sun_au, observer_au):
+    """Astrometric ICRF vectors (au) from an observer to many orbits at once.
+
+    position/velocity/epoch_tt describe each orbit at its epoch as returned
+    by perihelion_states(). sun_au and observer_au are the barycentric
+    positions of the sun and the observer at t. All orbits are propagated
+    to t in a single call; the step back by the light time then uses the
+    second-order expansion of the orbit at t, whose error is far below a
+    milliarcsecond even for sungrazers.
+    """
+    sun_au = np.asarray(sun_au, dtype=float).reshape(3, 1)
+    observer_au = np.asarray(observer_au, dtype=float).reshape(3, 1)
+
+    # a column of target times makes propagate() solve every orbit at t
+    # once instead of every orbit at every time
+    target_tt = np.full((position.shape[1], 1), t.tt)
+    pos, vel = propagate(position, velocity, epoch_tt, target_tt, GM_SUN_AU3_D2)
+    helio = mxv(ECLIPTIC_TO_ICRF, pos[:, :, 0])
+    helio_velocity = mxv(ECLIPTIC_TO_ICRF, vel[:, :, 0])
+    r = length_of(helio)
+    helio_acceleration = -GM_SUN_AU3_D2 * helio / (r * r * r)
+
+    def _at_light_time(light_time):
+        return (
+            helio
+            - helio_velocity * light_time
+            + 0.5 * helio_acceleration * light_time * light_time
+        )
+
+    light_time = length_of(sun_au + helio - observer_au) / C_AUDAY
+    for _ in range(LIGHT_TIME_ITERATIONS):
+        vector = sun_au + _at_light_time(light_time) - observer_au
+        light_time = length_of(vector) / C_AUDAY
+    return vector
+
+
+def vector_to_radec(vector):
+    """RA in hours, Dec in degrees and distance in au of (3, n) ICRF vectors."""
+    x, y, z = vector
+    distance = np.sqrt(x * x + y * y + z * z)
+    ra_hours = np.degrees(np.arctan2(y, x)) / 15.0 % 24.0
+    dec_degrees = np.degrees(np.arctan2(z, np.hypot(x, y)))
+    return ra_hours, dec_degrees, distance
+
+
+class CometTable(NamedTuple):
+    """One immutable snapshot of the index; reloads swap in a new one."""
+
+    designations: list
+    normalized: list
+    by_name: dict
+    position: np.ndarray
+    velocity: np.ndarray
+    epoch_tt: np.ndarray
+
+    def match(self, name: str) -> list[int]:
+        key = normalize_name(name)
+        if not key:
+            return []
+        exact = self.by_name.get(key)
+        if exact is not None:
+            return [exact]
+        return [i for i, candidate in enumerate(self.normalized) if key in candidate]
+
+
+EMPTY_TABLE = CometTable([], [], {}, np.zeros((3, 0)), np.zeros((3, 0)), np.zeros(0))
+
+
+class CometIndex:
+    """Resident index of the MPC comet file with batched position lookups.
+
+    ``search`` matches a name against the normalized designations: an exact
+    match returns just that comet, otherwise every designation containing
+    the name. ``lookup`` also propagates all matches to a time in one go.
+    """
+
+    def __init__(
+        self,
+        loader,
+        max_age_days: float = 7,
+        check_interval_s: float = 60.0,
+        logger=None,
+    ):
+        self.loader = loader
+        self.max_age_days = max_age_days
+        self.check_interval_s = check_interval_s
+        self.logger = logger
+        self.table = EMPTY_TABLE
+        self.num_loads = 0
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._file_mtime = None
+        self._timescale = None
+        self._ephemeris = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.loader.directory, COMET_FILENAME)
+
+    def timescale(self):
+        if self._timescale is None:
+            self._timescale = self.loader.timescale()
+        return self._timescale
+
+    def ephemeris(self):
+        if self._ephemeris is None:
+            self._ephemeris = self.loader("de440s.bsp")
+        return self._ephemeris
+
+    def is_file_stale(self) -> bool:
+        try:
+            age_s = time.time() - os.path.getmtime(self.path)
+        except OSError:
+            return True
+        return age_s > self.max_age_days * 86400
+
+    def ensure_loaded(self) -> CometTable:
+        now = time.monotonic()
+        with self._lock:
+            if (
+                self._checked_at is not None
+                and now - self._checked_at < self.check_interval_s
+            ):
+                return self.table
+            self._checked_at = now
+            stale = self.is_file_stale()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = None
+            if stale or mtime != self._file_mtime or not self.num_loads:
+                self._load(reload=stale)
+            return self.table
+
+    def _load(self, reload: bool) -> None:
+        start = time.perf_counter()
+        with self.loader.open(mpc.COMET_URL, reload=reload) as f:
+            comets = mpc.load_comets_dataframe(f)
+        self.load_dataframe(comets)
+        self._file_mtime = os.path.getmtime(self.path)
+        if self.logger:
+            self.logger.info(
+                f"Indexed {len(self.table.designations)} comets from {self.path} in {time.perf_counter() - start:.2f}s"
+            )
+
+    def load_dataframe(self, comets) -> None:
+        """Replace the index with the orbits in an MPC comet dataframe."""
+        comets = _valid_orbits(latest_orbits(comets))
+        position, velocity, epoch_tt = perihelion_states(comets, self.timescale())
+        designations = comets["designation"].tolist()
+        normalized = [normalize_name(d) for d in designations]
+        self.table = CometTable(
+            designations,
+            normalized,
+            {key: i for i, key in enumerate(normalized)},
+            position,
+            velocity,
+            epoch_tt,
+        )
+        self.num_loads += 1
+
+    def search(self, name: str) -> list[str]:
+        table = self.ensure_loaded()
+        return [table.designations[i] for i in table.match(name)]
+
+    def lookup(self, name: str, t, sun=None, earth=None):
+        """Designations and (ra_hours, dec_degrees, distance_au) of all matches at t.
+
+        sun and earth default to the de440s ephemeris, loaded once.
+        """
+        table = self.ensure_loaded()
+        idx = np.asarray(table.match(name), dtype=int)
+        if not len(idx):
+            return [], (np.zeros(0), np.zeros(0), np.zeros(0))
+        if sun is None or earth is None:
+            eph = self.ephemeris()
+            sun, earth = eph["sun"], eph["earth"]
+        vector = observe_orbits(
+            table.position[:, idx],
+            table.velocity[:, idx],
+            table.epoch_tt[idx],
+            t,
+            sun.at(t).position.au,
+            earth.at(t).position.au,
+        )
+        return [table.designations[i] for i in idx], vector_to_radec(vector)
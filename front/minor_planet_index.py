@@ -0,0 +1,370 @@
+#
+# minor_planet_index - prebuilt SQLite index of the MPCORB minor planet file
+#
+# data/mpn-01.txt (MPCORB format) is ingested once into data/mpn-01.sqlite:
+# one row of orbital elements per minor planet plus a word table over the
+# designations, so a search is an indexed lookup instead of parsing 2 MB
+# and running a regex over every designation. The index remembers the size
+# and mtime of the file it was built from and is rebuilt when they change.
+#
+# Rebuild or check it by hand with:
+#   python -m front.minor_planet_index [--check] [--source PATH] [--index PATH]
+#
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from skyfield.constants import DEG2RAD
+from skyfield.data import mpc
+from skyfield.keplerlib import ele_to_vec
+from skyfield.timelib import julian_day
+
+from front.comet_index import GM_SUN_AU3_D2, observe_orbits, vector_to_radec
+
+MPN_URL = "http://dss.stellarium.org/MPC/mpn-01.txt"
+SOURCE_PATH = os.path.join("data", "mpn-01.txt")
+INDEX_PATH = os.path.join("data", "mpn-01.sqlite")
+SCHEMA_VERSION = "1"
+# Newton steps for Kepler's equation; converges for every e < 1 from the
+# starting points used below
+KEPLER_ITERATIONS = 12
+
+ELEMENT_COLUMNS = (
+    "epoch_tt",
+    "mean_anomaly_degrees",
+    "argument_of_perihelion_degrees",
+    "longitude_of_ascending_node_degrees",
+    "inclination_degrees",
+    "eccentricity",
+    "semimajor_axis_au",
+)
+
+_word = re.compile(r"[0-9a-z]+")
+
+
+def designation_words(text: str) -> list[str]:
+    return _word.findall(text.lower())
+
+
+def _contains_phrase(designation: str, phrase: str) -> bool:
+    # an SQL function, so find() can rank phrase matches before its LIMIT
+    pattern = r"\b{}\b".format(re.escape(phrase))
+    return re.search(pattern, designation, re.IGNORECASE) is not None
+
+
+def _unpack_epoch_jd(packed: str) -> float:
+    def n(c):
+        return ord(c) - (48 if c.isdigit() else 55)
+
+    year = 100 * n(packed[0]) + int(packed[1:3])
+    return julian_day(year, n(packed[3]), n(packed[4])) - 0.5
+
+
+def _source_signature(source_path: str) -> dict[str, str]:
+    st = os.stat(source_path)
+    return {"source_size": str(st.st_size), "source_mtime_ns": str(st.st_mtime_ns)}
+
+
+def read_meta(index_path: str = INDEX_PATH) -> dict[str, str]:
+    if not os.path.exists(index_path):
+        return {}
+    try:
+        con = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+        try:
+            return dict(con.execute("SELECT key, value FROM meta"))
+        finally:
+            con.close()
+    except sqlite3.Error:
+        return {}
+
+
+def is_index_stale(
+    source_path: str = SOURCE_PATH, index_path: str = INDEX_PATH
+) -> bool:
+    meta = read_meta(index_path)
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        return True
+    try:
+        signature = _source_signature(source_path)
+    except OSError:
+        # nothing to rebuild from; an existing index is still usable
+        return False
+    return any(meta.get(key) != value for key, value in signature.items())
+
+
+def build_minor_planet_index(
+    source_path: str = SOURCE_PATH, index_path: str = INDEX_PATH, logger=None
+) -> int:
+    """Parse an MPCORB file into a fresh SQLite index. Returns the row count."""
+    start = time.perf_counter()
+    with open(source_path, "rb") as f:
+        planets = mpc.load_mpcorb_dataframe(f)
+    # rows without a semimajor axis cannot be propagated
+    planets = planets[
+        planets["semimajor_axis_au"].notnull() & planets["eccentricity"].lt(1.0)
+    ]
+
+    rows = [
+        (
+            designation,
+            magnitude_h,
+            _unpack_epoch_jd(epoch_packed),
+            *elements,
+        )
+        for designation, magnitude_h, epoch_packed, *elements in zip(
+            planets["designation"],
+            planets["magnitude_H"],
+            planets["epoch_packed"],
+            *(planets[column] for column in ELEMENT_COLUMNS[1:]),
+        )
+    ]
+
+    tmp_path = index_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    con = sqlite3.connect(tmp_path)
+    try:
+        con.executescript(
+            f"""
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE minor_planets (
+                id INTEGER PRIMARY KEY,
+                designation TEXT NOT NULL,
+                magnitude_h REAL,
+                {", ".join(f"{column} REAL NOT NULL" for column in ELEMENT_COLUMNS)}
+            );
+            CREATE TABLE designation_words (word TEXT NOT NULL, id INTEGER NOT NULL);
+            """
+        )
+        con.executemany(
+            f"INSERT INTO minor_planets VALUES (NULL, ?, ?, {', '.join('?' * len(ELEMENT_COLUMNS))})",
+            rows,
+        )
+        con.executemany(
+            "INSERT INTO designation_words VALUES (?, ?)",
+            (
+                (word, row_id)
+                for row_id, designation in con.execute(
+                    "SELECT id, designation FROM minor_planets"
+                ).fetchall()
+                for word in set(designation_words(designation))
+            ),
+        )
+        con.execute("CREATE INDEX designation_words_word ON designation_words(word)")
+        meta = {
+            "schema_version": SCHEMA_VERSION,
+            "source_path": os.path.abspath(source_path),
+            "num_rows": str(len(rows)),
+            "built_at": str(time.time()),
+            **_source_signature(source_path),
+        }
+        con.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp_path, index_path)
+
+    if logger:
+        logger.info(
+            f"Indexed {len(rows)} minor planets from {source_path} into {index_path} in {time.perf_counter() - start:.2f}s"
+        )
+    return len(rows)
+
+
+def eccentric_anomaly(e, mean_anomaly):
+    """Vectorized Newton solution of Kepler's equation for elliptic orbits."""
+    mean_anomaly = np.remainder(mean_anomaly + np.pi, 2 * np.pi) - np.pi
+    ecc = np.where(e < 0.8, mean_anomaly, np.pi * np.sign(mean_anomaly))
+    for _ in range(KEPLER_ITERATIONS):
+        ecc = ecc - (ecc - e * np.sin(ecc) - mean_anomaly) / (1.0 - e * np.cos(ecc))
+    return ecc
+
+
+def epoch_states(elements: dict):
+    """Heliocentric ecliptic state vectors (au, au/day) at each element epoch."""
+    e = elements["eccentricity"]
+    a = elements["semimajor_axis_au"]
+    ecc = eccentric_anomaly(e, DEG2RAD * elements["mean_anomaly_degrees"])
+    true_anomaly = 2.0 * np.arctan(np.sqrt((1.0 + e) / (1.0 - e)) * np.tan(ecc / 2))
+    position, velocity = ele_to_vec(
+        a * (1.0 - e * e),
+        e,
+        DEG2RAD * elements["inclination_degrees"],
+        DEG2RAD * elements["longitude_of_ascending_node_degrees"],
+        DEG2RAD * elements["argument_of_perihelion_degrees"],
+        true_anomaly,
+        GM_SUN_AU3_D2,
+    )
+    return position, velocity, elements["epoch_tt"]
+
+
+class MinorPlanetIndex:
+    """Read-only access to the minor planet index with batched positions.
+
+    The index is built (downloading the MPCORB file first if there is no
+    local copy) on first use and rebuilt when the source file changes; that
+    check runs at most every check_interval_s.
+    """
+
+    def __init__(
+        self,
+        loader,
+        source_path: str = SOURCE_PATH,
+        index_path: str = INDEX_PATH,
+        check_interval_s: float = 60.0,
+        logger=None,
+    ):
+        self.loader = loader
+        self.source_path = source_path
+        self.index_path = index_path
+        self.check_interval_s = check_interval_s
+        self.logger = logger
+        self.num_builds = 0
+        self._lock = threading.Lock()
+        self._con = None
+        self._checked_at = None
+
+    def ensure_index(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._con is not None and now - self._checked_at < self.check_interval_s:
+                return
+            self._checked_at = now
+            if not os.path.exists(self.source_path) and not os.path.exists(
+                self.index_path
+            ):
+                # Loader caches the download under its own directory
+                with self.loader.open(MPN_URL):
+                    pass
+            if is_index_stale(self.source_path, self.index_path):
+                build_minor_planet_index(
+                    self.source_path, self.index_path, logger=self.logger
+                )
+                self.num_builds += 1
+                self._close()
+            if self._con is None:
+                self._con = sqlite3.connect(
+                    f"file:{self.index_path}?mode=ro",
+                    uri=True,
+                    check_same_thread=False,
+                )
+                self._con.create_function(
+                    "contains_phrase", 2, _contains_phrase, deterministic=True
+                )
+
+    def _close(self) -> None:
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _query(self, sql: str, params=()) -> list:
+        self.ensure_index()
+        with self._lock:
+            return self._con.execute(sql, params).fetchall()
+
+    def find(self, name: str, limit: int = 50) -> list[int]:
+        """Ids of the minor planets whose designation contains every word of name.
+
+        Designations that contain name as a phrase, e.g. "(1) Ceres" for "1",
+        come first, then file order.
+        """
+        words = sorted(set(designation_words(name)))
+        if not words:
+            return []
+        rows = self._query(
+            f"""
+            SELECT m.id FROM designation_words w
+            JOIN minor_planets m ON m.id = w.id
+            WHERE w.word IN ({", ".join("?" * len(words))})
+            GROUP BY m.id HAVING COUNT(DISTINCT w.word) = ?
+            ORDER BY contains_phrase(m.designation, ?) DESC, m.id LIMIT ?
+            """,
+            (*words, len(words), name.strip(), limit),
+        )
+        return [row_id for (row_id,) in rows]
+
+    def search(self, name: str, limit: int = 50) -> list[str]:
+        ids = self.find(name, limit)
+        designations = self.designations(ids)
+        return [designations[row_id] for row_id in ids]
+
+    def designations(self, ids: list[int]) -> dict[int, str]:
+        if not ids:
+            return {}
+        return dict(
+            self._query(
+                f"SELECT id, designation FROM minor_planets WHERE id IN ({', '.join('?' * len(ids))})",
+                tuple(ids),
+            )
+        )
+
+    def elements(self, ids: list[int] | None = None) -> dict[str, np.ndarray]:
+        """Orbital elements as columns in the order of ids (all rows for None)."""
+        columns = ", ".join(("id",) + ELEMENT_COLUMNS)
+        if ids is None:
+            rows = self._query(f"SELECT {columns} FROM minor_planets ORDER BY id")
+        else:
+            rows = self._query(
+                f"SELECT {columns} FROM minor_planets WHERE id IN ({', '.join('?' * len(ids))})",
+                tuple(ids),
+            )
+            order = {row_id: k for k, row_id in enumerate(ids)}
+            rows.sort(key=lambda row: order[row[0]])
+        table = np.array(rows, dtype=float).reshape(len(rows), len(ELEMENT_COLUMNS) + 1)
+        out = {"id": table[:, 0].astype(int)}
+        for k, column in enumerate(ELEMENT_COLUMNS, start=1):
+            out[column] = table[:, k]
+        return out
+
+    def observe(self, ids: list[int] | None, t, sun, earth):
+        """RA (hours), Dec (degrees) and distance (au) seen from earth at t.
+
+        Pass ids=None to compute every minor planet in the index at once.
+        """
+        elements = self.elements(ids)
+        if not len(elements["id"]):
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        position, velocity, epoch_tt = epoch_states(elements)
+        vector = observe_orbits(
+            position,
+            velocity,
+            epoch_tt,
+            t,
+            sun.at(t).position.au,
+            earth.at(t).position.au,
+        )
+        return vector_to_radec(vector)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build the minor planet index from an MPCORB file."
+    )
+    parser.add_argument("--source", default=SOURCE_PATH)
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only report whether the index is stale; exit status 1 if it is",
+    )
+    args = parser.parse_args(argv)
+
+    stale = is_index_stale(args.source, args.index)
+    if args.check:
+        print(f"{args.index}: {'stale' if stale else 'up to date'}")
+        return 1 if stale else 0
+    num_rows = build_minor_planet_index(args.source, args.index)
+    print(f"Indexed {num_rows} minor planets from {args.source} into {args.index}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,461 @@
+#
+# night_planner - rank the local catalogue by how well it can be seen tonight
+#
+# For a site and a night, the altitude of every object in data/alp.dat is
+# computed on a regular time grid in one vectorized pass: the catalogue is
+# precessed to the date once, local sidereal time is analytic, and the
+# altitude comes from the hour angle by spherical trigonometry, so there is
+# no per-object astropy or skyfield call. The sun and moon use low precision
+# series (a few arcminutes), which is plenty for ranking targets.
+#
+# Objects are ranked by the hours they spend above the minimum altitude
+# while the sky is dark and the moon, when it is up, is far enough away.
+# Plans are cached per site, date and parameters.
+#
+import collections
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import date as date_type
+from datetime import datetime, timedelta, timezone
+from datetime import time as time_of_day
+
+import numpy as np
+
+from device.altaz_kernel import J2000_JD, UNIX_EPOCH_JD, gmst_degrees, precession_matrix
+from front.object_search import LP_OBJECT_TYPES
+
+CATALOG_PATH = os.path.join("data", "alp.dat")
+
+# objects handled per block; keeps the (objects, samples) arrays small
+CHUNK_SIZE = 2048
+# darkness levels tried in turn when the sun never gets low enough
+TWILIGHT_FALLBACKS = (-12.0, -6.0)
+
+
+class Catalog:
+    """The alp.dat columns the planner needs, as arrays."""
+
+    def __init__(self, rows: list[tuple]):
+        self.ra = [row[0] for row in rows]
+        self.dec = [row[1] for row in rows]
+        self.object_type = [row[2] or "" for row in rows]
+        self.names = [row[3] or row[4] or "" for row in rows]
+        self.ra_hours = np.array([_sexagesimal(ra) for ra in self.ra])
+        self.dec_degrees = np.array([_sexagesimal(dec) for dec in self.dec])
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _sexagesimal(text: str) -> float:
+    # "05h35m17.30s" or "-05d23m28.0s"
+    sign = -1.0 if text.startswith("-") else 1.0
+    for unit in "hdms":
+        text = text.replace(unit, " ")
+    whole, minutes, seconds = (abs(float(part)) for part in text.split())
+    return sign * (whole + minutes / 60.0 + seconds / 3600.0)
+
+
+def load_catalog(catalog_path: str = CATALOG_PATH) -> Catalog:
+    con = sqlite3.connect(f"file:{catalog_path}?mode=ro", uri=True)
+    try:
+        rows = con.execute(
+            "SELECT ra, dec, objectType, commonNames, identifiers FROM objects "
+            "WHERE ra IS NOT NULL AND dec IS NOT NULL ORDER BY rowid"
+        ).fetchall()
+    finally:
+        con.close()
+    return Catalog(rows)
+
+
+def julian_dates(times: list[datetime]) -> np.ndarray:
+    return np.array([t.timestamp() for t in times]) / 86400.0 + UNIX_EPOCH_JD
+
+
+def local_sidereal_time(jd, longitude_degrees: float):
+    """Local mean sidereal time in radians."""
+    return np.radians(
+        np.remainder(gmst_degrees(np.asarray(jd)) + longitude_degrees, 360.0)
+    )
+
+
+def unit_vectors(ra_radians, dec_radians) -> np.ndarray:
+    cos_dec = np.cos(dec_radians)
+    return np.stack(
+        [
+            cos_dec * np.cos(ra_radians),
+            cos_dec * np.sin(ra_radians),
+            np.sin(dec_radians),
+        ],
+        axis=-1,
+    )
+
+
+def _ecliptic_to_equatorial(longitude, latitude, jd):
+    obliquity = np.radians(23.439291 - 0.0130042 * (jd - J2000_JD) / 36525.0)
+    vector = unit_vectors(longitude, latitude)
+    x, y, z = vector[..., 0], vector[..., 1], vector[..., 2]
+    ce, se = np.cos(obliquity), np.sin(obliquity)
+    return np.stack([x, ce * y - se * z, se * y + ce * z], axis=-1)
+
+
+def sun_vectors(jd) -> np.ndarray:
+    """Unit vectors to the sun, equator of date (about 1 arcminute)."""
+    n = np.asarray(jd) - J2000_JD
+    mean_longitude = np.radians(280.460 + 0.9856474 * n)
+    g = np.radians(357.528 + 0.9856003 * n)
+    longitude = mean_longitude + np.radians(1.915 * np.sin(g) + 0.020 * np.sin(2 * g))
+    return _ecliptic_to_equatorial(longitude, np.zeros_like(longitude), jd)
+
+
+def moon_vectors(jd) -> np.ndarray:
+    """Unit vectors to the moon, geocentric, equator of date (about 0.3 degrees)."""
+    t = (np.asarray(jd) - J2000_JD) / 36525.0
+
+    def s(a, b):
+        return np.sin(np.radians(a + b * t))
+
+    longitude = (
+        218.32
+        + 481267.881 * t
+        + 6.29 * s(135.0, 477198.87)
+        - 1.27 * s(259.3, -413335.36)
+        + 0.66 * s(235.7, 890534.22)
+        + 0.21 * s(269.9, 954397.74)
+        - 0.19 * s(357.5, 35999.05)
+        - 0.11 * s(186.5, 966404.03)
+    )
+    latitude = (
+        5.13 * s(93.3, 483202.02)
+        + 0.28 * s(228.2, 960400.89)
+        - 0.28 * s(318.3, 6003.15)
+        - 0.17 * s(217.6, -407332.21)
+    )
+    return _ecliptic_to_equatorial(np.radians(longitude), np.radians(latitude), jd)
+
+
+def _track_altitude(vectors, lst, latitude_radians):
+    """Altitude in degrees of one moving body, vectors (t, 3) at each lst (t,)."""
+    sin_lat, cos_lat = math.sin(latitude_radians), math.cos(latitude_radians)
+    sin_alt = sin_lat * vectors[:, 2] + cos_lat * (
+        vectors[:, 0] * np.cos(lst) + vectors[:, 1] * np.sin(lst)
+    )
+    return np.degrees(np.arcsin(np.clip(sin_alt, -1.0, 1.0)))
+
+
+def altaz(ra_hours, dec_degrees, latitude, longitude, jd):
+    """Altitude and azimuth (degrees, azimuth from north through east).
+
+    ra_hours and dec_degrees are J2000 catalogue positions, jd a scalar or
+    an array of UTC Julian dates; the result has shape (objects, times).
+    """
+    jd = np.atleast_1d(np.asarray(jd, dtype=float))
+    ra_hours = np.atleast_1d(ra_hours)
+    vectors = (
+        unit_vectors(
+            np.radians(np.asarray(ra_hours, dtype=float) * 15.0),
+            np.radians(np.atleast_1d(np.asarray(dec_degrees, dtype=float))),
+        )
+        @ np.array(precession_matrix(float(jd.mean()))).T
+    )
+    lst = local_sidereal_time(jd, longitude)
+    lat = math.radians(latitude)
+    # hour angle components: cos(dec) sin(H) and cos(dec) cos(H)
+    sin_h = vectors[:, 0:1] * np.sin(lst) - vectors[:, 1:2] * np.cos(lst)
+    cos_h = vectors[:, 0:1] * np.cos(lst) + vectors[:, 1:2] * np.sin(lst)
+    z = vectors[:, 2:3]
+    altitude = np.degrees(
+        np.arcsin(np.clip(math.sin(lat) * z + math.cos(lat) * cos_h, -1.0, 1.0))
+    )
+    azimuth = (
+        np.degrees(np.arctan2(-sin_h, z * math.cos(lat) - cos_h * math.sin(lat)))
+        % 360.0
+    )
+    return altitude, azimuth
+
+
+class NightPlan:
+    """Visibility of every catalogue object during one night at one site."""
+
+    def __init__(self, catalog: Catalog, **fields):
+        self.catalog = catalog
+        self.__dict__.update(fields)
+
+    def summary(self) -> dict:
+        return {
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "date": self.date.isoformat(),
+            "step_minutes": self.step_minutes,
+            "min_altitude": self.min_altitude,
+            "min_moon_separation": self.min_moon_separation,
+            "twilight": self.twilight,
+            "dark_start": _isoformat(self.dark_start),
+            "dark_end": _isoformat(self.dark_end),
+            "dark_hours": round(self.dark_hours, 2),
+            "moon_illumination": round(self.moon_illumination, 2),
+            "num_objects": len(self.catalog),
+            "num_visible": int(np.count_nonzero(self.hours)),
+            "compute_seconds": round(self.compute_seconds, 3),
+        }
+
+    def targets(self, limit: int = 50, object_types=None) -> list[dict]:
+        """The best targets first: most usable hours, then highest altitude."""
+        order = np.lexsort((-self.max_altitude, -self.hours))
+        order = order[self.hours[order] > 0]
+        if object_types:
+            wanted = set(object_types)
+            order = [k for k in order if self.catalog.object_type[k] in wanted]
+        result = []
+        for k in order[:limit]:
+            object_type = self.catalog.object_type[k]
+            result.append(
+                {
+                    "objectName": self.catalog.names[k],
+                    "objectType": object_type,
+                    "ra": self.catalog.ra[k],
+                    "dec": self.catalog.dec[k],
+                    "lp": "true" if object_type in LP_OBJECT_TYPES else "false",
+                    "hours": round(float(self.hours[k]), 2),
+                    "max_altitude": round(float(self.max_altitude[k]), 1),
+                    "best_time": _isoformat(self.times[self.best_index[k]]),
+                    "moon_separation": round(float(self.moon_separation[k]), 1),
+                }
+            )
+        return result
+
+
+def _isoformat(value):
+    return value.isoformat(timespec="minutes") if value is not None else None
+
+
+def night_visibility(
+    ra_hours,
+    dec_degrees,
+    latitude: float,
+    longitude: float,
+    jd: np.ndarray,
+    dark: np.ndarray,
+    min_altitude: float,
+    min_moon_separation: float,
+    step_minutes: float,
+):
+    """Per-object visibility over the dark samples of a time grid.
+
+    Returns (hours, max_altitude, best_index, moon_separation): usable hours
+    above min_altitude with the moon, when up, at least min_moon_separation
+    away; the highest dark altitude, the grid index where it is reached and
+    the moon separation at that time.
+    """
+    n = len(ra_hours)
+    hours = np.zeros(n)
+    max_altitude = np.full(n, -90.0)
+    best_index = np.zeros(n, dtype=int)
+    moon_separation = np.full(n, 180.0)
+    dark_index = np.flatnonzero(dark)
+    if not n or not len(dark_index):
+        return hours, max_altitude, best_index, moon_separation
+
+    dark_jd = jd[dark_index]
+    lat = math.radians(latitude)
+    lst = local_sidereal_time(dark_jd, longitude)
+    cos_lst = np.cos(lst).astype(np.float32)
+    sin_lst = np.sin(lst).astype(np.float32)
+    moon = moon_vectors(dark_jd)
+    moon_altitude = _track_altitude(moon, lst, lat)
+    # parallax: seen from the surface the moon sits up to a degree lower
+    # than seen from the centre of the earth
+    moon_up = moon_altitude - 0.95 * np.cos(np.radians(moon_altitude)) > 0
+    moon = moon.astype(np.float32)
+
+    sin_min_alt = np.float32(math.sin(math.radians(min_altitude)))
+    cos_min_sep = np.float32(math.cos(math.radians(min_moon_separation)))
+    sin_lat, cos_lat = np.float32(math.sin(lat)), np.float32(math.cos(lat))
+    rotation = np.array(precession_matrix(float(dark_jd.mean()))).T
+    hours_per_sample = step_minutes / 60.0
+
+    for start in range(0, n, CHUNK_SIZE):
+        block = slice(start, start + CHUNK_SIZE)
+        vectors = (
+            unit_vectors(
+                np.radians(np.asarray(ra_hours[block]) * 15.0),
+                np.radians(np.asarray(dec_degrees[block])),
+            )
+            @ rotation
+        ).astype(np.float32)
+        x, y, z = vectors[:, 0:1], vectors[:, 1:2], vectors[:, 2:3]
+        # (objects, samples); only multiply-adds, no trigonometry per element
+        sin_alt = sin_lat * z + cos_lat * (x * cos_lst + y * sin_lst)
+        cos_moon = vectors @ moon.T
+        good = (sin_alt >= sin_min_alt) & ((cos_moon <= cos_min_sep) | ~moon_up)
+        hours[block] = np.count_nonzero(good, axis=1) * hours_per_sample
+        best = np.argmax(sin_alt, axis=1)
+        rows = np.arange(len(best))
+        max_altitude[block] = np.degrees(
+            np.arcsin(np.clip(sin_alt[rows, best], -1.0, 1.0))
+        )
+        moon_separation[block] = np.degrees(
+            np.arccos(np.clip(cos_moon[rows, best], -1.0, 1.0))
+        )
+        best_index[block] = dark_index[best]
+    return hours, max_altitude, best_index, moon_separation
+
+
+class NightPlanner:
+    """Night plans for the local catalogue, cached per site, date and limits."""
+
+    def __init__(
+        self, catalog_path: str = CATALOG_PATH, cache_size: int = 8, logger=None
+    ):
+        self.catalog_path = catalog_path
+        self.cache_size = cache_size
+        self.logger = logger
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._catalog_mtime_ns = None
+        self._cache: collections.OrderedDict[tuple, NightPlan] = (
+            collections.OrderedDict()
+        )
+
+    def catalog(self) -> Catalog:
+        mtime_ns = os.stat(self.catalog_path).st_mtime_ns
+        if self._catalog is None or self._catalog_mtime_ns != mtime_ns:
+            self._catalog = load_catalog(self.catalog_path)
+            self._catalog_mtime_ns = mtime_ns
+            self._cache.clear()
+        return self._catalog
+
+    def plan(
+        self,
+        latitude: float,
+        longitude: float,
+        date: date_type | None = None,
+        tz=None,
+        step_minutes: int = 5,
+        min_altitude: float = 30.0,
+        min_moon_separation: float = 30.0,
+        twilight: float = -18.0,
+    ) -> NightPlan:
+        """The plan for the night starting on date (local noon to noon).
+
+        Without a date, the night in progress or about to start: before
+        local noon that is the one that began the previous evening.
+        """
+        tz = tz or datetime.now().astimezone().tzinfo
+        if date is None:
+            date = (datetime.now(tz) - timedelta(hours=12)).date()
+        key = (
+            round(latitude, 4),
+            round(longitude, 4),
+            date,
+            str(tz),
+            step_minutes,
+            min_altitude,
+            min_moon_separation,
+            twilight,
+        )
+        with self._lock:
+            catalog = self.catalog()
+            plan = self._cache.get(key)
+            if plan is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+            plan = self._compute(
+                catalog,
+                latitude,
+                longitude,
+                date,
+                tz,
+                step_minutes,
+                min_altitude,
+                min_moon_separation,
+                twilight,
+            )
+            self._cache[key] = plan
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return plan
+
+    def _compute(
+        self,
+        catalog,
+        latitude,
+        longitude,
+        date,
+        tz,
+        step_minutes,
+        min_altitude,
+        min_moon_separation,
+        twilight,
+    ) -> NightPlan:
+        start_time = time.perf_counter()
+        noon = datetime.combine(date, time_of_day(12), tzinfo=tz)
+        next_noon = datetime.combine(
+            date + timedelta(days=1), time_of_day(12), tzinfo=tz
+        )
+        num_samples = int((next_noon - noon) / timedelta(minutes=step_minutes)) + 1
+        start_utc = noon.astimezone(timezone.utc)
+        utc_times = [
+            start_utc + timedelta(minutes=step_minutes * k) for k in range(num_samples)
+        ]
+        jd = julian_dates(utc_times)
+
+        sun_altitude = _track_altitude(
+            sun_vectors(jd), local_sidereal_time(jd, longitude), math.radians(latitude)
+        )
+        for level in (twilight,) + tuple(t for t in TWILIGHT_FALLBACKS if t > twilight):
+            dark = sun_altitude < level
+            if dark.any():
+                twilight = level
+                break
+
+        hours, max_altitude, best_index, moon_separation = night_visibility(
+            catalog.ra_hours,
+            catalog.dec_degrees,
+            latitude,
+            longitude,
+            jd,
+            dark,
+            min_altitude,
+            min_moon_separation,
+            step_minutes,
+        )
+        dark_index = np.flatnonzero(dark)
+        middle = (
+            dark_index[len(dark_index) // 2] if len(dark_index) else num_samples // 2
+        )
+        elongation = float(sun_vectors(jd[middle]) @ moon_vectors(jd[middle]))
+        local_times = [t.astimezone(tz) for t in utc_times]
+        plan = NightPlan(
+            catalog,
+            latitude=latitude,
+            longitude=longitude,
+            date=date,
+            step_minutes=step_minutes,
+            min_altitude=min_altitude,
+            min_moon_separation=min_moon_separation,
+            twilight=twilight,
+            times=local_times,
+            dark_start=local_times[dark_index[0]] if len(dark_index) else None,
+            dark_end=local_times[dark_index[-1]] if len(dark_index) else None,
+            dark_hours=len(dark_index) * step_minutes / 60.0,
+            moon_illumination=(1.0 - elongation) / 2.0,
+            hours=hours,
+            max_altitude=max_altitude,
+            best_index=best_index,
+            moon_separation=moon_separation,
+            compute_seconds=time.perf_counter() - start_time,
+        )
+        if self.logger:
+            self.logger.info(
+                f"Night plan for {date} at {latitude:.2f},{longitude:.2f}: "
+                f"{len(catalog)} objects x {len(dark_index)} dark samples in {plan.compute_seconds:.2f}s"
+            )
+        return plan
@@ -0,0 +1,333 @@
+#
+# object_search - full-text search over the local deep sky catalogue
+#
+# data/alp.dat ships as a plain SQLite table, which only supports
+# "LIKE '%x%'" scans. On first use the identifiers and common names are
+# copied into data/alp_fts.sqlite with an FTS5 trigram index, so substring
+# and prefix queries become index lookups and a misspelled name can still
+# be found by its shared trigrams. Queries run on a small pool of read-only
+# connections and the results of recent queries are kept in an LRU.
+#
+# Older SQLite builds without FTS5 or the trigram tokenizer fall back to
+# parameterized LIKE queries against alp.dat.
+#
+import collections
+import contextlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+CATALOG_PATH = os.path.join("data", "alp.dat")
+INDEX_PATH = os.path.join("data", "alp_fts.sqlite")
+SCHEMA_VERSION = "1"
+
+# object types that are worth imaging with the light pollution filter
+LP_OBJECT_TYPES = {
+    "Planetary Nebula",
+    "Nebula",
+    "Star cluster + Nebula",
+    "HII Ionized region",
+    "Supernova remnant",
+}
+# trigram MATCH needs at least three characters
+MIN_MATCH_CHARS = 3
+# fuzzy matches must share at least this fraction of the query trigrams
+MIN_FUZZY_SIMILARITY = 0.5
+
+_COLUMNS = "ra, dec, objectType, commonNames, identifiers"
+# exact names first, then names starting with the query, then the rest;
+# identifiers are separated by spaces and common names by commas
+_RANK_TIER = """CASE
+    WHEN ' ' || o.identifiers || ' ' LIKE :exact_id ESCAPE '\\'
+        OR ',' || o.commonNames || ',' LIKE :exact_name ESCAPE '\\' THEN 0
+    WHEN ' ' || o.identifiers LIKE :prefix_id ESCAPE '\\'
+        OR ',' || o.commonNames LIKE :prefix_name ESCAPE '\\' THEN 1
+    ELSE 2 END"""
+_FTS_SELECT = (
+    "SELECT o.id, o.ra, o.dec, o.objectType, o.commonNames, o.identifiers "
+    "FROM objects_fts f JOIN objects o ON o.id = f.rowid"
+)
+
+
+def _source_signature(catalog_path: str) -> dict[str, str]:
+    st = os.stat(catalog_path)
+    return {"source_size": str(st.st_size), "source_mtime_ns": str(st.st_mtime_ns)}
+
+
+def _connect_ro(path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+
+def read_meta(index_path: str = INDEX_PATH) -> dict[str, str]:
+    if not os.path.exists(index_path):
+        return {}
+    try:
+        con = _connect_ro(index_path)
+        try:
+            return dict(con.execute("SELECT key, value FROM meta"))
+        finally:
+            con.close()
+    except sqlite3.Error:
+        return {}
+
+
+def is_index_stale(
+    catalog_path: str = CATALOG_PATH, index_path: str = INDEX_PATH
+) -> bool:
+    meta = read_meta(index_path)
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        return True
+    signature = _source_signature(catalog_path)
+    return any(meta.get(key) != value for key, value in signature.items())
+
+
+def build_search_index(
+    catalog_path: str = CATALOG_PATH, index_path: str = INDEX_PATH, logger=None
+) -> int:
+    """Copy the catalogue into a new database with an FTS5 trigram index.
+
+    Raises sqlite3.OperationalError when this SQLite has no trigram FTS5.
+    Returns the number of indexed objects.
+    """
+    start = time.perf_counter()
+    tmp_path = index_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    con = sqlite3.connect(tmp_path)
+    try:
+        con.executescript(
+            """
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE objects (
+                id INTEGER PRIMARY KEY,
+                ra TEXT, dec TEXT, objectType TEXT,
+                commonNames TEXT, identifiers TEXT
+            );
+            CREATE VIRTUAL TABLE objects_fts USING fts5(
+                identifiers, commonNames,
+                content='objects', content_rowid='id', tokenize='trigram'
+            );
+            """
+        )
+        con.execute("ATTACH DATABASE ? AS catalog", (catalog_path,))
+        con.execute(
+            f"INSERT INTO objects ({_COLUMNS}) SELECT {_COLUMNS} FROM catalog.objects ORDER BY rowid"
+        )
+        con.commit()
+        con.execute("DETACH DATABASE catalog")
+        con.execute("INSERT INTO objects_fts(objects_fts) VALUES ('rebuild')")
+        num_rows = con.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+        meta = {
+            "schema_version": SCHEMA_VERSION,
+            "num_rows": str(num_rows),
+            **_source_signature(catalog_path),
+        }
+        con.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+        con.commit()
+    except sqlite3.Error:
+        con.close()
+        os.remove(tmp_path)
+        raise
+    con.close()
+    os.replace(tmp_path, index_path)
+    if logger:
+        logger.info(
+            f"Built search index of {num_rows} objects in {index_path} in {time.perf_counter() - start:.2f}s"
+        )
+    return num_rows
+
+
+def trigrams(text: str) -> set[str]:
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _fts_phrase(text: str) -> str:
+    # a quoted FTS5 string; embedded quotes are doubled
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _like_escape(text: str) -> str:
+    return re.sub(r"([\\%_])", r"\\\1", text)
+
+
+class ConnectionPool:
+    """A fixed number of read-only SQLite connections shared by threads."""
+
+    def __init__(self, path: str, size: int = 4):
+        self.path = path
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(_connect_ro(path))
+
+    @contextlib.contextmanager
+    def connection(self):
+        con = self._idle.get()
+        try:
+            yield con
+        finally:
+            self._idle.put(con)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class ObjectSearch:
+    """Search the local catalogue by identifier or common name.
+
+    ``search`` returns the rows whose identifiers or common names contain
+    the query (case-insensitive), best first: exact names, then names that
+    start with the query, then catalogue order. When nothing matches, the
+    query is retried without spaces and then the closest fuzzy matches are
+    returned instead.
+    """
+
+    def __init__(
+        self,
+        catalog_path: str = CATALOG_PATH,
+        index_path: str = INDEX_PATH,
+        pool_size: int = 4,
+        cache_size: int = 256,
+        logger=None,
+    ):
+        self.catalog_path = catalog_path
+        self.index_path = index_path
+        self.pool_size = pool_size
+        self.cache_size = cache_size
+        self.logger = logger
+        self.fts = False
+        self.hits = 0
+        self.misses = 0
+        self._pool = None
+        self._lock = threading.Lock()
+        self._cache: collections.OrderedDict[tuple, list] = collections.OrderedDict()
+
+    def _get_pool(self) -> ConnectionPool:
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._open_pool()
+            return self._pool
+
+    def _open_pool(self) -> ConnectionPool:
+        try:
+            if is_index_stale(self.catalog_path, self.index_path):
+                build_search_index(
+                    self.catalog_path, self.index_path, logger=self.logger
+                )
+            self.fts = True
+            return ConnectionPool(self.index_path, self.pool_size)
+        except (sqlite3.Error, OSError) as e:
+            if self.logger:
+                self.logger.warning(
+                    f"Full-text object search unavailable, using LIKE queries: {e}"
+                )
+            self.fts = False
+            return ConnectionPool(self.catalog_path, self.pool_size)
+
+    def reload(self) -> None:
+        """Drop the pool and cached results, e.g. after alp.dat was replaced."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+            self._cache.clear()
+
+    def search(self, text: str, limit: int = 50) -> list[dict]:
+        text = text.strip()
+        if not text:
+            return []
+        key = (text.lower(), limit)
+        with self._lock:
+            rows = self._cache.get(key)
+            if rows is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return rows
+            self.misses += 1
+
+        with self._get_pool().connection() as con:
+            rows = self._substring_rows(con, text, limit)
+            compact = "".join(text.split())
+            if not rows and compact != text:
+                # catalogue identifiers have no spaces: "NGC 7000" -> "NGC7000"
+                rows = self._substring_rows(con, compact, limit)
+            if not rows and self.fts and len(text) >= MIN_MATCH_CHARS + 1:
+                rows = self._fuzzy_rows(con, text)[:limit]
+        rows = [self._to_result(row) for row in rows]
+
+        with self._lock:
+            self._cache[key] = rows
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return rows
+
+    def _substring_rows(self, con, text: str, limit: int) -> list[tuple]:
+        escaped = _like_escape(text)
+        params = {
+            "exact_id": f"% {escaped} %",
+            "exact_name": f"%,{escaped},%",
+            "prefix_id": f"% {escaped}%",
+            "prefix_name": f"%,{escaped}%",
+            "limit": limit,
+        }
+        if self.fts and len(text) >= MIN_MATCH_CHARS:
+            return con.execute(
+                f"{_FTS_SELECT} WHERE objects_fts MATCH :match "
+                f"ORDER BY {_RANK_TIER}, o.id LIMIT :limit",
+                {**params, "match": _fts_phrase(text)},
+            ).fetchall()
+        # short queries, or no FTS5: alp.dat has no id column, only the rowid
+        id_column = "o.id" if self.fts else "o.rowid"
+        return con.execute(
+            f"SELECT {id_column}, {_COLUMNS} FROM objects o "
+            "WHERE o.identifiers LIKE :contains ESCAPE '\\' "
+            "OR o.commonNames LIKE :contains ESCAPE '\\' "
+            f"ORDER BY {_RANK_TIER}, {id_column} LIMIT :limit",
+            {**params, "contains": f"%{escaped}%"},
+        ).fetchall()
+
+    def _fuzzy_rows(self, con, text: str) -> list[tuple]:
+        wanted = trigrams(text)
+        query = " OR ".join(_fts_phrase(t) for t in sorted(wanted))
+        candidates = con.execute(
+            f"{_FTS_SELECT} WHERE objects_fts MATCH ? ORDER BY rank LIMIT 200",
+            (query,),
+        ).fetchall()
+        scored = []
+        for row in candidates:
+            best = max(
+                len(wanted & trigrams(name)) / len(wanted) for name in self._names(row)
+            )
+            if best >= MIN_FUZZY_SIMILARITY:
+                scored.append((-best, row[0], row))
+        scored.sort()
+        return [row for _, _, row in scored]
+
+    @staticmethod
+    def _names(row) -> list[str]:
+        common_names, identifiers = row[4] or "", row[5] or ""
+        return [n for n in common_names.split(",") + identifiers.split(" ") if n] or [
+            ""
+        ]
+
+    @staticmethod
+    def _to_result(row) -> dict:
+        _, ra, dec, object_type, common_names, identifiers = row
+        return {
+            "ra": ra,
+            "dec": dec,
+            "lp": "true" if object_type in LP_OBJECT_TYPES else "false",
+            # send back the full name when the object has one
+            "objectName": common_names or identifiers,
+        }
+
+    def suggest(self, text: str, limit: int = 10) -> list[str]:
+        """Names for the search box autocomplete."""
+        return [row["objectName"] for row in self.search(text, limit)]
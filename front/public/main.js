@@ -9,7 +9,7 @@ async function fetchCoordinates() {
                 return;
             }
             target = document.getElementById('targetName').value;
-            queryURL = '/localsearch?target=' + target
+            queryURL = '/localsearch?target=' + encodeURIComponent(target);
             fetch(queryURL)
             .then(response => {
                 if (!response.ok) {
@@ -525,4 +525,39 @@ function delSeestar() {
 
 }
 
+// Suggest names from the local deepsky DB while typing a target name
+function setupLocalSearchSuggest() {
+    const input = document.getElementById('targetName');
+    const searchFor = document.getElementById('searchFor');
+    if (!input || !searchFor || input.dataset.suggest) {
+        return;
+    }
+    input.dataset.suggest = 'true';
+    const list = document.createElement('datalist');
+    list.id = 'targetNameSuggestions';
+    input.after(list);
+    input.setAttribute('list', list.id);
+
+    let timer = null;
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        if (searchFor.value != 'LS' || input.value.trim().length < 2) {
+            list.replaceChildren();
+            return;
+        }
+        timer = setTimeout(() => {
+            fetch('/localsearch/suggest?q=' + encodeURIComponent(input.value))
+            .then(response => response.ok ? response.json() : [])
+            .then(names => {
+                list.replaceChildren(...names.map(name => {
+                    const option = document.createElement('option');
+                    option.value = name;
+                    return option;
+                }));
+            });
+        }, 150);
+    });
+}
 
+document.addEventListener('DOMContentLoaded', setupLocalSearchSuggest);
+document.addEventListener('htmx:afterSettle', setupLocalSearchSuggest);
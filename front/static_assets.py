@@ -0,0 +1,248 @@
+#
+# static_assets - precompressed, content-hashed serving of front/public
+#
+# The build step copies every file in front/public to front/public_build
+# under a content-hashed name (htmx.min.js -> htmx.min.3f2a9c0d1e.js) and
+# writes .gz (and .br, when the brotli module is installed) variants next to
+# it. Hashed names never change content, so they are served with
+# "Cache-Control: immutable"; the plain names still work and are revalidated
+# with ETag / If-None-Match.
+#
+# Run it by hand with:  python -m front.static_assets
+# FrontMain also runs it at startup whenever front/public has changed.
+#
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import threading
+
+import falcon
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+PUBLIC_DIR = os.path.join(os.path.dirname(__file__), "public")
+BUILD_DIR = os.path.join(os.path.dirname(__file__), "public_build")
+MANIFEST_NAME = "manifest.json"
+
+# binary formats that are already compressed gain nothing from gzip
+COMPRESSIBLE_SUFFIXES = {".js", ".css", ".html", ".svg", ".json", ".ico", ".txt"}
+# skip compressed variants that do not save at least this fraction
+MIN_SAVING = 0.1
+
+IMMUTABLE_CACHE_CONTROL = ["public", "max-age=31536000", "immutable"]
+REVALIDATE_CACHE_CONTROL = ["no-cache"]
+
+
+def hashed_name(name: str, digest: str) -> str:
+    stem, suffix = os.path.splitext(name)
+    return f"{stem}.{digest[:10]}{suffix}"
+
+
+def load_manifest(build_dir: str = BUILD_DIR) -> dict:
+    try:
+        with open(os.path.join(build_dir, MANIFEST_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}}
+
+
+def _source_digests(public_dir: str) -> dict[str, str]:
+    digests = {}
+    for name in sorted(os.listdir(public_dir)):
+        path = os.path.join(public_dir, name)
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                digests[name] = hashlib.sha256(f.read()).hexdigest()
+    return digests
+
+
+def is_build_stale(public_dir: str = PUBLIC_DIR, build_dir: str = BUILD_DIR) -> bool:
+    files = load_manifest(build_dir)["files"]
+    digests = _source_digests(public_dir)
+    if set(files) != set(digests):
+        return True
+    return any(files[name]["sha256"] != digest for name, digest in digests.items())
+
+
+def build_static_assets(
+    public_dir: str = PUBLIC_DIR, build_dir: str = BUILD_DIR, logger=None
+) -> dict:
+    """Write hashed copies and compressed variants of public_dir to build_dir.
+
+    Returns the manifest, which maps each source name to its hashed name and
+    the encodings that were written for it.
+    """
+    tmp_dir = build_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    manifest = {"files": {}}
+    for name, digest in _source_digests(public_dir).items():
+        with open(os.path.join(public_dir, name), "rb") as f:
+            data = f.read()
+        out_name = hashed_name(name, digest)
+        with open(os.path.join(tmp_dir, out_name), "wb") as f:
+            f.write(data)
+
+        encodings = []
+        if os.path.splitext(name)[1].lower() in COMPRESSIBLE_SUFFIXES:
+            variants = {"gzip": (".gz", gzip.compress(data, 9, mtime=0))}
+            if brotli is not None:
+                variants["br"] = (".br", brotli.compress(data, quality=11))
+            for encoding, (suffix, compressed) in variants.items():
+                if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                    with open(os.path.join(tmp_dir, out_name + suffix), "wb") as f:
+                        f.write(compressed)
+                    encodings.append(encoding)
+
+        manifest["files"][name] = {
+            "hashed": out_name,
+            "sha256": digest,
+            "size": len(data),
+            "encodings": encodings,
+        }
+
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    # swap the finished build in so a running server never sees half of it
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.replace(tmp_dir, build_dir)
+    if logger:
+        logger.info(
+            f"Built {len(manifest['files'])} static assets into {build_dir} (brotli: {brotli is not None})"
+        )
+    return manifest
+
+
+def ensure_static_assets(
+    public_dir: str = PUBLIC_DIR, build_dir: str = BUILD_DIR, logger=None
+) -> dict:
+    """Rebuild the static assets if front/public changed since the last build."""
+    try:
+        if is_build_stale(public_dir, build_dir):
+            return build_static_assets(public_dir, build_dir, logger)
+    except OSError as e:
+        # e.g. a read-only install; fall back to serving public_dir as is
+        if logger:
+            logger.warning(f"Could not build static assets into {build_dir}: {e}")
+    return load_manifest(build_dir)
+
+
+class StaticAssetResource:
+    """Serve /public/{name} from the prebuilt, precompressed asset directory.
+
+    Picks the best encoding the client accepts (br, then gzip), sends an
+    ETag for the exact bytes sent and answers a matching If-None-Match with
+    304. Hashed names are cached forever by the browser; plain names are
+    revalidated on every use. Files missing from the build (or everything,
+    if the build could not be written) are served straight from public_dir.
+    """
+
+    def __init__(self, public_dir: str = PUBLIC_DIR, build_dir: str = BUILD_DIR):
+        self.public_dir = public_dir
+        self.build_dir = build_dir
+        self._lock = threading.Lock()
+        self._data_cache: dict[str, bytes] = {}
+        self.reload()
+
+    def reload(self):
+        manifest = load_manifest(self.build_dir)
+        by_name = {}
+        for name, info in manifest["files"].items():
+            by_name[name] = (info, False)
+            by_name[info["hashed"]] = (info, True)
+        with self._lock:
+            self.manifest = manifest
+            self._by_name = by_name
+            self._data_cache.clear()
+
+    def asset_url(self, name: str) -> str:
+        info = self.manifest["files"].get(name)
+        return f"/public/{info['hashed'] if info else name}"
+
+    def _read(self, path: str) -> bytes:
+        with self._lock:
+            data = self._data_cache.get(path)
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+            with self._lock:
+                self._data_cache[path] = data
+        return data
+
+    @staticmethod
+    def _accepted_encodings(req) -> set[str]:
+        header = req.get_header("Accept-Encoding") or ""
+        accepted = set()
+        for part in header.split(","):
+            token, _, params = part.strip().partition(";")
+            if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00"):
+                continue
+            accepted.add(token.strip().lower())
+        return accepted
+
+    def on_get(self, req, resp, name):
+        if "/" in name or "\\" in name or name.startswith("."):
+            raise falcon.HTTPNotFound()
+
+        info, is_hashed = self._by_name.get(name, (None, False))
+        if info is None:
+            path = os.path.join(self.public_dir, name)
+            if not os.path.isfile(path):
+                raise falcon.HTTPNotFound()
+            encoding = None
+            etag_base = None
+        else:
+            path = os.path.join(self.build_dir, info["hashed"])
+            accepted = self._accepted_encodings(req)
+            encoding = next(
+                (
+                    enc
+                    for enc in ("br", "gzip")
+                    if enc in info["encodings"] and enc in accepted
+                ),
+                None,
+            )
+            if encoding:
+                path += ".br" if encoding == "br" else ".gz"
+            etag_base = info["sha256"][:16]
+
+        resp.vary = ["Accept-Encoding"]
+        resp.cache_control = (
+            IMMUTABLE_CACHE_CONTROL if is_hashed else REVALIDATE_CACHE_CONTROL
+        )
+
+        try:
+            data = self._read(path)
+        except OSError:
+            raise falcon.HTTPNotFound()
+        if etag_base is None:
+            etag_base = hashlib.sha256(data).hexdigest()[:16]
+        etag = f'"{etag_base}-{encoding}"' if encoding else f'"{etag_base}"'
+        resp.set_header("ETag", etag)
+
+        if_none_match = req.get_header("If-None-Match") or ""
+        if etag in [tag.strip() for tag in if_none_match.split(",")] or (
+            if_none_match.strip() == "*"
+        ):
+            resp.status = falcon.HTTP_304
+            return
+
+        resp.content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if encoding:
+            resp.set_header("Content-Encoding", encoding)
+        resp.status = falcon.HTTP_200
+        resp.data = data
+
+
+if __name__ == "__main__":
+    result = build_static_assets()
+    for source, entry in result["files"].items():
+        print(f"{source:28} -> {entry['hashed']:36} {', '.join(entry['encodings'])}")
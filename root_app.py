@@ -1,7 +1,7 @@
 #
 # Start frontend and pass in ALP for it to manage
 #
-from flask import Flask, Response
+from flask import Flask, Response, request
 from flask_cors import CORS, cross_origin
 import threading
 import time
@@ -10,12 +10,13 @@ import sdnotify
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
-from front.app import FrontMain, get_live_status
+from front.app import FrontMain, get_event_status_stream, get_live_status
 
 from device.app import DeviceMain  # type: ignore
 from device.config import Config  # type: ignore
 from device import log  # type: ignore
 from device import telescope  # type: ignore
+from device import thread_watchdog  # type: ignore
 
 
 import os
@@ -120,6 +121,14 @@ if __name__ == "__main__":
             mimetype="text/event-stream",
         )
 
+    @cross_origin()
+    @app.route("/<dev_num>/eventstatus")
+    def event_status(dev_num):
+        return Response(
+            get_event_status_stream(int(dev_num), request.args.get("action")),
+            mimetype="text/event-stream",
+        )
+
     @cross_origin()
     @app.route("/<dev_num>/vid")
     def vid(dev_num):
@@ -129,10 +138,16 @@ if __name__ == "__main__":
         )
 
     n.notify("READY=1")
+    # pings WATCHDOG=1 only while no connection thread is stalled
+    thread_watchdog.start_watchdog(logger, n.notify)
     print("Startup Complete")
 
     # telescope.telescopes()
 
     waitress.serve(
-        app, host=Config.ip_address, port=Config.imgport, threads=15, channel_timeout=30
+        app,
+        host=Config.ip_address,
+        port=Config.imgport,
+        threads=Config.imager_threads,
+        channel_timeout=30,
     )
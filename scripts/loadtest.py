@@ -0,0 +1,499 @@
+#
+# loadtest - drive a running ALP with a mix of realistic clients and report
+# latency percentiles, error rates and the process's CPU and memory over time
+#
+#   python scripts/loadtest.py --host 127.0.0.1 --devices 1,2 --duration 120 \
+#       --alpaca-clients 4 --mjpeg-viewers 2 --pid $(pgrep -f root_app.py) \
+#       --json report.json --html report.html
+#
+# Run it against the simulator fleet (see simulator/README.md) to size a
+# deployment. With --baseline it compares against an earlier JSON report and
+# exits with status 1 when an endpoint's p95 latency or error rate got worse
+# by more than --max-regression, so it can gate a release.
+#
+import argparse
+import html
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import requests
+
+# what NINA polls on a connected telescope
+ALPACA_PROPERTIES = (
+    "connected",
+    "rightascension",
+    "declination",
+    "altitude",
+    "azimuth",
+    "tracking",
+    "slewing",
+    "atpark",
+    "siderealtime",
+    "utcdate",
+)
+
+# pages poll their eventstatus fragment with hx-get every second
+EVENTSTATUS_ACTIONS = ("command", "goto", "image", "mosaic")
+
+
+class Recorder:
+    """Latencies, errors and streamed items per endpoint, safe across threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.items = defaultdict(int)
+
+    def ok(self, endpoint, seconds):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+
+    def error(self, endpoint):
+        with self.lock:
+            self.errors[endpoint] += 1
+
+    def streamed(self, endpoint, count=1):
+        with self.lock:
+            self.items[endpoint] += count
+
+    def summary(self, duration):
+        with self.lock:
+            endpoints = sorted(set(self.latencies) | set(self.errors) | set(self.items))
+            result = {}
+            for endpoint in endpoints:
+                latencies = np.array(self.latencies[endpoint]) * 1000.0
+                errors = self.errors[endpoint]
+                requests_made = len(latencies) + errors
+                entry = {
+                    "requests": requests_made,
+                    "errors": errors,
+                    "error_rate": round(errors / requests_made, 4)
+                    if requests_made
+                    else 0.0,
+                    "throughput_rps": round(len(latencies) / duration, 2),
+                }
+                if len(latencies):
+                    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+                    entry.update(
+                        p50_ms=round(float(p50), 1),
+                        p95_ms=round(float(p95), 1),
+                        p99_ms=round(float(p99), 1),
+                        max_ms=round(float(latencies.max()), 1),
+                    )
+                if self.items[endpoint]:
+                    entry["items_per_s"] = round(self.items[endpoint] / duration, 2)
+                result[endpoint] = entry
+            return result
+
+
+class ProcessSampler(threading.Thread):
+    """Samples CPU percent and RSS of a process from /proc once a second."""
+
+    def __init__(self, pid, stop, interval=1.0):
+        super().__init__(name="ProcessSampler", daemon=True)
+        self.pid = pid
+        self.stop = stop
+        self.interval = interval
+        self.samples = []
+        self.ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def available(self):
+        return os.path.exists(f"/proc/{self.pid}/stat")
+
+    def _cpu_seconds(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            # the command name may contain spaces, so split after it
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def _rss_mb(self):
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+        return 0.0
+
+    def run(self):
+        start = time.monotonic()
+        last_time, last_cpu = start, self._cpu_seconds()
+        while not self.stop.wait(self.interval):
+            try:
+                now, cpu = time.monotonic(), self._cpu_seconds()
+                self.samples.append(
+                    {
+                        "t": round(now - start, 1),
+                        "cpu_percent": round(
+                            100.0 * (cpu - last_cpu) / (now - last_time), 1
+                        ),
+                        "rss_mb": round(self._rss_mb(), 1),
+                    }
+                )
+                last_time, last_cpu = now, cpu
+            except OSError:
+                return  # the process has exited
+
+    def summary(self):
+        if not self.samples:
+            return {"samples": []}
+        cpu = [s["cpu_percent"] for s in self.samples]
+        rss = [s["rss_mb"] for s in self.samples]
+        return {
+            "cpu_mean_percent": round(float(np.mean(cpu)), 1),
+            "cpu_max_percent": round(float(np.max(cpu)), 1),
+            "rss_max_mb": round(float(np.max(rss)), 1),
+            "rss_growth_mb": round(rss[-1] - rss[0], 1),
+            "samples": self.samples,
+        }
+
+
+class LoadTest:
+    """Runs the workloads of args against one ALP until the duration is over."""
+
+    def __init__(self, args):
+        self.args = args
+        self.devices = [int(d) for d in str(args.devices).split(",") if d]
+        self.alpaca = f"http://{args.host}:{args.alpaca_port}/api/v1/telescope"
+        self.ui = f"http://{args.host}:{args.ui_port}"
+        self.imaging = f"http://{args.host}:{args.imaging_port}"
+        self.recorder = Recorder()
+        self.stop = threading.Event()
+        self.transaction = 0
+        self.transaction_lock = threading.Lock()
+
+    def _params(self):
+        with self.transaction_lock:
+            self.transaction += 1
+            return {"ClientID": 4242, "ClientTransactionID": self.transaction}
+
+    def _timed(self, endpoint, send):
+        """Make one request; Alpaca errors in the body count as errors too."""
+        start = time.perf_counter()
+        try:
+            response = send()
+            elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            if "application/json" in response.headers.get("Content-Type", ""):
+                if response.json().get("ErrorNumber", 0):
+                    raise ValueError(response.json().get("ErrorMessage"))
+        except (requests.RequestException, ValueError):
+            self.recorder.error(endpoint)
+            return False
+        self.recorder.ok(endpoint, elapsed)
+        return True
+
+    def _action(self, session, device, action, parameters):
+        data = {
+            **self._params(),
+            "Action": action,
+            "Parameters": json.dumps(parameters),
+        }
+        return session.put(
+            f"{self.alpaca}/{device}/action", data=data, timeout=self.args.timeout
+        )
+
+    def alpaca_poller(self, device):
+        session = requests.Session()
+        while not self.stop.is_set():
+            for prop in ALPACA_PROPERTIES:
+                self._timed(
+                    f"alpaca GET {prop}",
+                    lambda: session.get(
+                        f"{self.alpaca}/{device}/{prop}",
+                        params=self._params(),
+                        timeout=self.args.timeout,
+                    ),
+                )
+            self.stop.wait(self.args.alpaca_interval)
+
+    def method_sync_burster(self, device):
+        session = requests.Session()
+        methods = ("get_device_state", "scope_get_equ_coord", "get_view_state")
+        while not self.stop.is_set():
+            for k in range(self.args.burst):
+                method = methods[k % len(methods)]
+                self._timed(
+                    f"method_sync {method}",
+                    lambda: self._action(
+                        session, device, "method_sync", {"method": method}
+                    ),
+                )
+            self.stop.wait(self.args.burst_interval)
+
+    def federation_client(self):
+        session = requests.Session()
+        while not self.stop.is_set():
+            self._timed(
+                "federation method_sync get_device_state",
+                lambda: self._action(
+                    session, 0, "method_sync", {"method": "get_device_state"}
+                ),
+            )
+            self._timed(
+                "federation get_event_state",
+                lambda: self._action(session, 0, "get_event_state", {}),
+            )
+            self.stop.wait(self.args.federation_interval)
+
+    def eventstatus_poller(self, device):
+        session = requests.Session()
+        while not self.stop.is_set():
+            for action in EVENTSTATUS_ACTIONS:
+                self._timed(
+                    "ui GET eventstatus",
+                    lambda: session.get(
+                        f"{self.ui}/{device}/eventstatus",
+                        params={"action": action},
+                        headers={"HX-Request": "true"},
+                        timeout=self.args.timeout,
+                    ),
+                )
+            self.stop.wait(1.0)
+
+    def stream_reader(self, endpoint, url, marker):
+        """Hold a stream open, timing the first item and counting the rest.
+
+        Items are counted by `marker`, the MJPEG boundary or the blank line
+        that ends a server-sent event. A dropped stream is an error and is
+        reopened.
+        """
+        session = requests.Session()
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            first = True
+            tail = b""
+            try:
+                with session.get(
+                    url, stream=True, timeout=(self.args.timeout, 30)
+                ) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_content(65536):
+                        data = tail + chunk
+                        count = data.count(marker)
+                        tail = data[-len(marker) + 1 :]
+                        if count and first:
+                            self.recorder.ok(endpoint, time.perf_counter() - start)
+                            first = False
+                        if count:
+                            self.recorder.streamed(endpoint, count)
+                        if self.stop.is_set():
+                            return
+            except requests.RequestException:
+                pass
+            if not self.stop.is_set():
+                self.recorder.error(endpoint)
+                self.stop.wait(1.0)
+
+    def workers(self):
+        a = self.args
+        workers = []
+        for device in self.devices:
+            workers += [(self.alpaca_poller, (device,))] * a.alpaca_clients
+            workers += [(self.method_sync_burster, (device,))] * a.method_sync_clients
+            workers += [(self.eventstatus_poller, (device,))] * a.eventstatus_clients
+            workers += [
+                (
+                    self.stream_reader,
+                    (
+                        "imaging GET live/status",
+                        f"{self.imaging}/{device}/live/status",
+                        b"\n\n",
+                    ),
+                )
+            ] * a.live_status_clients
+            workers += [
+                (
+                    self.stream_reader,
+                    ("imaging GET vid", f"{self.imaging}/{device}/vid", b"--frame"),
+                )
+            ] * a.mjpeg_viewers
+        workers += [(self.federation_client, ())] * a.federation_clients
+        return workers
+
+    def run(self):
+        sampler = None
+        if self.args.pid:
+            sampler = ProcessSampler(self.args.pid, self.stop)
+            if sampler.available():
+                sampler.start()
+            else:
+                print(f"No /proc entry for pid {self.args.pid}, not sampling CPU/RSS")
+                sampler = None
+
+        threads = [
+            threading.Thread(target=target, args=args, daemon=True)
+            for target, args in self.workers()
+        ]
+        print(f"Running {len(threads)} clients for {self.args.duration}s")
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        self.stop.wait(self.args.duration)
+        self.stop.set()
+        for thread in threads:
+            thread.join(timeout=self.args.timeout + 1)
+        duration = time.monotonic() - start
+
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duration_s": round(duration, 1),
+            "workload": {
+                key: value
+                for key, value in vars(self.args).items()
+                if key not in ("json", "html", "baseline")
+            },
+            "endpoints": self.recorder.summary(duration),
+            "process": sampler.summary() if sampler else {"samples": []},
+        }
+
+
+def compare(report, baseline, max_regression):
+    """Endpoints whose p95 latency or error rate got worse than allowed."""
+    regressions = []
+    for endpoint, entry in report["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if before is None:
+            continue
+        if "p95_ms" in entry and "p95_ms" in before and before["p95_ms"] > 0:
+            change = entry["p95_ms"] / before["p95_ms"] - 1
+            if change > max_regression:
+                regressions.append(
+                    f"{endpoint}: p95 {before['p95_ms']} -> {entry['p95_ms']} ms "
+                    f"(+{change:.0%})"
+                )
+        if entry["error_rate"] > before["error_rate"] + max_regression / 10:
+            regressions.append(
+                f"{endpoint}: error rate {before['error_rate']:.2%} -> "
+                f"{entry['error_rate']:.2%}"
+            )
+    return regressions
+
+
+def _sparkline(samples, key, color, height=80, width=600):
+    values = [s[key] for s in samples]
+    if len(values) < 2:
+        return ""
+    top = max(values) or 1.0
+    points = " ".join(
+        f"{i * width / (len(values) - 1):.1f},{height - v * height / top:.1f}"
+        for i, v in enumerate(values)
+    )
+    return (
+        f'<svg width="{width}" height="{height}" style="border:1px solid #ccc">'
+        f'<polyline fill="none" stroke="{color}" stroke-width="2" points="{points}"/>'
+        f"</svg> max {top}"
+    )
+
+
+def render_html(report):
+    columns = (
+        "requests",
+        "error_rate",
+        "throughput_rps",
+        "p50_ms",
+        "p95_ms",
+        "p99_ms",
+        "max_ms",
+        "items_per_s",
+    )
+    rows = "".join(
+        f"<tr><td>{html.escape(endpoint)}</td>"
+        + "".join(f"<td>{entry.get(col, '')}</td>" for col in columns)
+        + "</tr>"
+        for endpoint, entry in report["endpoints"].items()
+    )
+    process = report["process"]
+    samples = process.get("samples", [])
+    process_html = "<p>Not sampled, pass --pid.</p>"
+    if samples:
+        process_html = (
+            f"<p>CPU mean {process['cpu_mean_percent']}%, "
+            f"max {process['cpu_max_percent']}%; RSS max {process['rss_max_mb']} MB, "
+            f"growth {process['rss_growth_mb']} MB</p>"
+            f"<h3>CPU %</h3>{_sparkline(samples, 'cpu_percent', '#c33')}"
+            f"<h3>RSS MB</h3>{_sparkline(samples, 'rss_mb', '#36c')}"
+        )
+    workload = html.escape(json.dumps(report["workload"], indent=2))
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>ALP load test {report["started"]}</title>
+<style>body{{font-family:sans-serif}} td,th{{padding:2px 8px;text-align:right}}
+td:first-child{{text-align:left}}</style></head><body>
+<h1>ALP load test</h1>
+<p>{report["started"]}, {report["duration_s"]} s</p>
+<table><tr><th>endpoint</th>{"".join(f"<th>{c}</th>" for c in columns)}</tr>
+{rows}</table>
+<h2>Process</h2>{process_html}
+<h2>Workload</h2><pre>{workload}</pre>
+</body></html>
+"""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load test a running ALP and report latencies."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--alpaca-port", type=int, default=5555)
+    parser.add_argument("--ui-port", type=int, default=5432)
+    parser.add_argument("--imaging-port", type=int, default=7556)
+    parser.add_argument("--devices", default="1", help="comma separated, e.g. 1,2,3")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per request")
+    parser.add_argument("--alpaca-clients", type=int, default=1, help="per device")
+    parser.add_argument("--alpaca-interval", type=float, default=1.0)
+    parser.add_argument("--method-sync-clients", type=int, default=1, help="per device")
+    parser.add_argument("--burst", type=int, default=10, help="method_sync per burst")
+    parser.add_argument("--burst-interval", type=float, default=5.0)
+    parser.add_argument("--eventstatus-clients", type=int, default=1, help="per device")
+    parser.add_argument("--live-status-clients", type=int, default=0, help="per device")
+    parser.add_argument("--mjpeg-viewers", type=int, default=0, help="per device")
+    parser.add_argument("--federation-clients", type=int, default=0)
+    parser.add_argument("--federation-interval", type=float, default=2.0)
+    parser.add_argument("--pid", type=int, help="ALP process to sample CPU/RSS of")
+    parser.add_argument("--json", help="write the report as JSON")
+    parser.add_argument("--html", help="write the report as HTML")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="allowed p95 increase as a fraction, default 0.2",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = LoadTest(args).run()
+
+    for endpoint, entry in report["endpoints"].items():
+        print(
+            f"{endpoint:45} {entry['throughput_rps']:7.1f}/s "
+            f"p50 {entry.get('p50_ms', '-'):>7} p95 {entry.get('p95_ms', '-'):>7} "
+            f"p99 {entry.get('p99_ms', '-'):>7} ms  errors {entry['error_rate']:.1%}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.json}")
+    if args.html:
+        with open(args.html, "w") as f:
+            f.write(render_html(report))
+        print(f"wrote {args.html}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
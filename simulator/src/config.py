@@ -130,6 +130,84 @@ class _Config:
             "options", "dropped_frame_ratio", 0
         )
 
+        # ---------------
+        # Imaging Section
+        # ---------------
+        self.imaging_enabled: bool = self.get_toml("imaging", "enabled", True)
+        self.imaging_port: int = self.get_toml("imaging", "port", 4800)
+        self.imaging_width: int = self.get_toml("imaging", "width", 1080)
+        self.imaging_height: int = self.get_toml("imaging", "height", 1920)
+        self.imaging_fps: float = self.get_toml("imaging", "fps", 2.0)
+        self.imaging_stars: int = self.get_toml("imaging", "stars", 300)
+
+        # -------------------
+        # Impairment Section
+        # -------------------
+        self.impairment_preset = self.get_toml("impairment", "preset", "none")
+        self.impairment_seed: int = self.get_toml("impairment", "seed", 0)
+        self.impairment_presets: dict = self.get_toml("impairment", "presets", {})
+
+        # -------------
+        # Fleet Section
+        # -------------
+        self.fleet_count: int = self.get_toml("fleet", "count", 1)
+        self.fleet_port_step: int = self.get_toml("fleet", "port_step", 1)
+        self.fleet_loopback_aliases: bool = self.get_toml(
+            "fleet", "loopback_aliases", False
+        )
+        self.scopes: list[dict] = self.fleet_scopes()
+
+    def fleet_scopes(self):
+        """
+        The simulated Seestars: name, device_num, ip_address, tcp_port, udp_port,
+        imaging_port (None with imaging disabled) and impairment, a preset name.
+
+        Scopes listed as [[fleet.scope]] tables are used as given, filling in
+        anything left out. Otherwise `count` scopes are laid out from the
+        [network] section: scope N listens on the ports plus N * port_step or,
+        with loopback_aliases, on the same ports at 127.0.0.(N + 1).
+        """
+        listed = self.get_toml("fleet", "scope", [])
+        count = len(listed) if listed else max(1, int(self.fleet_count))
+        # one preset for every scope, or a list used in turn
+        presets = self.impairment_preset
+        if isinstance(presets, str):
+            presets = [presets]
+        scopes = []
+        for index in range(count):
+            if self.fleet_loopback_aliases:
+                ip_address = f"127.0.0.{index + 1}"
+                offset = 0
+            else:
+                ip_address = self.ip_address
+                offset = index * self.fleet_port_step
+            scope = {
+                "name": "Seestar Simulator"
+                if count == 1
+                else f"Seestar Simulator {index + 1}",
+                "device_num": index + 1,
+                "ip_address": ip_address,
+                "tcp_port": self.tcp_port + offset,
+                "udp_port": self.udp_port + offset,
+                "imaging_port": self.imaging_port + offset
+                if self.imaging_enabled
+                else None,
+                "impairment": presets[index % len(presets)] if presets else "none",
+            }
+            if listed:
+                scope.update(listed[index])
+            scopes.append(scope)
+        return scopes
+
+    def imaging_options(self):
+        """Keyword arguments for the SimulatedImager of every scope."""
+        return {
+            "width": self.imaging_width,
+            "height": self.imaging_height,
+            "fps": self.imaging_fps,
+            "stars": self.imaging_stars,
+        }
+
     def load_toml(self, load_name=None):
         """
         Load a specific path to a toml file into this Config object
@@ -0,0 +1,386 @@
+import threading
+import time
+import socket
+import selectors
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Chunk:
+    """One queued message: when it may be sent, and where to cut it off."""
+
+    __slots__ = ("release_at", "data", "cut")
+
+    def __init__(self, release_at, data, cut):
+        self.release_at = release_at
+        self.data = memoryview(data)
+        # bytes left to send before the connection is dropped, or None
+        self.cut = cut
+
+
+class ClientConnection:
+    """
+    One TCP client of a simulated scope.
+
+    Replies and unsolicited events are queued with send() from any thread;
+    the fleet's event loop writes them out when the socket is writable, so a
+    slow client never blocks the simulator threads that produce events. With
+    an impairment each message is also delayed, paced, split or cut short.
+    """
+
+    def __init__(self, fleet, sock, addr, listener, service="control", impairment=None):
+        self.fleet = fleet
+        self.sock = sock
+        self.addr = addr
+        self.listener = listener
+        # "control" for the JSON-RPC port, "imaging" for the frame port
+        self.service = service
+        self.impairment = impairment
+        self.in_buffer = b""
+        self.chunks = deque()
+        # earliest time the next write may happen, for pacing and fragments
+        self.next_send = 0.0
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def send(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with self.lock:
+            if self.closed:
+                return
+            release_at, cut = 0.0, None
+            if self.impairment is not None:
+                release_at = time.monotonic() + self.impairment.delay()
+                if self.chunks:
+                    # delayed, but still in order
+                    release_at = max(release_at, self.chunks[-1].release_at)
+                cut = self.impairment.cut_at(len(data))
+            self.chunks.append(_Chunk(release_at, data, cut))
+        self.fleet.request_write(self)
+
+    def is_backlogged(self):
+        """Whether earlier data is still waiting to be written."""
+        with self.lock:
+            return bool(self.chunks)
+
+    def due_time(self):
+        """When the next write may happen, or None with nothing queued."""
+        with self.lock:
+            if not self.chunks:
+                return None
+            return max(self.chunks[0].release_at, self.next_send)
+
+
+class SimulatorFleet:
+    """
+    Runs any number of SocketListeners, each with its own SeestarSimulator,
+    in one selector-based event loop.
+
+    The loop accepts connections, reads commands and writes replies and events
+    for every scope. Commands are handed to one worker thread per scope, so a
+    command that sleeps (a filter wheel move, an injected delay) holds up its
+    own scope only and commands to one scope still run in the order they came in.
+    """
+
+    def __init__(self, logger, listeners, shutdown_event=None):
+        self.logger = logger
+        self.listeners = list(listeners)
+        self.shutdown_event = shutdown_event or threading.Event()
+        self.selector = None
+        self.connections = set()
+        # connections registered for EVENT_WRITE
+        self._writing = set()
+        # connections with delayed data -> when it is due
+        self._timers = {}
+        self._pending_writes = set()
+        self._pending_lock = threading.Lock()
+        self._executors = {}
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+
+    def start_listening(self):
+        """
+        Runs the event loop in a separate thread until Ctrl+C, then closes every
+        socket and waits for the loop to finish.
+        """
+        loop_thread = threading.Thread(target=self.run)
+        loop_thread.start()
+
+        try:
+            while loop_thread.is_alive():
+                loop_thread.join(timeout=1)
+        except KeyboardInterrupt:
+            print("Shutting down sockets...")
+            self.shutdown()
+            loop_thread.join()
+            print("Shutdown complete.")
+
+    def shutdown(self):
+        self.shutdown_event.set()
+        self._wake()
+
+    def run(self):
+        """
+        Opens the sockets of every listener and serves them until
+        `shutdown_event` is set.
+        """
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self._wake_r, selectors.EVENT_READ, ("wake", None))
+        for listener in self.listeners:
+            listener.open_sockets()
+            self.selector.register(
+                listener.tcp_socket,
+                selectors.EVENT_READ,
+                ("accept", (listener, "control")),
+            )
+            if listener.udp_socket is not None:
+                self.selector.register(
+                    listener.udp_socket, selectors.EVENT_READ, ("udp", listener)
+                )
+            services = ["control"]
+            if listener.imaging_socket is not None:
+                self.selector.register(
+                    listener.imaging_socket,
+                    selectors.EVENT_READ,
+                    ("accept", (listener, "imaging")),
+                )
+                services.append("imaging")
+            # imaging has its own worker, so rendering a stack frame does
+            # not hold up the control commands of the same scope
+            for service in services:
+                self._executors[(listener, service)] = ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix=f"Simulator{listener.simulator.device_num}"
+                    f".{service}",
+                )
+
+        print(f"Simulating {len(self.listeners)} Seestar(s).")
+        print("Startup complete.       Press Ctrl+C to stop.")
+
+        try:
+            while not self.shutdown_event.is_set():
+                try:
+                    events = self.selector.select(timeout=self._select_timeout())
+                except (OSError, ValueError) as e:
+                    # a socket closed from another thread during shutdown
+                    if self.shutdown_event.is_set():
+                        break
+                    print(f"Select loop error: {e}")
+                    break
+                for key, mask in events:
+                    kind, owner = key.data
+                    if kind == "wake":
+                        self._drain_wake()
+                    elif kind == "accept":
+                        self._accept(*owner)
+                    elif kind == "udp":
+                        self._read_udp(owner)
+                    elif kind == "client":
+                        if mask & selectors.EVENT_READ:
+                            self._read_client(owner)
+                        if mask & selectors.EVENT_WRITE and not owner.closed:
+                            self._write_client(owner)
+                self._update_write_interest()
+        finally:
+            self._close_all()
+
+    def request_write(self, connection):
+        with self._pending_lock:
+            self._pending_writes.add(connection)
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            # the loop is already due to wake up, or has stopped
+            pass
+
+    def _drain_wake(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _accept(self, listener, service):
+        server_socket = (
+            listener.imaging_socket if service == "imaging" else listener.tcp_socket
+        )
+        try:
+            client_socket, addr = server_socket.accept()
+        except (BlockingIOError, OSError) as e:
+            print(f"TCP accept error: {e}")
+            return
+        client_socket.setblocking(False)
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = ClientConnection(
+            self, client_socket, addr, listener, service, listener.impairment
+        )
+        self.connections.add(connection)
+        self.selector.register(
+            client_socket, selectors.EVENT_READ, ("client", connection)
+        )
+        self._clients_of(connection).add_client(connection)
+
+    def _read_udp(self, listener):
+        try:
+            data, addr = listener.udp_socket.recvfrom(4096)
+        except (BlockingIOError, OSError) as e:
+            print(f"UDP receive error: {e}")
+            return
+        listener.handle_udp_message(data, addr)
+
+    def _read_client(self, connection):
+        try:
+            data = connection.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"Error handling TCP connection from {connection.addr}: {e}")
+            data = b""
+        if not data:
+            self._close(connection)
+            return
+        connection.in_buffer += data
+        # Process complete messages separated by \r\n
+        while b"\r\n" in connection.in_buffer:
+            msg, connection.in_buffer = connection.in_buffer.split(b"\r\n", 1)
+            if msg:
+                self._executors[(connection.listener, connection.service)].submit(
+                    self._run_command, connection, msg.decode("utf-8")
+                )
+
+    def _run_command(self, connection, command):
+        try:
+            if connection.service == "imaging":
+                connection.listener.imager.process_command(command, connection)
+            else:
+                connection.send(connection.listener.process_tcp_command(command))
+        except Exception as e:
+            print(f"Error handling TCP connection from {connection.addr}: {e}")
+
+    def _write_client(self, connection):
+        """Write whatever is due, as far as the socket and impairment allow."""
+        impairment = connection.impairment
+        now = time.monotonic()
+        drop = False
+        with connection.lock:
+            while connection.chunks:
+                chunk = connection.chunks[0]
+                if max(chunk.release_at, connection.next_send) > now:
+                    break
+                size = len(chunk.data)
+                if impairment is not None:
+                    size = impairment.write_size(size)
+                if chunk.cut is not None:
+                    size = min(size, chunk.cut)
+                try:
+                    sent = connection.sock.send(chunk.data[:size])
+                except BlockingIOError:
+                    break
+                except OSError as e:
+                    print(f"Error sending to {connection.addr}: {e}")
+                    drop = True
+                    break
+                chunk.data = chunk.data[sent:]
+                if chunk.cut is not None:
+                    chunk.cut -= sent
+                    if chunk.cut <= 0:
+                        # a disconnect in the middle of a message
+                        drop = True
+                        break
+                if not chunk.data:
+                    connection.chunks.popleft()
+                if impairment is not None:
+                    connection.next_send = now + impairment.pause_after(sent)
+                if sent < size:
+                    break  # the socket buffer is full
+        if drop:
+            self._close(connection)
+
+    def _select_timeout(self):
+        if not self._timers:
+            return 1.0
+        return min(1.0, max(0.0, min(self._timers.values()) - time.monotonic()))
+
+    def _update_write_interest(self):
+        with self._pending_lock:
+            pending = self._pending_writes
+            self._pending_writes = set()
+        now = time.monotonic()
+        due = {c for c, at in self._timers.items() if at <= now}
+        for connection in pending | due | self._writing:
+            self._timers.pop(connection, None)
+            if connection.closed:
+                self._writing.discard(connection)
+                continue
+            if connection in pending or connection in due:
+                # try at once; most replies fit in the socket buffer
+                self._write_client(connection)
+                if connection.closed:
+                    self._writing.discard(connection)
+                    continue
+            due_at = connection.due_time()
+            # write interest only while data is due but the socket is full;
+            # data held back by an impairment waits on a timer instead
+            wants_write = due_at is not None and due_at <= time.monotonic()
+            if due_at is not None and not wants_write:
+                self._timers[connection] = due_at
+            if wants_write == (connection in self._writing):
+                continue
+            events = selectors.EVENT_READ
+            if wants_write:
+                events |= selectors.EVENT_WRITE
+                self._writing.add(connection)
+            else:
+                self._writing.discard(connection)
+            self.selector.modify(connection.sock, events, ("client", connection))
+
+    @staticmethod
+    def _clients_of(connection):
+        """The simulator or imager that keeps track of this connection."""
+        if connection.service == "imaging":
+            return connection.listener.imager
+        return connection.listener.simulator
+
+    def _close(self, connection):
+        with connection.lock:
+            if connection.closed:
+                return
+            connection.closed = True
+            connection.chunks.clear()
+        self.connections.discard(connection)
+        self._timers.pop(connection, None)
+        self._writing.discard(connection)
+        self._clients_of(connection).remove_client(connection)
+        try:
+            self.selector.unregister(connection.sock)
+        except (KeyError, ValueError):
+            pass
+        connection.sock.close()
+
+    def _close_all(self):
+        for connection in list(self.connections):
+            self._close(connection)
+        self.connections.clear()
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        for listener in self.listeners:
+            for sock in (
+                listener.tcp_socket,
+                listener.udp_socket,
+                listener.imaging_socket,
+            ):
+                if sock is None:
+                    continue
+                try:
+                    self.selector.unregister(sock)
+                except (KeyError, ValueError):
+                    pass
+                sock.close()
+        self.selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
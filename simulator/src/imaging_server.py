@@ -0,0 +1,201 @@
+import io
+import json
+import threading
+import time
+import zipfile
+from struct import pack
+
+import numpy as np
+
+# frame ids the device puts in the header of its port 4800 frames
+PREVIEW_FRAME_ID = 21
+STACK_FRAME_ID = 23
+HEADER_SIZE = 80
+
+
+def frame_header(size, frame_id, width=0, height=0):
+    """
+    The 80 byte header the Seestar puts in front of every port 4800 message.
+
+    Only the first 20 bytes are used (see SeestarBinaryProtocol.parse_header):
+    ">HHHIHHBBHH" with the payload size, the frame id and the image width and
+    height. The rest is zero padding.
+    """
+    header = pack(">HHHIHHBBHH", 3, 0, 0, size, 0, 0, 0, frame_id, width, height)
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+class StarField:
+    """
+    A synthetic star field as the Seestar camera would see it.
+
+    The noise-free sky (background plus Gaussian stars) is rendered once;
+    each frame only adds fresh noise, scaled down by the square root of the
+    number of stacked frames, so frames are cheap enough to stream.
+    """
+
+    def __init__(self, width, height, stars=300, seed=None, fwhm=2.5):
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self.sky = self._render_sky(stars, fwhm)
+        # photon noise of the sky and stars plus read noise, in ADU
+        self.sigma = np.sqrt(self.sky * 0.5 + 20.0**2).astype(np.float32)
+        mosaic = self._bayer_grbg_index()
+        self.sky_bayer = np.take_along_axis(self.sky, mosaic, axis=2)[..., 0]
+        self.sigma_bayer = np.take_along_axis(self.sigma, mosaic, axis=2)[..., 0]
+
+    def _render_sky(self, stars, fwhm):
+        h, w = self.height, self.width
+        sky = np.empty((h, w, 3), dtype=np.float32)
+        sky[:] = (900.0, 1000.0, 1100.0)  # a faint blue-ish sky background
+        sigma = fwhm / 2.355
+        radius = int(np.ceil(3 * sigma))
+        offsets = np.arange(-radius, radius + 1, dtype=np.float32)
+        xs = self.rng.uniform(radius, w - radius - 1, stars)
+        ys = self.rng.uniform(radius, h - radius - 1, stars)
+        # a few bright stars and many faint ones
+        peaks = 40000.0 * self.rng.pareto(1.5, stars).clip(0.02, 1.0)
+        colors = self.rng.uniform(0.7, 1.0, (stars, 3)).astype(np.float32)
+        for x, y, peak, color in zip(xs, ys, peaks, colors):
+            x0, y0 = int(x), int(y)
+            gx = np.exp(-((offsets + x0 - x) ** 2) / (2 * sigma**2))
+            gy = np.exp(-((offsets + y0 - y) ** 2) / (2 * sigma**2))
+            stamp = np.outer(gy, gx)[..., None] * (peak * color)
+            sky[y0 - radius : y0 + radius + 1, x0 - radius : x0 + radius + 1] += stamp
+        return np.minimum(sky, 65535.0)
+
+    def _bayer_grbg_index(self):
+        """Channel (0 R, 1 G, 2 B) each sensor pixel sees through a GRBG filter."""
+        index = np.ones((self.height, self.width, 1), dtype=np.intp)
+        index[0::2, 1::2] = 0
+        index[1::2, 0::2] = 2
+        return index
+
+    def _noisy(self, image, sigma, stacked):
+        noise = self.rng.standard_normal(image.shape, dtype=np.float32)
+        noise *= sigma
+        if stacked > 1:
+            noise *= 1.0 / np.sqrt(stacked)
+        noise += image
+        return np.clip(noise, 0, 65535, out=noise).astype(np.uint16)
+
+    def preview_frame(self):
+        """One raw Bayer GRBG uint16 frame, height x width."""
+        return self._noisy(self.sky_bayer, self.sigma_bayer, 1)
+
+    def stack_frame(self, stacked):
+        """The RGB uint16 stack of `stacked` frames, height x width x 3."""
+        return self._noisy(self.sky, self.sigma, max(1, stacked))
+
+
+class SimulatedImager:
+    """
+    The port 4800 imaging endpoint of one simulated Seestar.
+
+    Clients ask for preview frames with begin_streaming (sent at `fps` until
+    stop_streaming) and for the current stack with get_stacked_img, which
+    follows the stacking state of the simulator. Every message is an 80 byte
+    header plus payload, like the device sends.
+    """
+
+    def __init__(self, logger, simulator, width=1080, height=1920, fps=2.0, stars=300):
+        self.logger = logger
+        self.simulator = simulator
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.field = StarField(width, height, stars, seed=simulator.device_num)
+        self.lock = threading.Lock()
+        self.clients = set()
+        self.streaming = set()
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.stream_thread = None
+
+    def add_client(self, client):
+        with self.lock:
+            self.clients.add(client)
+
+    def remove_client(self, client):
+        with self.lock:
+            self.clients.discard(client)
+            self.streaming.discard(client)
+
+    def process_command(self, command, client):
+        """Handle one JSON command from an imaging client and send the reply."""
+        try:
+            data = json.loads(command)
+        except ValueError:
+            self.logger.debug(f"Imaging: could not parse {command}")
+            return
+        method = data.get("method")
+        cmd_id = data.get("id", 0)
+        if method == "begin_streaming":
+            with self.lock:
+                self.streaming.add(client)
+                if self.stream_thread is None or not self.stream_thread.is_alive():
+                    self.stream_thread = threading.Thread(
+                        target=self._stream_preview,
+                        name=f"SimulatedImager.{self.simulator.device_num}",
+                        daemon=True,
+                    )
+                    self.stream_thread.start()
+        elif method == "stop_streaming":
+            with self.lock:
+                self.streaming.discard(client)
+            self._reply(client, cmd_id, method)
+        elif method == "get_stacked_img":
+            stacked = self.simulator.stacked_frames
+            if stacked == 0:
+                self._reply(client, cmd_id, method, error="no stacked image", code=1)
+                return
+            client.send(self.stack_message(stacked))
+        else:
+            self._reply(client, cmd_id, method)
+
+    def preview_message(self):
+        payload = self.field.preview_frame().tobytes()
+        return (
+            frame_header(len(payload), PREVIEW_FRAME_ID, self.width, self.height)
+            + payload
+        )
+
+    def stack_message(self, stacked):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as z:
+            z.writestr("raw_data", self.field.stack_frame(stacked).tobytes())
+        payload = buffer.getvalue()
+        return (
+            frame_header(len(payload), STACK_FRAME_ID, self.width, self.height)
+            + payload
+        )
+
+    def _reply(self, client, cmd_id, method, **fields):
+        payload = json.dumps(
+            {"jsonrpc": "2.0", "method": method, "result": 0, "id": cmd_id, **fields}
+        ).encode("utf-8")
+        client.send(frame_header(len(payload), cmd_id & 0xFF) + payload)
+
+    def _stream_preview(self):
+        interval = 1.0 / self.fps
+        next_frame = time.monotonic()
+        while True:
+            with self.lock:
+                clients = list(self.streaming)
+            if not clients:
+                return
+            message = self.preview_message()
+            for client in clients:
+                # like the camera, skip a frame for a client that is behind
+                if client.is_backlogged():
+                    self.frames_dropped += 1
+                else:
+                    client.send(message)
+                    self.frames_sent += 1
+            next_frame += interval
+            delay = next_frame - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_frame = time.monotonic()
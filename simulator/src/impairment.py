@@ -0,0 +1,133 @@
+import random
+
+# Named network conditions a simulated scope can be put under. Every value
+# is optional; see Impairment for what they mean.
+PRESETS = {
+    "none": {},
+    "lan": {"latency_ms": 2, "jitter_ms": 1},
+    "wifi": {
+        "latency_ms": 15,
+        "jitter_ms": 10,
+        "bandwidth_kbps": 40000,
+        "fragment_bytes": 1400,
+    },
+    # the scope at the far end of the garden
+    "lossy_wifi": {
+        "latency_ms": 80,
+        "jitter_ms": 60,
+        "bandwidth_kbps": 4000,
+        "stall_probability": 0.02,
+        "stall_ms": 3000,
+        "disconnect_probability": 0.002,
+        "fragment_bytes": 536,
+        "fragment_gap_ms": 1,
+    },
+    # JSON lines and 80 byte headers are split across reads
+    "fragmented": {"fragment_bytes": 64, "fragment_gap_ms": 1},
+    "flaky": {
+        "latency_ms": 40,
+        "jitter_ms": 30,
+        "stall_probability": 0.05,
+        "stall_ms": 8000,
+        "disconnect_probability": 0.02,
+    },
+}
+
+
+class Impairment:
+    """
+    Network conditions applied to everything a simulated scope sends.
+
+    Args:
+        latency_ms: delay added to every message.
+        jitter_ms: the delay varies by up to this much either way. Messages
+            still arrive in order, as they would over TCP.
+        bandwidth_kbps: cap on the rate data is written, in kilobits per second.
+        stall_probability: chance that a message is held back by an extra
+            `stall_ms`, and everything queued behind it with it.
+        disconnect_probability: chance that the connection is dropped part way
+            through a message.
+        fragment_bytes: write at most this many bytes at a time, `fragment_gap_ms`
+            apart, so JSON lines and 80 byte headers are split across reads.
+        seed: makes the random choices repeatable.
+    """
+
+    def __init__(
+        self,
+        latency_ms=0,
+        jitter_ms=0,
+        bandwidth_kbps=0,
+        stall_probability=0.0,
+        stall_ms=0,
+        disconnect_probability=0.0,
+        fragment_bytes=0,
+        fragment_gap_ms=0,
+        seed=None,
+    ):
+        self.latency_s = latency_ms / 1000.0
+        self.jitter_s = jitter_ms / 1000.0
+        self.bytes_per_s = bandwidth_kbps * 1000 / 8
+        self.stall_probability = stall_probability
+        self.stall_s = stall_ms / 1000.0
+        self.disconnect_probability = disconnect_probability
+        self.fragment_bytes = int(fragment_bytes)
+        self.fragment_gap_s = fragment_gap_ms / 1000.0 if fragment_bytes else 0.0
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def from_config(cls, spec, presets=None, seed=None):
+        """
+        Build an impairment from a preset name, or from a dict of settings that
+        may name a `preset` to start from. Returns None for "none" or nothing.
+        """
+        presets = {**PRESETS, **(presets or {})}
+        if not spec or spec == "none":
+            return None
+        if isinstance(spec, str):
+            if spec not in presets:
+                raise ValueError(
+                    f"Unknown impairment preset {spec!r}, "
+                    f"choose from {', '.join(sorted(presets))}"
+                )
+            settings = dict(presets[spec])
+        else:
+            settings = dict(spec)
+            base = settings.pop("preset", None)
+            if base:
+                settings = {**presets[base], **settings}
+        settings.setdefault("seed", seed)
+        return cls(**settings)
+
+    def delay(self):
+        """Seconds to hold the next message back."""
+        delay = self.latency_s
+        if self.jitter_s:
+            delay += self.rng.uniform(-self.jitter_s, self.jitter_s)
+        if self.stall_probability and self.rng.random() < self.stall_probability:
+            delay += self.stall_s
+        return max(0.0, delay)
+
+    def cut_at(self, size):
+        """Bytes of a message to send before disconnecting, or None to send it all."""
+        if (
+            self.disconnect_probability
+            and size > 1
+            and self.rng.random() < self.disconnect_probability
+        ):
+            return self.rng.randrange(1, size)
+        return None
+
+    def write_size(self, size):
+        """Bytes to write at once: a fragment, or 10 ms worth under a bandwidth cap."""
+        if self.fragment_bytes:
+            size = min(size, self.fragment_bytes)
+        if self.bytes_per_s:
+            size = min(size, max(1, int(self.bytes_per_s * 0.01)))
+        return size
+
+    def pause_after(self, sent):
+        """Seconds to wait after writing `sent` bytes."""
+        pause = self.fragment_gap_s
+        if self.bytes_per_s:
+            pause += sent / self.bytes_per_s
+        return pause
@@ -1,74 +1,71 @@
 import threading
 import socket
-import select
 import json  # Added import for JSON handling
 from seestar_simulator import SeestarSimulator
+from fleet import SimulatorFleet
+from imaging_server import SimulatedImager
 from config import Config
 
 
 class SocketListener:
     def __init__(
-        self, logger, host="localhost", tcp_port=4700, udp_port=4720
+        self,
+        logger,
+        host="localhost",
+        tcp_port=4700,
+        udp_port=4720,
+        device_name="Seestar Simulator",
+        device_num=1,
+        imaging_port=None,
+        imaging_options=None,
+        impairment=None,
     ):  # Changed default tcp_port to 5555
         self.host = host
         self.tcp_port = tcp_port
         self.udp_port = udp_port
+        self.imaging_port = imaging_port
+        # network conditions for everything this scope sends, see impairment.py
+        self.impairment = impairment
         self.tcp_socket = None
         self.udp_socket = None
+        self.imaging_socket = None
         self.logger = logger  # Use the provided logger
         self.shutdown_event = threading.Event()
         self.simulator = SeestarSimulator(
             logger=logger,  # Replace with actual logger if needed
             host=self.host,
             port=self.tcp_port,
-            device_name="Seestar Simulator",
-            device_num=1,
+            device_name=device_name,
+            device_num=device_num,
             is_debug=True,
         )
+        # the port 4800 frame endpoint, only when an imaging port is given
+        self.imager = None
+        if imaging_port is not None:
+            self.imager = SimulatedImager(
+                logger, self.simulator, **(imaging_options or {})
+            )
 
     def start_listening(self):
         """
-        Starts the socket listener in a separate thread and manages its lifecycle.
-
-        This method initializes a shutdown event and spawns a new thread to run the socket listener.
-        It keeps the main thread alive while the listener thread is running, allowing for graceful
-        shutdown on a KeyboardInterrupt (Ctrl+C). Upon interruption, it signals the listener to stop,
-        closes any open TCP and UDP sockets, and waits for the listener thread to finish before exiting.
-
-        Raises:
-            KeyboardInterrupt: If the user interrupts the process (e.g., with Ctrl+C).
+        Serves this one simulator until Ctrl+C. See SimulatorFleet.start_listening.
         """
-        self.shutdown_event = threading.Event()
-        listener_thread = threading.Thread(target=self._start_socket_listener)
-        listener_thread.start()
-
-        try:
-            while listener_thread.is_alive():
-                listener_thread.join(timeout=1)
-        except KeyboardInterrupt:
-            print("Shutting down sockets...")
-            self.shutdown_event.set()
-            if self.tcp_socket:
-                self.tcp_socket.close()
-            if self.udp_socket:
-                self.udp_socket.close()
-            listener_thread.join()
-            print("Shutdown complete.")
+        SimulatorFleet(self.logger, [self], self.shutdown_event).start_listening()
 
     def _start_socket_listener(self):
         """
-        Starts and manages the main socket listener loop for both TCP and UDP connections.
-        This method sets up non-blocking TCP and UDP sockets bound to the specified host and ports.
-        It monitors these sockets for incoming connections or data using the `select` module.
-        - For TCP: Accepts new client connections and spawns a new thread to handle each connection.
-        - For UDP: Receives datagrams and processes them accordingly.
-        The method continues running until the `shutdown_event` is set, allowing for graceful shutdown.
-        All socket errors and select loop errors are caught and logged to the console.
+        Serves this one simulator in a fleet of one until `shutdown_event` is set.
+        """
+        SimulatorFleet(self.logger, [self], self.shutdown_event).run()
+
+    def open_sockets(self):
+        """
+        Binds the non-blocking TCP and UDP sockets of this simulator, and the
+        imaging socket when it has an imaging port.
+
         Side Effects:
-            - Modifies `self.tcp_socket` and `self.udp_socket`.
-            - Sets the socket in the associated simulator.
-            - Spawns threads for each TCP client connection.
-            - Prints status and error messages to the console.
+            - Modifies `self.tcp_socket`, `self.udp_socket` and `self.imaging_socket`.
+            - Prints status messages to the console.
         """
         # TCP setup
         self.tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -77,79 +74,24 @@ class SocketListener:
         self.tcp_socket.listen(5)
         self.tcp_socket.setblocking(False)  # 🔧 Required for select()
 
-        self.simulator.set_socket(self.tcp_socket)  # Set the socket in the simulator
         # UDP setup
         self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.udp_socket.bind((self.host, self.udp_port))
         self.udp_socket.setblocking(False)
 
-        print(f"Listening on TCP {self.host}:{self.tcp_port}")
-        print(f"Listening on UDP {self.host}:{self.udp_port}")
-        print("Startup complete.       Press Ctrl+C to stop.")
-
-        sockets_to_monitor = [self.tcp_socket, self.udp_socket]
-
-        while not self.shutdown_event.is_set():
-            try:
-                readable, _, _ = select.select(sockets_to_monitor, [], [], 1.0)
-                for sock in readable:
-                    if sock is self.tcp_socket:
-                        try:
-                            client_socket, addr = self.tcp_socket.accept()
-                            self.simulator.set_socket(
-                                client_socket
-                            )  # Set the socket in the simulator
-                            # Handle TCP connection (maybe spawn a thread if needed)
-                            threading.Thread(
-                                target=self.handle_tcp_connection,
-                                args=(client_socket, addr),
-                                daemon=True,
-                            ).start()
-                        except Exception as e:
-                            print(f"TCP accept error: {e}")
-                    elif sock is self.udp_socket:
-                        try:
-                            data, addr = self.udp_socket.recvfrom(4096)
-                            # Handle UDP message
-                            self.handle_udp_message(data, addr)
-                        except Exception as e:
-                            print(f"UDP receive error: {e}")
-            except Exception as e:
-                print(f"Select loop error: {e}")
-                break
-
-    def handle_tcp_connection(self, client_socket, addr):
-        """
-        Handles an incoming TCP connection from a client.
-
-        Receives data from the client socket in a blocking manner, buffering incoming bytes.
-        Processes complete messages separated by '\r\n', decodes each message as UTF-8,
-        and passes the command to `self.process_tcp_command`. Sends the response back to the client.
-        Handles client disconnection and logs any exceptions that occur during processing.
+        # Imaging setup
+        if self.imager is not None:
+            self.imaging_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.imaging_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.imaging_socket.bind((self.host, self.imaging_port))
+            self.imaging_socket.listen(5)
+            self.imaging_socket.setblocking(False)
 
-        Args:
-            client_socket (socket.socket): The socket object representing the client connection.
-            addr (tuple): The address of the connected client.
-        """
-        with client_socket:
-            client_socket.setblocking(True)  # Ensure blocking mode for the handler
-            try:
-                buffer = b""
-                while True:
-                    data = client_socket.recv(4096)
-                    if not data:
-                        break  # Client closed connection
-                    buffer += data
-                    # Process complete messages separated by \r\n
-                    while b"\r\n" in buffer:
-                        msg, buffer = buffer.split(b"\r\n", 1)
-                        if not msg:
-                            continue
-                        command = msg.decode("utf-8")
-                        response = self.process_tcp_command(command)
-                        client_socket.sendall(response.encode("utf-8"))
-            except Exception as e:
-                print(f"Error handling TCP connection from {addr}: {e}")
+        name = self.simulator.device_name
+        print(f"{name}: listening on TCP {self.host}:{self.tcp_port}")
+        print(f"{name}: listening on UDP {self.host}:{self.udp_port}")
+        if self.imager is not None:
+            print(f"{name}: imaging on TCP {self.host}:{self.imaging_port}")
 
     def process_tcp_command(self, command):
         """
@@ -241,7 +183,7 @@ class SocketListener:
                     "id": parsed.get("id", 1),
                     "result": "ok",
                     "device": "seestar",
-                    "name": "seestar simulator",
+                    "name": self.simulator.device_name.lower(),
                     "ip": addr[0],
                 }
                 response = json.dumps(device_info)
@@ -1,4 +1,6 @@
 from listener import SocketListener
+from fleet import SimulatorFleet
+from impairment import Impairment
 from config import Config
 import logging
 import log
@@ -16,15 +18,29 @@ def main():
     logger = logging.getLogger("seestar")
     # Share this logger throughout
 
-    # Start the socket listener
-    # Initialize the socket listener with the specified host and port
-    # The UDP port is used for iscope commands
+    # Start one socket listener per simulated Seestar, all served by one
+    # event loop. The UDP port is used for iscope commands
     # The TCP port is used for other commands
-    socket_listener = SocketListener(
-        logger, Config.ip_address, Config.tcp_port, Config.udp_port
-    )
+    listeners = [
+        SocketListener(
+            logger,
+            scope["ip_address"],
+            scope["tcp_port"],
+            scope["udp_port"],
+            device_name=scope["name"],
+            device_num=scope["device_num"],
+            imaging_port=scope["imaging_port"],
+            imaging_options=Config.imaging_options(),
+            impairment=Impairment.from_config(
+                scope["impairment"],
+                Config.impairment_presets,
+                seed=Config.impairment_seed + scope["device_num"],
+            ),
+        )
+        for scope in Config.scopes
+    ]
     # Start listening for incoming connections
-    socket_listener.start_listening()
+    SimulatorFleet(logger, listeners).start_listening()
 
 
 if __name__ == "__main__":
@@ -16,9 +16,13 @@ class SeestarSimulator:
         self.is_debug = is_debug
         self.cmdid = 10000
         self.scope_radec = [0.0, 0.0]  # Simulated RA/Dec coordinates
-        self.socket = None
+        # every connected client receives the unsolicited events
+        self.clients = set()
+        self.clients_lock = threading.Lock()
         self.start_time = time.time()
         self.stack_start_time = 0
+        self.stacked_frames = 0
+        self.dropped_frames = 0
         self.schedule = {
             "version": 1.0,
             "Event": "Scheduler",
@@ -187,14 +191,19 @@ class SeestarSimulator:
         )
         # Initialize the state with default value
 
-    # self.simulator.set_socket(self.tcp_socket)  # Set the socket in the simulator
-    def set_socket(self, sock):
+    def add_client(self, client):
         """
-        Set the socket for the simulator to use for sending unsolicited messages.
-        This is typically called by the SocketListener when it starts listening.
+        Add a connected client; it gets every unsolicited event from now on.
+        `client` needs a send(bytes) method, see fleet.ClientConnection.
         """
-        self.socket = sock
-        self.logger.debug(f"Socket set in SeestarSimulator: {sock}")
+        with self.clients_lock:
+            self.clients.add(client)
+        self.logger.debug(f"Client added to {self.device_name}: {client.addr}")
+
+    def remove_client(self, client):
+        with self.clients_lock:
+            self.clients.discard(client)
+        self.logger.debug(f"Client removed from {self.device_name}: {client.addr}")
 
     # Simulate the main API methods
     def send_message_param_sync(self, data):
@@ -629,8 +638,9 @@ class SeestarSimulator:
 
     def _stack_response(self):
         # Simulate stacking process
-        stacked_frames = 0
-        dropped_frames = 0
+        # kept on the simulator so the imaging endpoint can follow the stack
+        self.stacked_frames = 0
+        self.dropped_frames = 0
 
         while self.schedule["is_stacking"]:
             timestamp = f"{time.time() - self.start_time:2.9f}"
@@ -639,25 +649,25 @@ class SeestarSimulator:
                 "Timestamp": timestamp,
                 "state": "working",
                 "stack_status": "stacking",
-                "stacked_frame": stacked_frames,
-                "dropped_frame": dropped_frames,
+                "stacked_frame": self.stacked_frames,
+                "dropped_frame": self.dropped_frames,
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
             if (
                 Config.dropped_frame_ratio == 0
             ):  # if dropped frame ratio is 0, never drop frames
-                stacked_frames += 1
-            elif (stacked_frames + dropped_frames) == 0:  # always stack the first frame
-                stacked_frames += 1
+                self.stacked_frames += 1
+            elif (
+                self.stacked_frames + self.dropped_frames
+            ) == 0:  # always stack the first frame
+                self.stacked_frames += 1
             else:
                 if (
-                    stacked_frames + dropped_frames
+                    self.stacked_frames + self.dropped_frames
                 ) % Config.dropped_frame_ratio != 0:  # drop every nth frame
-                    stacked_frames += 1
+                    self.stacked_frames += 1
                 else:
-                    dropped_frames += 1
+                    self.dropped_frames += 1
 
             time.sleep(
                 (self.state.get("setting").get("exp_ms")["stack_l"] / 1000.0)
@@ -691,9 +701,7 @@ class SeestarSimulator:
                     "y": y_err,
                     "route": [],
                 }
-                self.send_unsolicited_message(
-                    self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-                )
+                self.broadcast(event)
                 time.sleep(2)
 
     def create_dark(self):
@@ -713,9 +721,7 @@ class SeestarSimulator:
             "percent": 0.0,
             "route": ["View", "Initialise"],
         }
-        self.send_unsolicited_message(
-            self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-        )
+        self.broadcast(event)
 
         for i in range(1, 100, 3):
             timestamp = f"{time.time() - self.start_time:2.9f}"
@@ -727,9 +733,7 @@ class SeestarSimulator:
                 "percent": i,
                 "route": ["View", "Initialise"],
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
             time.sleep(0.1)
 
         time.sleep(1)
@@ -746,9 +750,7 @@ class SeestarSimulator:
                 "percent": 100.0,
                 "route": [],
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
         except Exception as e:
             self.logger.warn(f"Error sending unsolicited TCP message: {e}")
 
@@ -777,9 +779,7 @@ class SeestarSimulator:
                 "func": "goto_ra_dec",
                 "state": "complete",
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
         except Exception as e:
             self.logger(f"Error sending unsolicited TCP message: {e}")
 
@@ -808,9 +808,7 @@ class SeestarSimulator:
                 "result": {"last_point": [0, 0.0]},
                 "state": "complete",
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
         except Exception as e:
             self.logger.warn(f"Error sending unsolicited TCP message: {e}")
 
@@ -833,9 +831,7 @@ class SeestarSimulator:
                 "lapse_ms": 0,
                 "close": False,
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             time.sleep(10)
 
@@ -849,9 +845,7 @@ class SeestarSimulator:
                 "close": True,
                 "equ_mode": True,
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
         except Exception as e:
             print(f"Error sending unsolicited TCP message: {e}")
 
@@ -877,9 +871,7 @@ class SeestarSimulator:
                 "lapse_ms": 0,
                 "close": False,
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             timestamp = f"{time.time() - self.start_time:2.9f}"
             event = {
@@ -895,9 +887,7 @@ class SeestarSimulator:
                 "lapse_ms": 4,
                 "close": False,
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             timestamp = f"{time.time() - self.start_time:2.9f}"
             event = {
@@ -908,15 +898,11 @@ class SeestarSimulator:
                 "manual": True,
                 "route": [],
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             timestamp = f"{time.time() - self.start_time:2.9f}"
             event = {"Event": "WheelMove", "Timestamp": timestamp, "state": "start"}
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             time.sleep(0.5)
             timestamp = f"{time.time() - self.start_time:2.9f}"
@@ -926,9 +912,7 @@ class SeestarSimulator:
                 "state": "complete",
                 "position": 1,
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             event = {
                 "Event": "ScopeGoto",
@@ -936,9 +920,7 @@ class SeestarSimulator:
                 "state": "working",
                 "lapse_ms": 0,
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             time.sleep(0.5)
 
@@ -953,9 +935,7 @@ class SeestarSimulator:
                 "code": 207,
                 "route": [],
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             # time.sleep(17)
             time.sleep(3)
@@ -968,9 +948,7 @@ class SeestarSimulator:
                 "manual": False,
                 "route": [],
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             time.sleep(1)
             timestamp = f"{time.time() - self.start_time:2.9f}"
@@ -980,9 +958,7 @@ class SeestarSimulator:
                 "state": "complete",
                 "lapse_ms": 45775,
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             time.sleep(1)
             timestamp = f"{time.time() - self.start_time:2.9f}"
@@ -994,9 +970,7 @@ class SeestarSimulator:
                 "manual": True,
                 "route": [],
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             event = {
                 "Event": "Exposure",
@@ -1006,9 +980,7 @@ class SeestarSimulator:
                 "exp_ms": 2000.0,
                 "route": ["EqModePA"],
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             event = {
                 "Event": "Exposure",
@@ -1018,9 +990,7 @@ class SeestarSimulator:
                 "exp_us": 2000000,
                 "gain": 80,
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             time.sleep(0.20)
             timestamp = f"{time.time() - self.start_time:2.9f}"
@@ -1034,9 +1004,7 @@ class SeestarSimulator:
                 "code": 207,
                 "route": [],
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             time.sleep(3)
             timestamp = f"{time.time() - self.start_time:2.9f}"
@@ -1046,9 +1014,7 @@ class SeestarSimulator:
                 "page": "preview",
                 "state": "downloading",
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             time.sleep(0.1)
             timestamp = f"{time.time() - self.start_time:2.9f}"
@@ -1058,9 +1024,7 @@ class SeestarSimulator:
                 "page": "preview",
                 "state": "complete",
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             event = {
                 "Event": "Exposure",
@@ -1070,9 +1034,7 @@ class SeestarSimulator:
                 "exp_ms": 2000.0,
                 "route": ["EqModePA"],
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             event = {
                 "Event": "PlateSolve",
@@ -1081,9 +1043,7 @@ class SeestarSimulator:
                 "lapse_ms": 0,
                 "route": ["EqModePA"],
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             time.sleep(0.2)
             timestamp = f"{time.time() - self.start_time:2.9f}"
@@ -1093,9 +1053,7 @@ class SeestarSimulator:
                 "page": "preview",
                 "state": "start",
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             event = {
                 "Event": "PlateSolve",
@@ -1103,9 +1061,7 @@ class SeestarSimulator:
                 "page": "preview",
                 "state": "start",
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             event = {
                 "Event": "PlateSolve",
@@ -1125,16 +1081,12 @@ class SeestarSimulator:
 
             # uncomment if you want to test plate solve failure
             # event = {'Event': 'PlateSolve', 'Timestamp': timestamp, 'state': 'fail', 'error': 'solve failed', 'code': 251, 'lapse_ms': 1730, 'route': ['EqModePA']}
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             time.sleep(1)
             timestamp = f"{time.time() - self.start_time:2.9f}"
             event = {"Event": "WheelMove", "Timestamp": timestamp, "state": "start"}
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
             time.sleep(0.5)
             timestamp = f"{time.time() - self.start_time:2.9f}"
@@ -1144,9 +1096,7 @@ class SeestarSimulator:
                 "state": "complete",
                 "position": 1,
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
         except Exception as e:
             print(f"Error sending unsolicited TCP message: {e}")
@@ -1168,28 +1118,25 @@ class SeestarSimulator:
                 "result": 0,
                 "state": "complete",
             }
-            self.send_unsolicited_message(
-                self.socket, (self.host, self.port), json.dumps(event) + "\r\n"
-            )
+            self.broadcast(event)
 
         except Exception as e:
             print(f"Error sending unsolicited TCP message: {e}")
 
         return
 
-    def send_unsolicited_message(self, sock, addr, message):
+    def broadcast(self, event):
         """
-        Send an unsolicited message to the given socket and address.
-        `sock` should be a socket.socket object (UDP or TCP).
-        `addr` is a tuple (host, port).
-        `message` is a string or bytes.
+        Send an unsolicited event to every connected client.
+        `event` is a dict; it is sent as one JSON line.
         """
-        if isinstance(message, str):
-            message = message.encode("utf-8")
-        try:
-            sock.sendto(message, addr)
-            self.logger.debug(f"Unsolicited message sent to {addr}: {message}")
-        except Exception as e:
-            self.logger.debug(f"Error sending unsolicited message to {addr}: {e}")
+        message = (json.dumps(event) + "\r\n").encode("utf-8")
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.send(message)
+        self.logger.debug(
+            f"Unsolicited message sent to {len(clients)} client(s): {message}"
+        )
 
     # ...add more methods as needed for your simulation...
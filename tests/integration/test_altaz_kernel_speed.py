@@ -0,0 +1,64 @@
+"""Alt/az of the mount position: coordinate kernel versus astropy.
+
+The baseline is what Seestar.get_altaz_from_eq used to do for every call:
+build a JNow SkyCoord and transform it into an AltAz frame.
+"""
+
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from device.altaz_kernel import equatorial_to_altaz
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.benchmark(group="altaz", min_rounds=5, max_time=1.0),
+]
+
+POSITIONS = list(
+    zip(
+        np.random.default_rng(3).uniform(0, 24, 20),
+        np.random.default_rng(4).uniform(-60, 80, 20),
+    )
+)
+
+
+def _astropy_altaz(ra, dec, location, obs_time):
+    from astropy.coordinates import AltAz
+
+    from device.seestar_util import Util
+
+    radec = Util.parse_coordinate(is_j2000=False, in_ra=ra, in_dec=dec)
+    altaz = radec.transform_to(AltAz(obstime=obs_time, location=location))
+    return altaz.alt.deg, altaz.az.deg
+
+
+def test_astropy_per_call(benchmark):
+    from astropy.utils import iers
+
+    iers.conf.auto_download = False
+    import astropy.units as u
+    from astropy.coordinates import EarthLocation
+    from astropy.time import Time
+
+    location = EarthLocation(lat=47.6 * u.deg, lon=-122.3 * u.deg)
+
+    def run():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for ra, dec in POSITIONS:
+                _astropy_altaz(ra, dec, location, Time(datetime.now(timezone.utc)))
+
+    benchmark.pedantic(run, rounds=3)
+
+
+def test_kernel_per_call(benchmark):
+    def run():
+        for ra, dec in POSITIONS:
+            equatorial_to_altaz(ra, dec, 47.6, -122.3)
+
+    benchmark(run)
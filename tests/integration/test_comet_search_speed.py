@@ -0,0 +1,102 @@
+"""Comet search latency: resident index versus reparsing per keystroke.
+
+The baseline repeats what searchComet used to do on every request: parse the
+MPC comet file, keep the latest orbit of every comet, then build and
+propagate one skyfield orbit per matching row.
+"""
+
+import os
+import re
+
+import numpy as np
+import pytest
+from skyfield.api import Loader
+from skyfield.constants import GM_SUN_Pitjeva_2005_km3_s2 as GM_SUN
+from skyfield.data import mpc
+
+from front.comet_index import CometIndex
+from tests.test_comet_index import EARTH, SUN, comet_line
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.benchmark(group="comet-search", min_rounds=5, max_time=1.0),
+]
+
+NUM_COMETS = 3000
+QUERY = "P/LINEAR"
+
+
+def _synthetic_comets(directory):
+    rng = np.random.default_rng(7)
+    lines = []
+    for k in range(NUM_COMETS):
+        survey = ("LINEAR", "ATLAS", "PANSTARRS", "NEAT")[k % 4]
+        lines.append(
+            comet_line(
+                f"{k + 1}P/{survey}",
+                rng.uniform(0.3, 6.0),
+                rng.uniform(0.05, 0.98),
+                rng.uniform(0, 360),
+                rng.uniform(0, 360),
+                rng.uniform(0, 170),
+                (int(rng.integers(2015, 2030)), int(rng.integers(1, 13)), 15.5),
+                ref=f"MPC {k:5d}",
+            )
+        )
+    with open(os.path.join(directory, "CometEls.txt"), "w") as f:
+        f.writelines(lines)
+
+
+def _baseline_search(loader, name, t):
+    with loader.open(mpc.COMET_URL) as f:
+        comets = mpc.load_comets_dataframe(f)
+    comets = (
+        comets.sort_values("reference")
+        .groupby("designation", as_index=False)
+        .last()
+        .set_index("designation", drop=False)
+    )
+    regex = re.compile(re.escape(name), re.IGNORECASE)
+    rows = comets[comets["designation"].str.contains(regex)]
+    ts = loader.timescale()
+    out = []
+    for _, row in rows.iterrows():
+        orbit = mpc.comet_orbit(row, ts, GM_SUN)
+        out.append(orbit.at(t).position.au + SUN.position_au - EARTH.position_au)
+    return out
+
+
+@pytest.fixture(scope="module")
+def comets(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("comets")
+    _synthetic_comets(directory)
+    loader = Loader(str(directory), verbose=False)
+    index = CometIndex(loader)
+    index._ephemeris = {"sun": SUN, "earth": EARTH}
+    index.ensure_loaded()
+    return loader, index, loader.timescale().utc(2026, 3, 1)
+
+
+def test_index_finds_what_reparsing_finds(comets):
+    loader, index, t = comets
+    names, (ra, dec, distance) = index.lookup(QUERY, t)
+    assert len(names) == len(_baseline_search(loader, QUERY, t)) == NUM_COMETS // 4
+    single, _ = index.lookup("1233P/LINEAR", t)
+    assert single == ["1233P/LINEAR"]
+
+
+def test_reparse_per_search(benchmark, comets):
+    loader, _, t = comets
+    benchmark.pedantic(_baseline_search, args=(loader, QUERY, t), rounds=3)
+
+
+def test_index_lookup_many_matches(benchmark, comets):
+    _, index, t = comets
+    benchmark(index.lookup, QUERY, t)
+
+
+def test_index_lookup_one_match(benchmark, comets):
+    _, index, t = comets
+    benchmark(index.lookup, "1233P/LINEAR", t)
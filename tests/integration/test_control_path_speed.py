@@ -0,0 +1,146 @@
+"""Per-message overhead on the control channel and the Alpaca API.
+
+Outgoing commands are built, verify-injected and JSON encoded into a real
+socket. Incoming lines are parsed and dispatched by the receive loop. Alpaca
+requests go through Falcon's test client, including PreProcessRequest, the
+responder and PropertyResponse/MethodResponse serialization. No scope is
+involved, so the numbers are the code's own cost, not the network's.
+
+Save a baseline before an optimization and compare against it afterwards:
+
+    pytest tests/integration/test_control_path_speed.py --benchmark-only \
+        --benchmark-autosave
+    pytest tests/integration/test_control_path_speed.py --benchmark-only \
+        --benchmark-compare
+"""
+
+import json
+import logging
+import socket
+import threading
+
+import falcon
+import pytest
+from falcon import testing
+
+import device.app as device_app
+import device.telescope as tel_module
+from device.config import Config
+from device.seestar_device import Seestar
+from device.shr import set_shr_logger
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.benchmark(group="control-path", min_rounds=20, max_time=0.5),
+]
+
+GOTO = {"method": "scope_goto", "params": [10.684, 41.269]}
+SET_SETTING = {"method": "set_setting", "params": {"exp_ms": {"stack_l": 10000}}}
+
+# a second's worth of chatter from a busy scope
+INCOMING = (
+    '{"jsonrpc":"2.0","Timestamp":"9507.244805160","method":"scope_get_equ_coord",'
+    '"result":{"ra":17.093056,"dec":34.349722},"code":0,"id":%d}\r\n'
+    '{"jsonrpc":"2.0","Timestamp":"9507.31","method":"get_view_state","result":'
+    '{"View":{"state":"working","stage":"Stack","target_name":"M 31"}},'
+    '"code":0,"id":%d}\r\n'
+    '{"Event":"PiStatus","Timestamp":"9507.4","temp":41.2,"charger_status":'
+    '"Discharging","battery_capacity":87}\r\n'
+    '{"Event":"Stack","Timestamp":"9507.5","state":"frame_complete",'
+    '"stacked_frame":%d,"dropped_frame":0,"total_frame":%d}\r\n'
+)
+BATCH = "".join(INCOMING % (i, i + 1, i, i) for i in range(0, 100, 4))
+
+
+def _drain(sock):
+    while sock.recv(65536):
+        pass
+
+
+@pytest.fixture
+def scope(monkeypatch):
+    """A Seestar that believes it is connected, writing into a socketpair."""
+    monkeypatch.setattr(Config, "log_events_in_info", False)
+    logger = logging.getLogger("control-path")
+    seestar = Seestar(logger, "127.0.0.1", 4700, "Bench", 1, True)
+    ours, theirs = socket.socketpair()
+    drain = threading.Thread(target=_drain, args=(theirs,), daemon=True)
+    drain.start()
+    seestar.s = ours
+    seestar.is_connected = True
+    yield seestar
+    ours.close()
+    drain.join(timeout=2)
+    theirs.close()
+
+
+@pytest.fixture
+def alpaca(monkeypatch, scope):
+    set_shr_logger(scope.logger)
+    monkeypatch.setitem(tel_module.seestar_dev, 1, scope)
+    app = falcon.App()
+    device_app.init_routes(app, "telescope", tel_module)
+    return testing.TestClient(app)
+
+
+def test_transform_message_for_verify(benchmark, scope):
+    message = benchmark(scope.transform_message_for_verify, SET_SETTING)
+    assert message["params"]["verify"] is True
+
+
+def test_send_message_param(benchmark, scope):
+    benchmark(scope.send_message_param, GOTO)
+    assert scope.cmdid > 1
+
+
+def test_receive_and_dispatch_lines(benchmark, monkeypatch, scope):
+    monkeypatch.setattr(scope, "get_socket_msg", lambda: BATCH)
+
+    def stop(_seconds):
+        scope.is_watch_events = False
+
+    monkeypatch.setattr("device.seestar_device.time.sleep", stop)
+
+    def receive_batch():
+        scope.is_watch_events = True
+        scope.receive_message_thread_fn()
+
+    benchmark(receive_batch)
+    assert scope.ra == 17.093056
+    assert scope.event_state["Stack"]["stacked_frame"] == 96
+
+
+def test_alpaca_property_get(benchmark, alpaca, scope):
+    scope.ra = 5.5
+    path = "/api/v1/telescope/1/rightascension"
+    params = {"ClientID": "1", "ClientTransactionID": "7"}
+    resp = benchmark(alpaca.simulate_get, path, params=params)
+    assert resp.json["Value"] == 5.5
+    assert resp.json["ErrorNumber"] == 0
+
+
+def test_alpaca_action_put(benchmark, alpaca):
+    path = "/api/v1/telescope/1/action"
+    form = {
+        "Action": "method_async",
+        "Parameters": json.dumps(GOTO),
+        "ClientID": "1",
+        "ClientTransactionID": "7",
+    }
+    resp = benchmark(alpaca.simulate_put, path, json=form)
+    assert resp.json["Value"] == "async request sent."
+
+
+def test_alpaca_event_state_put(benchmark, alpaca, scope):
+    scope.event_state["PiStatus"] = {"Event": "PiStatus", "temp": 41.2}
+    path = "/api/v1/telescope/1/action"
+    form = {
+        "Action": "get_event_state",
+        "Parameters": json.dumps({"event_name": "PiStatus"}),
+        "ClientID": "1",
+        "ClientTransactionID": "7",
+    }
+    resp = benchmark(alpaca.simulate_put, path, json=form)
+    assert resp.json["ErrorNumber"] == 0
@@ -0,0 +1,168 @@
+"""Federation fan-out benchmark against a fleet of 8 simulated scopes.
+
+Each scope is a real simulator ``SocketListener`` with a real ``Seestar``
+device connected to it. The simulator command handler is wrapped to add
+per-command latency so the serial and concurrent paths can be compared, and
+one scope can be made to hang past the federation deadline.
+"""
+
+import logging
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from device import seestar_util as _seestar_util
+from device.config import Config
+from device.seestar_device import Seestar
+
+sys.modules.setdefault("seestar_util", _seestar_util)
+from device.seestar_federation import Seestar_Federation  # noqa: E402
+
+SIMULATOR_SRC = Path(__file__).resolve().parents[2] / "simulator" / "src"
+if str(SIMULATOR_SRC) not in sys.path:
+    sys.path.insert(0, str(SIMULATOR_SRC))
+
+from listener import SocketListener  # noqa: E402
+
+
+pytestmark = pytest.mark.integration
+
+NUM_SCOPES = 8
+COMMAND_LATENCY_S = 0.3
+HUNG_LATENCY_S = 6.0
+
+
+def _find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_tcp(host, port, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(0.2)
+            try:
+                s.connect((host, port))
+                return
+            except OSError:
+                time.sleep(0.05)
+    raise TimeoutError(f"simulator TCP port {host}:{port} did not open in time")
+
+
+def _with_latency(listener, delays):
+    """Delay every non-heartbeat command by delays[listener.tcp_port] seconds."""
+    original = listener.process_tcp_command
+
+    def _process(command):
+        if "scope_get_equ_coord" not in command:
+            time.sleep(delays.get(listener.tcp_port, 0.0))
+        return original(command)
+
+    listener.process_tcp_command = _process
+
+
+@pytest.fixture(scope="module")
+def simulator_fleet():
+    host = "127.0.0.1"
+    logger = logging.getLogger("federation-fanout-benchmark")
+    delays = {}
+    listeners, threads = [], []
+    for _ in range(NUM_SCOPES):
+        lst = SocketListener(
+            logger, host=host, tcp_port=_find_free_port(), udp_port=_find_free_port()
+        )
+        _with_latency(lst, delays)
+        t = threading.Thread(target=lst._start_socket_listener, daemon=True)
+        t.start()
+        listeners.append(lst)
+        threads.append(t)
+    for lst in listeners:
+        _wait_for_tcp(host, lst.tcp_port)
+
+    saved_pem = getattr(Config, "seestar_interop_pem", "")
+    Config.seestar_interop_pem = ""
+
+    def _start_device(index):
+        dev = Seestar(
+            logger, host, listeners[index].tcp_port, f"Sim {index + 1}", index + 1
+        )
+        dev.start_watch_thread()
+        return dev
+
+    with ThreadPoolExecutor(max_workers=NUM_SCOPES) as ex:
+        devices = list(ex.map(_start_device, range(NUM_SCOPES)))
+    if not all(dev.is_connected for dev in devices):
+        pytest.fail("Timed out waiting for the simulator fleet to connect")
+
+    yield {
+        "devices": {dev.device_num: dev for dev in devices},
+        "listeners": listeners,
+        "delays": delays,
+        "logger": logger,
+    }
+
+    with ThreadPoolExecutor(max_workers=NUM_SCOPES) as ex:
+        list(ex.map(lambda dev: dev.end_watch_thread(), devices))
+    Config.seestar_interop_pem = saved_pem
+    for lst in listeners:
+        lst.shutdown_event.set()
+        if lst.tcp_socket:
+            lst.tcp_socket.close()
+        if lst.udp_socket:
+            lst.udp_socket.close()
+    for t in threads:
+        t.join(timeout=2)
+
+
+def test_fan_out_beats_serial_dispatch(simulator_fleet):
+    devices = simulator_fleet["devices"]
+    for lst in simulator_fleet["listeners"]:
+        simulator_fleet["delays"][lst.tcp_port] = COMMAND_LATENCY_S
+    federation = Seestar_Federation(simulator_fleet["logger"], devices)
+    request = {"method": "get_device_state"}
+
+    start = time.perf_counter()
+    serial = {
+        key: dev.send_message_param_sync(dict(request)) for key, dev in devices.items()
+    }
+    serial_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fanned = federation.send_message_param_sync(request)
+    fan_out_s = time.perf_counter() - start
+
+    assert set(fanned) == set(serial) == set(devices)
+    assert all("device" in reply["result"] for reply in fanned.values())
+    # 8 scopes in parallel should take about an eighth of the serial time
+    assert fan_out_s < serial_s / 2
+
+
+def test_hung_scope_is_reported_without_stalling_fleet(simulator_fleet):
+    devices = simulator_fleet["devices"]
+    listeners = simulator_fleet["listeners"]
+    for lst in listeners:
+        simulator_fleet["delays"][lst.tcp_port] = COMMAND_LATENCY_S
+    simulator_fleet["delays"][listeners[-1].tcp_port] = HUNG_LATENCY_S
+    hung_key = NUM_SCOPES
+    federation = Seestar_Federation(simulator_fleet["logger"], devices)
+
+    start = time.perf_counter()
+    out = federation.executor.run(
+        devices,
+        lambda dev: dev.send_message_param_sync({"method": "get_device_state"}),
+        deadline_s=1.5,
+    )
+    elapsed = time.perf_counter() - start
+    simulator_fleet["delays"][listeners[-1].tcp_port] = COMMAND_LATENCY_S
+
+    assert out[hung_key]["timed_out"] is True
+    assert all("device" in out[key]["result"] for key in devices if key != hung_key)
+    # returned at the deadline instead of waiting for the hung scope
+    assert elapsed < HUNG_LATENCY_S - 2
@@ -0,0 +1,71 @@
+"""Horizon mask lookups and tracks versus the point-in-polygon test that
+scripts/artificialhorizon.py used to run for a single alt/az."""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from device.horizon_mask import HorizonMask
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.benchmark(group="horizon-mask", min_rounds=5, max_time=1.0),
+]
+
+PROFILE_AZ = np.arange(360.0)
+PROFILE_ALT = 15 + 10 * np.sin(np.radians(PROFILE_AZ * 3))
+POLYGON = [(0.0, 0.0)] + list(zip(PROFILE_AZ, PROFILE_ALT)) + [(359.0, 0.0)]
+
+
+def _is_point_in_polygon(polygon, point):
+    # the winding-number loop the old script used
+    def is_left(p0, p1, p2):
+        return (p1[0] - p0[0]) * (p2[1] - p0[1]) - (p2[0] - p0[0]) * (p1[1] - p0[1])
+
+    winding_number = 0
+    for i in range(len(polygon)):
+        p1, p2 = polygon[i], polygon[(i + 1) % len(polygon)]
+        if p1[1] <= point[1]:
+            if p2[1] > point[1] and is_left(p1, p2, point) > 0:
+                winding_number += 1
+        elif p2[1] <= point[1] and is_left(p1, p2, point) < 0:
+            winding_number -= 1
+    return winding_number != 0
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(11)
+    return rng.uniform(0, 40, 200_000), rng.uniform(0, 360, 200_000)
+
+
+def test_polygon_test_200_points(benchmark, points):
+    altitude, azimuth = points
+
+    def run():
+        for k in range(200):
+            _is_point_in_polygon(POLYGON, (azimuth[k], altitude[k]))
+
+    benchmark(run)
+
+
+def test_mask_lookup_200k_points(benchmark, points):
+    mask = HorizonMask.from_profile(PROFILE_AZ, PROFILE_ALT)
+    altitude, azimuth = points
+    benchmark(mask.is_visible, altitude, azimuth)
+
+
+def test_12h_track_of_25_panels(benchmark):
+    mask = HorizonMask.from_profile(PROFILE_AZ, PROFILE_ALT)
+    rng = np.random.default_rng(12)
+    benchmark(
+        mask.visibility,
+        rng.uniform(0, 24, 25),
+        rng.uniform(-30, 80, 25),
+        47.6,
+        -122.3,
+        datetime(2026, 10, 20, 6, tzinfo=timezone.utc),
+    )
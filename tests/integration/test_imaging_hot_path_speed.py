@@ -0,0 +1,128 @@
+"""The imaging hot path at the Seestar's full 1080x1920 resolution.
+
+Every preview frame or stacked image goes through these on its way to the
+MJPEG stream, so they are benchmarked on fixed-seed sensor-sized frames
+with pytest-benchmark. Save a baseline and gate later runs against it:
+
+    pytest tests/integration/test_imaging_hot_path_speed.py --benchmark-only \
+        --benchmark-autosave
+    pytest tests/integration/test_imaging_hot_path_speed.py --benchmark-only \
+        --benchmark-compare --benchmark-compare-fail=median:25%
+
+Nothing here opens a window or a socket, so it runs on a headless CI box.
+"""
+
+import io
+import logging
+import zipfile
+
+import numpy as np
+import pytest
+
+from device import seestar_imaging
+from device.processors.graxpert_stretch import GraxpertStretch
+from device.processors.simple_stretch import SimpleStretch
+from device.protocols.imager import SeestarImagerProtocol
+from imaging.snr import calculate_snr_auto
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.benchmark(group="imaging-hot-path", min_rounds=3, max_time=0.5),
+]
+
+WIDTH, HEIGHT = 1080, 1920
+
+
+class _NoComm:
+    """Stands in for the imager socket, which none of these need."""
+
+    def __init__(self, **_kwargs):
+        pass
+
+    def start(self):
+        pass
+
+
+def _sky(rng, shape):
+    # a faint noisy background with a few hundred saturated-ish stars
+    frame = rng.normal(3000, 400, shape).clip(0, 65535)
+    ys = rng.integers(0, shape[0], 300)
+    xs = rng.integers(0, shape[1], 300)
+    frame[ys, xs] = rng.uniform(20000, 65535, (300,) + shape[2:])
+    return frame.astype(np.uint16)
+
+
+@pytest.fixture(scope="module")
+def bayer_frame():
+    return _sky(np.random.default_rng(1), (HEIGHT, WIDTH))
+
+
+@pytest.fixture(scope="module")
+def rgb_frame():
+    return _sky(np.random.default_rng(2), (HEIGHT, WIDTH, 3))
+
+
+@pytest.fixture(scope="module")
+def stack_zip(rgb_frame):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("raw_data", rgb_frame.tobytes())
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def protocol():
+    return SeestarImagerProtocol(
+        logging.getLogger("imaging-hot-path"), "bench", 1, "127.0.0.1", 4800
+    )
+
+
+@pytest.fixture
+def imager(monkeypatch):
+    monkeypatch.setattr(seestar_imaging, "SeestarImagerProtocol", _NoComm)
+    return seestar_imaging.SeestarImaging(
+        logging.getLogger("imaging-hot-path"), "127.0.0.1", 4700, "bench", 1
+    )
+
+
+def test_convert_bayer_preview(benchmark, protocol, bayer_frame):
+    image = benchmark(protocol.convert_star_image, bayer_frame.tobytes(), WIDTH, HEIGHT)
+    assert image.shape == (HEIGHT, WIDTH, 3)
+
+
+def test_convert_rgb_stack(benchmark, protocol, rgb_frame):
+    image = benchmark(protocol.convert_star_image, rgb_frame.tobytes(), WIDTH, HEIGHT)
+    assert image.shape == (HEIGHT, WIDTH, 3)
+
+
+def test_handle_stack_zip(benchmark, protocol, stack_zip):
+    benchmark(protocol.handle_stack, WIDTH, HEIGHT, stack_zip)
+    assert protocol.latest_image.shape == (HEIGHT, WIDTH, 3)
+
+
+def test_graxpert_stretch(benchmark, rgb_frame):
+    image = benchmark(GraxpertStretch().process, rgb_frame)
+    assert image.shape == rgb_frame.shape
+
+
+def test_simple_stretch(benchmark, rgb_frame):
+    image = benchmark(SimpleStretch().process, rgb_frame)
+    assert image.shape == rgb_frame.shape
+
+
+def test_calculate_snr_auto(benchmark, rgb_frame):
+    snr = benchmark(calculate_snr_auto, rgb_frame)
+    assert snr > 0
+
+
+def test_build_frame_bytes(benchmark, imager, rgb_frame):
+    image = (rgb_frame >> 8).astype(np.uint8)
+    frame = benchmark(imager.build_frame_bytes, image, WIDTH, HEIGHT)
+    assert frame.startswith(b"Content-Type: image/jpeg")
+
+
+def test_blank_frame(benchmark, imager):
+    frame = benchmark(imager.blank_frame, "Stopped", timestamp=True)
+    assert frame.endswith(imager.BOUNDARY)
@@ -0,0 +1,151 @@
+"""scripts/loadtest.py against a stand-in ALP.
+
+A small threaded HTTP server answers the Alpaca, UI and imaging endpoints
+the load test drives, including an MJPEG and a server-sent event stream, so
+the whole run, its reports and the baseline gate can be checked quickly.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parents[2] / "scripts"
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import loadtest  # noqa: E402
+
+
+pytestmark = pytest.mark.integration
+
+
+class _FakeAlp(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, content_type):
+        body = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _alpaca(self, value, error=0):
+        self._send(
+            json.dumps({"Value": value, "ErrorNumber": error, "ErrorMessage": ""}),
+            "application/json",
+        )
+
+    def _stream(self, content_type, item, interval=0.05):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for _ in range(200):
+                self.wfile.write(item)
+                self.wfile.flush()
+                time.sleep(interval)
+        except OSError:
+            pass
+        self.close_connection = True
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path.endswith("/vid"):
+            frame = b"\r\n--frame\r\nContent-Type: image/jpeg\r\n\r\n" + b"\xff" * 500
+            self._stream("multipart/x-mixed-replace; boundary=frame", frame)
+        elif path.endswith("/live/status"):
+            self._stream("text/event-stream", b"data: <div>status</div>\n\n")
+        elif path.endswith("/eventstatus"):
+            self._send("<div>events</div>", "text/html")
+        elif path.endswith("/slewing"):
+            # one property the scope refuses
+            self._alpaca(None, error=1031)
+        else:
+            self._alpaca(True)
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._alpaca({"result": {"device": {}}})
+
+
+@pytest.fixture
+def fake_alp():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeAlp)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_load_test_reports_and_gates(fake_alp, tmp_path):
+    port = str(fake_alp)
+    report_json = tmp_path / "report.json"
+    report_html = tmp_path / "report.html"
+    common = [
+        "--alpaca-port",
+        port,
+        "--ui-port",
+        port,
+        "--imaging-port",
+        port,
+        "--devices",
+        "1,2",
+        "--duration",
+        "2",
+        "--alpaca-interval",
+        "0.2",
+        "--burst-interval",
+        "0.5",
+        "--live-status-clients",
+        "1",
+        "--mjpeg-viewers",
+        "1",
+        "--federation-clients",
+        "1",
+        "--federation-interval",
+        "0.5",
+        "--pid",
+        str(os.getpid()),
+    ]
+    status = loadtest.main(
+        common + ["--json", str(report_json), "--html", str(report_html)]
+    )
+    assert status == 0
+
+    report = json.loads(report_json.read_text())
+    endpoints = report["endpoints"]
+    assert endpoints["alpaca GET rightascension"]["error_rate"] == 0
+    assert endpoints["alpaca GET slewing"]["error_rate"] == 1
+    assert endpoints["method_sync get_device_state"]["p95_ms"] > 0
+    assert endpoints["ui GET eventstatus"]["requests"] > 0
+    assert endpoints["federation get_event_state"]["requests"] > 0
+    # about 20 frames a second per viewer, two devices
+    assert endpoints["imaging GET vid"]["items_per_s"] > 10
+    assert endpoints["imaging GET live/status"]["items_per_s"] > 10
+    assert report["process"]["samples"]
+    assert "rss_max_mb" in report["process"]
+    assert "alpaca GET rightascension" in report_html.read_text()
+
+    # a baseline that was much faster fails the gate
+    baseline = json.loads(report_json.read_text())
+    for entry in baseline["endpoints"].values():
+        if "p95_ms" in entry:
+            entry["p95_ms"] = entry["p95_ms"] / 10
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(baseline))
+    regressions = loadtest.compare(report, baseline, 0.2)
+    assert any("p95" in line for line in regressions)
+    assert loadtest.compare(report, report, 0.2) == []
@@ -0,0 +1,85 @@
+"""Receive loop throughput with its logging written directly or through a queue.
+
+The same batch of scope traffic as the control path benchmarks is parsed and
+dispatched while every event is logged. It is logged at INFO, as with
+``log_events_in_info``, or at DEBUG, which also logs every reply. Direct
+logging writes the file on the receive thread, the way init_logging used to
+set things up. Queued logging hands records to the LogWriter thread.
+"""
+
+import logging
+import logging.handlers
+import queue
+
+import pytest
+
+from device.config import Config
+from device.log import DroppingQueueHandler, EventRateLimitFilter, LogWriter
+from device.seestar_device import Seestar
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.benchmark(group="receive-loop-logging", min_rounds=20, max_time=1.0),
+]
+
+INCOMING = (
+    '{"jsonrpc":"2.0","Timestamp":"9507.244805160","method":"scope_get_equ_coord",'
+    '"result":{"ra":17.093056,"dec":34.349722},"code":0,"id":%d}\r\n'
+    '{"Event":"PiStatus","Timestamp":"9507.4","temp":41.2,"charger_status":'
+    '"Discharging","battery_capacity":87}\r\n'
+    '{"Event":"ScopeTrack","Timestamp":"9507.45","state":"on","tracking":true}\r\n'
+    '{"Event":"Stack","Timestamp":"9507.5","state":"frame_complete",'
+    '"stacked_frame":%d,"dropped_frame":0,"total_frame":%d}\r\n'
+)
+BATCH = "".join(INCOMING % (i, i, i) for i in range(0, 100, 4))
+
+
+@pytest.fixture(params=["direct", "queued"])
+def pipeline(request, tmp_path):
+    formatter = logging.Formatter(
+        "%(asctime)s.%(msecs)03d %(levelname)s %(threadName)s %(message)s"
+    )
+    file_handler = logging.handlers.RotatingFileHandler(
+        tmp_path / "alpyca.log", maxBytes=50_000_000, backupCount=1
+    )
+    file_handler.setFormatter(formatter)
+    logger = logging.getLogger(f"receive-loop-logging.{request.param}")
+    logger.propagate = False
+    writer = None
+    if request.param == "direct":
+        handler = file_handler
+    else:
+        handler = DroppingQueueHandler(queue.Queue(Config.log_queue_size))
+        handler.addFilter(EventRateLimitFilter(["ScopeTrack", "PiStatus"], 10))
+        writer = LogWriter(handler.queue, file_handler)
+        writer.start()
+    logger.addHandler(handler)
+    yield request.param, logger, handler
+    logger.removeHandler(handler)
+    if writer is not None:
+        writer.stop()
+    file_handler.close()
+
+
+@pytest.mark.parametrize("level", ["INFO", "DEBUG"])
+def test_receive_loop_with_logging(benchmark, monkeypatch, pipeline, level):
+    _, logger, handler = pipeline
+    logger.setLevel(level)
+    monkeypatch.setattr(Config, "log_events_in_info", True)
+    scope = Seestar(logger, "127.0.0.1", 4700, "Bench", 1, True)
+    monkeypatch.setattr(scope, "get_socket_msg", lambda: BATCH)
+
+    def stop(_seconds):
+        scope.is_watch_events = False
+
+    monkeypatch.setattr("device.seestar_device.time.sleep", stop)
+
+    def receive_batch():
+        scope.is_watch_events = True
+        scope.receive_message_thread_fn()
+
+    benchmark(receive_batch)
+    benchmark.extra_info["records_dropped"] = getattr(handler, "dropped", 0)
+    assert scope.event_state["Stack"]["stacked_frame"] == 96
@@ -0,0 +1,44 @@
+"""What an instrumentation point costs on the hot path.
+
+The receive loop counts every event and every sync RPC observes a latency,
+so looking up a labelled metric and updating it has to stay in the low
+microseconds, and rendering /metrics for a few scopes has to stay cheap.
+"""
+
+import itertools
+
+import pytest
+
+from device.metrics import Registry
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.benchmark(group="metrics", min_rounds=20, max_time=0.5),
+]
+
+EVENTS = ["PiStatus", "ScopeTrack", "Stack", "ViewState", "FocuserMove"]
+
+
+def test_counter_inc(benchmark):
+    events = Registry().counter("events_total", "Events.", ("device", "event"))
+    names = itertools.cycle(EVENTS)
+    benchmark(lambda: events.labels(1, next(names)).inc())
+    assert sum(events.labels(1, name).get() for name in EVENTS) > 0
+
+
+def test_histogram_observe(benchmark):
+    rpc = Registry().histogram("rpc_seconds", "RPCs.", ("device", "method"))
+    benchmark(lambda: rpc.labels(1, "get_device_state").observe(0.05))
+    assert rpc.labels(1, "get_device_state").count > 0
+
+
+def test_render_four_scopes(benchmark):
+    registry = Registry()
+    rpc = registry.histogram("rpc_seconds", "RPCs.", ("device", "method"))
+    for device in range(1, 5):
+        for n in range(40):
+            rpc.labels(device, f"method_{n}").observe(0.01)
+    body = benchmark(registry.render)
+    assert 'rpc_seconds_count{device="4",method="method_39"} 1' in body
@@ -0,0 +1,74 @@
+"""Night planning over the whole local catalogue.
+
+Every object in alp.dat is evaluated on a 5-minute grid over the night.
+The baseline is astropy's AltAz transform of a small sample of the
+catalogue; multiply by len(catalogue) / BASELINE_SAMPLE for the whole of it.
+"""
+
+import os
+import warnings
+from datetime import date
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from front.night_planner import NightPlanner
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.benchmark(group="night-planner"),
+]
+
+CATALOG = os.path.join(os.path.dirname(__file__), "..", "..", "data", "alp.dat")
+BASELINE_SAMPLE = 100
+
+
+def _astropy_altaz(plan, latitude, longitude):
+    from astropy.utils import iers
+
+    iers.conf.auto_download = False
+    import astropy.units as u
+    from astropy.coordinates import AltAz, EarthLocation, SkyCoord
+    from astropy.time import Time
+
+    dark = [t for t in plan.times if plan.dark_start <= t <= plan.dark_end]
+    catalog = plan.catalog
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        frame = AltAz(
+            obstime=Time(dark),
+            location=EarthLocation(lat=latitude * u.deg, lon=longitude * u.deg),
+        )
+        for k in range(BASELINE_SAMPLE):
+            SkyCoord(
+                ra=catalog.ra_hours[k] * 15 * u.deg, dec=catalog.dec_degrees[k] * u.deg
+            ).transform_to(frame)
+
+
+@pytest.fixture(scope="module")
+def planner():
+    planner = NightPlanner(CATALOG, cache_size=0)
+    planner.catalog()
+    return planner
+
+
+def test_repeated_plans_come_from_the_cache():
+    planner = NightPlanner(CATALOG)
+    plan = planner.plan(47.6, -122.3, date(2026, 10, 5), ZoneInfo("UTC"))
+    assert planner.plan(47.6, -122.3, date(2026, 10, 5), ZoneInfo("UTC")) is plan
+    assert planner.hits == 1
+
+
+def test_full_catalogue_night(benchmark, planner):
+    benchmark.pedantic(
+        planner.plan,
+        args=(47.6, -122.3, date(2026, 10, 5), ZoneInfo("UTC")),
+        rounds=5,
+    )
+
+
+def test_astropy_sample(benchmark, planner):
+    plan = planner.plan(47.6, -122.3, date(2026, 10, 5), ZoneInfo("UTC"))
+    benchmark.pedantic(_astropy_altaz, args=(plan, 47.6, -122.3), rounds=1)
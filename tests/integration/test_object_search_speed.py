@@ -0,0 +1,63 @@
+"""Local object search latency: FTS5 trigram index versus the old LIKE scan.
+
+The baseline is the query searchLocal used to run on a new connection for
+every request. Autocomplete queries are typed one character at a time, so
+each prefix is measured uncached.
+"""
+
+import os
+import sqlite3
+
+import pytest
+
+from front.object_search import ObjectSearch
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.benchmark(group="object-search", min_rounds=5, max_time=1.0),
+]
+
+CATALOG = os.path.join(os.path.dirname(__file__), "..", "..", "data", "alp.dat")
+TYPED = ["andromeda", "ngc70", "veil nebula", "orion", "ic434", "m31", "crab"]
+
+
+def _prefixes():
+    return [word[:n] for word in TYPED for n in range(2, len(word) + 1)]
+
+
+def _baseline(text):
+    con = sqlite3.connect(CATALOG)
+    try:
+        pattern = f"%{text}%"
+        return con.execute(
+            "SELECT ra, dec, objectType, commonNames, identifiers FROM objects "
+            "WHERE identifiers LIKE ? OR commonNames LIKE ? COLLATE NOCASE",
+            (pattern, pattern),
+        ).fetchall()
+    finally:
+        con.close()
+
+
+@pytest.fixture(scope="module")
+def search(tmp_path_factory):
+    index_path = tmp_path_factory.mktemp("search") / "alp_fts.sqlite"
+    search = ObjectSearch(CATALOG, str(index_path), cache_size=0)
+    search.search("warm up")
+    yield search
+    search.reload()
+
+
+def test_index_finds_what_the_scan_finds(search):
+    for word in TYPED:
+        if _baseline(word):
+            assert search.suggest(word), word
+
+
+def test_like_scan_per_keystroke(benchmark):
+    benchmark(lambda: [_baseline(text) for text in _prefixes()])
+
+
+def test_fts_suggest_per_keystroke(benchmark, search):
+    benchmark(lambda: [search.suggest(text) for text in _prefixes()])
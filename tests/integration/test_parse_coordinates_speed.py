@@ -0,0 +1,53 @@
+"""J2000 -> JNow for a schedule's worth of targets: batch parser versus astropy.
+
+The baseline is Util.parse_coordinate, which builds a SkyCoord and an FK5
+frame of date for every target. Both cases convert the same 20 targets.
+"""
+
+import warnings
+
+import numpy as np
+import pytest
+
+from device.seestar_util import Util
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.benchmark(group="parse-coordinates", min_rounds=5, max_time=1.0),
+]
+
+NUM_TARGETS = 20
+
+
+@pytest.fixture(scope="module")
+def targets():
+    from astropy.utils import iers
+
+    iers.conf.auto_download = False
+    rng = np.random.default_rng(5)
+    hours = rng.integers(0, 24, NUM_TARGETS)
+    degrees = rng.integers(-80, 80, NUM_TARGETS)
+    minutes = rng.integers(0, 60, (2, NUM_TARGETS))
+    seconds = rng.uniform(0, 59, (2, NUM_TARGETS))
+    ra = [f"{h}h{m}m{s:.1f}s" for h, m, s in zip(hours, minutes[0], seconds[0])]
+    dec = [f"{d:+d}d{m}m{s:.0f}s" for d, m, s in zip(degrees, minutes[1], seconds[1])]
+    return ra, dec
+
+
+def test_astropy_per_target(benchmark, targets):
+    ra, dec = targets
+
+    def run():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for k in range(NUM_TARGETS):
+                Util.parse_coordinate(is_j2000=True, in_ra=ra[k], in_dec=dec[k])
+
+    benchmark.pedantic(run, rounds=3)
+
+
+def test_batch_parse(benchmark, targets):
+    ra, dec = targets
+    benchmark(Util.parse_coordinates, True, ra, dec)
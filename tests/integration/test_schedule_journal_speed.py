@@ -0,0 +1,61 @@
+"""What journaling costs the scheduler: the time record() takes on the
+scheduler's thread, versus writing and fsyncing each change directly."""
+
+import json
+import os
+
+import pytest
+
+from device.schedule_journal import ScheduleJournal
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.benchmark(group="schedule-journal", min_rounds=20, max_time=1.0),
+]
+
+ITEMS = [
+    {
+        "schedule_item_id": f"item-{k}",
+        "action": "start_mosaic",
+        "params": {"target_name": f"T{k}", "ra": "10h0m0s", "dec": "+20d0m0s"},
+    }
+    for k in range(30)
+]
+
+
+def _journal(path):
+    journal = ScheduleJournal(str(path), compact_after=500)
+    journal.recover()
+    journal.snapshot({"schedule_id": "s1", "list": ITEMS, "state": "working"})
+    return journal
+
+
+def test_burst_of_records_is_recovered(tmp_path):
+    journal = _journal(tmp_path / "journal.jsonl")
+    count = 2000
+    for k in range(count):
+        journal.record("panel", panel="11", stacked_s=k * 5)
+    journal.close()
+
+    recovered = ScheduleJournal(str(tmp_path / "journal.jsonl")).recover()
+    assert len(recovered["list"]) == 30
+    assert recovered["stacked_s"] == (count - 1) * 5
+
+
+def test_record(benchmark, tmp_path):
+    journal = _journal(tmp_path / "journal.jsonl")
+    benchmark(journal.record, "panel", panel="11", stacked_s=5)
+    journal.close()
+
+
+def test_write_and_fsync_per_change(benchmark, tmp_path):
+    with open(tmp_path / "direct.jsonl", "a") as f:
+
+        def write():
+            f.write(json.dumps({"op": "panel", "panel": "11", "stacked_s": 5}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        benchmark(write)
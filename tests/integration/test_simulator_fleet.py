@@ -0,0 +1,199 @@
+"""Several simulated scopes served by one simulator event loop.
+
+Each scope keeps its own state, every client of a scope receives its
+unsolicited events, and a slow command on one scope does not hold up the
+others.
+"""
+
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+SIMULATOR_SRC = Path(__file__).resolve().parents[2] / "simulator" / "src"
+if str(SIMULATOR_SRC) not in sys.path:
+    sys.path.insert(0, str(SIMULATOR_SRC))
+
+from config import Config as SimulatorConfig  # noqa: E402
+from fleet import SimulatorFleet  # noqa: E402
+from listener import SocketListener  # noqa: E402
+
+
+pytestmark = pytest.mark.integration
+
+NUM_SCOPES = 4
+
+
+def _find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_tcp(host, port, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(0.2)
+            try:
+                s.connect((host, port))
+                return
+            except OSError:
+                time.sleep(0.05)
+    raise TimeoutError(f"simulator TCP port {host}:{port} did not open in time")
+
+
+class _Client:
+    def __init__(self, port):
+        self.sock = socket.create_connection(("127.0.0.1", port), timeout=5.0)
+        self.buffer = b""
+
+    def send(self, payload):
+        self.sock.sendall((json.dumps(payload) + "\r\n").encode("utf-8"))
+
+    def read(self, predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            while b"\r\n" in self.buffer:
+                line, self.buffer = self.buffer.split(b"\r\n", 1)
+                message = json.loads(line)
+                if predicate(message):
+                    return message
+            self.sock.settimeout(max(0.01, deadline - time.monotonic()))
+            try:
+                data = self.sock.recv(65536)
+            except socket.timeout:
+                break
+            if not data:
+                break
+            self.buffer += data
+        raise TimeoutError("no matching message from the simulator")
+
+    def call(self, method, params=None, cmd_id=1):
+        payload = {"id": cmd_id, "method": method}
+        if params is not None:
+            payload["params"] = params
+        self.send(payload)
+        return self.read(lambda m: m.get("id") == cmd_id and "Event" not in m)
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.fixture(scope="module")
+def fleet():
+    logger = logging.getLogger("simulator-fleet-test")
+    listeners = [
+        SocketListener(
+            logger,
+            host="127.0.0.1",
+            tcp_port=_find_free_port(),
+            udp_port=_find_free_port(),
+            device_name=f"Seestar Simulator {n}",
+            device_num=n,
+        )
+        for n in range(1, NUM_SCOPES + 1)
+    ]
+    fleet = SimulatorFleet(logger, listeners)
+    thread = threading.Thread(target=fleet.run, daemon=True)
+    thread.start()
+    for listener in listeners:
+        _wait_for_tcp("127.0.0.1", listener.tcp_port)
+    yield listeners
+    fleet.shutdown()
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+
+
+def test_each_scope_keeps_its_own_state(fleet):
+    clients = [_Client(listener.tcp_port) for listener in fleet]
+    try:
+        for n, client in enumerate(clients):
+            client.call("set_setting", {"focal_pos": 1000 + n})
+        for n, client in enumerate(clients):
+            setting = client.call("get_setting")["result"]
+            assert setting["focal_pos"] == 1000 + n
+    finally:
+        for client in clients:
+            client.close()
+
+    listener = fleet[2]
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.settimeout(2.0)
+        s.sendto(
+            json.dumps({"id": 1, "method": "scan_iscope"}).encode("utf-8"),
+            ("127.0.0.1", listener.udp_port),
+        )
+        reply = json.loads(s.recvfrom(4096)[0])
+    assert reply["name"] == "seestar simulator 3"
+
+
+def test_events_reach_every_client_of_a_scope(fleet):
+    first, second = _Client(fleet[1].tcp_port), _Client(fleet[1].tcp_port)
+    other = _Client(fleet[0].tcp_port)
+    try:
+        # wait until the simulator has registered every connection
+        for client in (first, second, other):
+            client.call("get_setting")
+        first.call("start_create_dark", cmd_id=2)
+
+        def is_dark(message):
+            return message.get("Event") == "DarkLibrary"
+
+        assert first.read(is_dark)["state"] == "working"
+        assert second.read(is_dark)["state"] == "working"
+        with pytest.raises(TimeoutError):
+            other.read(is_dark, timeout=0.5)
+    finally:
+        for client in (first, second, other):
+            client.close()
+
+
+def test_slow_command_stalls_only_its_own_scope(fleet):
+    slow, fast = _Client(fleet[0].tcp_port), _Client(fleet[3].tcp_port)
+    try:
+        # the simulated filter wheel takes a second to move
+        slow.send({"id": 5, "method": "set_wheel_position", "params": [2]})
+        time.sleep(0.05)
+        start = time.perf_counter()
+        fast.call("get_setting")
+        elapsed = time.perf_counter() - start
+        assert elapsed < 0.5
+        assert slow.read(lambda m: m.get("id") == 5)["result"] == 0
+    finally:
+        slow.close()
+        fast.close()
+
+
+def test_fleet_layout_from_config(monkeypatch):
+    monkeypatch.setattr(SimulatorConfig, "ip_address", "127.0.0.1")
+    monkeypatch.setattr(SimulatorConfig, "tcp_port", 4700)
+    monkeypatch.setattr(SimulatorConfig, "udp_port", 4720)
+    monkeypatch.setattr(SimulatorConfig, "fleet_count", 3)
+    monkeypatch.setattr(SimulatorConfig, "fleet_port_step", 2)
+    monkeypatch.setattr(SimulatorConfig, "fleet_loopback_aliases", False)
+    monkeypatch.setitem(SimulatorConfig._dict, "fleet", {})
+    scopes = SimulatorConfig.fleet_scopes()
+    assert [s["tcp_port"] for s in scopes] == [4700, 4702, 4704]
+    assert [s["udp_port"] for s in scopes] == [4720, 4722, 4724]
+    assert [s["name"] for s in scopes][-1] == "Seestar Simulator 3"
+
+    monkeypatch.setattr(SimulatorConfig, "fleet_loopback_aliases", True)
+    scopes = SimulatorConfig.fleet_scopes()
+    assert [s["ip_address"] for s in scopes] == ["127.0.0.1", "127.0.0.2", "127.0.0.3"]
+    assert {s["tcp_port"] for s in scopes} == {4700}
+
+    monkeypatch.setitem(
+        SimulatorConfig._dict,
+        "fleet",
+        {"scope": [{"name": "North", "tcp_port": 5000}, {"name": "South"}]},
+    )
+    scopes = SimulatorConfig.fleet_scopes()
+    assert [s["name"] for s in scopes] == ["North", "South"]
+    assert scopes[0]["tcp_port"] == 5000
+    assert scopes[1]["device_num"] == 2
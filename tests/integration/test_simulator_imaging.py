@@ -0,0 +1,145 @@
+"""The simulator's port 4800 imaging endpoint, read by the device's own parser.
+
+Frames are received over a real socket and decoded with
+``SeestarImagerProtocol``, so the header layout and payload formats are the
+ones the device code expects from a real scope.
+"""
+
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from device.protocols.imager import SeestarImagerProtocol
+
+SIMULATOR_SRC = Path(__file__).resolve().parents[2] / "simulator" / "src"
+if str(SIMULATOR_SRC) not in sys.path:
+    sys.path.insert(0, str(SIMULATOR_SRC))
+
+from fleet import SimulatorFleet  # noqa: E402
+from imaging_server import StarField  # noqa: E402
+from listener import SocketListener  # noqa: E402
+
+
+pytestmark = pytest.mark.integration
+
+WIDTH, HEIGHT = 160, 120
+
+
+def _find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_tcp(host, port, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(0.2)
+            try:
+                s.connect((host, port))
+                return
+            except OSError:
+                time.sleep(0.05)
+    raise TimeoutError(f"simulator TCP port {host}:{port} did not open in time")
+
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("simulator closed the imaging connection")
+        data += chunk
+    return data
+
+
+def _read_message(sock, protocol):
+    size, frame_id, width, height = protocol.parse_header(_recv_exact(sock, 80))
+    return frame_id, width, height, _recv_exact(sock, size)
+
+
+@pytest.fixture(scope="module")
+def imaging_scope():
+    logger = logging.getLogger("simulator-imaging-test")
+    listener = SocketListener(
+        logger,
+        host="127.0.0.1",
+        tcp_port=_find_free_port(),
+        udp_port=_find_free_port(),
+        imaging_port=_find_free_port(),
+        imaging_options={"width": WIDTH, "height": HEIGHT, "fps": 20.0, "stars": 40},
+    )
+    fleet = SimulatorFleet(logger, [listener])
+    thread = threading.Thread(target=fleet.run, daemon=True)
+    thread.start()
+    _wait_for_tcp("127.0.0.1", listener.imaging_port)
+    yield listener
+    listener.simulator.schedule["is_stacking"] = False
+    fleet.shutdown()
+    thread.join(timeout=2)
+
+
+@pytest.fixture
+def protocol():
+    return SeestarImagerProtocol(
+        logging.getLogger("simulator-imaging-test"), "sim", 1, "127.0.0.1", 4800
+    )
+
+
+def test_preview_frames_decode_as_bayer(imaging_scope, protocol):
+    with socket.create_connection(("127.0.0.1", imaging_scope.imaging_port)) as s:
+        s.settimeout(5.0)
+        s.sendall(b'{"id": 21, "method": "begin_streaming"}\r\n')
+        start = time.perf_counter()
+        frames = [_read_message(s, protocol) for _ in range(5)]
+        elapsed = time.perf_counter() - start
+        s.sendall(b'{"id": 22, "method": "stop_streaming"}\r\n')
+
+    for frame_id, width, height, payload in frames:
+        assert (frame_id, width, height) == (21, WIDTH, HEIGHT)
+        assert len(payload) == WIDTH * HEIGHT * 2
+    # five frames at 20 fps
+    assert 0.15 < elapsed < 2.0
+
+    protocol.handle_preview_frame(WIDTH, HEIGHT, frames[-1][3])
+    assert protocol.latest_image.shape == (HEIGHT, WIDTH, 3)
+    assert protocol.latest_image.dtype == np.uint16
+
+
+def test_stacked_image_follows_the_stack(imaging_scope, protocol):
+    simulator = imaging_scope.simulator
+    with socket.create_connection(("127.0.0.1", imaging_scope.imaging_port)) as s:
+        s.settimeout(5.0)
+        s.sendall(b'{"id": 23, "method": "get_stacked_img"}\r\n')
+        _, _, _, payload = _read_message(s, protocol)
+        assert json.loads(payload)["error"] == "no stacked image"
+
+        simulator.state["setting"]["exp_ms"]["stack_l"] = 50
+        simulator.schedule["is_stacking"] = True
+        simulator.start_stack()
+        deadline = time.monotonic() + 5
+        while simulator.stacked_frames < 3 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        s.sendall(b'{"id": 23, "method": "get_stacked_img"}\r\n')
+        frame_id, width, height, payload = _read_message(s, protocol)
+        simulator.schedule["is_stacking"] = False
+
+    assert (frame_id, width, height) == (23, WIDTH, HEIGHT)
+    protocol.handle_stack(width, height, payload)
+    assert len(protocol.raw_img) == WIDTH * HEIGHT * 6
+    assert protocol.latest_image.shape == (HEIGHT, WIDTH, 3)
+
+
+def test_stacking_lowers_the_noise():
+    field = StarField(WIDTH, HEIGHT, stars=0, seed=1)
+    single = field.stack_frame(1).astype(np.float32) - field.sky
+    stacked = field.stack_frame(16).astype(np.float32) - field.sky
+    assert np.std(stacked) < np.std(single) / 3
@@ -0,0 +1,149 @@
+"""Simulated scopes behind impaired networks.
+
+Each scope sends through an ``Impairment``: latency, a bandwidth cap,
+fragmented writes or a disconnect part way through a message. The last test
+runs a real ``Seestar`` device against a fragmenting, jittery scope to check
+that its framing and sync calls cope.
+"""
+
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from device.config import Config
+from device.seestar_device import Seestar
+
+SIMULATOR_SRC = Path(__file__).resolve().parents[2] / "simulator" / "src"
+if str(SIMULATOR_SRC) not in sys.path:
+    sys.path.insert(0, str(SIMULATOR_SRC))
+
+from fleet import SimulatorFleet  # noqa: E402
+from impairment import Impairment  # noqa: E402
+from listener import SocketListener  # noqa: E402
+
+
+pytestmark = pytest.mark.integration
+
+IMPAIRMENTS = {
+    "latency": {"latency_ms": 150},
+    "bandwidth": {"bandwidth_kbps": 200},
+    "fragmented": {"preset": "fragmented", "fragment_bytes": 16},
+    "disconnect": {"disconnect_probability": 1.0},
+    "device": {"preset": "fragmented", "latency_ms": 30, "jitter_ms": 20},
+}
+
+
+def _find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_tcp(host, port, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(0.2)
+            try:
+                s.connect((host, port))
+                return
+            except OSError:
+                time.sleep(0.05)
+    raise TimeoutError(f"simulator TCP port {host}:{port} did not open in time")
+
+
+def _call(port, method):
+    """Send one command; return the reply, the number of reads and the time taken."""
+    with socket.create_connection(("127.0.0.1", port), timeout=5.0) as s:
+        start = time.perf_counter()
+        s.sendall((json.dumps({"id": 1, "method": method}) + "\r\n").encode("utf-8"))
+        data, reads = b"", 0
+        while not data.endswith(b"\r\n"):
+            chunk = s.recv(65536)
+            if not chunk:
+                return data, reads, time.perf_counter() - start
+            data += chunk
+            reads += 1
+        return json.loads(data), reads, time.perf_counter() - start
+
+
+@pytest.fixture(scope="module")
+def scopes():
+    logger = logging.getLogger("simulator-impairment-test")
+    listeners = {
+        name: SocketListener(
+            logger,
+            host="127.0.0.1",
+            tcp_port=_find_free_port(),
+            udp_port=_find_free_port(),
+            device_name=name,
+            device_num=n,
+            impairment=Impairment.from_config(spec, seed=n),
+        )
+        for n, (name, spec) in enumerate(IMPAIRMENTS.items(), start=1)
+    }
+    fleet = SimulatorFleet(logger, listeners.values())
+    thread = threading.Thread(target=fleet.run, daemon=True)
+    thread.start()
+    for listener in listeners.values():
+        _wait_for_tcp("127.0.0.1", listener.tcp_port)
+    yield {name: listener.tcp_port for name, listener in listeners.items()}
+    fleet.shutdown()
+    thread.join(timeout=2)
+
+
+def test_latency_delays_replies(scopes):
+    reply, _, elapsed = _call(scopes["latency"], "get_setting")
+    assert reply["method"] == "get_setting"
+    assert elapsed >= 0.15
+
+
+def test_bandwidth_cap_paces_large_replies(scopes):
+    reply, _, elapsed = _call(scopes["bandwidth"], "get_device_state")
+    size = len(json.dumps(reply)) + 2
+    # written in 10 ms slices of 250 bytes
+    assert "device" in reply["result"]
+    assert elapsed >= (size - 250) / 25000
+
+
+def test_fragmented_writes_split_lines(scopes):
+    reply, reads, _ = _call(scopes["fragmented"], "get_device_state")
+    assert "device" in reply["result"]
+    assert reads > 3
+
+
+def test_disconnect_mid_message(scopes):
+    data, _, _ = _call(scopes["disconnect"], "get_device_state")
+    assert isinstance(data, bytes)
+    assert not data.endswith(b"\r\n")
+
+
+def test_same_seed_same_conditions():
+    first = Impairment.from_config("lossy_wifi", seed=7)
+    second = Impairment.from_config("lossy_wifi", seed=7)
+    assert [first.delay() for _ in range(50)] == [second.delay() for _ in range(50)]
+    assert Impairment.from_config("none") is None
+    with pytest.raises(ValueError):
+        Impairment.from_config("dial_up")
+
+
+def test_device_sync_calls_over_fragmented_jittery_link(scopes):
+    saved_pem = getattr(Config, "seestar_interop_pem", "")
+    Config.seestar_interop_pem = ""
+    logger = logging.getLogger("simulator-impairment-test")
+    device = Seestar(logger, "127.0.0.1", scopes["device"], "Impaired", 1)
+    device.start_watch_thread()
+    try:
+        assert device.is_connected
+        for _ in range(5):
+            reply = device.send_message_param_sync({"method": "get_device_state"})
+            assert "device" in reply["result"]
+    finally:
+        device.end_watch_thread()
+        Config.seestar_interop_pem = saved_pem
@@ -0,0 +1,68 @@
+"""Cold and warm page-load byte counts for the front's /public assets.
+
+Compares the bytes a browser downloads for the assets base.html pulls in
+when they are served raw (the old static route) against the precompressed,
+content-hashed build: a cold load fetches the compressed hashed files, and a
+warm load revalidates the plain names with If-None-Match.
+"""
+
+import re
+from pathlib import Path
+
+import falcon
+import pytest
+from falcon import testing
+
+from front.static_assets import PUBLIC_DIR, StaticAssetResource, build_static_assets
+
+pytestmark = pytest.mark.integration
+
+BASE_TEMPLATE = (
+    Path(__file__).resolve().parents[2] / "front" / "templates" / "base.html"
+)
+
+
+def _page_assets():
+    names = re.findall(r"asset_url\('([^']+)'\)", BASE_TEMPLATE.read_text())
+    assert names, "base.html no longer references any assets"
+    return sorted(set(names))
+
+
+@pytest.fixture(scope="module")
+def asset_client(tmp_path_factory):
+    build_dir = str(tmp_path_factory.mktemp("public_build"))
+    build_static_assets(PUBLIC_DIR, build_dir)
+    resource = StaticAssetResource(PUBLIC_DIR, build_dir)
+    app = falcon.App()
+    app.add_route("/public/{name}", resource)
+    return resource, testing.TestClient(app)
+
+
+def test_page_load_bytes_cold_and_warm(asset_client):
+    resource, client = asset_client
+    names = _page_assets()
+    headers = {"Accept-Encoding": "br, gzip, deflate"}
+
+    raw_bytes = sum((Path(PUBLIC_DIR) / name).stat().st_size for name in names)
+
+    cold_bytes = 0
+    etags = {}
+    for name in names:
+        resp = client.simulate_get(resource.asset_url(name), headers=headers)
+        assert resp.status_code == 200
+        assert "immutable" in resp.headers["Cache-Control"]
+        cold_bytes += len(resp.content)
+        plain = client.simulate_get(f"/public/{name}", headers=headers)
+        etags[name] = plain.headers["ETag"]
+
+    # hashed urls are never re-requested; plain names revalidate to a 304
+    warm_bytes = 0
+    for name in names:
+        resp = client.simulate_get(
+            f"/public/{name}", headers=dict(headers, **{"If-None-Match": etags[name]})
+        )
+        assert resp.status_code == 304
+        warm_bytes += len(resp.content)
+
+    assert cold_bytes < raw_bytes * 0.4
+    assert warm_bytes == 0
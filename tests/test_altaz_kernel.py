@@ -0,0 +1,123 @@
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from device import altaz_kernel
+from device.altaz_kernel import (
+    altaz_track,
+    equatorial_to_altaz,
+    frame_for,
+    gmst_degrees,
+    is_above_horizon,
+    julian_date,
+    refraction_degrees,
+)
+
+WHEN = datetime(2026, 10, 20, 6, 0, 17, tzinfo=timezone.utc)
+SITES = [(47.6, -122.3), (-33.9, 151.2), (0.0, 0.0), (64.1, -21.9)]
+
+
+def _astropy_altaz(ra_hours, dec_degrees, latitude, longitude, j2000):
+    from astropy.utils import iers
+
+    iers.conf.auto_download = False
+    import astropy.units as u
+    from astropy.coordinates import FK5, AltAz, EarthLocation, SkyCoord
+    from astropy.time import Time
+
+    t = Time(WHEN)
+    frame = "icrs" if j2000 else FK5(equinox=t)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        coord = SkyCoord(
+            ra=np.asarray(ra_hours) * u.hourangle,
+            dec=np.asarray(dec_degrees) * u.deg,
+            frame=frame,
+        ).transform_to(
+            AltAz(
+                obstime=t,
+                location=EarthLocation(lat=latitude * u.deg, lon=longitude * u.deg),
+            )
+        )
+    return coord.alt.deg, coord.az.deg
+
+
+@pytest.mark.parametrize("j2000", [False, True])
+@pytest.mark.parametrize("site", SITES)
+def test_matches_astropy_to_arcseconds(site, j2000):
+    rng = np.random.default_rng(7)
+    ra = rng.uniform(0, 24, 40)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, 40)))
+    want_alt, want_az = _astropy_altaz(ra, dec, *site, j2000)
+
+    for k in range(len(ra)):
+        alt, az = equatorial_to_altaz(ra[k], dec[k], *site, WHEN, j2000)
+        assert abs(alt - want_alt[k]) * 3600 < 2.0
+        az_error = (az - want_az[k] + 180) % 360 - 180
+        assert abs(az_error * np.cos(np.radians(want_alt[k]))) * 3600 < 2.0
+
+
+def test_azimuth_convention():
+    # due south at transit for a site north of the target
+    lst_hours = (gmst_degrees(julian_date(WHEN)) - 122.3) / 15 % 24
+    alt, az = equatorial_to_altaz(lst_hours, 0.0, 47.6, -122.3, WHEN)
+    assert alt == pytest.approx(90 - 47.6, abs=0.05)
+    assert az == pytest.approx(180.0, abs=0.2)
+    # the celestial pole sits at the site latitude, due north
+    alt, az = equatorial_to_altaz(0.0, 90.0, 47.6, -122.3, WHEN)
+    assert alt == pytest.approx(47.6, abs=0.5)
+    assert min(az, 360 - az) < 1.0
+
+
+def test_refraction():
+    assert refraction_degrees(0.0) * 60 == pytest.approx(29.0, abs=1.0)
+    assert refraction_degrees(45.0) * 60 == pytest.approx(1.0, abs=0.1)
+    assert refraction_degrees(90.0) * 60 < 0.01
+    assert refraction_degrees(-5.0) == 0.0
+    geometric, _ = equatorial_to_altaz(3.0, 20.0, 47.6, -122.3, WHEN)
+    apparent, _ = equatorial_to_altaz(3.0, 20.0, 47.6, -122.3, WHEN, refraction=True)
+    assert apparent - geometric == pytest.approx(refraction_degrees(geometric))
+
+
+def test_frames_are_cached_per_minute():
+    altaz_kernel._minute_frame.cache_clear()
+    jd = julian_date(WHEN)
+    first = frame_for(jd)
+    assert frame_for(jd + 10 / 86400.0) is first
+    assert frame_for(jd + 61 / 86400.0) is not first
+    assert frame_for(jd, j2000=True) is not first
+    assert altaz_kernel._minute_frame.cache_info().hits == 1
+
+
+def test_julian_date_accepts_common_time_types():
+    from astropy.time import Time
+
+    jd = julian_date(WHEN)
+    assert julian_date(datetime(2000, 1, 1, 12, tzinfo=timezone.utc)) == 2451545.0
+    assert julian_date(Time(WHEN)) == pytest.approx(jd, abs=1e-9)
+    assert julian_date(jd) == jd
+    assert abs(julian_date() - julian_date(datetime.now(timezone.utc))) < 1e-6
+
+
+def test_is_above_horizon():
+    assert is_above_horizon(0.0, 89.0, 47.6, -122.3, when=WHEN)
+    assert not is_above_horizon(0.0, -89.0, 47.6, -122.3, when=WHEN)
+    alt, _ = equatorial_to_altaz(3.0, 20.0, 47.6, -122.3, WHEN, refraction=True)
+    assert is_above_horizon(3.0, 20.0, 47.6, -122.3, alt - 0.01, WHEN)
+    assert not is_above_horizon(3.0, 20.0, 47.6, -122.3, alt + 0.01, WHEN)
+
+
+def test_track_matches_scalar_kernel():
+    jd = julian_date(WHEN) + np.arange(0, 240, 15) / 1440.0
+    altitude, azimuth = altaz_track([3.0, 17.5], [20.0, -30.0], 47.6, -122.3, jd)
+    assert altitude.shape == (2, len(jd))
+    for n, (ra, dec) in enumerate([(3.0, 20.0), (17.5, -30.0)]):
+        for k in range(len(jd)):
+            alt, az = equatorial_to_altaz(ra, dec, 47.6, -122.3, jd[k])
+            assert altitude[n, k] == pytest.approx(alt, abs=1e-4)
+            assert azimuth[n, k] == pytest.approx(az, abs=1e-4)
+    refracted, _ = altaz_track(3.0, 20.0, 47.6, -122.3, jd[:1], refraction=True)
+    apparent, _ = equatorial_to_altaz(3.0, 20.0, 47.6, -122.3, jd[0], refraction=True)
+    assert refracted[0] == pytest.approx(apparent, abs=1e-6)
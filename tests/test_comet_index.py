@@ -0,0 +1,181 @@
+import json
+import os
+import time
+from io import BytesIO
+
+import numpy as np
+import pytest
+from skyfield.api import Loader
+from skyfield.constants import C_AUDAY
+from skyfield.constants import GM_SUN_Pitjeva_2005_km3_s2 as GM_SUN
+from skyfield.data import mpc
+
+from front.comet_index import CometIndex, normalize_name
+
+
+def comet_line(name, q, e, w, om, i, perihelion=(2024, 9, 27.7), ref="MPC 12345"):
+    year, month, day = perihelion
+    return (
+        f"    C{'':7}  {year:4d} {month:02d} {day:7.4f} {q:9.6f}  {e:8.6f}"
+        f"  {w:8.4f}  {om:8.4f}  {i:8.4f}  20240101  10.0  4.0  {name}  {ref}\n"
+    )
+
+
+COMETS = [
+    comet_line(
+        "C/1995 O1 (Hale-Bopp)", 0.914, 0.995, 130.6, 282.5, 89.2, (1997, 4, 1.1)
+    ),
+    comet_line("C/2023 A3 (Tsuchinshan-ATLAS)", 0.391, 1.000, 308.5, 21.6, 139.1),
+    comet_line(
+        "C/2024 G3 (ATLAS)", 0.094, 1.00005, 108.1, 220.3, 116.9, (2025, 1, 13.4)
+    ),
+    comet_line("12P/Pons-Brooks", 0.781, 0.955, 199.0, 255.9, 74.2, (2024, 4, 21.1)),
+    comet_line("2P/Encke", 0.339, 0.848, 187.3, 334.2, 11.3, (2023, 10, 22.7)),
+]
+
+
+class FakeBody:
+    def __init__(self, position_au):
+        self.position_au = np.array(position_au, dtype=float)
+
+    def at(self, t):
+        class Position:
+            pass
+
+        pos = Position()
+        pos.position = Position()
+        pos.position.au = self.position_au
+        return pos
+
+
+SUN = FakeBody([0.002, -0.004, 0.001])
+EARTH = FakeBody([0.95, -0.27, -0.12])
+
+
+def _write_comets(directory, lines):
+    path = os.path.join(directory, "CometEls.txt")
+    with open(path, "w") as f:
+        f.writelines(lines)
+    return path
+
+
+@pytest.fixture
+def index(tmp_path):
+    _write_comets(tmp_path, COMETS)
+    idx = CometIndex(Loader(str(tmp_path), verbose=False))
+    idx._ephemeris = {"sun": SUN, "earth": EARTH}
+    return idx
+
+
+def test_normalize_name_ignores_case_and_punctuation():
+    assert normalize_name("C/2023 A3 (Tsuchinshan-ATLAS)") == "c2023a3tsuchinshanatlas"
+    assert normalize_name(" 12P/Pons-Brooks ") == "12pponsbrooks"
+    assert normalize_name("  /  ") == ""
+
+
+def test_search_matches_exact_name_or_substring(index):
+    assert index.search("c/2023 a3 (tsuchinshan-atlas)") == [
+        "C/2023 A3 (Tsuchinshan-ATLAS)"
+    ]
+    assert index.search("atlas") == [
+        "C/2023 A3 (Tsuchinshan-ATLAS)",
+        "C/2024 G3 (ATLAS)",
+    ]
+    assert index.search("Pons Brooks") == ["12P/Pons-Brooks"]
+    assert index.search("") == []
+    assert index.search("no such comet") == []
+
+
+def test_only_latest_orbit_of_each_comet_is_kept(tmp_path):
+    _write_comets(
+        tmp_path,
+        [
+            comet_line("2P/Encke", 0.336, 0.847, 186.5, 334.6, 11.8, ref="MPC 10000"),
+            comet_line("2P/Encke", 0.339, 0.848, 187.3, 334.2, 11.3, ref="MPC 20000"),
+        ],
+    )
+    idx = CometIndex(Loader(str(tmp_path), verbose=False))
+    assert idx.search("encke") == ["2P/Encke"]
+    assert len(idx.table.designations) == 1
+    assert idx.table.position.shape == (3, 1)
+
+
+def test_batched_positions_match_skyfield_orbits(index):
+    ts = index.timescale()
+    t = ts.utc(2024, 10, 12, 3, 0, 0)
+    # elliptic, parabolic and hyperbolic orbits in one batch
+    names, (ra, dec, distance) = index.lookup("c", t)
+    assert len(names) == 4
+
+    comets = mpc.load_comets_dataframe(BytesIO("".join(COMETS).encode()))
+    by_name = {row["designation"]: row for _, row in comets.iterrows()}
+    for k, name in enumerate(names):
+        orbit = mpc.comet_orbit(by_name[name], ts, GM_SUN)
+        light_time = 0.0
+        for _ in range(5):
+            helio = orbit.at(ts.tt_jd(t.tt - light_time)).position.au
+            vector = SUN.position_au + helio - EARTH.position_au
+            light_time = np.linalg.norm(vector) / C_AUDAY
+        x, y, z = vector
+        want_ra = np.degrees(np.arctan2(y, x)) / 15.0 % 24.0
+        want_dec = np.degrees(np.arctan2(z, np.hypot(x, y)))
+        assert abs(ra[k] - want_ra) * 15 * 3600 * np.cos(np.radians(want_dec)) < 1e-3
+        assert abs(dec[k] - want_dec) * 3600 < 1e-3
+        assert distance[k] == pytest.approx(np.linalg.norm(vector), rel=1e-9)
+
+
+def test_file_is_parsed_once_and_reparsed_when_it_changes(tmp_path):
+    path = _write_comets(tmp_path, COMETS[:2])
+    idx = CometIndex(Loader(str(tmp_path), verbose=False), check_interval_s=0)
+    assert idx.search("hale") == ["C/1995 O1 (Hale-Bopp)"]
+    assert idx.search("hale") == ["C/1995 O1 (Hale-Bopp)"]
+    assert idx.num_loads == 1
+
+    _write_comets(tmp_path, COMETS)
+    later = time.time() + 5
+    os.utime(path, (later, later))
+    assert idx.search("encke") == ["2P/Encke"]
+    assert idx.num_loads == 2
+
+
+def test_checks_are_throttled_and_stale_file_is_redownloaded(tmp_path, monkeypatch):
+    path = _write_comets(tmp_path, COMETS)
+    loader = Loader(str(tmp_path), verbose=False)
+    idx = CometIndex(loader, max_age_days=7, check_interval_s=60)
+    idx.search("hale")
+    os.utime(path, (time.time() - 8 * 86400,) * 2)
+    # within the check interval nothing on disk is looked at
+    idx.search("hale")
+    assert idx.num_loads == 1
+
+    reloads = []
+    real_open = loader.open
+
+    def _open(url, mode="rb", reload=False, filename=None):
+        reloads.append(reload)
+        return real_open(url, mode, reload=False, filename=filename)
+
+    monkeypatch.setattr(loader, "open", _open)
+    idx._checked_at -= 61
+    assert idx.search("hale") == ["C/1995 O1 (Hale-Bopp)"]
+    assert reloads == [True]
+
+
+def test_search_comet_returns_object_for_single_match_and_list_otherwise(
+    index, monkeypatch
+):
+    from front import app as front_app
+
+    monkeypatch.setattr(front_app, "comet_index", index)
+
+    single = json.loads(front_app.searchComet("hale-bopp"))
+    assert single["cometName"] == "C/1995 O1 (Hale-Bopp)"
+    assert single["ra"].endswith("s") and "h" in single["ra"]
+    assert single["dec"][0] in "+-" and single["dec"].endswith("s")
+
+    many = json.loads(front_app.searchComet("atlas"))
+    assert [c["cometName"] for c in many] == [
+        "C/2023 A3 (Tsuchinshan-ATLAS)",
+        "C/2024 G3 (ATLAS)",
+    ]
+    assert front_app.searchComet("no such comet") == ""
@@ -365,6 +365,7 @@ def _base_form_media(**overrides):
         "ip_address": "127.0.0.1",
         "port": "5555",
         "imgport": "7556",
+        "imager_threads": "32",
         "stport": "8090",
         "sthost": "localhost",
         "timeout": "5",
@@ -380,6 +381,15 @@ def _base_form_media(**overrides):
         "location": "Anywhere",
         "step_size": "1.0",
         "steps_per_sec": "6",
+        "federation_timeout": "12.0",
+        "horizon_mask_file": "",
+        "horizon_mask_rotation": "0.0",
+        "horizon_mask_margin": "2.0",
+        "horizon_mask_max_wait_min": "60",
+        "schedule_journal_dir": "",
+        "operation_stats_dir": "",
+        "telemetry_budget_kb": "512",
+        "log_rate_limit_s": "10",
         "log_level": "INFO",
         "log_prefix": "",
         "max_size_mb": "5",
@@ -531,6 +541,48 @@ def test_load_from_form_sets_network_values(monkeypatch):
     assert cfg._dict["network"]["port"] == 6666
 
 
+def test_load_from_form_sets_scheduler_and_watchdog_values(monkeypatch):
+    cfg = make_loaded_config()
+    monkeypatch.setattr(cfg, "load", lambda path, preloaded_dict=None: None)
+
+    req = FakeRequest(
+        _base_form_media(
+            horizon_mask_file="horizon.csv",
+            horizon_mask_max_wait_min="30",
+            schedule_journal_dir="/var/lib/alp",
+            federation_timeout="20",
+            watchdog_reconnect="on",
+        )
+    )
+    cfg.load_from_form(req)
+
+    device = cfg._dict["device"]
+    assert device["horizon_mask_file"] == "horizon.csv"
+    assert device["horizon_mask_max_wait_min"] == 30
+    assert device["schedule_journal_dir"] == "/var/lib/alp"
+    assert device["federation_timeout"] == 20.0
+    assert cfg._dict["server"]["watchdog_enabled"] is False
+    assert cfg._dict["server"]["watchdog_reconnect"] is True
+
+
+def test_render_config_html_has_the_scheduler_and_watchdog_fields():
+    cfg = make_config()
+    cfg.load("", preloaded_dict={})
+    html = cfg.render_config_html()
+    for name in (
+        "horizon_mask_file",
+        "horizon_mask_rotation",
+        "horizon_mask_margin",
+        "horizon_mask_max_wait_min",
+        "schedule_journal_dir",
+        "federation_timeout",
+        "watchdog_enabled",
+        "watchdog_reconnect",
+        "imager_threads",
+    ):
+        assert f'name="{name}"' in html
+
+
 def test_load_from_form_no_seestars_key_in_dict(monkeypatch):
     """load_from_form must not crash when _dict has no seestars key (fresh config)."""
     cfg = make_loaded_config()
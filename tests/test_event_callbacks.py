@@ -1,7 +1,16 @@
 import json
 
 from device.config import Config
-from device.event_callbacks import BatteryWatch, SensorTempWatch, UserScriptEvent
+from device.event_callbacks import (
+    BatteryWatch,
+    OperationTimer,
+    SchedulerWaker,
+    SensorTempWatch,
+    TelemetryRecorder,
+    UserScriptEvent,
+)
+from device.operation_stats import OperationStats
+from device.telemetry_store import TelemetryStore
 
 
 class DummyLogger:
@@ -132,3 +141,42 @@ def test_user_script_event_no_events_key_returns_empty_list():
     callback = UserScriptEvent(device, {}, {"execute": ["/bin/true"]})
 
     assert callback.fireOnEvents() == []
+
+
+def test_operation_timer_records_lapse_ms():
+    device = DummyDevice()
+    device.operation_stats = OperationStats()
+    timer = OperationTimer(device, {})
+    assert "PlateSolve" in timer.fireOnEvents()
+
+    timer.eventFired(
+        device, {"Event": "PlateSolve", "state": "complete", "lapse_ms": 3582}
+    )
+    assert round(device.operation_stats.estimate("plate_solve"), 3) == 3.582
+
+
+def test_telemetry_recorder_keeps_event_readings():
+    device = DummyDevice()
+    device.telemetry = TelemetryStore()
+    recorder = TelemetryRecorder(device, {})
+    assert {"PiStatus", "Stack", "FocuserMove"} <= set(recorder.fireOnEvents())
+
+    recorder.eventFired(device, {"Event": "PiStatus", "temp": 41.5})
+    metrics = device.telemetry.query(["temperature", "battery"])["metrics"]
+    assert metrics["temperature"]["v"] == [41.5]
+    assert metrics["battery"]["v"] == []
+
+
+def test_scheduler_waker_notifies_the_scheduler():
+    device = DummyDevice()
+    notified = []
+    device.scheduler_wakeup = type(
+        "Wakeup", (), {"notify": lambda self: notified.append(True)}
+    )()
+    waker = SchedulerWaker(device, {})
+    # including the ops Seestar.wait_end_op waits on
+    ops = {"ScopeHome", "AutoFocus", "DarkLibrary", "EqModePA"}
+    assert {"AutoGoto", "Stack"} | ops <= set(waker.fireOnEvents())
+
+    waker.eventFired(device, {"Event": "AutoGoto", "state": "complete"})
+    assert notified == [True]
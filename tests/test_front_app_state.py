@@ -313,6 +313,44 @@ def test_update_planning_card_state_invalidates_cache(monkeypatch, tmp_path):
     assert updated_cards[0]["planning_page_enable"] is False
 
 
+def test_get_planning_cards_adds_new_example_cards(monkeypatch, tmp_path):
+    saved = [
+        {
+            "card_name": "twilight_times",
+            "planning_page_enable": False,
+            "planning_page_collapsed": False,
+        }
+    ]
+    (tmp_path / "planning.json").write_text(json.dumps(saved))
+    (tmp_path / "planning.json.example").write_text(
+        json.dumps(
+            [
+                {**saved[0], "planning_page_enable": True},
+                {
+                    "card_name": "night_targets",
+                    "planning_page_enable": True,
+                    "planning_page_collapsed": False,
+                },
+            ]
+        )
+    )
+
+    monkeypatch.setattr(front_app.os.path, "dirname", lambda _: str(tmp_path))
+    front_app._planning_cards_cache = None
+    front_app._planning_cards_cache_mtime = None
+
+    cards = front_app.get_planning_cards()
+    assert [card["card_name"] for card in cards] == ["twilight_times", "night_targets"]
+    assert cards[0]["planning_page_enable"] is False
+    written = json.loads((tmp_path / "planning.json").read_text())
+    assert [card["card_name"] for card in written] == [
+        "twilight_times",
+        "night_targets",
+    ]
+    front_app._planning_cards_cache = None
+    front_app._planning_cards_cache_mtime = None
+
+
 def test_get_csc_sites_data_uses_in_memory_cache(monkeypatch, tmp_path):
     csc_file = tmp_path / "csc_sites.json"
     csc_file.write_text(json.dumps({"42": {"-71": [{"id": "A"}]}}))
@@ -1,4 +1,7 @@
+import http.client
+import socket
 import threading
+import time
 
 import front.app as front_app
 from front.app import (
@@ -286,3 +289,252 @@ def test_get_root_unknown_device_returns_empty_string(monkeypatch):
         [{"device_num": 1, "name": "Alpha", "ip_address": "127.0.0.1"}],
     )
     assert get_root(99) == ""
+
+
+class _EventBusDevice:
+    def __init__(self, name):
+        from blinker import Signal
+
+        self.device_name = name
+        self.eventbus = Signal()
+        self.event_state = {"AutoGoto": {"Event": "AutoGoto", "state": "idle"}}
+        self.get_event_state_calls = 0
+
+    def get_event_state(self, params=None):
+        self.get_event_state_calls += 1
+        return {"result": self.event_state}
+
+
+def _event_status_channel(monkeypatch, dev, action="goto"):
+    monkeypatch.setattr(front_app.EventStatusChannel, "_channels", {})
+    monkeypatch.setattr(front_app.telescope, "get_seestar_device", lambda _n: dev)
+    return front_app.EventStatusChannel.get(1, action)
+
+
+def test_event_status_channel_renders_only_after_events(monkeypatch):
+    dev = _EventBusDevice("Seestar Alpha")
+    channel = _event_status_channel(monkeypatch, dev)
+    assert front_app.EventStatusChannel.get(1, "goto") is channel
+
+    etag, html = channel.refresh()
+    assert "AutoGoto" in html
+    assert "idle" in html
+    # nothing happened on the event bus: no new render
+    assert channel.refresh() == (etag, html)
+    assert dev.get_event_state_calls == 1
+
+    dev.event_state["AutoGoto"] = {"Event": "AutoGoto", "state": "working"}
+    dev.eventbus.send(dev.event_state["AutoGoto"])
+    new_etag, new_html = channel.refresh()
+    assert new_etag != etag
+    assert "working" in new_html
+    assert dev.get_event_state_calls == 2
+
+
+def test_event_status_channel_stream_pushes_changes_once(monkeypatch):
+    dev = _EventBusDevice("Seestar Alpha")
+    channel = _event_status_channel(monkeypatch, dev, action="image")
+    monkeypatch.setattr(front_app.EventStatusChannel, "RESYNC_S", 5.0)
+
+    stream_a = channel.stream()
+    stream_b = channel.stream()
+    first_a = next(stream_a)
+    first_b = next(stream_b)
+    assert first_a == first_b
+    assert first_a.startswith(b"event: EventStatus\nid: ")
+    assert first_a.endswith(b"\n\n")
+    assert b"data: " in first_a
+    assert channel.num_renders == 1
+
+    def send_event():
+        dev.event_state["Stack"] = {
+            "Event": "Stack",
+            "state": "working",
+            "stacked_frame": 7,
+            "dropped_frame": 1,
+        }
+        dev.eventbus.send(dev.event_state["Stack"])
+
+    timer = threading.Timer(0.05, send_event)
+    timer.start()
+    update_a = next(stream_a)
+    update_b = next(stream_b)
+    timer.join()
+    assert update_a == update_b
+    assert b"Stacked:</strong> 7" in update_a
+    # both subscribers shared a single render of the change
+    assert channel.num_renders == 2
+
+
+def test_event_status_channel_keys_on_known_actions_only(monkeypatch):
+    dev = _EventBusDevice("Seestar Alpha")
+    channel = _event_status_channel(monkeypatch, dev, action="default")
+    for action in (None, "", "x" * 100, "no_such_action"):
+        assert front_app.EventStatusChannel.get(1, action) is channel
+    assert front_app.EventStatusChannel.get(1, "goto") is not channel
+    assert len(front_app.EventStatusChannel._channels) == 2
+
+
+def test_event_status_channel_leaves_the_event_bus_with_its_last_stream(
+    monkeypatch,
+):
+    dev = _EventBusDevice("Seestar Alpha")
+    monkeypatch.setattr(front_app.EventStatusChannel, "_channels", {})
+    monkeypatch.setattr(front_app.telescope, "get_seestar_device", lambda _n: dev)
+
+    stream_a = front_app.get_event_status_stream(1, "goto")
+    stream_b = front_app.get_event_status_stream(1, "goto")
+    next(stream_a)
+    next(stream_b)
+    assert len(front_app.EventStatusChannel._channels) == 1
+    assert len(dev.eventbus.receivers) == 1
+
+    stream_a.close()
+    assert len(dev.eventbus.receivers) == 1
+    stream_b.close()
+    assert front_app.EventStatusChannel._channels == {}
+    assert not dev.eventbus.receivers
+
+
+def _first_event(sock):
+    received = b""
+    while b"\n\n" not in received.partition(b"\r\n\r\n")[2]:
+        chunk = sock.recv(4096)
+        assert chunk, received
+        received += chunk
+    return received
+
+
+def test_event_status_streams_past_the_cap_leave_threads_for_video(monkeypatch):
+    from flask import Flask, Response, request
+    from waitress.server import create_server
+
+    dev = _EventBusDevice("Seestar Alpha")
+    monkeypatch.setattr(front_app.EventStatusChannel, "_channels", {})
+    monkeypatch.setattr(front_app.EventStatusChannel, "RESYNC_S", 0.2)
+    monkeypatch.setattr(front_app.telescope, "get_seestar_device", lambda _n: dev)
+    monkeypatch.setattr(front_app.Config, "imager_threads", 4)
+    num_streams = front_app.EventStatusChannel.num_streams
+
+    app = Flask(__name__)
+
+    @app.route("/<dev_num>/eventstatus")
+    def event_status(dev_num):
+        return Response(
+            front_app.get_event_status_stream(int(dev_num), request.args.get("action")),
+            mimetype="text/event-stream",
+        )
+
+    @app.route("/<dev_num>/vid/status")
+    def vid_status(dev_num):
+        return "streaming"
+
+    server = create_server(app, host="127.0.0.1", port=0, threads=4)
+    threading.Thread(target=server.run, daemon=True).start()
+    tabs = []
+    try:
+        # more tabs than the server has threads
+        for _ in range(6):
+            tab = socket.create_connection(("127.0.0.1", server.effective_port), 5)
+            tab.sendall(b"GET /1/eventstatus?action=goto HTTP/1.1\r\nHost: x\r\n\r\n")
+            tabs.append(tab)
+        replies = [_first_event(tab) for tab in tabs]
+        assert all(b"event: EventStatus" in reply for reply in replies)
+        # two streams, the other four tabs are told to poll every second
+        assert sum(b"retry: 1000" in reply for reply in replies) == 4
+        assert front_app.EventStatusChannel.num_streams == num_streams + 2
+
+        video = http.client.HTTPConnection("127.0.0.1", server.effective_port, 5)
+        video.request("GET", "/1/vid/status")
+        assert video.getresponse().read() == b"streaming"
+        video.close()
+    finally:
+        for tab in tabs:
+            tab.close()
+        for _ in range(100):
+            if front_app.EventStatusChannel.num_streams == num_streams:
+                break
+            time.sleep(0.05)
+        server.close()
+    assert front_app.EventStatusChannel.num_streams == num_streams
+
+
+def test_event_status_results_does_not_tag_device_state():
+    live = {"AutoGoto": {"Event": "AutoGoto", "state": "idle"}}
+    results = front_app.event_status_results({"Value": {1: {"result": live}}})
+    assert results == [{"Event": "AutoGoto", "state": "idle", "DeviceID": 1}]
+    assert "DeviceID" not in live["AutoGoto"]
+
+
+def test_template_renders_are_timed_per_template():
+    front_app.template_render_stats.clear()
+    template = front_app.fetch_template("eventstatus.html")
+    template.render(results=[], events=[])
+    template.render(results=[], events=[])
+    stats = front_app.template_render_stats.snapshot()["eventstatus.html"]
+    assert stats["count"] == 2
+    assert stats["max_ms"] >= stats["avg_ms"] > 0
+
+
+def test_fragment_cache_keys_on_inputs_and_evicts_lru():
+    cache = front_app.FragmentCache(max_entries=2)
+    renders = []
+
+    def render(tag):
+        renders.append(tag)
+        return f"<p>{tag}</p>"
+
+    assert cache.get_or_render("card", {"lat": 1}, lambda: render("a")) == "<p>a</p>"
+    assert cache.get_or_render("card", {"lat": 1}, lambda: render("x")) == "<p>a</p>"
+    assert cache.get_or_render("card", {"lat": 2}, lambda: render("b")) == "<p>b</p>"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    cache.get_or_render("card", {"lat": 3}, lambda: render("c"))
+    # {"lat": 1} was the least recently used entry and got evicted
+    cache.get_or_render("card", {"lat": 1}, lambda: render("a2"))
+    assert renders == ["a", "b", "c", "a2"]
+
+
+def test_config_form_html_is_cached_until_config_changes(monkeypatch):
+    front_app.fragment_cache.clear()
+    calls = []
+    monkeypatch.setattr(
+        front_app.Config,
+        "render_config_html",
+        lambda: calls.append(1) or f"<form>{front_app.Config.init_gain}</form>",
+    )
+    monkeypatch.setattr(front_app.Config, "init_gain", 80)
+    first = front_app.get_config_form_html()
+    assert front_app.get_config_form_html() == first
+    assert len(calls) == 1
+
+    monkeypatch.setattr(front_app.Config, "init_gain", 120)
+    assert front_app.get_config_form_html() == "<form>120</form>"
+    assert len(calls) == 2
+
+
+def test_warm_template_cache_compiles_every_template():
+    count = front_app.warm_template_cache()
+    assert count == len(front_app.env.list_templates(extensions=["html"]))
+    assert count > 50
+
+
+def test_import_csv_schedule_skips_mosaic_with_invalid_coordinates(monkeypatch):
+    calls = []
+
+    def fake_dispatch(action, params, telescope_id):
+        calls.append((action, params, telescope_id))
+
+    monkeypatch.setattr(front_app, "do_schedule_action_device", fake_dispatch)
+    csv_input = (
+        "action,target_name,ra,dec\n"
+        "start_mosaic,M31,00h42m44s,+41d16m9s\n"
+        "start_mosaic,Typo,00h42x44s,+41d16m9s\n"
+        "wait_for,,,\n"
+    )
+    import_csv_schedule([csv_input], telescope_id=1)
+
+    assert [(action, params.get("target_name")) for action, params, _ in calls] == [
+        ("start_mosaic", "M31"),
+        ("wait_for", None),
+    ]
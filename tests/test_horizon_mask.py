@@ -0,0 +1,118 @@
+import math
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from device import horizon_mask
+from device.altaz_kernel import equatorial_to_altaz, julian_date
+from device.config import Config
+from device.horizon_mask import HorizonMask, get_horizon_mask
+
+WHEN = datetime(2026, 10, 20, 6, 0, tzinfo=timezone.utc)
+SEATTLE = (47.6, -122.3)
+
+
+def _wall(azimuth_from, azimuth_to, height):
+    """Flat 5 degree horizon with a wall of height between two azimuths."""
+    altitudes = np.full(horizon_mask.NUM_STEPS, 5.0)
+    altitudes[azimuth_from * 10 : azimuth_to * 10] = height
+    return HorizonMask(altitudes)
+
+
+def test_profile_is_interpolated_around_the_circle():
+    mask = HorizonMask.from_profile([10, 90, 350], [20, 40, 10])
+    assert mask.altitude_at(90) == pytest.approx(40)
+    assert mask.altitude_at(50) == pytest.approx(30)
+    # 350 -> 10 wraps through north
+    assert mask.altitude_at(0) == pytest.approx(15)
+    assert mask.altitude_at(-10) == pytest.approx(10)
+    assert mask.altitude_at([90, 450]).tolist() == pytest.approx([40, 40])
+
+
+def test_is_visible_is_vectorized_and_uses_margin():
+    mask = _wall(90, 180, 30.0)
+    visible = mask.is_visible(np.array([10, 10, 31]), np.array([45, 100, 100]))
+    assert visible.tolist() == [True, False, True]
+    mask.margin = 2.0
+    assert not mask.is_visible(31.0, 100.0)
+
+
+def test_csv_and_stellarium_polygon(tmp_path):
+    profile = tmp_path / "horizon.csv"
+    profile.write_text("azimuth,altitude\n0,10\n90,20\n180,10\n270,20\n")
+    mask = HorizonMask.load(str(profile))
+    assert mask.altitude_at(45) == pytest.approx(15)
+
+    (tmp_path / "horizon.txt").write_text("\n\n0\t12\n180\t24\n")
+    (tmp_path / "landscape.ini").write_text(
+        "[landscape]\ntype = polygonal\npolygonal_horizon_list = horizon.txt\n"
+    )
+    mask = HorizonMask.load(str(tmp_path / "landscape.ini"))
+    assert mask.altitude_at(90) == pytest.approx(18)
+
+
+def test_landscape_png(tmp_path):
+    # 1024 x 2048 panorama: ground below the middle row, a 45 degree
+    # building in the second quarter
+    alpha = np.zeros((1024, 2048), dtype=np.uint8)
+    alpha[512:, :] = 255
+    alpha[256:, 512:1024] = 255
+    image = np.zeros((1024, 2048, 4), dtype=np.uint8)
+    image[:, :, 3] = alpha
+    path = tmp_path / "yard.png"
+    Image.fromarray(image).save(path)
+
+    mask = HorizonMask.load(str(path))
+    assert mask.altitude_at(45) == pytest.approx(0, abs=0.1)
+    assert mask.altitude_at(135) == pytest.approx(45, abs=0.1)
+    rotated = HorizonMask.load(str(path), rotation=90)
+    assert rotated.altitude_at(225) == pytest.approx(45, abs=0.1)
+
+
+def test_minutes_until_visible_and_blocked():
+    # rising in the east, about 42 degrees up
+    alt, _ = equatorial_to_altaz(3.0, 20.0, *SEATTLE, WHEN, refraction=True)
+    open_sky = HorizonMask(np.zeros(horizon_mask.NUM_STEPS))
+    assert open_sky.minutes_until_visible(3.0, 20.0, *SEATTLE, WHEN) == 0
+    assert open_sky.minutes_until_blocked(3.0, 20.0, *SEATTLE, WHEN, 60) == math.inf
+    # hide everything: never clears, blocked now
+    closed = HorizonMask(np.full(horizon_mask.NUM_STEPS, 90.0))
+    assert math.isinf(closed.minutes_until_visible(3.0, 20.0, *SEATTLE, WHEN, 60))
+    assert closed.minutes_until_blocked(3.0, 20.0, *SEATTLE, WHEN, 60) == 0
+
+    # a wall just above the target: it clears when it rises past the wall
+    wall = _wall(0, 360, alt + 1.0)
+    wait = wall.minutes_until_visible(3.0, 20.0, *SEATTLE, WHEN)
+    assert 0 < wait < 60
+    later, _ = equatorial_to_altaz(
+        3.0, 20.0, *SEATTLE, julian_date(WHEN) + wait / 1440, refraction=True
+    )
+    assert later > alt + 1.0
+
+
+def test_visibility_for_several_targets():
+    mask = _wall(0, 360, 20.0)
+    until_visible, until_blocked = mask.visibility(
+        [3.0, 3.0], [20.0, -80.0], *SEATTLE, WHEN, minutes=120
+    )
+    assert until_visible.shape == (2,)
+    assert math.isinf(until_visible[1])
+    assert until_blocked[1] == 0
+
+
+def test_get_horizon_mask_reads_config_once(tmp_path, monkeypatch):
+    profile = tmp_path / "horizon.csv"
+    profile.write_text("0,10\n180,30\n")
+    monkeypatch.setattr(Config, "horizon_mask_file", "")
+    assert get_horizon_mask() is None
+
+    monkeypatch.setattr(Config, "horizon_mask_file", str(profile))
+    monkeypatch.setattr(Config, "horizon_mask_margin", 1.5)
+    mask = get_horizon_mask()
+    assert mask.margin == 1.5
+    assert get_horizon_mask() is mask
+
+    monkeypatch.setattr(Config, "horizon_mask_file", str(tmp_path / "missing.csv"))
+    assert get_horizon_mask() is None
@@ -1,4 +1,5 @@
 import logging
+import queue
 from types import SimpleNamespace
 
 import device.log as log_mod
@@ -70,12 +71,22 @@ def test_init_logging_creates_rotating_handler_and_disables_stdout(monkeypatch):
             max_size_mb=1,
             num_keep_logs=2,
             log_to_stdout=False,
+            log_queue_size=100,
+            log_rate_limited_events=["PiStatus"],
+            log_rate_limit_s=10,
         ),
     )
+    monkeypatch.setattr(log_mod, "queue_handler", None)
+    monkeypatch.setattr(log_mod, "log_writer", None)
 
     out = log_mod.init_logging()
+    writer = log_mod.log_writer
+    log_mod.stop_logging()
     assert out is root_logger
-    assert file_handler in root_logger.added
+    assert root_logger.added == [log_mod.queue_handler]
+    assert isinstance(log_mod.queue_handler, log_mod.DroppingQueueHandler)
+    assert log_mod.queue_handler.level == logging.INFO
+    assert writer.handlers == (file_handler,)
     assert file_handler.rolled is True
     assert stdout_handler in root_logger.removed
 
@@ -99,3 +110,50 @@ def test_get_logger_returns_global_logger():
     fake = FakeRootLogger(FakeHandler())
     log_mod.logger = fake
     assert log_mod.get_logger() is fake
+
+
+def _record(msg="hello", event=None, device="Alpha", created=0.0):
+    record = logging.LogRecord("alpyca", logging.INFO, __file__, 1, msg, None, None)
+    record.created = created
+    if event is not None:
+        record.event = event
+        record.device = device
+    return record
+
+
+def test_queue_handler_drops_when_full_and_reports_the_count():
+    handler = log_mod.DroppingQueueHandler(queue.Queue(2))
+    for n in range(5):
+        handler.handle(_record(f"message {n}"))
+    assert handler.dropped == 3
+
+    queued = [handler.queue.get_nowait().getMessage() for _ in range(2)]
+    assert queued == ["message 0", "message 1"]
+
+    handler.handle(_record("after"))
+    notice = handler.queue.get_nowait()
+    assert notice.levelno == logging.WARNING
+    assert "dropped 3 records" in notice.getMessage()
+    assert handler.queue.get_nowait().getMessage() == "after"
+
+
+def test_rate_limit_filter_lets_one_event_through_per_interval():
+    limiter = log_mod.EventRateLimitFilter(["PiStatus", "ScopeTrack"], 10)
+
+    assert limiter.filter(_record(event="PiStatus", created=0.0))
+    assert not limiter.filter(_record(event="PiStatus", created=1.0))
+    assert not limiter.filter(_record(event="PiStatus", created=2.0))
+    # other scopes, other events and plain records are independent
+    assert limiter.filter(_record(event="PiStatus", device="Beta", created=1.0))
+    assert limiter.filter(_record(event="ScopeTrack", created=1.0))
+    assert limiter.filter(_record(event="Stack", created=1.0))
+    assert limiter.filter(_record(created=1.0))
+
+    later = _record("PiStatus update", event="PiStatus", created=10.5)
+    assert limiter.filter(later)
+    assert later.getMessage() == "PiStatus update (2 similar suppressed)"
+
+
+def test_dropped_records_without_a_pipeline(monkeypatch):
+    monkeypatch.setattr(log_mod, "queue_handler", None)
+    assert log_mod.dropped_records() == 0
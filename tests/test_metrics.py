@@ -0,0 +1,152 @@
+import json
+
+import falcon
+import numpy as np
+import pytest
+from falcon import testing
+
+from device import management, metrics
+from device import telescope
+from device.metrics import Registry
+from device.protocols.imager import SeestarImagerProtocol
+from device.shr import set_shr_logger
+
+
+class DummyLogger:
+    def info(self, *args, **kwargs):
+        return None
+
+    def debug(self, *args, **kwargs):
+        return None
+
+    def warn(self, *args, **kwargs):
+        return None
+
+    def error(self, *args, **kwargs):
+        return None
+
+
+def _lines(registry):
+    return registry.render().splitlines()
+
+
+def test_counter_and_gauge_render_with_labels():
+    registry = Registry()
+    events = registry.counter("events_total", "Events.", ("device", "event"))
+    events.labels(1, "PiStatus").inc()
+    events.labels(1, "PiStatus").inc(2)
+    events.labels(2, 'odd "name"').inc()
+    depth = registry.gauge("depth", "Queue depth.")
+    depth.set(4)
+
+    lines = _lines(registry)
+    assert "# TYPE events_total counter" in lines
+    assert 'events_total{device="1",event="PiStatus"} 3.0' in lines
+    assert 'events_total{device="2",event="odd \\"name\\""} 1.0' in lines
+    assert "# TYPE depth gauge" in lines
+    assert "depth 4" in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("rpc_seconds", "RPCs.", ("method",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.labels("get_device_state").observe(value)
+
+    lines = _lines(registry)
+    assert 'rpc_seconds_bucket{method="get_device_state",le="0.1"} 2' in lines
+    assert 'rpc_seconds_bucket{method="get_device_state",le="1.0"} 3' in lines
+    assert 'rpc_seconds_bucket{method="get_device_state",le="+Inf"} 4' in lines
+    assert 'rpc_seconds_count{method="get_device_state"} 4' in lines
+    assert 'rpc_seconds_sum{method="get_device_state"} 3.65' in lines
+
+
+def test_function_values_are_read_at_render_time():
+    registry = Registry()
+    queue = []
+    registry.gauge("depth", "Depth.", ("queue",)).labels("events").set_function(
+        lambda: len(queue)
+    )
+    broken = registry.gauge("broken", "Broken.")
+    broken.set_function(lambda: 1 / 0)
+
+    queue.extend([1, 2])
+    lines = _lines(registry)
+    assert 'depth{queue="events"} 2' in lines
+    assert any(line.startswith("# broken failed") for line in lines)
+
+
+def test_registration_is_idempotent_and_checks_labels():
+    registry = Registry()
+    first = registry.counter("c_total", "C.", ("device",))
+    assert registry.counter("c_total", "C.", ("device",)) is first
+    with pytest.raises(ValueError):
+        registry.gauge("c_total", "C.")
+    with pytest.raises(ValueError):
+        first.labels(1, "extra")
+
+
+def test_metric_subclasses_must_make_their_values():
+    with pytest.raises(TypeError):
+        metrics.Metric("m", "M.")
+
+    class Untyped(metrics.Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Untyped("m", "M.")
+
+
+def test_imager_records_frames_bytes_and_decode_time():
+    proto = SeestarImagerProtocol(DummyLogger(), "scope", 97, "127.0.0.1", 1234)
+    frames = metrics.IMAGING_FRAMES.labels(97, "preview")
+    before = frames.get()
+    data = np.zeros((4, 6), dtype=np.uint16).tobytes()
+
+    proto.handle_preview_frame(6, 4, data)
+
+    assert frames.get() == before + 1
+    assert metrics.IMAGING_BYTES.labels(97, "preview").get() >= len(data)
+    assert metrics.IMAGING_DECODE_SECONDS.labels(97, "preview").count >= 1
+
+
+class FakeDevice:
+    is_connected = True
+
+    def __init__(self):
+        self.logger = DummyLogger()
+
+    def get_event_state(self, params):
+        return {"PiStatus": {"temp": 40}}
+
+
+def test_metrics_endpoint_serves_action_latency(monkeypatch):
+    set_shr_logger(DummyLogger())
+    monkeypatch.setitem(telescope.seestar_dev, 1, FakeDevice())
+    app = falcon.App()
+    app.add_route("/api/v1/telescope/{devnum:int(min=0)}/action", telescope.action())
+    app.add_route("/metrics", management.metrics())
+    client = testing.TestClient(app)
+
+    for action in ("get_event_state", "no_such_action"):
+        resp = client.simulate_put(
+            "/api/v1/telescope/1/action",
+            json={
+                "Action": action,
+                "Parameters": json.dumps({}),
+                "ClientID": 1,
+                "ClientTransactionID": 1,
+            },
+        )
+        assert resp.status_code == 200
+
+    resp = client.simulate_get("/metrics")
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = resp.text
+    assert "# TYPE alp_alpaca_action_seconds histogram" in body
+    assert (
+        'alp_alpaca_action_seconds_count{device="1",action="get_event_state"}' in body
+    )
+    assert 'action="unknown"' in body
+    assert "no_such_action" not in body
+    assert "alp_log_dropped_records_total" in body
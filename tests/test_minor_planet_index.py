@@ -0,0 +1,165 @@
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+from skyfield.api import Loader
+from skyfield.constants import C_AUDAY
+from skyfield.constants import GM_SUN_Pitjeva_2005_km3_s2 as GM_SUN
+from skyfield.data import mpc
+
+from front import minor_planet_index
+from front.minor_planet_index import (
+    MinorPlanetIndex,
+    build_minor_planet_index,
+    is_index_stale,
+    read_meta,
+)
+from tests.test_comet_index import EARTH, SUN
+
+MPCORB = os.path.join(os.path.dirname(__file__), "..", "data", "mpn-01.txt")
+
+
+def _write_source(tmp_path, num_rows=40):
+    with open(MPCORB, "rb") as f:
+        lines = [f.readline() for _ in range(num_rows)]
+    source = tmp_path / "mpn-01.txt"
+    source.write_bytes(b"".join(lines))
+    return str(source), str(tmp_path / "mpn-01.sqlite")
+
+
+@pytest.fixture
+def index(tmp_path):
+    source, index_path = _write_source(tmp_path)
+    return MinorPlanetIndex(
+        Loader(str(tmp_path), verbose=False),
+        source_path=source,
+        index_path=index_path,
+    )
+
+
+def test_build_writes_rows_and_source_signature(tmp_path):
+    source, index_path = _write_source(tmp_path)
+    assert is_index_stale(source, index_path)
+
+    assert build_minor_planet_index(source, index_path) == 40
+    meta = read_meta(index_path)
+    assert meta["num_rows"] == "40"
+    assert meta["source_size"] == str(os.path.getsize(source))
+    assert not is_index_stale(source, index_path)
+
+
+def test_index_goes_stale_when_source_changes(tmp_path):
+    source, index_path = _write_source(tmp_path)
+    build_minor_planet_index(source, index_path)
+    _write_source(tmp_path, num_rows=50)
+    assert is_index_stale(source, index_path)
+
+
+def test_search_matches_words_and_prefers_phrase(index):
+    assert index.search("Ceres") == ["(1) Ceres"]
+    assert index.search("4 vesta") == ["(4) Vesta"]
+    assert index.search("(2) Pallas") == ["(2) Pallas"]
+    # the number alone is a whole word, (10) Hygiea is not a match for "1"
+    assert index.search("1") == ["(1) Ceres"]
+    assert index.search("Ceres' moon") == []
+    assert index.search("  ") == []
+
+
+def test_find_ranks_the_phrase_match_before_the_limit(tmp_path):
+    source, index_path = _write_source(tmp_path)
+    with open(source, "rb") as f:
+        lines = f.readlines()
+    # a later designation that has "Ceres 1" as a phrase, unlike (1) Ceres
+    lines[-1] = lines[-1][:166] + b"Ceres 1".ljust(28) + lines[-1][194:]
+    with open(source, "wb") as f:
+        f.writelines(lines)
+    index = MinorPlanetIndex(
+        Loader(str(tmp_path), verbose=False),
+        source_path=source,
+        index_path=index_path,
+    )
+
+    assert index.search("ceres 1") == ["Ceres 1", "(1) Ceres"]
+    assert index.search("ceres 1", limit=1) == ["Ceres 1"]
+    assert index.search("1", limit=1) == ["(1) Ceres"]
+
+
+def test_index_is_built_once_and_rebuilt_when_source_changes(tmp_path):
+    source, index_path = _write_source(tmp_path)
+    index = MinorPlanetIndex(
+        Loader(str(tmp_path), verbose=False),
+        source_path=source,
+        index_path=index_path,
+        check_interval_s=0,
+    )
+    index.search("ceres")
+    index.search("juno")
+    assert index.num_builds == 1
+
+    _write_source(tmp_path, num_rows=60)
+    later = time.time() + 5
+    os.utime(source, (later, later))
+    index.search("ceres")
+    assert index.num_builds == 2
+    assert read_meta(index_path)["num_rows"] == "60"
+
+
+def test_batched_positions_match_skyfield_orbits(index):
+    ts = Loader(os.path.dirname(index.source_path), verbose=False).timescale()
+    t = ts.utc(2026, 3, 1, 22, 0, 0)
+    ids = index.find("ceres") + index.find("vesta") + index.find("pallas")
+    ra, dec, distance = index.observe(ids, t, SUN, EARTH)
+
+    with open(index.source_path, "rb") as f:
+        planets = mpc.load_mpcorb_dataframe(f).set_index("designation", drop=False)
+    for k, name in enumerate(["(1) Ceres", "(4) Vesta", "(2) Pallas"]):
+        orbit = mpc.mpcorb_orbit(planets.loc[name], ts, GM_SUN)
+        light_time = 0.0
+        for _ in range(5):
+            helio = orbit.at(ts.tt_jd(t.tt - light_time)).position.au
+            vector = SUN.position_au + helio - EARTH.position_au
+            light_time = np.linalg.norm(vector) / C_AUDAY
+        x, y, z = vector
+        want_ra = np.degrees(np.arctan2(y, x)) / 15.0 % 24.0
+        want_dec = np.degrees(np.arctan2(z, np.hypot(x, y)))
+        assert abs(ra[k] - want_ra) * 15 * 3600 * np.cos(np.radians(want_dec)) < 1e-3
+        assert abs(dec[k] - want_dec) * 3600 < 1e-3
+        assert distance[k] == pytest.approx(np.linalg.norm(vector), rel=1e-9)
+
+
+def test_observe_all_rows_for_planning(index):
+    t = Loader(os.path.dirname(index.source_path), verbose=False).timescale().utc(2026)
+    ra, dec, distance = index.observe(None, t, SUN, EARTH)
+    assert len(ra) == len(dec) == len(distance) == 40
+    assert ((ra >= 0) & (ra < 24)).all()
+    assert (distance > 0.5).all()
+
+
+def test_check_command_reports_staleness(tmp_path, capsys):
+    source, index_path = _write_source(tmp_path)
+    args = ["--source", source, "--index", index_path]
+    assert minor_planet_index.main(args + ["--check"]) == 1
+    assert minor_planet_index.main(args) == 0
+    assert minor_planet_index.main(args + ["--check"]) == 0
+    assert "up to date" in capsys.readouterr().out
+
+
+def test_search_minor_planet_returns_coordinates(index, monkeypatch):
+    from front import app as front_app
+
+    class Eph:
+        def timescale(self):
+            return Loader(os.path.dirname(index.source_path), verbose=False).timescale()
+
+        def ephemeris(self):
+            return {"sun": SUN, "earth": EARTH}
+
+    monkeypatch.setattr(front_app, "minor_planet_index", index)
+    monkeypatch.setattr(front_app, "comet_index", Eph())
+
+    data = json.loads(front_app.searchMinorPlanet("Vesta"))
+    assert set(data) == {"ra", "dec"}
+    assert "h" in data["ra"] and data["dec"][0] in "+-"
+    assert front_app.searchMinorPlanet("no such rock") == ""
@@ -0,0 +1,122 @@
+import threading
+
+from device.mosaic_panel_queue import (
+    MosaicPanelQueue,
+    get_panel_queue,
+    register_panel_queue,
+    remove_panel_queue,
+)
+
+
+def test_claim_hands_out_each_panel_once_in_order():
+    panel_queue = MosaicPanelQueue(["11", "21", "12"])
+    assert [panel_queue.claim(1), panel_queue.claim(2), panel_queue.claim(1)] == [
+        "11",
+        "21",
+        "12",
+    ]
+    assert panel_queue.claim(2) is None
+    assert panel_queue.num_remaining() == 3
+    assert panel_queue.is_done() is False
+
+
+def test_failed_panel_is_requeued_until_attempts_run_out():
+    panel_queue = MosaicPanelQueue(["11", "21"], max_attempts=2)
+    assert panel_queue.claim(1) == "11"
+    assert panel_queue.fail("11", 1) is True
+    # requeued behind the panels nobody has tried yet
+    assert panel_queue.claim(2) == "21"
+    panel_queue.complete("21", 2)
+    assert panel_queue.claim(2) == "11"
+    assert panel_queue.fail("11", 2) is False
+    assert panel_queue.claim(1) is None
+    assert panel_queue.is_done() is True
+
+    status = panel_queue.get_status()
+    assert status["num_complete"] == 1
+    assert status["num_failed"] == 1
+    assert status["panels"]["11"] == {"state": "failed", "device_num": 2, "attempts": 2}
+    assert status["panels"]["21"] == {
+        "state": "complete",
+        "device_num": 2,
+        "attempts": 1,
+    }
+
+
+def test_release_puts_panel_back_without_counting_an_attempt():
+    panel_queue = MosaicPanelQueue(["11", "21"])
+    assert panel_queue.claim(1) == "11"
+    panel_queue.release("11")
+    assert panel_queue.get_status()["panels"]["11"]["attempts"] == 0
+    assert panel_queue.claim(2) == "11"
+
+    # releasing a panel that is no longer being imaged is a no-op
+    panel_queue.complete("11", 2)
+    panel_queue.release("11")
+    assert panel_queue.get_status()["panels"]["11"]["state"] == "complete"
+
+
+def test_defer_puts_panel_at_the_back_without_counting_an_attempt():
+    panel_queue = MosaicPanelQueue(["11", "21"], max_attempts=1)
+    assert panel_queue.claim(1) == "11"
+    panel_queue.defer("11")
+    assert panel_queue.claim(2) == "21"
+    panel_queue.complete("21", 2)
+    for _ in range(3):
+        assert panel_queue.claim(1) == "11"
+        panel_queue.defer("11")
+    assert panel_queue.claim(1) == "11"
+    assert panel_queue.get_status()["panels"]["11"]["attempts"] == 1
+
+
+def test_waiters_are_notified_of_every_panel_change():
+    panel_queue = MosaicPanelQueue(["11", "21", "12", "22"])
+    notified = []
+
+    def notify():
+        notified.append(panel_queue.num_pending())
+
+    panel_queue.add_waiter(notify)
+    for _ in range(4):
+        panel_queue.claim(1)
+    assert notified == []
+    panel_queue.complete("11", 1)
+    panel_queue.fail("21", 1)
+    panel_queue.release("12")
+    panel_queue.defer("22")
+    assert notified == [0, 1, 2, 3]
+
+    panel_queue.remove_waiter(notify)
+    panel_queue.claim(1)
+    panel_queue.release("12")
+    assert len(notified) == 4
+
+
+def test_concurrent_claims_never_duplicate_a_panel():
+    panels = [f"{ra}{dec}" for dec in range(1, 10) for ra in range(1, 10)]
+    panel_queue = MosaicPanelQueue(panels)
+    claimed = {n: [] for n in range(8)}
+
+    def worker(device_num):
+        while (panel := panel_queue.claim(device_num)) is not None:
+            claimed[device_num].append(panel)
+            panel_queue.complete(panel, device_num)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in claimed]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    all_claimed = [p for panels in claimed.values() for p in panels]
+    assert sorted(all_claimed) == sorted(panels)
+    assert panel_queue.get_status()["num_complete"] == len(panels)
+
+
+def test_registry_round_trip():
+    panel_queue = MosaicPanelQueue(["11"])
+    queue_id = register_panel_queue(panel_queue)
+    assert get_panel_queue(queue_id) is panel_queue
+    remove_panel_queue(queue_id)
+    assert get_panel_queue(queue_id) is None
+    remove_panel_queue(queue_id)
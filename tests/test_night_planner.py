@@ -0,0 +1,172 @@
+import os
+import warnings
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+
+import ephem
+import numpy as np
+import pytest
+
+from device.altaz_kernel import precession_matrix
+from front.night_planner import (
+    NightPlanner,
+    altaz,
+    julian_dates,
+    moon_vectors,
+    sun_vectors,
+)
+
+CATALOG = os.path.join(os.path.dirname(__file__), "..", "data", "alp.dat")
+SEATTLE = (47.6, -122.3)
+PACIFIC = ZoneInfo("America/Los_Angeles")
+
+
+@pytest.fixture(scope="module")
+def planner():
+    return NightPlanner(CATALOG, cache_size=2)
+
+
+def _astropy():
+    from astropy.utils import iers
+
+    iers.conf.auto_download = False
+    import astropy.units as u
+    from astropy.coordinates import AltAz, EarthLocation, SkyCoord, get_body
+    from astropy.time import Time
+
+    return u, AltAz, EarthLocation, SkyCoord, get_body, Time
+
+
+def test_altaz_matches_astropy():
+    u, AltAz, EarthLocation, SkyCoord, _, Time = _astropy()
+    t = Time(["2026-10-20T06:00:00", "2026-10-20T10:00:00"], scale="utc")
+    site = EarthLocation(lat=SEATTLE[0] * u.deg, lon=SEATTLE[1] * u.deg)
+    ra = np.array([0.7123, 5.5877, 18.6156, 13.4, 2.53])
+    dec = np.array([41.269, -5.391, 38.784, -60.0, 89.26])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        want = SkyCoord(ra=ra * 15 * u.deg, dec=dec * u.deg)[:, None].transform_to(
+            AltAz(obstime=t[None, :], location=site)
+        )
+
+    altitude, azimuth = altaz(ra, dec, *SEATTLE, t.jd)
+    assert altitude.shape == (5, 2)
+    # no nutation or aberration: well under an arcminute
+    assert np.abs(altitude - want.alt.deg).max() < 1 / 60
+    az_error = (azimuth - want.az.deg + 180) % 360 - 180
+    assert np.abs(az_error * np.cos(np.radians(want.alt.deg))).max() < 1 / 60
+
+
+def test_sun_and_moon_match_astropy():
+    u, _, _, _, get_body, Time = _astropy()
+    t = Time(["2026-01-05T00:00:00", "2026-10-20T06:00:00"], scale="utc")
+    for name, vectors, tolerance in (
+        ("sun", sun_vectors, 0.05),
+        ("moon", moon_vectors, 0.5),
+    ):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            want = get_body(name, t).cartesian.xyz.value.T
+        want /= np.linalg.norm(want, axis=1)[:, None]
+        for k, jd in enumerate(t.jd):
+            # back from the equator of date to GCRS
+            got = np.array(precession_matrix(jd)).T @ vectors(jd)
+            separation = np.degrees(np.arccos(np.clip(got @ want[k], -1, 1)))
+            assert separation < tolerance, name
+
+
+def test_dark_window_matches_ephem_twilight(planner):
+    plan = planner.plan(*SEATTLE, date(2026, 10, 19), PACIFIC)
+
+    observer = ephem.Observer()
+    observer.lat, observer.lon = str(SEATTLE[0]), str(SEATTLE[1])
+    observer.date = datetime(2026, 10, 19, 19, 0, tzinfo=timezone.utc)
+    observer.horizon = "-18"
+    sun = ephem.Sun()
+    dusk = observer.next_setting(sun, use_center=True).datetime()
+    dawn = observer.next_rising(sun, use_center=True).datetime()
+
+    def utc(t):
+        return t.astimezone(timezone.utc).replace(tzinfo=None)
+
+    assert abs((utc(plan.dark_start) - dusk).total_seconds()) <= 6 * 60
+    assert abs((utc(plan.dark_end) - dawn).total_seconds()) <= 6 * 60
+    assert plan.twilight == -18.0
+    assert 0.5 < plan.moon_illumination < 0.8
+
+
+def test_targets_are_ranked_by_usable_hours(planner):
+    plan = planner.plan(*SEATTLE, date(2026, 10, 19), PACIFIC)
+    targets = plan.targets(limit=500)
+    hours = [t["hours"] for t in targets]
+    assert hours == sorted(hours, reverse=True)
+    assert all(t["max_altitude"] >= 30 for t in targets)
+
+    names = {name: k for k, name in enumerate(plan.catalog.names)}
+    andromeda = names["Andromeda Galaxy"]
+    assert plan.hours[andromeda] > 6
+    assert plan.max_altitude[andromeda] > 80
+    # never above 30 degrees from Seattle
+    assert plan.hours[names["Omega Centauri"]] == 0
+    assert plan.summary()["num_objects"] == len(plan.catalog)
+
+
+def test_moon_separation_limit_removes_hours(planner):
+    near = planner.plan(*SEATTLE, date(2026, 10, 19), PACIFIC, min_moon_separation=0)
+    far = planner.plan(*SEATTLE, date(2026, 10, 19), PACIFIC, min_moon_separation=90)
+    assert (far.hours <= near.hours).all()
+    assert far.hours.sum() < near.hours.sum()
+
+
+def test_filter_by_object_type(planner):
+    plan = planner.plan(*SEATTLE, date(2026, 10, 19), PACIFIC)
+    targets = plan.targets(limit=5, object_types=["Planetary Nebula"])
+    assert len(targets) == 5
+    assert {t["objectType"] for t in targets} == {"Planetary Nebula"}
+    assert all(t["lp"] == "true" for t in targets)
+
+
+def test_plans_are_cached_per_site_and_date():
+    planner = NightPlanner(CATALOG, cache_size=2)
+    first = planner.plan(*SEATTLE, date(2026, 10, 19), PACIFIC)
+    assert planner.plan(*SEATTLE, date(2026, 10, 19), PACIFIC) is first
+    planner.plan(*SEATTLE, date(2026, 10, 20), PACIFIC)
+    planner.plan(51.5, 0.0, date(2026, 10, 19), ZoneInfo("Europe/London"))
+    assert planner.plan(*SEATTLE, date(2026, 10, 19), PACIFIC) is not first
+    assert (planner.hits, planner.misses) == (1, 4)
+
+
+def test_white_nights_fall_back_to_lighter_twilight(planner):
+    plan = planner.plan(60.0, 10.0, date(2026, 6, 21), ZoneInfo("Europe/Oslo"))
+    assert plan.twilight > -18
+    assert 0 < plan.dark_hours < 4
+
+
+def test_julian_dates():
+    jd = julian_dates([datetime(2000, 1, 1, 12, tzinfo=timezone.utc)])
+    assert jd[0] == pytest.approx(2451545.0)
+
+
+def test_planning_targets_endpoints(planner, monkeypatch):
+    from falcon import testing
+
+    from front import app as front_app
+
+    monkeypatch.setattr(front_app, "night_planner", planner)
+    monkeypatch.setattr(front_app.Config, "init_lat", SEATTLE[0])
+    monkeypatch.setattr(front_app.Config, "init_long", SEATTLE[1])
+    app = testing.TestClient(front_app.falcon.App())
+    app.app.add_route("/planning/targets", front_app.PlanningTargetsResource())
+    app.app.add_route("/planning/targets.json", front_app.PlanningTargetsJsonResource())
+
+    params = {"date": "2026-10-19", "limit": "3", "type": "Open Cluster"}
+    result = app.simulate_get("/planning/targets.json", params=params)
+    assert result.json["date"] == "2026-10-19"
+    assert len(result.json["targets"]) == 3
+    assert {t["objectType"] for t in result.json["targets"]} == {"Open Cluster"}
+
+    html = app.simulate_get("/planning/targets", params=params).text
+    assert result.json["targets"][0]["objectName"] in html
+
+    bad = app.simulate_get("/planning/targets.json", params={"min_alt": "100"})
+    assert bad.status_code == 400
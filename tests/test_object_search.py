@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from front import object_search as object_search_module
+from front.object_search import (
+    ObjectSearch,
+    build_search_index,
+    is_index_stale,
+    read_meta,
+)
+
+CATALOG = os.path.join(os.path.dirname(__file__), "..", "data", "alp.dat")
+
+
+@pytest.fixture
+def search(tmp_path):
+    s = ObjectSearch(CATALOG, str(tmp_path / "alp_fts.sqlite"), cache_size=8)
+    yield s
+    s.reload()
+
+
+def _names(rows):
+    return [row["objectName"] for row in rows]
+
+
+def test_build_copies_catalog_and_tracks_staleness(tmp_path):
+    index_path = str(tmp_path / "alp_fts.sqlite")
+    assert is_index_stale(CATALOG, index_path)
+    num_rows = build_search_index(CATALOG, index_path)
+
+    con = sqlite3.connect(CATALOG)
+    assert num_rows == con.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+    con.close()
+    assert read_meta(index_path)["num_rows"] == str(num_rows)
+    assert not is_index_stale(CATALOG, index_path)
+
+
+def test_search_is_case_insensitive_and_ranks_exact_names_first(search):
+    assert _names(search.search("m31")) == ["Andromeda Galaxy"]
+    names = _names(search.search("M3"))
+    assert names[0] == "M3"
+    assert "Andromeda Galaxy" in names
+    assert search.fts is True
+
+
+def test_search_result_fields(search):
+    (veil,) = search.search("Veil")
+    assert veil == {
+        "ra": veil["ra"],
+        "dec": veil["dec"],
+        "lp": "true",
+        "objectName": "Veil Nebula",
+    }
+    assert search.search("M31")[0]["lp"] == "false"
+
+
+def test_search_retries_without_spaces_and_falls_back_to_fuzzy(search):
+    assert _names(search.search("NGC 7000")) == ["North America Nebula"]
+    assert _names(search.search("M 31")) == ["Andromeda Galaxy"]
+    assert _names(search.search("Andromedda")) == ["Andromeda Galaxy"]
+
+
+@pytest.mark.parametrize(
+    "text", ['o"ri', "Barnard's", "%", "_", "x' OR 1=1 --", "NEAR(a b)"]
+)
+def test_user_input_is_never_interpreted_as_sql_or_fts_syntax(search, text):
+    rows = search.search(text)
+    assert isinstance(rows, list)
+    if text == "Barnard's":
+        assert _names(rows) == ["Barnard's Merope Nebula"]
+    if text in ("%", "_"):
+        assert rows == []
+
+
+def test_recent_queries_are_served_from_the_lru(search):
+    first = search.search("veil")
+    assert search.search("VEIL ") is first
+    assert (search.hits, search.misses) == (1, 1)
+
+    for k in range(10):
+        search.search(f"ngc{k}")
+    search.search("veil")
+    assert search.misses == 12
+
+
+def test_concurrent_searches_share_the_pool(search):
+    errors = []
+
+    def _worker(name):
+        try:
+            for _ in range(20):
+                search.reload() if name == "reload" else search.search(name)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=_worker, args=(name,))
+        for name in ("m31", "veil", "orion", "ic1", "ngc7000", "andromeda")
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+
+def test_falls_back_to_like_queries_without_fts5(tmp_path, monkeypatch):
+    def _no_fts(*args, **kwargs):
+        raise sqlite3.OperationalError("no such module: fts5")
+
+    monkeypatch.setattr(object_search_module, "build_search_index", _no_fts)
+    s = ObjectSearch(CATALOG, str(tmp_path / "alp_fts.sqlite"))
+    assert _names(s.search("m31")) == ["Andromeda Galaxy"]
+    assert s.fts is False
+    assert s.search("50%") == []
+    s.reload()
+
+
+def test_front_search_local_and_suggest(search, monkeypatch):
+    from falcon import testing
+
+    from front import app as front_app
+
+    monkeypatch.setattr(front_app, "object_search", search)
+    assert json.loads(front_app.searchLocal("veil"))[0]["objectName"] == "Veil Nebula"
+    assert front_app.searchLocal("no such object at all") == ""
+
+    app = testing.TestClient(front_app.falcon.App())
+    app.app.add_route("/localsearch/suggest", front_app.GetLocalSearchSuggest())
+    result = app.simulate_get("/localsearch/suggest", params={"q": "androm"})
+    assert result.json == ["Andromeda Galaxy"]
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from device.operation_stats import DEFAULT_DURATIONS, OperationStats
+
+
+def test_records_completed_operation_events():
+    stats = OperationStats()
+    assert stats.record_event(
+        {"Event": "AutoFocus", "state": "complete", "lapse_ms": 45775}
+    )
+    # still running, failed, or not an operation we time
+    assert not stats.record_event(
+        {"Event": "AutoFocus", "state": "working", "lapse_ms": 0}
+    )
+    assert not stats.record_event(
+        {"Event": "PlateSolve", "state": "fail", "lapse_ms": 1730}
+    )
+    assert not stats.record_event({"Event": "PiStatus", "temp": 40})
+
+    assert stats.count("auto_focus") == 1
+    assert stats.estimate("auto_focus") == pytest.approx(45.775)
+    assert stats.estimate("plate_solve") == DEFAULT_DURATIONS["plate_solve"]
+    assert stats.estimate("unknown") == DEFAULT_DURATIONS["command"]
+    assert stats.estimate("unknown", default=7.0) == 7.0
+
+
+def test_keeps_the_most_recent_samples():
+    stats = OperationStats(max_samples=4)
+    for seconds in (100, 100, 100, 100, 10, 10, 10):
+        stats.record("goto", seconds)
+    assert stats.count("goto") == 7
+    # three of the four remaining samples are the new ones
+    assert stats.estimate("goto") == pytest.approx(10)
+    summary = stats.summary()["goto"]
+    assert summary["count"] == 7
+    assert summary["median_s"] == 10
+    assert summary["p90_s"] == pytest.approx(73.0)
+
+    stats.record("goto", 0)
+    stats.record("goto", -5)
+    assert stats.count("goto") == 7
+
+
+def test_saves_and_loads(tmp_path):
+    path = str(tmp_path / "operation_stats_1.json")
+    stats = OperationStats(path)
+    stats.record("plate_solve", 12.5)
+    stats.record("plate_solve", 14.5)
+    with open(path) as f:
+        assert json.load(f)["plate_solve"]["samples"] == [12.5, 14.5]
+
+    loaded = OperationStats(path)
+    assert loaded.estimate("plate_solve") == pytest.approx(13.5)
+    loaded.record("plate_solve", 13.0)
+    assert loaded.count("plate_solve") == 3
+
+
+def test_unreadable_file_starts_empty(tmp_path):
+    path = tmp_path / "operation_stats_1.json"
+    path.write_text("not json")
+    stats = OperationStats(str(path))
+    assert stats.summary() == {}
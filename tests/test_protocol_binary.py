@@ -9,11 +9,11 @@ class DummyLogger:
     def __init__(self):
         self.messages = []
 
-    def debug(self, msg):
-        self.messages.append(("debug", msg))
+    def debug(self, msg, *args):
+        self.messages.append(("debug", msg % args if args else msg))
 
-    def info(self, msg):
-        self.messages.append(("info", msg))
+    def info(self, msg, *args):
+        self.messages.append(("info", msg % args if args else msg))
 
     def error(self, msg):
         self.messages.append(("error", msg))
@@ -10,11 +10,11 @@ class DummyLogger:
     def __init__(self):
         self.records = []
 
-    def info(self, msg):
-        self.records.append(("info", msg))
+    def info(self, msg, *args):
+        self.records.append(("info", msg % args if args else msg))
 
-    def debug(self, msg):
-        self.records.append(("debug", msg))
+    def debug(self, msg, *args):
+        self.records.append(("debug", msg % args if args else msg))
 
     def error(self, msg):
         self.records.append(("error", msg))
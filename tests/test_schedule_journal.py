@@ -0,0 +1,103 @@
+import json
+
+from device.schedule_journal import ScheduleJournal
+
+
+def _item(item_id, **params):
+    return {"schedule_item_id": item_id, "action": "wait_for", "params": params}
+
+
+def _lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_replays_edits_and_progress(tmp_path):
+    path = str(tmp_path / "schedule_journal_1.jsonl")
+    journal = ScheduleJournal(path, flush_interval=0.01)
+    assert journal.recover()["list"] == []
+
+    journal.record("create", schedule_id="s1")
+    journal.record("add", item=_item("a"))
+    journal.record("add", item=_item("c"))
+    journal.record("insert", before_id="c", item=_item("b"))
+    journal.record("replace", item_id="a", item=_item("a", timer_sec=5))
+    journal.record("remove", item_id="c")
+    journal.record("state", state="working")
+    journal.record("item", item_id="b", item_number=2)
+    journal.record("panel", panel="11", stacked_s=600, done=True)
+    journal.record("panel", panel="21", stacked_s=120)
+    journal.close()
+
+    recovered = ScheduleJournal(path).recover()
+    assert recovered["schedule_id"] == "s1"
+    assert [item["schedule_item_id"] for item in recovered["list"]] == ["a", "b"]
+    assert recovered["list"][0]["params"] == {"timer_sec": 5}
+    assert recovered["state"] == "working"
+    assert recovered["item_number"] == 2
+    assert recovered["panel"] == "21"
+    assert recovered["stacked_s"] == 120
+    assert recovered["completed_panels"] == ["11"]
+
+
+def test_records_are_copied_and_batched(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = ScheduleJournal(path, flush_interval=60)
+    journal.recover()
+    item = _item("a", timer_sec=5)
+    journal.record("add", item=item)
+    # later changes to the caller's item are not journaled
+    item["params"]["timer_sec"] = 99
+    for stacked_s in range(0, 600, 5):
+        journal.record("panel", panel="11", stacked_s=stacked_s)
+    # nothing reaches the disk until the batch is flushed
+    assert not (tmp_path / "journal.jsonl").exists()
+    journal.flush()
+    assert len(_lines(path)) == 121
+    assert journal.state()["list"][0]["params"]["timer_sec"] == 5
+    journal.close()
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text(
+        json.dumps({"op": "create", "schedule_id": "s1"})
+        + "\n"
+        + json.dumps({"op": "add", "item": _item("a")})
+        + '\n{"op": "add", "item": {"sched'
+    )
+    recovered = ScheduleJournal(str(path)).recover()
+    assert [item["schedule_item_id"] for item in recovered["list"]] == ["a"]
+
+
+def test_compaction_rewrites_one_snapshot(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = ScheduleJournal(path, flush_interval=60, compact_after=10)
+    journal.recover()
+    journal.record("create", schedule_id="s1")
+    for k in range(5):
+        journal.record("add", item=_item(f"i{k}"))
+    journal.flush()
+    assert len(_lines(path)) == 6
+
+    for stacked_s in range(10):
+        journal.record("panel", panel="11", stacked_s=stacked_s)
+    journal.flush()
+    lines = _lines(path)
+    assert [line["op"] for line in lines] == ["snapshot"]
+    assert len(lines[0]["state"]["list"]) == 5
+
+    # appending carries on after the snapshot
+    journal.record("remove", item_id="i0")
+    journal.close()
+    recovered = ScheduleJournal(path).recover()
+    assert len(recovered["list"]) == 4
+    assert recovered["stacked_s"] == 9
+
+    # an explicit snapshot (an imported schedule) replaces the file at once
+    journal = ScheduleJournal(path, flush_interval=60)
+    journal.recover()
+    journal.snapshot({"schedule_id": "s2", "list": [_item("x")], "state": "stopped"})
+    journal.close()
+    assert [line["op"] for line in _lines(path)] == ["snapshot"]
+    assert ScheduleJournal(path).recover()["schedule_id"] == "s2"
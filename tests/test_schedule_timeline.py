@@ -0,0 +1,174 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from device.operation_stats import OperationStats
+from device.schedule_timeline import ScheduleTimeline
+
+SEATTLE = (47.6, -122.3)
+# 21:00 in Seattle, well after dusk
+NOW = datetime(2026, 10, 20, 4, 0, tzinfo=timezone.utc).timestamp()
+
+
+def _mosaic(item_id, panel_time_sec=600, ra="00h42m44s", dec="+41d16m9s", **params):
+    return {
+        "schedule_item_id": item_id,
+        "action": "start_mosaic",
+        "params": {
+            "target_name": item_id,
+            "ra": ra,
+            "dec": dec,
+            "is_j2000": True,
+            "panel_time_sec": panel_time_sec,
+            "ra_num": 1,
+            "dec_num": 1,
+            "is_use_autofocus": False,
+            **params,
+        },
+    }
+
+
+def _schedule(*items, state="stopped", item_number=0):
+    return {
+        "schedule_id": "s1",
+        "state": state,
+        "item_number": item_number,
+        "list": list(items),
+    }
+
+
+@pytest.fixture
+def stats():
+    stats = OperationStats()
+    stats.record("goto", 40)
+    stats.record("plate_solve", 20)
+    stats.record("auto_focus", 100)
+    return stats
+
+
+def test_durations_come_from_learned_operations(stats):
+    timeline = ScheduleTimeline(stats)
+    assert timeline.estimate_duration(_mosaic("m", 600)) == 600 + 40 + 20
+    assert timeline.estimate_duration(
+        _mosaic("m", 300, ra_num=2, dec_num=3, is_use_autofocus=True)
+    ) == 6 * (300 + 40 + 20 + 100)
+    assert timeline.estimate_duration(_mosaic("m", 300, selected_panels="11;22")) == (
+        2 * (300 + 60)
+    )
+    # measured panel overhead replaces the sum of its parts
+    stats.record("panel_overhead", 90)
+    assert timeline.estimate_duration(_mosaic("m", 600)) == 690
+    assert (
+        timeline.estimate_duration(
+            {
+                "action": "start_up_sequence",
+                "params": {"auto_focus": True, "3ppa": False},
+            }
+        )
+        == 5 + 100
+    )
+    assert (
+        timeline.estimate_duration({"action": "wait_for", "params": {"timer_sec": 30}})
+        == 30
+    )
+
+
+def test_items_follow_each_other(stats):
+    timeline = ScheduleTimeline(stats)
+    result = timeline.update(
+        _schedule(
+            _mosaic("a", 600),
+            {
+                "schedule_item_id": "w",
+                "action": "wait_for",
+                "params": {"timer_sec": 60},
+            },
+            _mosaic("b", 1200),
+        ),
+        *SEATTLE,
+        now=NOW,
+    )
+    items = result["items"]
+    assert [item["start_ts"] for item in items] == [NOW, NOW + 660, NOW + 720]
+    assert items[-1]["end_ts"] == NOW + 720 + 1260
+    assert items[0]["target_name"] == "a"
+    assert items[0]["flags"] == []
+    assert result["fits_night"]
+
+
+def test_wait_until_runs_to_the_next_local_time(stats):
+    local_now = datetime.fromtimestamp(NOW)
+    wake = (local_now + timedelta(hours=2)).strftime("%H:%M")
+    timeline = ScheduleTimeline(stats)
+    result = timeline.update(
+        _schedule(
+            {
+                "schedule_item_id": "u",
+                "action": "wait_until",
+                "params": {"local_time": wake},
+            }
+        ),
+        *SEATTLE,
+        now=NOW,
+    )
+    assert result["items"][0]["duration_s"] == 7200
+
+
+def test_flags_twilight_and_horizon(stats):
+    timeline = ScheduleTimeline(stats)
+    result = timeline.update(
+        _schedule(
+            # runs into the morning
+            _mosaic("long", 10 * 3600),
+            # never rises in Seattle
+            _mosaic("south", 600, ra="13h26m47s", dec="-75d0m0s"),
+        ),
+        *SEATTLE,
+        now=NOW,
+    )
+    long, south = result["items"]
+    assert long["flags"] == ["past_twilight"]
+    assert "below_horizon" in south["flags"]
+    assert not result["fits_night"]
+
+
+def test_running_item_anchors_the_timeline(stats):
+    timeline = ScheduleTimeline(stats)
+    schedule = _schedule(
+        _mosaic("done", 600),
+        _mosaic("running", 600),
+        _mosaic("next", 600),
+        state="working",
+        item_number=2,
+    )
+    timeline.item_started("running", NOW - 300)
+    items = timeline.update(schedule, *SEATTLE, now=NOW)["items"]
+    assert [item["schedule_item_id"] for item in items] == ["running", "next"]
+    assert items[0]["start_ts"] == NOW - 300
+    assert items[1]["start_ts"] == NOW + 360
+
+    # overrunning its estimate pushes the rest back
+    items = timeline.update(schedule, *SEATTLE, now=NOW + 1000)["items"]
+    assert items[1]["start_ts"] == NOW + 1000
+
+
+def test_only_changed_items_are_estimated_again(stats):
+    timeline = ScheduleTimeline(stats)
+    items = [_mosaic(f"m{k}", 600) for k in range(5)]
+    timeline.update(_schedule(*items), *SEATTLE, now=NOW)
+    assert timeline.estimates == 5
+
+    items.insert(2, _mosaic("new", 300))
+    timeline.update(_schedule(*items), *SEATTLE, now=NOW)
+    assert timeline.estimates == 6
+
+    del items[0]
+    items[1]["params"]["panel_time_sec"] = 900
+    result = timeline.update(_schedule(*items), *SEATTLE, now=NOW)
+    assert timeline.estimates == 7
+    assert result["items"][0]["start_ts"] == NOW
+    assert len(timeline._durations) == len(items)
+
+    stats.record("goto", 50)
+    timeline.update(_schedule(*items), *SEATTLE, now=NOW)
+    assert timeline.estimates == 7 + len(items)
@@ -0,0 +1,70 @@
+import threading
+import time
+from datetime import datetime
+
+from device.scheduler_wakeup import SchedulerWakeup, seconds_until_local_time
+
+
+def test_notify_wakes_a_waiter_at_once():
+    wakeup = SchedulerWakeup(heartbeat=30.0)
+    done = []
+
+    def finish():
+        time.sleep(0.05)
+        done.append(True)
+        wakeup.notify()
+
+    threading.Thread(target=finish).start()
+    start = time.monotonic()
+    assert wakeup.wait(lambda: bool(done), timeout=30.0)
+    assert time.monotonic() - start < 1.0
+
+
+def test_timeout_and_ticks():
+    wakeup = SchedulerWakeup(heartbeat=0.02)
+    ticks = []
+    start = time.monotonic()
+    assert not wakeup.wait(lambda: False, timeout=0.1, on_tick=ticks.append)
+    assert time.monotonic() - start >= 0.1
+    # ticked every heartbeat with a shrinking remaining time
+    assert len(ticks) >= 3
+    assert ticks == sorted(ticks, reverse=True)
+    assert 0 < ticks[-1] < 0.1
+
+    # already true: returns without waiting or ticking
+    ticks.clear()
+    assert wakeup.wait(lambda: True, timeout=10.0, on_tick=ticks.append)
+    assert ticks == []
+
+
+def test_slow_ticks_do_not_hold_up_notify():
+    wakeup = SchedulerWakeup(heartbeat=0.01)
+    ticking = threading.Event()
+    release_tick = threading.Event()
+    done = []
+
+    def slow_tick(_remaining):
+        ticking.set()
+        release_tick.wait(5.0)
+
+    waiter = threading.Thread(
+        target=lambda: done.append(wakeup.wait(lambda: False, 0.05, slow_tick))
+    )
+    waiter.start()
+    assert ticking.wait(1.0)
+    start = time.monotonic()
+    wakeup.notify()
+    assert time.monotonic() - start < 0.5
+    release_tick.set()
+    waiter.join(5.0)
+    assert done == [False]
+
+
+def test_seconds_until_local_time():
+    now = datetime(2026, 10, 19, 21, 30, 20)
+    assert seconds_until_local_time("22:00", now) == 29 * 60 + 40
+    # still within the minute: run now rather than tomorrow
+    assert seconds_until_local_time("21:30", now) == 0
+    assert seconds_until_local_time("21:29", now) == 24 * 3600 - 80
+    assert seconds_until_local_time("05:15", now) == (7 * 60 + 44) * 60 + 40
+    assert seconds_until_local_time("bad", now) == 0
@@ -1,13 +1,24 @@
 import collections
 import json
 import socket
+import threading
 import time
+from datetime import datetime, timezone
 from types import SimpleNamespace
 
+import numpy as np
 import pytest
 
+from device import metrics
+from device.altaz_kernel import equatorial_to_altaz
 from device.config import Config
-from device.seestar_device import Seestar
+from device.mosaic_panel_queue import (
+    MosaicPanelQueue,
+    register_panel_queue,
+    remove_panel_queue,
+)
+from device.scheduler_wakeup import SchedulerWakeup
+from device.seestar_device import FixedSizeOrderedDict, Seestar
 
 
 class DummyLogger:
@@ -27,9 +38,47 @@ class DummyLogger:
         return None
 
 
+class InstantWakeup:
+    """SchedulerWakeup stand-in that runs waits on a fake clock.
+
+    Every heartbeat passes at once and calls on_step(seconds), so a test
+    can change the scope's state between wake-ups.
+    """
+
+    heartbeat = 5.0
+
+    def __init__(self):
+        self.clock = 0.0
+        self.on_step = None
+
+    def notify(self):
+        pass
+
+    def wait(self, predicate=None, timeout=None, on_tick=None):
+        waited = 0.0
+        for _ in range(100_000):
+            if predicate is not None and predicate():
+                return True
+            remaining = None if timeout is None else timeout - waited
+            if remaining is not None and remaining <= 0:
+                return False
+            if on_tick is not None:
+                on_tick(remaining)
+            step = (
+                self.heartbeat if remaining is None else min(remaining, self.heartbeat)
+            )
+            waited += step
+            self.clock += step
+            if self.on_step is not None:
+                self.on_step(step)
+        raise AssertionError("wait never finished")
+
+
 @pytest.fixture
 def seestar():
-    return Seestar(DummyLogger(), "127.0.0.1", 4700, "TestScope", 1, True)
+    seestar = Seestar(DummyLogger(), "127.0.0.1", 4700, "TestScope", 1, True)
+    seestar.scheduler_wakeup = InstantWakeup()
+    return seestar
 
 
 def test_should_inject_verify_respects_config_and_firmware(seestar):
@@ -201,10 +250,6 @@ def test_goto_target_returns_false_if_already_in_goto(seestar):
 
 
 def test_goto_target_sends_expected_request(monkeypatch, seestar):
-    class FakeCoord:
-        ra = SimpleNamespace(hour=1.5)
-        dec = SimpleNamespace(deg=22.25)
-
     captured = {}
     seestar.is_goto = lambda: False
     seestar.mark_op_state = lambda *args, **kwargs: None
@@ -212,7 +257,7 @@ def test_goto_target_sends_expected_request(monkeypatch, seestar):
         captured.setdefault("payload", payload) or {"result": "ok"}
     )
     monkeypatch.setattr(
-        "device.seestar_device.Util.parse_coordinate", lambda *args, **kwargs: FakeCoord
+        "device.seestar_device.Util.to_jnow", lambda *args, **kwargs: (1.5, 22.25)
     )
 
     ok = seestar.goto_target(
@@ -632,6 +677,23 @@ def test_send_message_param_sync_shutdown_and_wait_paths(monkeypatch, seestar):
     assert out2["result"] == "ok"
 
 
+def test_fixed_size_ordered_dict_evicts_the_oldest():
+    kept = FixedSizeOrderedDict(maxsize=100)
+    for key in range(150):
+        kept[key] = key
+    assert len(kept) == 100
+    assert list(kept)[:2] == [50, 51]
+
+
+def test_response_buffers_keep_the_last_100_replies(seestar):
+    for cmdid in range(500):
+        seestar.response_times[cmdid] = float(cmdid)
+        seestar.response_dict[cmdid] = {"id": cmdid}
+    assert len(seestar.response_dict) == len(seestar.response_times) == 100
+    assert 399 not in seestar.response_dict
+    assert 400 in seestar.response_dict and 400 in seestar.response_times
+
+
 def test_send_message_param_sync_timeout(monkeypatch, seestar):
     monkeypatch.setattr(seestar, "send_message_param", lambda _d: 999)
     monkeypatch.setattr("device.seestar_device.time.sleep", lambda _s: None)
@@ -642,6 +704,38 @@ def test_send_message_param_sync_timeout(monkeypatch, seestar):
     assert "Error: Exceeded allotted wait time for result" in out["result"]
 
 
+def test_send_message_param_sync_times_the_reply_arrival(monkeypatch, seestar):
+    clock = [100.0]
+    monkeypatch.setattr("device.seestar_device.time.perf_counter", lambda: clock[0])
+    sent = []
+
+    def send(_data):
+        sent.append(56 + len(sent))
+        return sent[-1]
+
+    monkeypatch.setattr(seestar, "send_message_param", send)
+
+    def poll(seconds):
+        # the receive thread stores the reply 20 ms into the half-second poll
+        cmdid = sent[-1]
+        seestar.response_times[cmdid] = clock[0] + 0.02
+        seestar.response_dict[cmdid] = {"id": cmdid, "result": "ok"}
+        clock[0] += seconds
+
+    monkeypatch.setattr("device.seestar_device.time.sleep", poll)
+    known = metrics.RPC_SECONDS.labels(seestar.device_num, "get_view_state")
+    unknown = metrics.RPC_SECONDS.labels(seestar.device_num, "unknown")
+    known_sum, unknown_count = known.sum, unknown.count
+
+    seestar.send_message_param_sync({"method": "get_view_state"})
+    assert known.sum - known_sum == pytest.approx(0.02)
+
+    # made-up method names share one label
+    seestar.send_message_param_sync({"method": "made_up_method"})
+    assert unknown.count == unknown_count + 1
+    assert "made_up_method" not in metrics.REGISTRY.render()
+
+
 def test_get_event_state_and_is_client_master(seestar):
     seestar.schedule["state"] = "working"
     seestar.event_state["3PPA"] = {"eq_offset_alt": 0, "eq_offset_az": 0}
@@ -671,20 +765,29 @@ def test_get_altaz_from_eq_paths(monkeypatch, seestar):
     seestar.site_altaz_frame = None
     assert seestar.get_altaz_from_eq(1.0, 2.0, "obs") == [9999.9, 9999.9]
 
-    class AltAzObj:
-        az = SimpleNamespace(deg=11.0)
-        alt = SimpleNamespace(deg=22.0)
+    obs_time = datetime(2026, 10, 20, 6, 0, tzinfo=timezone.utc)
+    seestar.site_altaz_frame = object()
+    seestar.site_latitude, seestar.site_longitude = 47.6, -122.3
+    want = list(equatorial_to_altaz(1.0, 2.0, 47.6, -122.3, when=obs_time))
+    assert seestar.get_altaz_from_eq(1.0, 2.0, obs_time) == want
+    alt, az = seestar.get_altaz_from_eq("01h00m00s", "+02d00m00s", obs_time)
+    assert alt == pytest.approx(want[0]) and az == pytest.approx(want[1])
 
-    class Coord:
-        def transform_to(self, _x):
-            return AltAzObj()
 
-    monkeypatch.setattr(
-        "device.seestar_device.Util.parse_coordinate", lambda **_k: Coord()
+def test_goto_target_warns_below_horizon(monkeypatch, seestar):
+    warnings = []
+    seestar.logger.warning = lambda msg, *args: warnings.append(msg % args)
+    seestar.is_goto = lambda: False
+    seestar.mark_op_state = lambda *args, **kwargs: None
+    seestar.send_message_param_sync = lambda payload: {"result": "ok"}
+    seestar.site_latitude, seestar.site_longitude = 47.6, -122.3
+
+    assert seestar.is_target_above_horizon(0.0, 89.0)
+    assert not seestar.is_target_above_horizon(0.0, -89.0)
+    seestar.goto_target(
+        {"is_j2000": False, "ra": 0.0, "dec": -89.0, "target_name": "south pole"}
     )
-    monkeypatch.setattr("device.seestar_device.AltAz", lambda **_kwargs: object())
-    seestar.site_altaz_frame = object()
-    assert seestar.get_altaz_from_eq(1.0, 2.0, "obs") == [22.0, 11.0]
+    assert warnings == ["TestScope: target south pole is below the horizon"]
 
 
 def test_set_setting_emits_expected_sequence(monkeypatch, seestar):
@@ -1025,12 +1128,8 @@ def test_start_up_thread_fn_success_and_old_firmware(monkeypatch, seestar):
 def test_spectra_thread_and_start_item(monkeypatch, seestar):
     monkeypatch.setattr("device.seestar_device.time.sleep", lambda _s: None)
 
-    class FakeCoord:
-        ra = SimpleNamespace(hour=1.5)
-        dec = SimpleNamespace(deg=22.0)
-
     monkeypatch.setattr(
-        "device.seestar_device.Util.parse_coordinate", lambda *_a, **_k: FakeCoord
+        "device.seestar_device.Util.to_jnow", lambda *_a, **_k: (1.5, 22.0)
     )
     monkeypatch.setattr(seestar, "_slew_to_ra_dec", lambda _p: True)
     monkeypatch.setattr(seestar, "set_target_name", lambda _n: {"ok": True})
@@ -1513,6 +1612,17 @@ def test_stop_scheduler_mark_wait_guest_and_watch(monkeypatch, seestar, tmp_path
     assert b"focusMove" in frame
 
 
+def test_update_scheduler_state_obj_announces_on_eventbus(seestar):
+    received = []
+    seestar.eventbus.connect(received.append, weak=False)
+    try:
+        seestar.update_scheduler_state_obj({"type": "mosaic", "action": "start"})
+    finally:
+        seestar.eventbus.disconnect(received.append)
+    assert received == [seestar.event_state["scheduler"]]
+    assert received[0]["cur_scheduler_item"]["action"] == "start"
+
+
 def test_mosaic_thread_fn_happy_path(monkeypatch, seestar):
     monkeypatch.setattr("device.seestar_device.time.sleep", lambda _s: None)
     monkeypatch.setattr("device.seestar_device.sleep", lambda _s: None)
@@ -1550,16 +1660,168 @@ def test_mosaic_thread_fn_happy_path(monkeypatch, seestar):
     assert seestar.is_cur_scheduler_item_working is False
 
 
-def test_start_mosaic_item_paths(monkeypatch, seestar):
+def _setup_mosaic_panel_test(monkeypatch, seestar, goto_results):
+    """Stub the scope so mosaic_thread_fn only exercises the panel loop.
+
+    goto_results maps (ra, dec) of a panel to the list of goto outcomes it
+    should return on successive attempts (default True).
+    """
     monkeypatch.setattr("device.seestar_device.time.sleep", lambda _s: None)
     monkeypatch.setattr("device.seestar_device.sleep", lambda _s: None)
+    monkeypatch.setattr(
+        "device.seestar_device.Util.mosaic_next_center_spacing", lambda *_a: [1.0, 2.0]
+    )
+    gotos = []
 
-    class FakeCoord:
-        ra = SimpleNamespace(hour=1.5)
-        dec = SimpleNamespace(deg=2.5)
+    def fake_goto(ra, dec, *_a, **_k):
+        gotos.append((ra, dec))
+        outcomes = goto_results.get((ra, dec), [])
+        return outcomes.pop(0) if outcomes else True
+
+    monkeypatch.setattr(seestar, "mosaic_goto_inner_worker", fake_goto)
+    monkeypatch.setattr(seestar, "set_target_name", lambda _n: {"ok": True})
+    monkeypatch.setattr(seestar, "start_stack", lambda _p: True)
+    monkeypatch.setattr(seestar, "stop_stack", lambda: {"ok": True})
+    monkeypatch.setattr(seestar, "send_message_param_sync", lambda _p: {"ok": True})
+    seestar.schedule["state"] = "working"
+    seestar.schedule["is_skip_requested"] = False
+    seestar.schedule["current_item_id"] = "m1"
+    return gotos
 
+
+def test_mosaic_panel_centers_match_grid_order(monkeypatch, seestar):
     monkeypatch.setattr(
-        "device.seestar_device.Util.parse_coordinate", lambda *_a, **_k: FakeCoord
+        "device.seestar_device.Util.mosaic_next_center_spacing", lambda *_a: [1.0, 2.0]
+    )
+    centers = seestar.mosaic_panel_centers(10.0, 20.0, 2, 2, 10)
+    assert list(centers) == ["11", "21", "12", "22"]
+    assert centers["11"] == (0, 0, 9.5, 19.0)
+    assert centers["22"] == (1, 1, 10.5, 21.0)
+
+
+def test_mosaic_thread_fn_selected_panels(monkeypatch, seestar):
+    gotos = _setup_mosaic_panel_test(monkeypatch, seestar, {})
+    seestar.mosaic_thread_fn(
+        "T1", 10.0, 20.0, False, 5, 2, 2, 10, 80, False, "22;11", 1, 5
+    )
+    # panels are imaged in grid order, not in the order they were selected
+    assert gotos == [(9.5, 19.0), (10.5, 21.0)]
+    assert (
+        seestar.event_state["scheduler"]["cur_scheduler_item"]["action"] == "complete"
+    )
+
+
+def test_mosaic_thread_fn_claims_from_panel_queue(monkeypatch, seestar):
+    # panel 21 fails its first goto and is retried after the others
+    gotos = _setup_mosaic_panel_test(monkeypatch, seestar, {(10.5, 19.0): [False]})
+    panel_queue = MosaicPanelQueue(["11", "21", "12"], max_attempts=2)
+    seestar.mosaic_thread_fn(
+        "T1",
+        10.0,
+        20.0,
+        False,
+        5,
+        2,
+        2,
+        10,
+        80,
+        False,
+        "22",
+        1,
+        5,
+        panel_queue=panel_queue,
+    )
+    assert gotos == [(9.5, 19.0), (10.5, 19.0), (9.5, 21.0), (10.5, 19.0)]
+    status = panel_queue.get_status()
+    assert status["num_complete"] == 3
+    assert status["panels"]["21"] == {
+        "state": "complete",
+        "device_num": seestar.device_num,
+        "attempts": 2,
+    }
+    assert seestar.is_cur_scheduler_item_working is False
+
+
+def test_mosaic_thread_fn_waits_for_panels_other_devices_put_back(monkeypatch, seestar):
+    gotos = _setup_mosaic_panel_test(monkeypatch, seestar, {})
+    panel_queue = MosaicPanelQueue(["11", "21"], max_attempts=2)
+    # device 2 is still imaging panel 11 when this device has finished 21
+    assert panel_queue.claim(2) == "11"
+
+    waits = []
+
+    def device_2_fails_its_panel(_s):
+        if panel_queue.get_status()["num_complete"] == 1 and not waits:
+            # this device has nothing to claim and waits on the queue
+            waits.append(
+                seestar.event_state["scheduler"]["cur_scheduler_item"]["action"]
+            )
+            assert panel_queue.fail("11", 2)
+
+    seestar.scheduler_wakeup.on_step = device_2_fails_its_panel
+    seestar.mosaic_thread_fn(
+        "T1",
+        10.0,
+        20.0,
+        False,
+        5,
+        2,
+        1,
+        10,
+        80,
+        False,
+        "",
+        1,
+        5,
+        panel_queue=panel_queue,
+    )
+    assert gotos == [(10.5, 20.0), (9.5, 20.0)]
+    assert waits[0].startswith("waiting for the other devices")
+    assert panel_queue.is_done()
+    assert panel_queue.get_status()["panels"]["11"] == {
+        "state": "complete",
+        "device_num": seestar.device_num,
+        "attempts": 2,
+    }
+
+
+def test_mosaic_thread_fn_releases_panel_when_stopped(monkeypatch, seestar):
+    _setup_mosaic_panel_test(monkeypatch, seestar, {})
+
+    def stop_during_stack(_p):
+        seestar.schedule["state"] = "stopping"
+        return True
+
+    monkeypatch.setattr(seestar, "start_stack", stop_during_stack)
+    panel_queue = MosaicPanelQueue(["11", "21"])
+    seestar.mosaic_thread_fn(
+        "T1",
+        10.0,
+        20.0,
+        False,
+        10,
+        2,
+        1,
+        10,
+        80,
+        False,
+        "",
+        1,
+        5,
+        panel_queue=panel_queue,
+    )
+    assert seestar.schedule["state"] == "stopped"
+    status = panel_queue.get_status()
+    assert status["num_pending"] == 2
+    assert status["panels"]["11"]["attempts"] == 0
+
+
+def test_start_mosaic_item_paths(monkeypatch, seestar):
+    monkeypatch.setattr("device.seestar_device.time.sleep", lambda _s: None)
+    monkeypatch.setattr("device.seestar_device.sleep", lambda _s: None)
+
+    monkeypatch.setattr(
+        "device.seestar_device.Util.to_jnow", lambda *_a, **_k: (1.5, 2.5)
     )
     monkeypatch.setattr(
         seestar,
@@ -1736,12 +1998,13 @@ def test_mosaic_thread_branch_variants(monkeypatch, seestar):
     # stop requested during loop
     monkeypatch.setattr(seestar, "start_stack", lambda _p: True)
 
-    def stop_after_first_sleep(_s):
+    def stop_after_first_wait(_s):
         seestar.schedule["state"] = "stopping"
 
-    monkeypatch.setattr("device.seestar_device.time.sleep", stop_after_first_sleep)
+    seestar.scheduler_wakeup.on_step = stop_after_first_wait
     seestar.schedule["state"] = "working"
     seestar.mosaic_thread_fn("T", 1.0, 2.0, False, 5, 1, 1, 10, 80, False, "", 1, 5)
+    assert seestar.schedule["state"] == "stopped"
 
 
 def test_scheduler_and_schedule_guard_branches(monkeypatch, seestar):
@@ -1841,12 +2104,12 @@ def test_wait_guest_watch_and_events_extra(monkeypatch, seestar, tmp_path):
     seestar.event_state["X"] = {"state": "working"}
     flips = {"n": 0}
 
-    def _sleep(_s):
+    def _step(_s):
         flips["n"] += 1
         if flips["n"] == 1:
             seestar.event_state["X"]["state"] = "fail"
 
-    monkeypatch.setattr("device.seestar_device.time.sleep", _sleep)
+    seestar.scheduler_wakeup.on_step = _step
     assert seestar.wait_end_op("X") is False
 
     # guest mode with empty hostname
@@ -2183,6 +2446,27 @@ def test_start_mosaic_item_defaults_stack_type_to_deepsky(monkeypatch, seestar):
     assert received.get("stack_type") == "DeepSky"
 
 
+def test_start_mosaic_item_passes_registered_panel_queue(monkeypatch, seestar):
+    received = _setup_mosaic_item_test(monkeypatch, seestar)
+    queues = []
+    monkeypatch.setattr(
+        seestar, "mosaic_thread_fn", lambda *a, **k: queues.append(k["panel_queue"])
+    )
+    panel_queue = MosaicPanelQueue(["11"])
+    params = _mosaic_item_params()
+    params["panel_queue_id"] = register_panel_queue(panel_queue)
+    try:
+        seestar.start_mosaic_item(params)
+    finally:
+        remove_panel_queue(panel_queue.queue_id)
+    assert queues == [panel_queue]
+
+    # a queue that no longer exists (e.g. after a restart) skips the item
+    seestar.start_mosaic_item(params)
+    assert queues == [panel_queue]
+    assert received == {}
+
+
 def test_start_stack_set_stack_type_failure_is_non_fatal(monkeypatch, seestar):
     """If set_stack_type returns an error, iscope_start_stack is still called."""
     import time as _time
@@ -2446,3 +2730,363 @@ def test_force_stop_goto_idempotent_when_no_goto(monkeypatch, seestar):
 
     assert result["ok"] is True
     assert seestar.is_goto() is False
+
+
+class FakeHorizonMask:
+    """Panels at the listed RAs are hidden for another 30 minutes; the
+    others set behind the mask after (12 - ra) hours."""
+
+    def __init__(self, hidden_ra=()):
+        self.hidden_ra = set(hidden_ra)
+
+    def visibility(self, ra, dec, latitude, longitude, when=None, minutes=720):
+        ra = np.atleast_1d(ra)
+        hidden = np.array([r in self.hidden_ra for r in ra])
+        until_visible = np.where(hidden, 30.0, 0.0)
+        until_blocked = np.where(hidden, 0.0, (12 - ra) * 60)
+        if minutes < 30:
+            until_visible = np.where(hidden, np.inf, 0.0)
+        if until_visible.size == 1:
+            return float(until_visible[0]), float(until_blocked[0])
+        return until_visible, until_blocked
+
+    def minutes_until_visible(self, *args, **kwargs):
+        return self.visibility(*args, **kwargs)[0]
+
+
+def test_order_panels_for_horizon(monkeypatch, seestar):
+    centers = {
+        "11": (0, 0, 9.5, 19.0),
+        "21": (1, 0, 10.5, 19.0),
+        "12": (0, 1, 9.5, 21.0),
+    }
+    assert seestar.order_panels_for_horizon(["11", "21", "12"], centers) == [
+        "11",
+        "21",
+        "12",
+    ]
+    monkeypatch.setattr(
+        "device.seestar_device.get_horizon_mask",
+        lambda _logger=None: FakeHorizonMask(hidden_ra={9.5}),
+    )
+    # the visible panel first, then the hidden ones in grid order
+    assert seestar.order_panels_for_horizon(["11", "21", "12"], centers) == [
+        "21",
+        "11",
+        "12",
+    ]
+    # visible panels that set behind the mask sooner go first
+    monkeypatch.setattr(
+        "device.seestar_device.get_horizon_mask",
+        lambda _logger=None: FakeHorizonMask(),
+    )
+    assert seestar.order_panels_for_horizon(["11", "21"], centers) == ["21", "11"]
+
+
+def test_mosaic_thread_fn_skips_panels_behind_horizon_mask(monkeypatch, seestar):
+    gotos = _setup_mosaic_panel_test(monkeypatch, seestar, {})
+    monkeypatch.setattr(
+        "device.seestar_device.get_horizon_mask",
+        lambda _logger=None: FakeHorizonMask(hidden_ra={9.5}),
+    )
+    seestar.mosaic_thread_fn("T1", 10.0, 20.0, False, 5, 2, 2, 10, 80, False, "", 1, 5)
+    # panels 11 and 12 were deferred behind 21 and 22, then skipped
+    assert gotos == [(10.5, 19.0), (10.5, 21.0)]
+    assert (
+        seestar.event_state["scheduler"]["cur_scheduler_item"]["action"] == "complete"
+    )
+
+
+class ClearingHorizonMask(FakeHorizonMask):
+    """Panels at the listed RAs are hidden until clock() reaches clears_at s.
+
+    checks counts how often a hidden panel was checked.
+    """
+
+    def __init__(self, hidden_ra, clock, clears_at):
+        super().__init__(hidden_ra)
+        self.clock = clock
+        self.clears_at = clears_at
+        self.checks = 0
+
+    def visibility(self, ra, dec, latitude, longitude, when=None, minutes=720):
+        ra = np.atleast_1d(ra)
+        left_min = max(0.0, self.clears_at - self.clock()) / 60
+        if minutes == 0 and ra[0] in self.hidden_ra:
+            self.checks += 1
+        hidden = np.array([r in self.hidden_ra for r in ra]) & (left_min > 0)
+        until_visible = np.where(hidden, left_min, 0.0)
+        until_visible = np.where(until_visible > minutes, np.inf, until_visible)
+        until_blocked = np.where(hidden, 0.0, np.inf)
+        if until_visible.size == 1:
+            return float(until_visible[0]), float(until_blocked[0])
+        return until_visible, until_blocked
+
+
+def test_mosaic_thread_fn_waits_for_queued_panel_behind_horizon_mask(
+    monkeypatch, seestar
+):
+    gotos = _setup_mosaic_panel_test(monkeypatch, seestar, {})
+    monkeypatch.setattr(Config, "horizon_mask_max_wait_min", 60)
+    wakeup = seestar.scheduler_wakeup
+    mask = ClearingHorizonMask({9.5}, lambda: wakeup.clock, clears_at=20 * 60)
+    monkeypatch.setattr("device.seestar_device.get_horizon_mask", lambda _l=None: mask)
+    panel_queue = MosaicPanelQueue(["11", "21"], max_attempts=1)
+    seestar.mosaic_thread_fn(
+        "T1",
+        10.0,
+        20.0,
+        False,
+        5,
+        2,
+        1,
+        10,
+        80,
+        False,
+        "",
+        1,
+        5,
+        panel_queue=panel_queue,
+    )
+    # 21 first, then 11 once it cleared, although it was found hidden more
+    # often than its one allowed attempt
+    assert gotos == [(10.5, 20.0), (9.5, 20.0)]
+    assert mask.checks == 4
+    assert wakeup.clock >= 20 * 60
+    assert panel_queue.get_status()["panels"]["11"] == {
+        "state": "complete",
+        "device_num": seestar.device_num,
+        "attempts": 1,
+    }
+
+
+def test_mosaic_thread_fn_leaves_queued_panels_that_stay_hidden(monkeypatch, seestar):
+    gotos = _setup_mosaic_panel_test(monkeypatch, seestar, {})
+    monkeypatch.setattr(Config, "horizon_mask_max_wait_min", 10)
+    wakeup = seestar.scheduler_wakeup
+    mask = ClearingHorizonMask({9.5}, lambda: wakeup.clock, clears_at=20 * 60)
+    monkeypatch.setattr("device.seestar_device.get_horizon_mask", lambda _l=None: mask)
+    panel_queue = MosaicPanelQueue(["11", "21"])
+    seestar.mosaic_thread_fn(
+        "T1",
+        10.0,
+        20.0,
+        False,
+        5,
+        2,
+        1,
+        10,
+        80,
+        False,
+        "",
+        1,
+        5,
+        panel_queue=panel_queue,
+    )
+    # 11 clears after the longest allowed wait, so it is left in the queue
+    assert gotos == [(10.5, 20.0)]
+    assert wakeup.clock < 60
+    assert panel_queue.get_status()["panels"]["11"]["state"] == "pending"
+    assert seestar.is_cur_scheduler_item_working is False
+
+
+def test_wait_for_horizon_mask(monkeypatch, seestar):
+    params = {"target_name": "M31", "ra": 9.5, "dec": 20.0, "is_j2000": False}
+    # no mask configured
+    assert seestar.wait_for_horizon_mask(params, lambda: None) is True
+
+    clock = [1000.0]
+    monkeypatch.setattr("device.seestar_device.time.time", lambda: clock[0])
+    seestar.scheduler_wakeup.on_step = lambda s: clock.__setitem__(0, clock[0] + s)
+    monkeypatch.setattr(
+        "device.seestar_device.get_horizon_mask",
+        lambda _logger=None: FakeHorizonMask(hidden_ra={9.5}),
+    )
+    seestar.schedule["state"] = "working"
+    seestar.schedule["is_skip_requested"] = False
+    seestar.schedule["current_item_id"] = "m1"
+
+    # hidden for 30 minutes: waits it out
+    monkeypatch.setattr(Config, "horizon_mask_max_wait_min", 60)
+    assert seestar.wait_for_horizon_mask(params, lambda: None) is True
+    assert clock[0] >= 1000.0 + 30 * 60
+    item = seestar.event_state["scheduler"]["cur_scheduler_item"]
+    assert item["type"] == "wait_for_horizon"
+    assert item["remaining s"] == 0
+
+    # will not clear within the allowed wait: skipped without waiting
+    monkeypatch.setattr(Config, "horizon_mask_max_wait_min", 10)
+    start = clock[0]
+    assert seestar.wait_for_horizon_mask(params, lambda: None) is False
+    assert clock[0] == start
+
+    # visible targets and the current position go straight through
+    assert seestar.wait_for_horizon_mask({**params, "ra": 10.5}, lambda: None)
+    assert seestar.wait_for_horizon_mask({**params, "ra": -1, "dec": -1}, lambda: None)
+
+
+def test_scheduler_skips_targets_behind_horizon_mask(monkeypatch, seestar):
+    monkeypatch.setattr("device.seestar_device.time.sleep", lambda _s: None)
+    monkeypatch.setattr(seestar, "play_sound", lambda _sid: None)
+    monkeypatch.setattr(seestar, "wait_for_horizon_mask", lambda p, _u: p["ra"] > 10)
+    started = []
+    monkeypatch.setattr(
+        seestar, "start_mosaic_item", lambda p: started.append(p["target_name"])
+    )
+    seestar.schedule["list"] = collections.deque(
+        [
+            {
+                "schedule_item_id": name,
+                "action": "start_mosaic",
+                "params": {"target_name": name, "ra": ra, "dec": 0.0},
+            }
+            for name, ra in (("hidden", 9.5), ("visible", 10.5))
+        ]
+    )
+    seestar.schedule["item_number"] = 1
+    seestar.schedule["is_skip_requested"] = False
+    seestar.scheduler_thread_fn()
+    assert started == ["visible"]
+    assert seestar.schedule["state"] == "complete"
+
+
+def test_panels_and_events_feed_the_schedule_timeline(monkeypatch, seestar):
+    clock = [1000.0]
+    monkeypatch.setattr("device.seestar_device.time.time", lambda: clock[0])
+    _setup_mosaic_panel_test(monkeypatch, seestar, {})
+    seestar.scheduler_wakeup.on_step = lambda s: clock.__setitem__(0, clock[0] + s)
+
+    def fake_goto(*_a, **_k):
+        # slewing and solving take 75 s on top of the 5 s panel
+        clock[0] += 75
+        return True
+
+    monkeypatch.setattr(seestar, "mosaic_goto_inner_worker", fake_goto)
+    seestar.mosaic_thread_fn("T1", 10.0, 20.0, False, 5, 1, 1, 10, 80, False, "", 1, 5)
+    assert seestar.operation_stats.estimate("panel_overhead") == 75
+
+    seestar.operation_stats.record_event(
+        {"Event": "AutoFocus", "state": "complete", "lapse_ms": 40000}
+    )
+    seestar.schedule["state"] = "stopped"
+    seestar.schedule["list"] = collections.deque(
+        [
+            {
+                "schedule_item_id": "m1",
+                "action": "start_mosaic",
+                "params": {
+                    "target_name": "M31",
+                    "ra": -1,
+                    "dec": -1,
+                    "panel_time_sec": 600,
+                    "ra_num": 2,
+                    "dec_num": 1,
+                },
+            },
+            {"schedule_item_id": "f1", "action": "auto_focus", "params": {}},
+        ]
+    )
+    timeline = seestar.get_schedule_timeline({})
+    assert [item["duration_s"] for item in timeline["items"]] == [2 * 675, 40]
+    assert timeline["operation_stats"]["auto_focus"]["count"] == 1
+
+
+def test_stop_wakes_the_scheduler_at_once(monkeypatch, seestar):
+    seestar.scheduler_wakeup = SchedulerWakeup()
+    seestar.schedule["list"] = collections.deque(
+        [
+            {
+                "schedule_item_id": "w1",
+                "action": "wait_for",
+                "params": {"timer_sec": 600},
+            },
+            {
+                "schedule_item_id": "w2",
+                "action": "wait_for",
+                "params": {"timer_sec": 600},
+            },
+        ]
+    )
+    seestar.schedule["item_number"] = 1
+    monkeypatch.setattr(seestar, "play_sound", lambda _sid: None)
+    monkeypatch.setattr(seestar, "stop_slew", lambda: None)
+    monkeypatch.setattr(seestar, "stop_stack", lambda: None)
+
+    thread = threading.Thread(target=seestar.scheduler_thread_fn, daemon=True)
+    thread.start()
+    for _ in range(200):
+        if seestar.event_state["scheduler"]["cur_scheduler_item"].get("type"):
+            break
+        time.sleep(0.01)
+
+    # a skip moves on to the next item without waiting out the timer
+    seestar.skip_scheduler_cur_item({})
+    for _ in range(200):
+        if seestar.schedule["current_item_id"] == "w2":
+            break
+        time.sleep(0.01)
+    assert seestar.schedule["current_item_id"] == "w2"
+
+    start = time.monotonic()
+    seestar.stop_scheduler()
+    thread.join(2.0)
+    assert not thread.is_alive()
+    assert time.monotonic() - start < 1.0
+    assert seestar.schedule["state"] == "stopped"
+
+
+def test_journal_resumes_an_interrupted_mosaic(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "schedule_journal_dir", str(tmp_path))
+    first = Seestar(DummyLogger(), "127.0.0.1", 4700, "TestScope", 1, True)
+    first.scheduler_wakeup = InstantWakeup()
+    first.create_schedule({"schedule_id": "s1"})
+    first.add_schedule_item({"action": "wait_for", "params": {"timer_sec": 5}})
+    first.add_schedule_item(
+        {"action": "start_mosaic", "params": {"ra": 10.0, "dec": 20.0}}
+    )
+    mosaic_id = first.schedule["list"][1]["schedule_item_id"]
+
+    # the scheduler reaches the mosaic and the process dies while the
+    # second of its two panels is stacking
+    _setup_mosaic_panel_test(monkeypatch, first, {})
+    first.journal("state", state="working")
+    first.schedule["current_item_id"] = mosaic_id
+    first.journal("item", item_id=mosaic_id, item_number=2)
+    steps = []
+
+    def crash_during_second_panel(_s):
+        steps.append(_s)
+        if len(steps) == 4:
+            first.schedule["state"] = "stopping"
+
+    first.scheduler_wakeup.on_step = crash_during_second_panel
+    first.mosaic_thread_fn("T1", 10.0, 20.0, False, 10, 2, 1, 10, 80, False, "", 1, 5)
+    first.schedule_journal.close()
+
+    second = Seestar(DummyLogger(), "127.0.0.1", 4700, "TestScope", 1, True)
+    second.scheduler_wakeup = InstantWakeup()
+    assert second.schedule["schedule_id"] == "s1"
+    assert [item["action"] for item in second.schedule["list"]] == [
+        "wait_for",
+        "start_mosaic",
+    ]
+    assert second.schedule["resume"] == {
+        "item_id": mosaic_id,
+        "item_number": 2,
+        "panel": "21",
+        "stacked_s": 5,
+        "completed_panels": ["11"],
+    }
+
+    monkeypatch.setattr(second, "scheduler_thread_fn", lambda: None)
+    second.resume_scheduler({})
+    assert second.schedule["item_number"] == 2
+    assert "resume" not in second.schedule
+    assert second.resume_scheduler({})["code"] == -1
+
+    gotos = _setup_mosaic_panel_test(monkeypatch, second, {})
+    second.schedule["current_item_id"] = mosaic_id
+    second.mosaic_thread_fn("T1", 10.0, 20.0, False, 10, 2, 1, 10, 80, False, "", 1, 5)
+    # only the unfinished panel is imaged again
+    assert gotos == [(10.5, 20.0)]
+    second.schedule_journal.close()
@@ -1,11 +1,13 @@
 import collections
 import json
 import sys
+import time
 
 import pytest
 from device import seestar_util as _seestar_util
 
 sys.modules.setdefault("seestar_util", _seestar_util)
+from device.mosaic_panel_queue import get_panel_queue  # noqa: E402
 from device.seestar_federation import Seestar_Federation  # noqa: E402
 
 
@@ -19,6 +21,9 @@ class DummyLogger:
     def warn(self, *args, **kwargs):
         return None
 
+    def warning(self, *args, **kwargs):
+        return None
+
     def error(self, *args, **kwargs):
         return None
 
@@ -475,6 +480,59 @@ def test_start_scheduler_by_time(monkeypatch):
     assert any(c[0] == "add_schedule_item" for c in dev2.called)
 
 
+def test_start_scheduler_dynamic_shares_one_panel_queue(monkeypatch):
+    dev1 = FakeDevice(connected=True)
+    dev2 = FakeDevice(connected=True)
+    federation = Seestar_Federation(DummyLogger(), {1: dev1, 2: dev2})
+
+    federation.schedule["list"] = collections.deque(
+        [
+            {
+                "action": "start_mosaic",
+                "params": {
+                    "ra": 1.2,
+                    "dec": 3.4,
+                    "is_j2000": True,
+                    "federation_mode": "dynamic",
+                    "panel_time_sec": 30,
+                    "ra_num": 2,
+                    "dec_num": 2,
+                    "selected_panels": "",
+                    "panel_max_attempts": 3,
+                },
+            },
+        ]
+    )
+    monkeypatch.setattr("device.seestar_federation.random.shuffle", lambda x: None)
+    out = federation.start_scheduler({})
+
+    items = [dev.schedule["list"][0]["params"] for dev in (dev1, dev2)]
+    queue_id = items[0]["panel_queue_id"]
+    assert items[1]["panel_queue_id"] == queue_id
+    assert items[0]["selected_panels"] == ""
+    status = out["mosaic_panels"][queue_id]
+    assert status["num_panels"] == 4
+    assert status["num_pending"] == 4
+
+    panel_queue = get_panel_queue(queue_id)
+    assert panel_queue.max_attempts == 3
+    panel = panel_queue.claim(1)
+    panel_queue.complete(panel, 1)
+    status = federation.get_schedule({})["mosaic_panels"][queue_id]
+    assert status["num_complete"] == 1
+    assert status["panels"][panel] == {
+        "state": "complete",
+        "device_num": 1,
+        "attempts": 1,
+    }
+
+    # restarting the scheduler drops the queue of the previous run
+    dev1.schedule["state"] = "stopped"
+    dev2.schedule["state"] = "stopped"
+    federation.start_scheduler({})
+    assert get_panel_queue(queue_id) is None
+
+
 def test_start_scheduler_missing_params_raises_keyerror(monkeypatch):
     dev1 = FakeDevice(connected=True)
     dev2 = FakeDevice(connected=True)
@@ -491,3 +549,67 @@ def test_stop_scheduler_only_connected_devices():
     federation = Seestar_Federation(DummyLogger(), {1: dev1, 2: dev2})
     out = federation.stop_scheduler({})
     assert out == {1: {"ok": True}}
+
+
+class SlowDevice(FakeDevice):
+    def __init__(self, delay_s, connected=True):
+        super().__init__(connected)
+        self.delay_s = delay_s
+
+    def send_message_param_sync(self, data):
+        time.sleep(self.delay_s)
+        return super().send_message_param_sync(data)
+
+
+def test_federation_fan_out_runs_devices_concurrently():
+    devices = {i: SlowDevice(0.2) for i in range(1, 7)}
+    federation = Seestar_Federation(DummyLogger(), devices)
+
+    start = time.monotonic()
+    out = federation.send_message_param_sync({"method": "get_device_state"})
+    elapsed = time.monotonic() - start
+
+    assert out == {i: {"result": "ok"} for i in range(1, 7)}
+    assert elapsed < 0.2 * 6 / 2
+
+
+def test_federation_fan_out_marks_timed_out_devices():
+    devices = {1: SlowDevice(0.0), 2: SlowDevice(1.0)}
+    federation = Seestar_Federation(DummyLogger(), devices)
+
+    start = time.monotonic()
+    out = federation.executor.run(
+        devices, lambda dev: dev.send_message_param_sync({"method": "x"}), 0.2
+    )
+    elapsed = time.monotonic() - start
+
+    assert out[1] == {"result": "ok"}
+    assert out[2]["timed_out"] is True
+    assert "error" in out[2]
+    assert elapsed < 0.9
+
+
+def test_federation_fan_out_reports_device_errors():
+    class BrokenDevice(FakeDevice):
+        def stop_slew(self):
+            raise RuntimeError("socket gone")
+
+    federation = Seestar_Federation(DummyLogger(), {1: FakeDevice(), 2: BrokenDevice()})
+    out = federation.stop_slew()
+    assert out[1] == {"ok": True}
+    assert out[2] == {"error": "socket gone"}
+
+
+def test_federation_send_message_gives_each_device_its_own_copy():
+    class MutatingDevice(FakeDevice):
+        def send_message_param_sync(self, data):
+            data["result"] = "Error: Exceeded allotted wait time for result"
+            return data
+
+    request = {"method": "get_device_state"}
+    federation = Seestar_Federation(
+        DummyLogger(), {1: MutatingDevice(), 2: MutatingDevice()}
+    )
+    out = federation.send_message_param_sync(request)
+    assert out[1] is not out[2]
+    assert request == {"method": "get_device_state"}
@@ -1,6 +1,12 @@
 import math
+import warnings
+from datetime import datetime, timezone
 
-from device.seestar_util import Util
+import numpy as np
+import pytest
+
+from device import seestar_util
+from device.seestar_util import Util, parse_sexagesimal
 
 
 def test_trim_seconds_formats_to_one_decimal():
@@ -192,3 +198,63 @@ def test_trim_seconds_already_one_decimal():
 
 def test_trim_seconds_empty_string_passthrough():
     assert Util.trim_seconds("") == ""
+
+
+def test_parse_sexagesimal_formats():
+    values = parse_sexagesimal(
+        ["12h30m10.5s", "12 30 10.5", "12:30:10.5", "-05d30m", "+5.25", 7, "12h"]
+    )
+    expected = [12.50291667, 12.50291667, 12.50291667, -5.5, 5.25, 7.0, 12.0]
+    assert values == pytest.approx(expected)
+    assert np.isnan(parse_sexagesimal(["abc", "", "12x30"])).all()
+    assert parse_sexagesimal("-0d30m")[0] == -0.5
+
+
+def test_parse_coordinates_matches_astropy():
+    from astropy.utils import iers
+
+    iers.conf.auto_download = False
+    when = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+    ra = ["00h42m44.3s", "05h35m17.3s", "18h36m56.3s", "13h26m47.3s"]
+    dec = ["+41d16m09s", "-05d23m28s", "+38d47m01s", "-47d28m46s"]
+    got_ra, got_dec = Util.parse_coordinates(True, ra, dec, when)
+
+    from astropy.coordinates import FK5, SkyCoord
+    from astropy.time import Time
+    import astropy.units as u
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        want = SkyCoord(ra=ra, dec=dec, unit=(u.hourangle, u.deg)).transform_to(
+            FK5(equinox=Time(when))
+        )
+    ra_error = (got_ra - want.ra.hour + 12) % 24 - 12
+    assert np.abs(ra_error * 15 * np.cos(np.radians(got_dec))).max() * 3600 < 0.5
+    assert np.abs(got_dec - want.dec.deg).max() * 3600 < 0.5
+
+
+def test_parse_coordinates_jnow_passthrough_and_errors():
+    ra, dec = Util.parse_coordinates(False, ["1h30m", 2.5], ["-10d", "20 30"])
+    assert ra.tolist() == [1.5, 2.5]
+    assert dec.tolist() == [-10.0, 20.5]
+    assert Util.to_jnow(False, "1h30m", "-10d") == (1.5, -10.0)
+    with pytest.raises(ValueError):
+        Util.parse_coordinates(False, ["1h", "bad"], ["0", "0"])
+    with pytest.raises(ValueError):
+        Util.parse_coordinates(False, ["1h"], ["0", "0"])
+
+
+def test_jnow_rotation_is_reused_within_the_interval(monkeypatch):
+    monkeypatch.setattr(seestar_util.Config, "jnow_equinox_interval_s", 3600.0)
+    seestar_util._jnow_rotation.cache_clear()
+    start = datetime(2026, 10, 19, 12, 0, 1, tzinfo=timezone.utc).timestamp()
+    first = seestar_util.jnow_rotation(datetime.fromtimestamp(start, timezone.utc))
+    same = seestar_util.jnow_rotation(
+        datetime.fromtimestamp(start + 3500, timezone.utc)
+    )
+    later = seestar_util.jnow_rotation(
+        datetime.fromtimestamp(start + 3600, timezone.utc)
+    )
+    assert same is first
+    assert later is not first
+    assert seestar_util._jnow_rotation.cache_info().hits == 1
@@ -0,0 +1,118 @@
+import gzip
+import json
+import os
+
+import falcon
+from falcon import testing
+
+from front import static_assets
+from front.static_assets import (
+    StaticAssetResource,
+    build_static_assets,
+    ensure_static_assets,
+    is_build_stale,
+)
+
+APP_JS = b"function hello() { return 'hello'; }\n" * 200
+
+
+def _make_public(tmp_path):
+    public = tmp_path / "public"
+    public.mkdir()
+    (public / "app.js").write_bytes(APP_JS)
+    (public / "logo.png").write_bytes(b"\x89PNG" + bytes(range(256)))
+    return str(public), str(tmp_path / "build")
+
+
+def _client(public_dir, build_dir):
+    resource = StaticAssetResource(public_dir, build_dir)
+    app = falcon.App()
+    app.add_route("/public/{name}", resource)
+    return resource, testing.TestClient(app)
+
+
+def test_build_writes_hashed_and_compressed_variants(tmp_path):
+    public_dir, build_dir = _make_public(tmp_path)
+    manifest = build_static_assets(public_dir, build_dir)
+
+    js = manifest["files"]["app.js"]
+    assert js["hashed"].startswith("app.") and js["hashed"].endswith(".js")
+    assert "gzip" in js["encodings"]
+    with open(os.path.join(build_dir, js["hashed"] + ".gz"), "rb") as f:
+        assert gzip.decompress(f.read()) == APP_JS
+    # already compressed formats are only copied
+    assert manifest["files"]["logo.png"]["encodings"] == []
+    with open(os.path.join(build_dir, "manifest.json")) as f:
+        assert json.load(f) == manifest
+
+
+def test_build_is_redone_only_when_sources_change(tmp_path, monkeypatch):
+    public_dir, build_dir = _make_public(tmp_path)
+    assert is_build_stale(public_dir, build_dir)
+    first = ensure_static_assets(public_dir, build_dir)
+    assert not is_build_stale(public_dir, build_dir)
+
+    builds = []
+    monkeypatch.setattr(
+        static_assets, "build_static_assets", lambda *a, **k: builds.append(a)
+    )
+    assert ensure_static_assets(public_dir, build_dir) == first
+    assert builds == []
+
+    with open(os.path.join(public_dir, "app.js"), "ab") as f:
+        f.write(b"// changed\n")
+    assert is_build_stale(public_dir, build_dir)
+
+
+def test_hashed_asset_is_immutable_and_negotiates_gzip(tmp_path):
+    public_dir, build_dir = _make_public(tmp_path)
+    build_static_assets(public_dir, build_dir)
+    resource, client = _client(public_dir, build_dir)
+    url = resource.asset_url("app.js")
+    assert url != "/public/app.js"
+
+    resp = client.simulate_get(url, headers={"Accept-Encoding": "gzip, deflate"})
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert resp.headers["Vary"] == "Accept-Encoding"
+    assert resp.headers["Content-Type"] == "text/javascript"
+    assert gzip.decompress(resp.content) == APP_JS
+
+    plain = client.simulate_get(url, headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.content == APP_JS
+    assert plain.headers["ETag"] != resp.headers["ETag"]
+
+
+def test_conditional_request_gets_304(tmp_path):
+    public_dir, build_dir = _make_public(tmp_path)
+    build_static_assets(public_dir, build_dir)
+    _, client = _client(public_dir, build_dir)
+
+    first = client.simulate_get("/public/app.js", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["Cache-Control"] == "no-cache"
+    etag = first.headers["ETag"]
+
+    again = client.simulate_get(
+        "/public/app.js",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+    )
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_unbuilt_files_are_served_from_public_and_paths_are_confined(tmp_path):
+    public_dir, build_dir = _make_public(tmp_path)
+    _, client = _client(public_dir, build_dir)
+
+    resp = client.simulate_get("/public/app.js", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.content == APP_JS
+    assert "Content-Encoding" not in resp.headers
+    etag = resp.headers["ETag"]
+    again = client.simulate_get("/public/app.js", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+    assert client.simulate_get("/public/missing.js").status_code == 404
+    assert client.simulate_get("/public/..").status_code == 404
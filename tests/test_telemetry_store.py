@@ -0,0 +1,104 @@
+import pytest
+
+from device import telemetry_store
+from device.telemetry_store import (
+    MAX_RAW_SLOTS,
+    METRICS,
+    MINUTE_SLOTS,
+    TelemetryStore,
+)
+
+# a minute boundary, so the tests can count whole minutes
+T0 = 1_700_000_040.0
+
+
+@pytest.fixture
+def now(monkeypatch):
+    clock = {"t": T0}
+    monkeypatch.setattr(telemetry_store.time, "time", lambda: clock["t"])
+    return clock
+
+
+def test_records_event_fields_as_metrics(now):
+    store = TelemetryStore()
+    assert store.record_event(
+        {"Event": "PiStatus", "temp": 41.2, "battery_capacity": 87}
+    )
+    now["t"] += 2
+    assert store.record_event({"Event": "Stack", "stacked_frame": 12})
+    assert store.record_event({"Event": "FocuserMove", "position": 1580})
+    assert not store.record_event({"Event": "ScopeTrack", "tracking": True})
+    store.record("snr", 23.25)
+    # readings that are not numbers are skipped
+    store.record("battery", None)
+    store.record("battery", "unknown")
+    store.record("not_a_metric", 1)
+
+    result = store.query()
+    assert result["resolution"] == "raw"
+    metrics = result["metrics"]
+    assert set(metrics) == set(METRICS)
+    assert metrics["battery"] == {"t": [T0], "v": [87.0]}
+    assert metrics["temperature"]["v"] == [pytest.approx(41.2)]
+    assert metrics["stacked_frames"] == {"t": [T0 + 2], "v": [12.0]}
+    assert metrics["dropped_frames"] == {"t": [], "v": []}
+    assert metrics["focuser_position"]["v"] == [1580.0]
+    assert metrics["snr"]["v"] == [23.25]
+
+
+def test_raw_tier_is_thinned_to_fit_the_hour():
+    # 64 KB leaves too little for 1 Hz raw samples, so raw samples are spaced
+    # further apart
+    store = TelemetryStore(budget_kb=64)
+    assert store.raw_slots == 60
+    for second in range(120):
+        store.record("battery", second, T0 + second)
+
+    raw = store.query(["battery"], T0, T0 + 120, "raw")["metrics"]["battery"]
+    assert raw["v"] == [0.0, 60.0]
+
+
+def test_minute_tier_keeps_means_for_the_day(now):
+    store = TelemetryStore()
+    for second in range(0, 180, 2):
+        store.record("temperature", 40 + second // 60, T0 + second)
+    now["t"] = T0 + 3 * 3600
+
+    # the window starts more than an hour ago, so auto picks the minute tier
+    result = store.query(["temperature"], T0, T0 + 3600)
+    assert result["resolution"] == "1m"
+    minutes = result["metrics"]["temperature"]
+    assert minutes["t"] == [T0, T0 + 60, T0 + 120]
+    assert minutes["v"] == [40.0, 41.0, 42.0]
+
+
+def test_ring_buffers_keep_the_newest_samples():
+    store = TelemetryStore()
+    total = MAX_RAW_SLOTS + 100
+    for second in range(total):
+        store.record("focuser_position", second, T0 + second)
+
+    raw = store.query(["focuser_position"], 0, T0 + total, "raw")
+    values = raw["metrics"]["focuser_position"]["v"]
+    assert len(values) == MAX_RAW_SLOTS
+    assert values[0] == 100.0
+    assert values[-1] == total - 1
+    assert values == sorted(values)
+
+
+def test_memory_stays_within_the_budget():
+    for budget_kb in (256, 512, 2048):
+        store = TelemetryStore(budget_kb)
+        assert store.nbytes <= budget_kb * 1024
+        before = store.nbytes
+        for second in range(0, 2 * MINUTE_SLOTS * 60, 7):
+            store.record("battery", 50, T0 + second)
+        assert store.nbytes == before
+
+
+def test_query_rejects_unknown_metrics_and_resolutions():
+    store = TelemetryStore()
+    with pytest.raises(ValueError):
+        store.query(["humidity"])
+    with pytest.raises(ValueError):
+        store.query(resolution="5m")
@@ -117,6 +117,14 @@ class FakeDevice:
         self.calls.append(("get_schedule", params))
         return {"state": "stopped"}
 
+    def get_schedule_timeline(self, params):
+        self.calls.append(("get_schedule_timeline", params))
+        return {"items": []}
+
+    def get_telemetry(self, params):
+        self.calls.append(("get_telemetry", params))
+        return {"resolution": "raw", "metrics": {"battery": {"t": [], "v": []}}}
+
     def create_schedule(self, params):
         self.calls.append(("create_schedule", params))
         return {"state": "stopped"}
@@ -141,6 +149,10 @@ class FakeDevice:
         self.calls.append(("stop_scheduler", params))
         return {"ok": True}
 
+    def resume_scheduler(self, params):
+        self.calls.append(("resume_scheduler", params))
+        return {"ok": True}
+
     def export_schedule(self, params):
         self.calls.append(("export_schedule", params))
         return {"ok": True}
@@ -289,12 +301,15 @@ def test_action_put_dispatches_many_supported_actions():
         ("adjust_focus", {"steps": 10}),
         ("start_spectra", {"ra": 1, "dec": 2}),
         ("get_schedule", {}),
+        ("get_schedule_timeline", {}),
+        ("get_telemetry", {"metrics": ["battery"]}),
         ("create_schedule", {}),
         ("add_schedule_item", {"action": "wait_for"}),
         ("insert_schedule_item_before", {"before_id": "x"}),
         ("replace_schedule_item", {"item_id": "x"}),
         ("remove_schedule_item", {"schedule_item_id": "x"}),
         ("stop_scheduler", {}),
+        ("resume_scheduler", {}),
         ("export_schedule", {"filepath": "/tmp/s.json"}),
         ("import_schedule", {"filepath": "/tmp/s.json", "is_retain_state": False}),
         ("action_start_up_sequence", {"auto_focus": True}),
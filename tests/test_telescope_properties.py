@@ -146,6 +146,30 @@ def test_many_simple_property_responders_return_value():
         assert "Value" in payload, responder.__name__
 
 
+def test_altitude_and_azimuth_follow_the_mount_position(monkeypatch):
+    set_shr_logger(logging.getLogger("test-telescope-props"))
+    device_exceptions.logger = DummyLogger()
+    telescope.seestar_dev.clear()
+    device = FakeDevice()
+    telescope.seestar_dev[1] = device
+
+    calls = []
+
+    def fake_altaz(ra, dec, latitude, longitude):
+        calls.append((ra, dec, latitude, longitude))
+        return 12.5, 234.5
+
+    monkeypatch.setattr(telescope, "equatorial_to_altaz", fake_altaz)
+    assert call_get(telescope.altitude)["Value"] == 12.5
+    assert call_get(telescope.azimuth)["Value"] == 234.5
+    assert calls == [(1.23, 4.56, 40.0, -70.0)] * 2
+
+    monkeypatch.undo()
+    altitude = call_get(telescope.altitude)["Value"]
+    azimuth = call_get(telescope.azimuth)["Value"]
+    assert -90 <= altitude <= 90 and 0 <= azimuth < 360
+
+
 def test_settable_property_put_endpoints_update_device_state():
     set_shr_logger(logging.getLogger("test-telescope-props"))
     device_exceptions.logger = DummyLogger()
@@ -0,0 +1,165 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from device import metrics, thread_watchdog
+from device.thread_watchdog import ThreadWatchdog
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.records = []
+
+    def _record(self, level, msg, *args):
+        self.records.append((level, msg % args))
+
+    def info(self, msg, *args):
+        self._record("info", msg, *args)
+
+    def warning(self, msg, *args):
+        self._record("warning", msg, *args)
+
+    def error(self, msg, *args):
+        self._record("error", msg, *args)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _wait_for_new_stamp(thread, old):
+    for _ in range(200):
+        if getattr(thread, "last_run", None) != old:
+            return
+        threading.Event().wait(0.01)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(thread_watchdog.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def loop():
+    """A worker loop that stamps last_run whenever it is told to go round."""
+    go_round = threading.Event()
+    stop = threading.Event()
+
+    def stuck_in_the_loop():
+        while not stop.is_set():
+            threading.current_thread().last_run = datetime.now()
+            go_round.wait()
+            go_round.clear()
+
+    thread = threading.Thread(
+        target=stuck_in_the_loop, name="IncomingMsgThread:watchdog-test", daemon=True
+    )
+    thread.start()
+    _wait_for_new_stamp(thread, None)
+    yield thread, go_round
+    stop.set()
+    go_round.set()
+    thread.join(timeout=2)
+
+
+def test_healthy_loop_has_no_lag_and_pings_systemd(clock, loop):
+    thread, _ = loop
+    pings = []
+    watchdog = ThreadWatchdog(RecordingLogger(), notify=pings.append)
+    watchdog.register(thread, 5)
+
+    clock.now += 4
+    assert watchdog.check() == []
+    assert metrics.THREAD_LAG_SECONDS.labels(thread.name).get() == 0.0
+    clock.now += 4
+    assert watchdog.check() == []
+    assert metrics.THREAD_LAG_SECONDS.labels(thread.name).get() == 3.0
+    assert pings == ["WATCHDOG=1", "WATCHDOG=1"]
+
+
+def test_stalled_loop_logs_its_stack_once_and_reconnects(clock, loop):
+    thread, go_round = loop
+    logger = RecordingLogger()
+    pings = []
+    reconnected = threading.Event()
+    stalls = metrics.THREAD_STALLS.labels(thread.name)
+    before = stalls.get()
+    watchdog = ThreadWatchdog(logger, reconnect=True, notify=pings.append)
+    watchdog.register(thread, 5, reconnected.set)
+    watchdog.check()
+
+    clock.now += 16
+    assert watchdog.check() == [thread.name]
+    assert reconnected.wait(2)
+    assert stalls.get() == before + 1
+    warnings = [msg for level, msg in logger.records if level == "warning"]
+    assert "Thread IncomingMsgThread:watchdog-test stalled" in warnings[0]
+    assert "stuck_in_the_loop" in warnings[0]
+    assert metrics.THREAD_LAG_SECONDS.labels(thread.name).get() == 11.0
+
+    # still stalled: counted and logged once, systemd is not pinged
+    clock.now += 5
+    assert watchdog.check() == [thread.name]
+    assert stalls.get() == before + 1
+    assert pings == ["WATCHDOG=1"]
+
+    old = thread.last_run
+    go_round.set()
+    _wait_for_new_stamp(thread, old)
+    assert watchdog.check() == []
+    assert ("info", f"Thread {thread.name} is running again") in logger.records
+    assert pings == ["WATCHDOG=1", "WATCHDOG=1"]
+
+
+def test_stall_without_reconnect_leaves_the_connection(clock, loop):
+    thread, _ = loop
+    reconnected = []
+    watchdog = ThreadWatchdog(RecordingLogger())
+    watchdog.register(thread, 5, lambda: reconnected.append(True))
+
+    clock.now += 16
+    assert watchdog.check() == [thread.name]
+    assert reconnected == []
+
+
+def test_finished_threads_are_dropped(clock):
+    thread = threading.Thread(target=lambda: None, name="FinishedThread:watchdog")
+    thread.start()
+    thread.join()
+    watchdog = ThreadWatchdog(RecordingLogger())
+    watchdog.register(thread, 5)
+    metrics.THREAD_LAG_SECONDS.labels(thread.name).set(1.0)
+
+    assert watchdog.check() == []
+    assert thread not in watchdog._loops
+    assert "FinishedThread:watchdog" not in metrics.REGISTRY.render()
+
+
+def test_start_watchdog_follows_config(monkeypatch):
+    watchdog = ThreadWatchdog()
+    monkeypatch.setattr(thread_watchdog, "watchdog", watchdog)
+    monkeypatch.setattr(thread_watchdog.Config, "watchdog_enabled", False)
+    thread_watchdog.start_watchdog(RecordingLogger(), print)
+    assert watchdog._thread is None
+
+    monkeypatch.setattr(thread_watchdog.Config, "watchdog_enabled", True)
+    monkeypatch.setattr(thread_watchdog.Config, "watchdog_systemd", False)
+    monkeypatch.setattr(thread_watchdog.Config, "watchdog_interval_s", 0.01)
+    thread_watchdog.start_watchdog(RecordingLogger(), print)
+    try:
+        assert watchdog.notify is None
+        assert watchdog._thread.name == "ThreadWatchdog"
+        for _ in range(200):
+            if hasattr(watchdog._thread, "last_run"):
+                break
+            threading.Event().wait(0.01)
+        assert hasattr(watchdog._thread, "last_run")
+    finally:
+        watchdog.stop()